@@ -0,0 +1,9 @@
+"""
+Benchmarks - In-process load and latency measurements
+
+Run from backend/:
+    python -m benchmarks.run_load --requests 500 --concurrency 20 --output reporte.json
+
+Supabase, Groq and SMTP are replaced by local stand-ins (see fakes.py and
+the fake LLM provider), so results are repeatable and need no network.
+"""
@@ -0,0 +1,421 @@
+"""
+Local stand-ins for Supabase (PostgREST + Storage) and SMTP used by the benchmarks
+"""
+import copy
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+
+class APIError(Exception):
+    """Mirrors postgrest.exceptions.APIError closely enough for the routes"""
+
+
+class FakeQuery:
+    """
+    PostgREST-compatible query builder over in-memory rows.
+
+    Supports the subset used by the app: select (column list and
+    count="exact"), eq/neq/gt/gte/lt/lte/in_/ilike/like/is_ filters
+    (optionally negated with not_), or_
+    with comparison operators and nested and(...), order (nulls last
+    asc / nulls first desc, like PostgreSQL), range, limit,
+    insert/upsert (single row or list), update and delete.
+    """
+
+    # Columnas con DEFAULT now() en la base real
+    DEFAULT_NOW = {"aplicaciones": ("fecha_aplicacion",)}
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self._db = db
+        self._table = table
+        self._filters: List[Callable[[Dict], bool]] = []
+        self._op = "select"
+        self._payload: Any = None
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._order: List[tuple] = []
+        self._range: Optional[tuple] = None
+        self._limit: Optional[int] = None
+        self._on_conflict = "id"
+        self._negar = False
+        self._ignore_duplicates = False
+
+    # --- Operaciones ---
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "FakeQuery":
+        self._columns = columns
+        self._count = count
+        return self
+
+    def insert(self, rows: Any) -> "FakeQuery":
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows: Any, on_conflict: str = "id", ignore_duplicates: bool = False, **kwargs) -> "FakeQuery":
+        self._op, self._payload, self._on_conflict = "upsert", rows, on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: Dict) -> "FakeQuery":
+        self._op, self._payload = "update", values
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self._op = "delete"
+        return self
+
+    # --- Filtros ---
+    def _filter(self, fn: Callable[[Dict], bool]) -> "FakeQuery":
+        if self._negar:
+            self._negar = False
+            self._filters.append(lambda r: not fn(r))
+        else:
+            self._filters.append(fn)
+        return self
+
+    @property
+    def not_(self) -> "FakeQuery":
+        self._negar = True
+        return self
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        # Solo se usa con "null"
+        return self._filter(lambda r: r.get(column) is None)
+
+    @staticmethod
+    def _same(a: Any, b: Any) -> bool:
+        # PostgREST compara en texto: 7 == "7"
+        if isinstance(a, bool) or isinstance(b, bool):
+            return a == b
+        return a is not None and str(a) == str(b)
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(lambda r: self._same(r.get(column), value))
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(lambda r: not self._same(r.get(column), value))
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(lambda r: r.get(column) is not None and r[column] > value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(lambda r: r.get(column) is not None and r[column] >= value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(lambda r: r.get(column) is not None and r[column] < value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(lambda r: r.get(column) is not None and r[column] <= value)
+
+    @staticmethod
+    def _comparar(actual: Any, op: str, texto: str) -> bool:
+        """Compare a row value with a filter value written as text"""
+        if op == "eq":
+            return FakeQuery._same(actual, texto)
+        if op == "neq":
+            return not FakeQuery._same(actual, texto)
+        if actual is None:
+            return False
+        valor: Any = texto
+        if isinstance(actual, (int, float)) and not isinstance(actual, bool):
+            valor = float(texto)
+        elif not isinstance(actual, str):
+            actual = str(actual)
+        return {
+            "lt": actual < valor, "lte": actual <= valor,
+            "gt": actual > valor, "gte": actual >= valor
+        }[op]
+
+    @staticmethod
+    def _partes(texto: str) -> List[str]:
+        """Split a PostgREST logic tree on top-level commas"""
+        partes, nivel, comillas, actual = [], 0, False, ""
+        for c in texto:
+            if c == '"':
+                comillas = not comillas
+            elif not comillas and c == "(":
+                nivel += 1
+            elif not comillas and c == ")":
+                nivel -= 1
+            elif not comillas and c == "," and nivel == 0:
+                partes.append(actual)
+                actual = ""
+                continue
+            actual += c
+        partes.append(actual)
+        return partes
+
+    def _condicion(self, texto: str) -> Callable[[Dict], bool]:
+        texto = texto.strip()
+        for logico, combinar in (("and(", all), ("or(", any)):
+            if texto.startswith(logico):
+                hijos = [self._condicion(p) for p in self._partes(texto[len(logico):-1])]
+                return lambda r, hijos=hijos, combinar=combinar: combinar(h(r) for h in hijos)
+        column, op, valor = texto.split(".", 2)
+        valor = valor[1:-1] if valor.startswith('"') and valor.endswith('"') else valor
+        return lambda r: self._comparar(r.get(column), op, valor)
+
+    def or_(self, filters: str) -> "FakeQuery":
+        condiciones = [self._condicion(p) for p in self._partes(filters)]
+        return self._filter(lambda r: any(c(r) for c in condiciones))
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        valores = {str(v) for v in values}
+        return self._filter(lambda r: r.get(column) is not None and str(r[column]) in valores)
+
+    def _pattern(self, column: str, pattern: str, flags: int) -> "FakeQuery":
+        regex = re.compile("^" + re.escape(pattern).replace("%", ".*").replace("_", ".") + "$", flags | re.S)
+        return self._filter(lambda r: r.get(column) is not None and bool(regex.match(str(r[column]))))
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        return self._pattern(column, pattern, 0)
+
+    def ilike(self, column: str, pattern: str) -> "FakeQuery":
+        return self._pattern(column, pattern, re.I)
+
+    # --- Modificadores ---
+    def order(self, column: str, desc: bool = False, **kwargs) -> "FakeQuery":
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self._range = (start, end)
+        return self
+
+    def limit(self, size: int) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    # --- Ejecución ---
+    def _project(self, row: Dict) -> Dict:
+        if self._columns.strip() == "*":
+            return copy.deepcopy(row)
+        columns = [c.strip() for c in self._columns.split(",") if c.strip()]
+        return {c: copy.deepcopy(row.get(c)) for c in columns}
+
+    def _new_row(self, values: Dict) -> Dict:
+        row = copy.deepcopy(values)
+        if row.get("id") is None:
+            row["id"] = str(uuid.uuid4())
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        for column in self.DEFAULT_NOW.get(self._table, ()):
+            row.setdefault(column, row["created_at"])
+        return row
+
+    def execute(self) -> SimpleNamespace:
+        self._db.simulate_latency()
+        with self._db.lock:
+            self._db.queries += 1
+            rows = self._db.tables.setdefault(self._table, [])
+
+            if self._op in ("insert", "upsert"):
+                items = self._payload if isinstance(self._payload, list) else [self._payload]
+                out = []
+                for item in items:
+                    if self._op == "upsert":
+                        # on_conflict puede ser una lista de columnas ("email,tipo_usuario")
+                        columnas = [c.strip() for c in self._on_conflict.split(",")]
+                        existing = next((
+                            r for r in rows
+                            if all(item.get(c) is not None and self._same(r.get(c), item.get(c)) for c in columnas)
+                        ), None)
+                        if existing is not None and self._ignore_duplicates:
+                            continue
+                        if existing is not None:
+                            existing.update(copy.deepcopy(item))
+                            out.append(copy.deepcopy(existing))
+                            continue
+                    row = self._new_row(item)
+                    rows.append(row)
+                    out.append(copy.deepcopy(row))
+                return SimpleNamespace(data=out, count=None)
+
+            selected = [r for r in rows if all(f(r) for f in self._filters)]
+
+            if self._op == "update":
+                for r in selected:
+                    r.update(copy.deepcopy(self._payload))
+                return SimpleNamespace(data=copy.deepcopy(selected), count=None)
+
+            if self._op == "delete":
+                ids = {id(r) for r in selected}
+                rows[:] = [r for r in rows if id(r) not in ids]
+                return SimpleNamespace(data=selected, count=None)
+
+            for column, desc in reversed(self._order):
+                present = [r for r in selected if r.get(column) is not None]
+                missing = [r for r in selected if r.get(column) is None]
+                present.sort(key=lambda r: r[column], reverse=desc)
+                selected = missing + present if desc else present + missing
+
+            total = len(selected)
+            if self._range is not None:
+                selected = selected[self._range[0]:self._range[1] + 1]
+            if self._limit is not None:
+                selected = selected[:self._limit]
+
+            return SimpleNamespace(
+                data=[self._project(r) for r in selected],
+                count=total if self._count else None
+            )
+
+
+class FakeRPC:
+    """Unknown functions return no rows (the routes fall back to table queries)"""
+
+    def __init__(self, db: "FakeSupabase"):
+        self._db = db
+
+    def execute(self) -> SimpleNamespace:
+        self._db.simulate_latency()
+        return SimpleNamespace(data=[], count=None)
+
+
+class FakeBucket:
+    """Supabase Storage bucket kept in memory"""
+
+    def __init__(self, db: "FakeSupabase", name: str):
+        self._db = db
+        self.name = name
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict] = None) -> SimpleNamespace:
+        self._db.simulate_latency()
+        if isinstance(file, (bytes, bytearray)):
+            data = bytes(file)
+        elif isinstance(file, str):
+            with open(file, "rb") as f:
+                data = f.read()
+        else:
+            data = file.read()
+
+        key = f"{self.name}/{path}"
+        with self._db.lock:
+            upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+            if key in self._db.objects and not upsert:
+                raise APIError({"statusCode": 409, "error": "Duplicate", "message": "The resource already exists"})
+            self._db.objects[key] = data
+            self._db.uploads += 1
+        return SimpleNamespace(path=path, full_path=key)
+
+    def get_public_url(self, path: str) -> str:
+        return f"https://fake.supabase.local/storage/v1/object/public/{self.name}/{path}"
+
+    def list(self, path: str = "", options: Optional[Dict] = None) -> List[Dict]:
+        prefix = f"{self.name}/{path}".rstrip("/") + "/"
+        with self._db.lock:
+            return [{"name": k[len(prefix):]} for k in self._db.objects if k.startswith(prefix)]
+
+    def remove(self, paths: List[str]) -> List[Dict]:
+        with self._db.lock:
+            for path in paths:
+                self._db.objects.pop(f"{self.name}/{path}", None)
+        return [{"name": p} for p in paths]
+
+
+class FakeStorage:
+    def __init__(self, db: "FakeSupabase"):
+        self._db = db
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self._db, bucket)
+
+
+class FakeSupabase:
+    """
+    In-memory replacement for supabase.Client.
+
+    Each `execute()` sleeps `latency_ms` (blocking, like the real
+    synchronous client) so DB round trips show up in the measurements.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.tables: Dict[str, List[Dict]] = {}
+        self.objects: Dict[str, bytes] = {}
+        self.lock = threading.RLock()
+        self.queries = 0
+        self.uploads = 0
+        self.storage = FakeStorage(self)
+
+    def simulate_latency(self) -> None:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> FakeRPC:
+        return FakeRPC(self)
+
+
+class FakeSMTP:
+    """smtplib.SMTP replacement that accepts every message after `latency_ms`"""
+
+    latency_ms: float = 0.0
+    sent = 0
+    _lock = threading.Lock()
+
+    def __init__(self, host: str = "", port: int = 0, *args, **kwargs):
+        self.host, self.port = host, port
+
+    def __enter__(self) -> "FakeSMTP":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.quit()
+
+    def starttls(self, *args, **kwargs) -> None:
+        pass
+
+    def login(self, user: str, password: str) -> None:
+        pass
+
+    def send_message(self, msg: Any, *args, **kwargs) -> Dict:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with FakeSMTP._lock:
+            FakeSMTP.sent += 1
+        return {}
+
+    def quit(self) -> None:
+        pass
+
+
+def pdf_minimo(texto: str) -> bytes:
+    """
+    Build a small valid single-page PDF whose text PyPDF2 can extract
+
+    Args:
+        texto: Text lines (split on newlines)
+
+    Returns:
+        PDF file content
+    """
+    def escapar(linea: str) -> str:
+        return linea.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    lineas = texto.encode("latin-1", "replace").decode("latin-1").splitlines()
+    stream = "BT /F1 11 Tf 14 TL 50 780 Td " + " ".join(f"({escapar(l)}) '" for l in lineas) + " ET"
+    objetos = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+
+    salida = b"%PDF-1.4\n"
+    offsets = []
+    for i, objeto in enumerate(objetos, start=1):
+        offsets.append(len(salida))
+        salida += f"{i} 0 obj\n{objeto}\nendobj\n".encode("latin-1")
+    xref = len(salida)
+    salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    salida += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode("latin-1")
+    salida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return salida
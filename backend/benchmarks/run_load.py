@@ -0,0 +1,402 @@
+"""
+Load Benchmark - Drive a realistic request mix through the FastAPI app in-process
+
+Usage (from backend/):
+    python -m benchmarks.run_load --requests 500 --concurrency 20
+    python -m benchmarks.run_load --duration 30 --output reporte.json
+    python -m benchmarks.run_load --mix publicadas=50,detalles=30,chatbot=20
+
+The app runs in the same process behind httpx.ASGITransport, with the
+fake Supabase (benchmarks/fakes.py), the fake LLM provider and a fake
+SMTP server. The JSON report has throughput and p50/p95/p99 latency per
+endpoint, so runs can be compared between commits.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+
+ESCENARIOS = ("publicadas", "detalles", "aplicar", "responder", "chatbot")
+MIX_DEFAULT = "publicadas=40,detalles=25,aplicar=10,responder=10,chatbot=15"
+
+CIUDADES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Bucaramanga"]
+MODALIDADES = ["remoto", "presencial", "hibrido"]
+HABILIDADES = ["Python", "Django", "FastAPI", "React", "SQL", "Docker", "AWS", "Java", "Excel", "Scrum"]
+
+# (endpoint, status_code, segundos)
+Medicion = Tuple[str, int, float]
+
+
+def configurar_entorno(args: argparse.Namespace) -> None:
+    """Point Settings at the local stand-ins (must run before importing the app)"""
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["LLM_FAKE_JITTER_MS"] = str(args.llm_jitter_ms)
+    os.environ["LLM_FAKE_ERROR_RATE"] = str(args.llm_error_rate)
+    os.environ["SUPABASE_URL"] = "https://fake.supabase.local"
+    os.environ["SUPABASE_KEY"] = "fake"
+    os.environ["SMTP_USER"] = "benchmark@example.com"
+    os.environ["SMTP_PASSWORD"] = "fake"
+    os.environ["ENVIRONMENT"] = "benchmark"
+    os.environ["EMBEDDINGS_DIR"] = tempfile.mkdtemp(prefix="bench-embeddings-")
+
+
+def sembrar_datos(db, rng: random.Random, empresas: int, vacantes: int, aplicaciones: int) -> Dict[str, List]:
+    """
+    Fill the fake database with published job postings and applications
+
+    Returns:
+        Pools of IDs the scenarios pick from
+    """
+    ahora = datetime.now(timezone.utc)
+    empresa_ids, vacante_ids, aplicacion_ids = [], [], []
+
+    for i in range(empresas):
+        fila = db.table("empresas").insert({
+            "nombre_empresa": f"Empresa {i}",
+            "ciudad": rng.choice(CIUDADES),
+            "industria": "Tecnología",
+            "descripcion": "Empresa de prueba para benchmarks",
+            "tamaño_empresa": "pequeña"
+        }).execute().data[0]
+        empresa_ids.append(fila["id"])
+
+    for i in range(vacantes):
+        habilidades = rng.sample(HABILIDADES, 3)
+        vacante = db.table("vacantes").insert({
+            "empresa_id": rng.choice(empresa_ids),
+            "titulo": f"Desarrollador {habilidades[0]} {i}",
+            "descripcion": "Buscamos una persona para construir y mantener servicios web.",
+            "cargo": f"Desarrollador {habilidades[0]}",
+            "tipo_contrato": "indefinido",
+            "modalidad": rng.choice(MODALIDADES),
+            "habilidades_requeridas": habilidades,
+            "experiencia_min": rng.randint(0, 5),
+            "salario_min": 3000000,
+            "salario_max": 6000000,
+            "ciudad": rng.choice(CIUDADES),
+            "estado": "publicada",
+            "fecha_publicacion": (ahora - timedelta(minutes=i)).isoformat()
+        }).execute().data[0]
+        vacante_ids.append(vacante["id"])
+
+        db.table("vacante_preguntas").insert([
+            {
+                "vacante_id": vacante["id"],
+                "pregunta": f"¿Cuál es tu experiencia con {habilidades[j % 3]}? ({j + 1})",
+                "tipo_pregunta": "abierta",
+                "aprobada_por_empresa": True,
+                "created_at": (ahora + timedelta(seconds=j)).isoformat()
+            }
+            for j in range(5)
+        ]).execute()
+
+    for i in range(aplicaciones):
+        aplicacion_ids.append(crear_aplicacion(db, rng, rng.choice(vacante_ids), i))
+
+    return {"empresas": empresa_ids, "vacantes": vacante_ids, "aplicaciones": aplicacion_ids}
+
+
+def crear_aplicacion(db, rng: random.Random, vacante_id: str, n: int) -> str:
+    """Insert a candidate and an application directly (not measured)"""
+    candidato = db.table("candidatos").insert({
+        "nombre_anonimo": f"Candidato {n}",
+        "email": f"candidato{n}@example.com",
+        "años_experiencia": rng.randint(0, 10)
+    }).execute().data[0]
+    db.table("documentos").insert({
+        "candidato_id": candidato["id"],
+        "tipo_documento": "cv",
+        "texto_extraido": "Desarrollador con 4 años de experiencia en Python, Django y SQL."
+    }).execute()
+    aplicacion = db.table("aplicaciones").insert({
+        "vacante_id": vacante_id,
+        "candidato_id": candidato["id"],
+        "estado": "aplicado",
+        "analisis_cv": {
+            "habilidades": rng.sample(HABILIDADES, 4),
+            "experiencia_años": rng.randint(0, 10),
+            "educacion": "Ingeniería de Sistemas",
+            "resumen": "Desarrollador backend."
+        }
+    }).execute().data[0]
+    return aplicacion["id"]
+
+
+class Escenarios:
+    """One coroutine per traffic type; each returns its measured requests"""
+
+    def __init__(self, client, db, datos: Dict[str, List], rng: random.Random, pdf: bytes):
+        self.client = client
+        self.db = db
+        self.datos = datos
+        self.rng = rng
+        self.pdf = pdf
+        self.contador = 0
+
+    async def _medir(self, endpoint: str, method: str, url: str, **kwargs) -> Tuple[Medicion, object]:
+        inicio = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            print(f"Request {endpoint} failed: {e}")
+            response, status = None, 599
+        return (endpoint, status, time.perf_counter() - inicio), response
+
+    async def publicadas(self) -> List[Medicion]:
+        params = {"limit": 20, "offset": self.rng.choice([0, 0, 0, 20, 40])}
+        if self.rng.random() < 0.3:
+            params["ciudad"] = self.rng.choice(CIUDADES)[:4]
+        medicion, _ = await self._medir("GET /api/vacantes/publicadas", "GET", "/api/vacantes/publicadas", params=params)
+        return [medicion]
+
+    async def detalles(self) -> List[Medicion]:
+        vacante_id = self.rng.choice(self.datos["vacantes"])
+        medicion, _ = await self._medir(
+            "GET /api/vacantes/{id}/detalles", "GET", f"/api/vacantes/{vacante_id}/detalles"
+        )
+        return [medicion]
+
+    async def aplicar(self) -> List[Medicion]:
+        self.contador += 1
+        n = self.contador
+        medicion, response = await self._medir(
+            "POST /api/candidato/aplicar", "POST", "/api/candidato/aplicar",
+            data={
+                "vacante_id": self.rng.choice(self.datos["vacantes"]),
+                "nombre_anonimo": f"Aspirante {n}",
+                "email": f"aspirante{n}@example.com",
+                "telefono": "3000000000",
+                "ciudad": self.rng.choice(CIUDADES),
+                "años_experiencia": str(self.rng.randint(0, 10))
+            },
+            files={"cv_pdf": (f"cv_{n}.pdf", self.pdf, "application/pdf")}
+        )
+        if response is not None and response.status_code == 200:
+            self.datos["aplicaciones"].append(response.json()["aplicacion_id"])
+        return [medicion]
+
+    async def responder(self) -> List[Medicion]:
+        aplicacion_id = self.rng.choice(self.datos["aplicaciones"])
+        aplicacion = self.db.table("aplicaciones").select("vacante_id").eq("id", aplicacion_id).execute().data[0]
+        preguntas = self.db.table("vacante_preguntas").select("id").eq(
+            "vacante_id", aplicacion["vacante_id"]
+        ).execute().data
+        medicion, _ = await self._medir(
+            "POST /api/candidato/responder", "POST", "/api/candidato/responder",
+            json={
+                "aplicacion_id": aplicacion_id,
+                "respuestas": [
+                    {"pregunta_id": p["id"], "respuesta": "Trabajé tres años en proyectos similares con buenos resultados."}
+                    for p in preguntas
+                ]
+            }
+        )
+        return [medicion]
+
+    async def chatbot(self) -> List[Medicion]:
+        # Entrevista completa sobre una aplicación nueva (el estado es por aplicación)
+        self.contador += 1
+        aplicacion_id = crear_aplicacion(
+            self.db, self.rng, self.rng.choice(self.datos["vacantes"]), 100000 + self.contador
+        )
+        mediciones = []
+        medicion, response = await self._medir(
+            "POST /api/candidato/chatbot/iniciar", "POST", "/api/candidato/chatbot/iniciar",
+            params={"aplicacion_id": aplicacion_id}
+        )
+        mediciones.append(medicion)
+        if response is None or response.status_code != 200:
+            return mediciones
+
+        for _ in range(response.json().get("total_preguntas", 0)):
+            medicion, _ = await self._medir(
+                "POST /api/candidato/chatbot/siguiente", "POST", "/api/candidato/chatbot/siguiente",
+                params={"aplicacion_id": aplicacion_id, "respuesta_anterior": "Tengo experiencia liderando un equipo pequeño."}
+            )
+            mediciones.append(medicion)
+
+        medicion, _ = await self._medir(
+            "POST /api/candidato/chatbot/finalizar", "POST", "/api/candidato/chatbot/finalizar",
+            params={"aplicacion_id": aplicacion_id}
+        )
+        mediciones.append(medicion)
+        return mediciones
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[k]
+
+
+def resumir(mediciones: List[Medicion], duracion: float) -> Dict:
+    """Throughput and latency percentiles per endpoint and overall"""
+    por_endpoint: Dict[str, List[Medicion]] = defaultdict(list)
+    for medicion in mediciones:
+        por_endpoint[medicion[0]].append(medicion)
+
+    def stats(items: List[Medicion]) -> Dict:
+        tiempos = sorted(m[2] * 1000 for m in items)
+        return {
+            "requests": len(items),
+            "errores": sum(1 for m in items if m[1] >= 400),
+            "throughput_rps": round(len(items) / duracion, 2) if duracion else 0.0,
+            "media_ms": round(sum(tiempos) / len(tiempos), 2) if tiempos else 0.0,
+            "p50_ms": round(percentil(tiempos, 50), 2),
+            "p95_ms": round(percentil(tiempos, 95), 2),
+            "p99_ms": round(percentil(tiempos, 99), 2),
+            "max_ms": round(tiempos[-1], 2) if tiempos else 0.0
+        }
+
+    return {
+        "total": stats(mediciones),
+        "endpoints": {nombre: stats(items) for nombre, items in sorted(por_endpoint.items())}
+    }
+
+
+def parse_mix(texto: str) -> Dict[str, float]:
+    mix = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        nombre = nombre.strip()
+        if nombre not in ESCENARIOS:
+            raise SystemExit(f"Escenario desconocido: {nombre} (opciones: {', '.join(ESCENARIOS)})")
+        mix[nombre] = float(peso or 1)
+    return mix
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "desconocido"
+
+
+async def ejecutar(args: argparse.Namespace) -> Dict:
+    configurar_entorno(args)
+
+    # Importar la app solo después de configurar el entorno
+    import httpx
+    import smtplib
+    from benchmarks.fakes import FakeSupabase, FakeSMTP, pdf_minimo
+    from database import Database
+
+    db = FakeSupabase(latency_ms=args.db_latency_ms)
+    Database._client = db
+    FakeSMTP.latency_ms = args.smtp_latency_ms
+    smtplib.SMTP = FakeSMTP
+
+    from main import app
+
+    rng = random.Random(args.seed)
+    datos = sembrar_datos(db, rng, args.empresas, args.vacantes, args.aplicaciones)
+    pdf = pdf_minimo(
+        "Candidata de prueba\nPERFIL\nDesarrolladora backend con 5 años de experiencia.\n"
+        "EXPERIENCIA\nEmpresa X: APIs con Python, Django y FastAPI.\n"
+        "HABILIDADES\nPython, Django, FastAPI, SQL, Docker, AWS"
+    )
+
+    mix = parse_mix(args.mix)
+    nombres, pesos = list(mix), list(mix.values())
+    mediciones: List[Medicion] = []
+    restantes = args.requests
+    fin = time.perf_counter() + args.duration if args.duration else None
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            escenarios = Escenarios(client, db, datos, rng, pdf)
+
+            # Calentamiento: no se mide
+            for nombre in nombres:
+                await getattr(escenarios, nombre)()
+
+            async def worker():
+                nonlocal restantes
+                while True:
+                    if fin is not None:
+                        if time.perf_counter() >= fin:
+                            return
+                    else:
+                        if restantes <= 0:
+                            return
+                        restantes -= 1
+                    nombre = rng.choices(nombres, weights=pesos)[0]
+                    mediciones.extend(await getattr(escenarios, nombre)())
+
+            inicio = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            duracion = time.perf_counter() - inicio
+
+    return {
+        "commit": git_commit(),
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "config": {
+            "requests": args.requests if not args.duration else None,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "seed": args.seed,
+            "db_latency_ms": args.db_latency_ms,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "llm_error_rate": args.llm_error_rate,
+            "smtp_latency_ms": args.smtp_latency_ms,
+            "datos": {"empresas": args.empresas, "vacantes": args.vacantes, "aplicaciones": args.aplicaciones}
+        },
+        "duracion_s": round(duracion, 3),
+        "db_queries": db.queries,
+        **resumir(mediciones, duracion)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="In-process load benchmark for the recruitment API")
+    parser.add_argument("--requests", type=int, default=300, help="Scenario runs (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="Run for N seconds instead of a fixed count")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--mix", default=MIX_DEFAULT, help=f"Scenario weights (default: {MIX_DEFAULT})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--smtp-latency-ms", type=float, default=50.0)
+    parser.add_argument("--empresas", type=int, default=20)
+    parser.add_argument("--vacantes", type=int, default=200)
+    parser.add_argument("--aplicaciones", type=int, default=500)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    # Los prints de la app van a stderr para que stdout sea solo el reporte
+    with contextlib.redirect_stdout(sys.stderr):
+        reporte = asyncio.run(ejecutar(args))
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
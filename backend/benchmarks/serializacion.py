@@ -0,0 +1,156 @@
+"""
+Serialization Benchmark - JSON encoding cost per response size
+
+Usage (from backend/):
+    python -m benchmarks.serializacion
+    python -m benchmarks.serializacion --tamaños 10,100,1000,10000 --output serializacion.json
+
+For each payload shape (dicts as /api/vacantes/publicadas and /aplicaciones
+build them, and lists of VacantePublicada / AplicacionDetalle models) and
+size, the report compares three paths:
+
+- fastapi: jsonable_encoder + JSONResponse (FastAPI's default)
+- default_class: jsonable_encoder + RespuestaJSON (the app default now)
+- directa: RespuestaJSON returned by the endpoint (no jsonable_encoder)
+
+with the median time per response and the time saved against FastAPI's
+default path.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models.candidato import AplicacionDetalle
+from models.vacante import VacantePublicada
+from services.respuesta_json import SERIALIZADOR, RespuestaJSON
+
+CIUDADES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Bucaramanga"]
+MODALIDADES = ["remoto", "presencial", "hibrido"]
+HABILIDADES = ["Python", "Django", "FastAPI", "React", "SQL", "Docker", "AWS", "Java", "Excel", "Scrum"]
+ESTADOS = ["aplicado", "en_revision", "entrevista", "rechazado", "contratado"]
+
+
+def vacantes(rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    """Rows shaped like /api/vacantes/publicadas"""
+    ahora = datetime.now(timezone.utc)
+    return [
+        {
+            "id": f"00000000-0000-4000-8000-{i:012d}",
+            "titulo": f"Desarrollador {rng.choice(HABILIDADES)} {i}",
+            "empresa_nombre": f"Empresa {i % 50}",
+            "ciudad": rng.choice(CIUDADES),
+            "salario_min": float(rng.randrange(2_000_000, 6_000_000, 100_000)),
+            "salario_max": float(rng.randrange(6_000_000, 12_000_000, 100_000)),
+            "modalidad": rng.choice(MODALIDADES),
+            "habilidades_requeridas": rng.sample(HABILIDADES, 4),
+            "fecha_publicacion": ahora - timedelta(minutes=i)
+        }
+        for i in range(n)
+    ]
+
+
+def aplicaciones(rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    """Rows shaped like /api/empresa/{id}/aplicaciones"""
+    ahora = datetime.now(timezone.utc)
+    return [
+        {
+            "aplicacion_id": f"00000000-0000-4000-9000-{i:012d}",
+            "candidato_nombre": f"Candidato {i}",
+            "vacante_titulo": f"Desarrollador {rng.choice(HABILIDADES)}",
+            "puntuacion_ia": rng.randint(0, 100),
+            "compatibilidad_porcentaje": rng.randint(0, 100),
+            "estado": rng.choice(ESTADOS),
+            "fecha_aplicacion": ahora - timedelta(minutes=i)
+        }
+        for i in range(n)
+    ]
+
+
+def cargas(rng: random.Random, n: int) -> Dict[str, Any]:
+    """Payloads of one size, keyed by shape"""
+    filas_vacantes = vacantes(rng, n)
+    filas_aplicaciones = aplicaciones(rng, n)
+    return {
+        "vacantes_dict": {"vacantes": filas_vacantes, "total": n, "limit": n, "offset": 0},
+        "aplicaciones_dict": {"aplicaciones": filas_aplicaciones, "siguiente_cursor": None},
+        "vacantes_modelo": [VacantePublicada(**v) for v in filas_vacantes],
+        "aplicaciones_modelo": [AplicacionDetalle(**a) for a in filas_aplicaciones]
+    }
+
+
+CAMINOS: Dict[str, Callable[[Any], bytes]] = {
+    "fastapi": lambda c: JSONResponse(jsonable_encoder(c)).body,
+    "default_class": lambda c: RespuestaJSON(jsonable_encoder(c)).body,
+    "directa": lambda c: RespuestaJSON(c).body
+}
+
+
+def medir(fn: Callable[[Any], bytes], contenido: Any, repeticiones: int) -> float:
+    """Median milliseconds of `repeticiones` runs (after one warm-up)"""
+    fn(contenido)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn(contenido)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def ejecutar(tamaños: List[int], repeticiones: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    resultados = []
+    for n in tamaños:
+        # Menos repeticiones para las cargas grandes (mismo tiempo total aprox.)
+        veces = max(3, repeticiones * 100 // max(n, 100))
+        for forma, contenido in cargas(rng, n).items():
+            # Los tres caminos deben producir el mismo JSON
+            base = json.loads(CAMINOS["fastapi"](contenido))
+            for nombre, fn in CAMINOS.items():
+                assert json.loads(fn(contenido)) == base, f"{nombre} differs for {forma}"
+
+            ms = {nombre: medir(fn, contenido, veces) for nombre, fn in CAMINOS.items()}
+            resultados.append({
+                "forma": forma,
+                "filas": n,
+                "bytes": len(CAMINOS["directa"](contenido)),
+                **{f"{nombre}_ms": round(t, 3) for nombre, t in ms.items()},
+                "ahorro_default_class_ms": round(ms["fastapi"] - ms["default_class"], 3),
+                "ahorro_directa_ms": round(ms["fastapi"] - ms["directa"], 3),
+                "aceleracion_directa": round(ms["fastapi"] / ms["directa"], 2) if ms["directa"] else 0.0
+            })
+    return {
+        "serializador": SERIALIZADOR,
+        "repeticiones_base": repeticiones,
+        "resultados": resultados
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark per response size")
+    parser.add_argument("--tamaños", default="10,100,1000,10000", help="Rows per response, comma separated")
+    parser.add_argument("--repeticiones", type=int, default=50, help="Runs per measurement at 100 rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    tamaños = [int(t) for t in args.tamaños.split(",") if t.strip()]
+    reporte = ejecutar(tamaños, args.repeticiones, args.seed)
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
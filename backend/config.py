@@ -24,6 +24,14 @@ class Settings(BaseSettings):
     # Groq API (LLaMA 3.1)
     groq_api_key: str = os.getenv("GROQ_API_KEY", "")
     
+    # Proveedor LLM: "groq" (producción) o "fake" (local, sin red, para
+    # pruebas de carga). El fake simula latencia, jitter y errores.
+    llm_provider: str = os.getenv("LLM_PROVIDER", "groq")
+    llm_model: str = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+    llm_fake_latency_ms: float = float(os.getenv("LLM_FAKE_LATENCY_MS", "300"))
+    llm_fake_jitter_ms: float = float(os.getenv("LLM_FAKE_JITTER_MS", "100"))
+    llm_fake_error_rate: float = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+    
     # Email
     smtp_host: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
     smtp_port: int = int(os.getenv("SMTP_PORT", "587"))
@@ -33,7 +41,90 @@ class Settings(BaseSettings):
     
     # General
     environment: str = os.getenv("ENVIRONMENT", "development")
-    
+
+    # Búsqueda semántica (embeddings locales)
+    # embedding_model vacío = TF-IDF con hashing (sin dependencias extra)
+    embeddings_dir: str = os.getenv("EMBEDDINGS_DIR", "data/embeddings")
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "")
+    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "1024"))
+    embedding_ann: bool = os.getenv("EMBEDDING_ANN", "false").lower() == "true"
+    embedding_ann_min_items: int = int(os.getenv("EMBEDDING_ANN_MIN_ITEMS", "5000"))
+
+    # Presupuesto de tokens del CV enviado al LLM (aprox. tokens LLaMA)
+    cv_tokens_analisis: int = int(os.getenv("CV_TOKENS_ANALISIS", "900"))
+    cv_tokens_evaluacion: int = int(os.getenv("CV_TOKENS_EVALUACION", "600"))
+
+    # Memoria del chatbot: al superar el umbral, los turnos antiguos se
+    # condensan en un resumen y solo se conservan los últimos N turnos
+    chatbot_memory_max_tokens: int = int(os.getenv("CHATBOT_MEMORY_MAX_TOKENS", "600"))
+    chatbot_memory_keep_turns: int = int(os.getenv("CHATBOT_MEMORY_KEEP_TURNS", "2"))
+    # Conversaciones en memoria: se descartan tras el TTL sin actividad o al superar el máximo
+    chatbot_sesion_ttl_seconds: float = float(os.getenv("CHATBOT_SESION_TTL_SECONDS", "3600"))
+    chatbot_sesiones_max: int = int(os.getenv("CHATBOT_SESIONES_MAX", "5000"))
+
+    # Registro de respuestas: inserciones agrupadas en respuestas_candidato
+    answer_log_batch_size: int = int(os.getenv("ANSWER_LOG_BATCH_SIZE", "50"))
+    answer_log_flush_seconds: float = float(os.getenv("ANSWER_LOG_FLUSH_SECONDS", "0.5"))
+
+    # Métricas de latencia por etapa expuestas en /metrics (formato Prometheus)
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Reporte de arranque (/api/admin/arranque): instala un import hook que
+    # mide cada módulo importado hasta que la app está lista y luego se quita
+    startup_report_enabled: bool = os.getenv("STARTUP_REPORT_ENABLED", "false").lower() == "true"
+
+    # Profiler por muestreo: peticiones con "X-Profile: 1" o una fracción
+    # aleatoria (PROFILER_SAMPLE_RATE). Los perfiles se consultan en
+    # /api/admin/perfiles
+    profiler_enabled: bool = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+    profiler_sample_rate: float = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    profiler_interval_ms: float = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    profiler_buffer_size: int = int(os.getenv("PROFILER_BUFFER_SIZE", "50"))
+
+    # Endpoints /api/admin/*: si se define, exigen el header X-Admin-Token
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")
+
+    # Ciclo de vida: calentamiento al arrancar y vaciado al apagar.
+    # warmup_llm hace una llamada mínima (1 token) por modelo para abrir la conexión
+    warmup_enabled: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    warmup_llm: bool = os.getenv("WARMUP_LLM", "true").lower() == "true"
+    warmup_timeout_seconds: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "15"))
+    shutdown_timeout_seconds: float = float(os.getenv("SHUTDOWN_TIMEOUT_SECONDS", "25"))
+
+    # Subida de CVs: tamaño máximo, tamaño de cada bloque copiado a disco
+    # y carpeta de los archivos temporales (vacío = carpeta temporal del sistema)
+    cv_max_mb: float = float(os.getenv("CV_MAX_MB", "10"))
+    cv_upload_chunk_kb: int = int(os.getenv("CV_UPLOAD_CHUNK_KB", "64"))
+    cv_tmp_dir: str = os.getenv("CV_TMP_DIR", "")
+
+    # Caché por proceso email -> candidato_id para candidatos que vuelven a aplicar
+    candidato_cache_ttl_seconds: float = float(os.getenv("CANDIDATO_CACHE_TTL_SECONDS", "600"))
+    candidato_cache_max: int = int(os.getenv("CANDIDATO_CACHE_MAX", "10000"))
+
+    # Importación masiva de vacantes: máximo por petición y llamadas al LLM simultáneas
+    importacion_max_vacantes: int = int(os.getenv("IMPORTACION_MAX_VACANTES", "500"))
+    importacion_concurrencia: int = int(os.getenv("IMPORTACION_CONCURRENCIA", "8"))
+    importacion_max_mb: int = int(os.getenv("IMPORTACION_MAX_MB", "5"))
+
+    # Preguntas en segundo plano: tiempo máximo que espera el stream SSE
+    preguntas_stream_timeout_seconds: float = float(os.getenv("PREGUNTAS_STREAM_TIMEOUT_SECONDS", "120"))
+
+    # Plantillas de preguntas: reutiliza las preguntas de vacantes equivalentes.
+    # plantillas_similitud: Jaccard mínimo (título + habilidades) para vacantes parecidas; 1 = solo exactas
+    plantillas_enabled: bool = os.getenv("PLANTILLAS_ENABLED", "true").lower() == "true"
+    plantillas_max: int = int(os.getenv("PLANTILLAS_MAX", "2000"))
+    plantillas_similitud: float = float(os.getenv("PLANTILLAS_SIMILITUD", "0.8"))
+
+    # Dashboard de aplicaciones por empresa: se reconstruye desde la BD tras el TTL
+    # (recoge lo escrito por otros workers); top_n = tamaño del top y de "últimas";
+    # max_empresas = resúmenes en memoria (se descartan los menos consultados)
+    dashboard_ttl_seconds: float = float(os.getenv("DASHBOARD_TTL_SECONDS", "300"))
+    dashboard_top_n: int = int(os.getenv("DASHBOARD_TOP_N", "10"))
+    dashboard_max_empresas: int = int(os.getenv("DASHBOARD_MAX_EMPRESAS", "1000"))
+
+    # Exportación de aplicaciones: filas leídas de la BD por página
+    exportacion_pagina: int = int(os.getenv("EXPORTACION_PAGINA", "1000"))
+
     # CORS - Configuración dinámica para desarrollo y producción
     @property
     def cors_origins(self) -> List[str]:
@@ -66,9 +157,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
-# Debug: Mostrar configuración al iniciar (útil para troubleshooting)
-print(f"🌍 Environment: {settings.environment}")
-print(f"🔐 CORS Origins: {settings.cors_origins}")
-print(f"✅ Supabase URL: {settings.supabase_url[:30]}..." if settings.supabase_url else "❌ Supabase URL no configurada")
-print(f"✅ Groq API Key: {'Configurada' if settings.groq_api_key else '❌ No configurada'}")
\ No newline at end of file
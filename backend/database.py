@@ -1,17 +1,22 @@
 """
 Database module - Supabase client initialization
 """
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
 from config import settings
+from services.metrics import TimedClient, metrics
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
 class Database:
     """Supabase database client wrapper"""
     
-    _client: Client = None
+    _client: "Client" = None
+    _timed: TimedClient = None
     
     @classmethod
-    def get_client(cls) -> Client:
+    def get_client(cls) -> "Client":
         """Get or create Supabase client instance"""
         if cls._client is None:
             if not settings.supabase_url or not settings.supabase_service_key:
@@ -19,6 +24,8 @@ class Database:
                     "Supabase credentials not configured. "
                     "Please set SUPABASE_URL and SUPABASE_SERVICE_KEY in .env file"
                 )
+            # supabase es pesado de importar: se carga con la primera consulta
+            from supabase import create_client
             cls._client = create_client(
                 settings.supabase_url,
                 settings.supabase_service_key
@@ -27,6 +34,11 @@ class Database:
 
 
 # Convenience function
-def get_db() -> Client:
-    """Get database client instance"""
-    return Database.get_client()
+def get_db() -> "Client":
+    """Get database client instance (timed per query when metrics are enabled)"""
+    client = Database.get_client()
+    if not metrics.enabled:
+        return client
+    if Database._timed is None or Database._timed._client is not client:
+        Database._timed = TimedClient(client)
+    return Database._timed
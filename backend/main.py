@@ -1,20 +1,47 @@
 """
 FastAPI Main Application - Recruitment System Backend
 """
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 from config import settings
-from routes import empresas, candidatos, vacantes
+from services.lazy import startup_report
+
+# Medir el costo de cada import desde aquí (reporte en /api/admin/arranque)
+if settings.startup_report_enabled:
+    startup_report.iniciar()
+
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from routes import empresas, candidatos, vacantes, admin
+from routes.admin import _verificar_token
+from services.metrics import MetricsMiddleware, metrics
+from services.profiler import ProfilerMiddleware
+from services.lifecycle import calentar, drenar
+from services.cv_upload import LimiteSubidaMiddleware
+from services.respuesta_json import RespuestaJSON
 import os
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up before serving; drain background work before exiting"""
+    if settings.warmup_enabled:
+        await calentar(app)
+    yield
+    await drenar(settings.shutdown_timeout_seconds)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Sistema de Reclutamiento Inteligente",
     description="Backend API para sistema de reclutamiento con IA",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    # orjson si está instalado (respaldo: json estándar)
+    default_response_class=RespuestaJSON
 )
 
 # Configure CORS
@@ -36,10 +63,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latencia por ruta (histogramas en /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Perfiles por petición (X-Profile: 1 o PROFILER_SAMPLE_RATE), desactivado por defecto
+app.add_middleware(ProfilerMiddleware)
+
+# Rechaza con 413 los formularios multipart que superan CV_MAX_MB antes de parsearlos
+app.add_middleware(LimiteSubidaMiddleware)
+
 # Include routers
 app.include_router(empresas.router)
 app.include_router(candidatos.router)
 app.include_router(vacantes.router)
+app.include_router(admin.router)
+
+startup_report.finalizar()
 
 
 @app.get("/")
@@ -64,11 +103,32 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint(
+    x_admin_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Stage latency histograms and counters in Prometheus text format
+
+    Protected like /api/admin/*: X-Admin-Token, or
+    `Authorization: Bearer <token>` for Prometheus scrapers.
+    """
+    if x_admin_token is None and authorization and authorization.lower().startswith("bearer "):
+        x_admin_token = authorization[7:].strip()
+    _verificar_token(x_admin_token)
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True if settings.environment == "development" else False
+        reload=True if settings.environment == "development" else False,
+        timeout_graceful_shutdown=int(settings.shutdown_timeout_seconds)
     )
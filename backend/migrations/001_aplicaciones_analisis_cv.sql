@@ -0,0 +1,5 @@
+-- Análisis estructurado del CV (habilidades, experiencia, educación, resumen)
+-- guardado con cada aplicación para reutilizarlo en la evaluación de
+-- compatibilidad sin volver a enviar el texto del CV al LLM.
+ALTER TABLE aplicaciones
+    ADD COLUMN IF NOT EXISTS analisis_cv JSONB;
@@ -0,0 +1,16 @@
+-- Registro de respuestas de los candidatos (chatbot y formulario).
+-- Solo se insertan filas (append-only); la evaluación de compatibilidad
+-- lee las respuestas de aquí al finalizar la entrevista.
+CREATE TABLE IF NOT EXISTS respuestas_candidato (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    aplicacion_id UUID NOT NULL REFERENCES aplicaciones(id) ON DELETE CASCADE,
+    pregunta_id UUID REFERENCES vacante_preguntas(id) ON DELETE SET NULL,
+    pregunta TEXT,
+    respuesta TEXT NOT NULL,
+    orden INTEGER,
+    origen TEXT NOT NULL DEFAULT 'chatbot',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_respuestas_candidato_aplicacion
+    ON respuestas_candidato (aplicacion_id, orden);
@@ -0,0 +1,5 @@
+-- Saludo inicial del chatbot pre-generado por vacante (con el marcador
+-- {candidato_nombre}). Se genera al publicar la vacante y evita una
+-- llamada al LLM en cada inicio de entrevista.
+ALTER TABLE vacantes
+    ADD COLUMN IF NOT EXISTS apertura_chatbot TEXT;
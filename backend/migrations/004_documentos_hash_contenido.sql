@@ -0,0 +1,8 @@
+-- SHA-256 del CV almacenado. Los archivos se guardan en el bucket como
+-- cv/{hash}.pdf: el mismo PDF se sube una sola vez y las filas de
+-- documentos que comparten el hash cuentan como referencias al archivo.
+ALTER TABLE documentos
+    ADD COLUMN IF NOT EXISTS hash_contenido TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_documentos_hash_contenido
+    ON documentos (hash_contenido);
@@ -0,0 +1,7 @@
+-- Búsqueda de candidatos por email al aplicar: quien ya aplicó reutiliza
+-- su registro en usuarios/candidatos en lugar de crear uno nuevo.
+CREATE INDEX IF NOT EXISTS idx_candidatos_email
+    ON candidatos (email);
+
+CREATE INDEX IF NOT EXISTS idx_documentos_candidato_hash
+    ON documentos (candidato_id, hash_contenido);
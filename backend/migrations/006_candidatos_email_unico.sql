@@ -0,0 +1,83 @@
+-- Un candidato (y un usuario candidato) por email: permite el upsert al
+-- aplicar y evita duplicados cuando dos procesos reciben la primera
+-- aplicación del mismo email a la vez.
+--
+-- Antes se creaba un candidato por aplicación, así que primero se pasan
+-- los emails a minúsculas (las búsquedas ya los normalizan) y se fusionan
+-- los duplicados: sobrevive el registro más antiguo y sus aplicaciones y
+-- documentos pasan a él. Los índices únicos fallarían si quedara alguno.
+BEGIN;
+
+UPDATE candidatos
+    SET email = lower(trim(email))
+    WHERE email IS NOT NULL AND email <> lower(trim(email));
+
+UPDATE usuarios
+    SET email = lower(trim(email))
+    WHERE email IS NOT NULL AND email <> lower(trim(email));
+
+-- Candidatos duplicados -> superviviente (el de menor id)
+CREATE TEMP TABLE candidatos_fusion ON COMMIT DROP AS
+SELECT id, superviviente
+FROM (
+    SELECT id, min(id) OVER (PARTITION BY email) AS superviviente
+    FROM candidatos
+    WHERE email IS NOT NULL
+) c
+WHERE id <> superviviente;
+
+UPDATE aplicaciones a
+    SET candidato_id = f.superviviente
+    FROM candidatos_fusion f
+    WHERE a.candidato_id = f.id;
+
+UPDATE documentos d
+    SET candidato_id = f.superviviente
+    FROM candidatos_fusion f
+    WHERE d.candidato_id = f.id;
+
+DELETE FROM candidatos c
+    USING candidatos_fusion f
+    WHERE c.id = f.id;
+
+-- Usuarios duplicados del mismo tipo -> el más antiguo. El índice incluye
+-- tipo_usuario: una empresa y un candidato pueden compartir email.
+CREATE TEMP TABLE usuarios_fusion ON COMMIT DROP AS
+SELECT id, superviviente
+FROM (
+    SELECT id, first_value(id) OVER (
+        PARTITION BY tipo_usuario, email ORDER BY created_at, id
+    ) AS superviviente
+    FROM usuarios
+    WHERE email IS NOT NULL
+) u
+WHERE id <> superviviente;
+
+UPDATE candidatos c
+    SET usuario_id = f.superviviente
+    FROM usuarios_fusion f
+    WHERE c.usuario_id = f.id;
+
+UPDATE empresas e
+    SET usuario_id = f.superviviente
+    FROM usuarios_fusion f
+    WHERE e.usuario_id = f.id;
+
+DELETE FROM usuarios u
+    USING usuarios_fusion f
+    WHERE u.id = f.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidatos_email_unico
+    ON candidatos (email);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_tipo_email_unico
+    ON usuarios (email, tipo_usuario);
+
+DROP INDEX IF EXISTS idx_candidatos_email;
+
+-- Análisis del CV guardado junto al documento: un CV ya enviado reutiliza
+-- su propio análisis, no el de la última aplicación del candidato.
+ALTER TABLE documentos
+    ADD COLUMN IF NOT EXISTS analisis_cv JSONB;
+
+COMMIT;
@@ -0,0 +1,8 @@
+-- Entrevista del chatbot a la que pertenece cada respuesta. La evaluación
+-- al finalizar usa solo las respuestas de esa sesión, no las del
+-- formulario ni las de una entrevista anterior abandonada.
+ALTER TABLE respuestas_candidato
+    ADD COLUMN IF NOT EXISTS sesion_id UUID;
+
+CREATE INDEX IF NOT EXISTS idx_respuestas_candidato_sesion
+    ON respuestas_candidato (aplicacion_id, sesion_id);
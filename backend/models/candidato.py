@@ -1,7 +1,7 @@
 """
 Pydantic models for Candidato (Candidate) entities
 """
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import List, Optional
 from datetime import datetime
 
@@ -42,6 +42,20 @@ class ResponderPreguntas(BaseModel):
     respuestas: List[RespuestaCandidato]
 
 
+class AnalisisCV(BaseModel):
+    """Structured CV analysis extracted by AI (stored with the application)"""
+    habilidades: List[str] = Field(default_factory=list)
+    experiencia_años: Optional[float] = None
+    educacion: Optional[str] = None
+    resumen: Optional[str] = None
+
+    @field_validator("habilidades", mode="before")
+    @classmethod
+    def null_to_list(cls, value):
+        """The prompt allows null when no skills are found"""
+        return value or []
+
+
 class EvaluacionIA(BaseModel):
     """AI evaluation result"""
     puntuacion: int = Field(..., ge=0, le=100)
@@ -49,6 +63,19 @@ class EvaluacionIA(BaseModel):
     fortalezas: List[str]
     debilidades: List[str]
 
+    @field_validator("puntuacion", "compatibilidad", mode="before")
+    @classmethod
+    def clamp_score(cls, value):
+        """LLMs sometimes return scores like 105, -5 or "85%": clamp instead of rejecting"""
+        if isinstance(value, str):
+            try:
+                value = float(value.strip().rstrip("%"))
+            except ValueError:
+                return value
+        if isinstance(value, (int, float)):
+            return max(0, min(100, int(value)))
+        return value
+
 
 class AplicacionCompleta(BaseModel):
     """Response after completing application"""
@@ -24,6 +24,7 @@ class VacanteCrear(BaseModel):
 
 class PreguntaSugerida(BaseModel):
     """Model for AI-generated question"""
+    pregunta_id: Optional[str] = None
     pregunta: str
     tipo_pregunta: str  # "abierta", "si_no", "escala"
 
@@ -32,6 +33,7 @@ class VacanteConPreguntas(BaseModel):
     """Response model with job posting and suggested questions"""
     vacante_id: str
     preguntas_sugeridas: List[PreguntaSugerida]
+    estado_preguntas: str = "listas"  # "generando" mientras el LLM trabaja en segundo plano
 
 
 class PreguntaAprobacion(BaseModel):
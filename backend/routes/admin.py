@@ -0,0 +1,90 @@
+"""
+Admin routes - Operational endpoints (request profiles, startup report, caches)
+"""
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from config import settings
+from services.profiler import profiler
+from services.lazy import startup_report
+from services.plantillas_preguntas import plantillas_preguntas
+from typing import Optional
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+def _verificar_token(token: Optional[str]) -> None:
+    """Check ADMIN_TOKEN when it is set"""
+    if settings.admin_token and token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+def _verificar_acceso(token: Optional[str]) -> None:
+    """Hide the profile endpoints when profiling is off"""
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    _verificar_token(token)
+
+
+@router.get("/perfiles")
+async def listar_perfiles(x_admin_token: Optional[str] = Header(None)):
+    """
+    List the most recent request profiles (newest first)
+    
+    Returns:
+    - perfiles: id, method, path, status, duration and sample count
+    """
+    _verificar_acceso(x_admin_token)
+    return {"perfiles": profiler.listar()}
+
+
+@router.get("/perfiles/{perfil_id}")
+async def descargar_perfil(perfil_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Download a profile as collapsed stacks ("frame;frame;frame count")
+    
+    The file can be opened directly in speedscope or rendered with
+    flamegraph.pl. Stacks rooted at "[esperando]" are time the request
+    spent suspended in an await (LLM, email, background work).
+    """
+    _verificar_acceso(x_admin_token)
+    
+    perfil = profiler.obtener(perfil_id)
+    if not perfil:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    
+    return PlainTextResponse(
+        perfil.folded(),
+        headers={"Content-Disposition": f'attachment; filename="perfil-{perfil.id}.folded"'}
+    )
+
+
+@router.get("/arranque")
+async def reporte_arranque(x_admin_token: Optional[str] = Header(None)):
+    """
+    Startup cost report
+    
+    Returns:
+    - arranque_ms: Time from the first app import until the app was ready
+    - paquetes: Import self time per top-level package, by phase
+      ("arranque" or a lazy service built during startup); empty unless
+      STARTUP_REPORT_ENABLED
+    - modulos: Most expensive modules (inclusive and self time)
+    - servicios: Construction time of each lazy service, imports included,
+      and of each warm-up step ("calentamiento.<paso>")
+    """
+    _verificar_token(x_admin_token)
+    return startup_report.reporte()
+
+
+@router.get("/plantillas")
+async def estadisticas_plantillas(x_admin_token: Optional[str] = Header(None)):
+    """
+    Question template cache statistics
+    
+    Returns:
+    - plantillas: Stored entries
+    - aciertos_exactos / aciertos_similares / fallos: Lookups by result
+    - tasa_aciertos: Share of job postings served without the LLM (0-1)
+    """
+    _verificar_token(x_admin_token)
+    return plantillas_preguntas.estadisticas()
@@ -1,8 +1,9 @@
 """
 Candidato routes - Candidate endpoints
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Body, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Callable, Dict, List, Optional
 from models.candidato import (
     CandidatoAplicar,
     AplicacionConPreguntas,
@@ -14,14 +15,29 @@ from database import get_db
 from services.pdf_service import pdf_service
 from services.ia_service import ia_service
 from services.storage_service import storage_service
-from services.email_service import email_service
 from services.chatbot_service import chatbot_service
+from services.embedding_service import embedding_service
+from services.answer_log import answer_log
+from services.evaluacion_service import evaluacion_service
+from services.cv_upload import recibir_cv, CVInvalidoError
+from services.candidato_service import candidato_service
+from services.dashboard_service import dashboard_service
+import asyncio
+import json
 import uuid
 from datetime import datetime
 
 router = APIRouter(prefix="/api/candidato", tags=["Candidatos"])
 
 
+def _es_uuid(valor: str) -> bool:
+    try:
+        uuid.UUID(str(valor))
+        return True
+    except ValueError:
+        return False
+
+
 @router.post("/aplicar", response_model=AplicacionConPreguntas)
 async def aplicar_vacante(
     vacante_id: str = Form(...),
@@ -40,7 +56,11 @@ async def aplicar_vacante(
     3. Analyze CV with AI
     4. Create candidate and application records
     5. Return questions for candidate to answer
+    
+    Repeat applicants (same email) reuse their candidate record, and
+    steps 1-3 are skipped when they send a CV they already uploaded.
     """
+    cv = None
     try:
         db = get_db()
         
@@ -51,68 +71,72 @@ async def aplicar_vacante(
         
         vacante_data = vacante.data[0]
         
-        # Read PDF file
-        pdf_bytes = await cv_pdf.read()
-        
-        # Extract text from PDF
-        cv_text = await pdf_service.extract_text_from_pdf(pdf_bytes)
-        
-        # Analyze CV with AI
-        cv_analisis = await ia_service.analizar_cv(cv_text)
-        
-        # Create user record
-        usuario_id = str(uuid.uuid4())
-        usuario_record = {
-            "id": usuario_id,
-            "email": email,
-            "tipo_usuario": "candidato",
-            "nombre_completo": nombre_anonimo,
-            "telefono": telefono
-            # created_at y updated_at se generan automáticamente
-        }
-        
-        db.table("usuarios").insert(usuario_record).execute()
-        
-        # Create candidate record
-        # IMPORTANTE: candidato_id es BIGINT autoincremental, NO se genera manualmente
-        candidato_record = {
-            "usuario_id": usuario_id,
-            "nombre_anonimo": nombre_anonimo,
-            "email": email,  # ✅ SÍ existe en candidatos
-            "telefono": telefono,  # ✅ SÍ existe en candidatos
-            "años_experiencia": años_experiencia,  # ✅ Con tilde
-            "resumen_profesional": cv_analisis.get("resumen", "")  # ✅ SÍ existe
-            # id se genera automáticamente (BIGINT autoincremental)
-            # created_at se genera automáticamente
-        }
-        
-        result = db.table("candidatos").insert(candidato_record).execute()
-        candidato_id = result.data[0]["id"]  # Obtener el ID generado (BIGINT)
-        
-        # Upload CV to storage
-        cv_url = await storage_service.upload_cv(
-            file_bytes=pdf_bytes,
-            candidato_id=candidato_id,
-            filename=cv_pdf.filename
+        # Copy PDF to a temporary file in chunks (type and size checked on the way)
+        try:
+            cv = await recibir_cv(cv_pdf)
+        except CVInvalidoError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        
+        # Returning applicants keep their candidate record; a CV they already
+        # sent (same content hash) reuses its stored text and analysis
+        candidato_id = candidato_service.buscar(email)
+        cv_previo = candidato_service.cv_previo(candidato_id, cv.sha256) if candidato_id is not None else None
+        
+        if cv_previo is not None:
+            cv_text = cv_previo["texto_extraido"]
+            cv_analisis = cv_previo["analisis_cv"]
+        else:
+            # Extract text from PDF
+            cv_text = await pdf_service.extract_text_from_file(cv.path)
+            
+            # Analyze CV with AI
+            cv_analisis = await ia_service.analizar_cv(cv_text)
+        
+        # Create user and candidate records (a returning email keeps its stored data)
+        candidato_id, _ = await candidato_service.obtener_o_crear(
+            email=email,
+            nombre_anonimo=nombre_anonimo,
+            telefono=telefono,
+            años_experiencia=años_experiencia,
+            resumen_profesional=cv_analisis.get("resumen", "")
         )
         
-        # Save document record
-        documento_id = str(uuid.uuid4())
-        file_size_kb = len(pdf_bytes) // 1024  # Convert bytes to KB
-        
-        documento_record = {
-            "id": documento_id,
-            "candidato_id": candidato_id,  # BIGINT (no TEXT)
-            "tipo_documento": "cv",
-            "nombre_archivo": cv_pdf.filename,
-            "url_archivo": cv_url,
-            "tamaño_kb": file_size_kb,
-            "mime_type": cv_pdf.content_type or "application/pdf",
-            "texto_extraido": cv_text[:5000]  # Store first 5000 chars
-            # created_at se genera automáticamente con DEFAULT now()
-        }
-        
-        db.table("documentos").insert(documento_record).execute()
+        if cv_previo is None:
+            # Upload CV to storage
+            cv_url = await storage_service.upload_cv(
+                file_bytes=cv.path,
+                candidato_id=candidato_id,
+                filename=cv.filename,
+                sha256=cv.sha256
+            )
+            
+            # Save document record
+            documento_id = str(uuid.uuid4())
+            file_size_kb = cv.size_kb
+            
+            documento_record = {
+                "id": documento_id,
+                "candidato_id": candidato_id,  # BIGINT (no TEXT)
+                "tipo_documento": "cv",
+                "nombre_archivo": cv.filename,
+                "url_archivo": cv_url,
+                "tamaño_kb": file_size_kb,
+                "mime_type": cv.content_type,
+                # Referencia al CV almacenado por contenido (solo si se subió)
+                "hash_contenido": cv.sha256 if cv_url else None,
+                "texto_extraido": cv_text[:5000],  # Store first 5000 chars
+                # JSONB - se reutiliza si vuelve a enviar este CV (no si el análisis falló)
+                "analisis_cv": cv_analisis if ia_service.formatear_analisis_cv(cv_analisis) else None
+                # created_at se genera automáticamente con DEFAULT now()
+            }
+            
+            db.table("documentos").insert(documento_record).execute()
+            
+            # Index CV for semantic search (no bloquea la aplicación si falla)
+            try:
+                await asyncio.to_thread(embedding_service.indexar_cv, candidato_id, cv_text)
+            except Exception as e:
+                print(f"Error indexing CV embedding: {e}")
         
         # Create application record
         aplicacion_id = str(uuid.uuid4())
@@ -120,12 +144,16 @@ async def aplicar_vacante(
             "id": aplicacion_id,
             "vacante_id": vacante_id,
             "candidato_id": candidato_id,  # BIGINT (no TEXT, no UUID)
-            "estado": "aplicado"
+            "estado": "aplicado",
+            "analisis_cv": cv_analisis  # JSONB - se reutiliza en la evaluación
             # fecha_aplicacion, fecha_ultima_actualizacion y updated_at
             # se generan automáticamente con DEFAULT now()
         }
         
         db.table("aplicaciones").insert(aplicacion_record).execute()
+        dashboard_service.registrar_aplicacion(
+            vacante_data["empresa_id"], aplicacion_record, nombre_anonimo, vacante_data["titulo"]
+        )
         
         # Get approved questions for this job posting
         preguntas = db.table("vacante_preguntas").select("*").eq(
@@ -151,6 +179,9 @@ async def aplicar_vacante(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error aplicando a vacante: {str(e)}")
+    finally:
+        if cv is not None:
+            cv.cerrar()
 
 
 @router.post("/responder", response_model=AplicacionCompleta)
@@ -158,7 +189,7 @@ async def responder_preguntas(respuestas_data: ResponderPreguntas):
     """
     Submit answers to job posting questions
     
-    1. Save all answers to database
+    1. Save all answers to the answer log (respuestas_candidato)
     2. Evaluate candidate compatibility with AI
     3. Update application with scores
     4. Send confirmation email
@@ -171,106 +202,47 @@ async def responder_preguntas(respuestas_data: ResponderPreguntas):
         if not aplicacion.data:
             raise HTTPException(status_code=404, detail="Aplicación no encontrada")
         
-        aplicacion_data = aplicacion.data[0]
-        candidato_id = aplicacion_data["candidato_id"]
-        vacante_id = aplicacion_data["vacante_id"]
-        
-        # Get candidate info
-        candidato = db.table("candidatos").select("*").eq("id", candidato_id).execute()
-        candidato_data = candidato.data[0]
-        
-        # Email está en la tabla candidatos (no necesitamos buscar en usuarios)
-        candidato_email = candidato_data.get("email", "")
-        
-        # Get job posting info
-        vacante = db.table("vacantes").select("*").eq("id", vacante_id).execute()
-        vacante_data = vacante.data[0]
-        
-        # Get CV text
-        documento = db.table("documentos").select("texto_extraido").eq(
-            "candidato_id", candidato_id
-        ).eq("tipo_documento", "cv").execute()
-        cv_text = documento.data[0]["texto_extraido"] if documento.data else ""
+        # Get all question texts in one query (only valid IDs of this job posting)
+        pregunta_ids = [str(r.pregunta_id) for r in respuestas_data.respuestas if _es_uuid(r.pregunta_id)]
+        textos = {}
+        if pregunta_ids:
+            preguntas = db.table("vacante_preguntas").select("id, pregunta").in_(
+                "id", pregunta_ids
+            ).eq("vacante_id", aplicacion.data[0]["vacante_id"]).execute()
+            textos = {str(p["id"]): p["pregunta"] for p in preguntas.data}
         
         # Save each answer
         respuestas_completas = []
-        for respuesta in respuestas_data.respuestas:
-            respuesta_id = str(uuid.uuid4())
-            
-            # Get question text
-            pregunta = db.table("vacante_preguntas").select("pregunta").eq("id", respuesta.pregunta_id).execute()
-            pregunta_texto = pregunta.data[0]["pregunta"] if pregunta.data else ""
-            
-            # NOTA: No existe tabla respuestas_candidato
-            # Las respuestas se guardan en la evaluación final
-            # Por ahora solo las acumulamos para la evaluación de IA
-            
-            # respuesta_record = {
-            #     "id": respuesta_id,
-            #     "aplicacion_id": respuestas_data.aplicacion_id,
-            #     "pregunta_id": respuesta.pregunta_id,
-            #     "respuesta": respuesta.respuesta
-            # }
-            # 
-            # db.table("respuestas_candidato").insert(respuesta_record).execute()
+        for orden, respuesta in enumerate(respuestas_data.respuestas):
+            pregunta_texto = textos.get(str(respuesta.pregunta_id), "")
             
-            # Las respuestas se procesan pero no se guardan individualmente
-            # Se guardarán en la tabla evaluaciones después de la evaluación de IA
+            answer_log.append(
+                aplicacion_id=respuestas_data.aplicacion_id,
+                respuesta=respuesta.respuesta,
+                pregunta=pregunta_texto,
+                # Un ID desconocido rompería la FK del lote: se guarda sin él
+                pregunta_id=str(respuesta.pregunta_id) if str(respuesta.pregunta_id) in textos else None,
+                orden=orden,
+                origen="formulario"
+            )
             
             respuestas_completas.append({
                 "pregunta": pregunta_texto,
                 "respuesta": respuesta.respuesta
             })
         
-        # Evaluate compatibility with AI
-        evaluacion = await ia_service.evaluar_compatibilidad(
-            cv_text=cv_text,
-            respuestas=respuestas_completas,
-            titulo=vacante_data["titulo"],
-            habilidades_requeridas=vacante_data["habilidades_requeridas"],
-            experiencia_min=vacante_data["experiencia_min"]
-        )
-        
-        # Update application with scores
-        db.table("aplicaciones").update({
-            "puntuacion_ia": evaluacion["puntuacion"],
-            "compatibilidad_porcentaje": evaluacion["compatibilidad"],
-            "estado": "en_revision"
-        }).eq("id", respuestas_data.aplicacion_id).execute()
-        
-        # Save evaluation to evaluaciones table
-        evaluacion_record = {
-            "entrevista_id": None,  # Puede vincularse después si hay entrevista
-            "puntaje_general": evaluacion["puntuacion"],
-            "fortalezas": evaluacion.get("fortalezas", []),
-            "debilidades": evaluacion.get("debilidades", []),
-            "evaluador_nombre": "IA - Groq LLaMA 3.1",
-            "aspectos_positivos": evaluacion.get("fortalezas", []),
-            "aspectos_negativos": evaluacion.get("debilidades", []),
-            "decision_final": "Pendiente de revisión"
-            # created_at se genera automáticamente
-        }
-        
-        db.table("evaluaciones").insert(evaluacion_record).execute()
-        
-        # Get company info for email
-        empresa = db.table("empresas").select("nombre_empresa").eq("id", vacante_data["empresa_id"]).execute()
-        empresa_nombre = empresa.data[0]["nombre_empresa"] if empresa.data else "La empresa"
-        
-        # Send confirmation email
-        email_enviado = await email_service.send_application_confirmation(
-            to_email=candidato_email,  # Email está en tabla usuarios
-            candidato_nombre=candidato_data["nombre_anonimo"],
-            vacante_titulo=vacante_data["titulo"],
-            empresa_nombre=empresa_nombre,
-            puntuacion=evaluacion["puntuacion"]
+        # Evaluate, save scores and send confirmation email
+        resultado = await evaluacion_service.evaluar_aplicacion(
+            respuestas_data.aplicacion_id,
+            respuestas_completas,
+            aplicacion_data=aplicacion.data[0]
         )
         
         return AplicacionCompleta(
             mensaje="Aplicación enviada exitosamente",
-            puntuacion_ia=evaluacion["puntuacion"],
-            compatibilidad_porcentaje=evaluacion["compatibilidad"],
-            email_enviado=email_enviado
+            puntuacion_ia=resultado["puntuacion"],
+            compatibilidad_porcentaje=resultado["compatibilidad"],
+            email_enviado=resultado["email_enviado"]
         )
         
     except HTTPException:
@@ -279,6 +251,79 @@ async def responder_preguntas(respuestas_data: ResponderPreguntas):
         raise HTTPException(status_code=500, detail=f"Error procesando respuestas: {str(e)}")
 
 
+@router.get("/{candidato_id}/vacantes-recomendadas")
+async def obtener_vacantes_recomendadas(
+    candidato_id: str,
+    k: int = Query(10, ge=1, le=50, description="Número de vacantes a retornar")
+):
+    """
+    Get published job postings that best match the candidate's CV
+    
+    Uses local embeddings (semantic search), not keyword matching.
+    
+    Path parameter:
+    - candidato_id: Candidate ID
+    
+    Returns:
+    - vacantes: Published job postings sorted by similarity (0-1)
+    """
+    try:
+        db = get_db()
+        
+        cv_text = None
+        if embedding_service.cvs.get_vector(candidato_id) is None:
+            documento = db.table("documentos").select("texto_extraido").eq(
+                "candidato_id", candidato_id
+            ).eq("tipo_documento", "cv").order("created_at", desc=True).limit(1).execute()
+            if not documento.data:
+                raise HTTPException(status_code=404, detail="CV del candidato no encontrado")
+            cv_text = documento.data[0]["texto_extraido"]
+            await asyncio.to_thread(embedding_service.indexar_cv, candidato_id, cv_text)
+        
+        # Pedimos más resultados de los necesarios: algunas vacantes pueden
+        # haberse cerrado desde que se indexaron
+        resultados = await asyncio.to_thread(
+            embedding_service.vacantes_para_cv, candidato_id, cv_text, k * 2
+        )
+        if not resultados:
+            return {"vacantes": []}
+        
+        similitudes = dict(resultados)
+        vacantes = db.table("vacantes").select(
+            "id, titulo, ciudad, salario_min, salario_max, modalidad, habilidades_requeridas, fecha_publicacion, empresa_id"
+        ).in_("id", list(similitudes.keys())).eq("estado", "publicada").execute()
+        
+        empresa_ids = list(set(v["empresa_id"] for v in vacantes.data))
+        empresas_dict = {}
+        if empresa_ids:
+            empresas = db.table("empresas").select("id, nombre_empresa").in_("id", empresa_ids).execute()
+            empresas_dict = {e["id"]: e["nombre_empresa"] for e in empresas.data}
+        
+        vacantes_lista = [
+            {
+                "id": v["id"],
+                "titulo": v["titulo"],
+                "empresa_nombre": empresas_dict.get(v["empresa_id"], "Empresa"),
+                "ciudad": v["ciudad"],
+                "salario_min": v.get("salario_min"),
+                "salario_max": v.get("salario_max"),
+                "modalidad": v["modalidad"],
+                "habilidades_requeridas": v["habilidades_requeridas"],
+                "fecha_publicacion": v.get("fecha_publicacion"),
+                "similitud": round(similitudes[str(v["id"])], 4)
+            }
+            for v in vacantes.data
+        ]
+        vacantes_lista.sort(key=lambda v: v["similitud"], reverse=True)
+        
+        return {"vacantes": vacantes_lista[:k]}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo vacantes recomendadas: {str(e)}")
+
+
 
 # ============================================================================
 # CHATBOT ENDPOINTS - Conversational AI for candidate interviews
@@ -287,25 +332,28 @@ async def responder_preguntas(respuestas_data: ResponderPreguntas):
 @router.post("/chatbot/iniciar")
 async def iniciar_chatbot(
     aplicacion_id: str,
-    candidato_nombre: str,
-    vacante_titulo: str,
-    preguntas: List[str]
+    candidato_nombre: Optional[str] = None,
+    vacante_titulo: Optional[str] = None,
+    preguntas: Optional[List[str]] = Body(None)
 ):
     """
     Start a conversational chatbot session for candidate interview.
     
     Initializes a conversation with memory, greeting the candidate
-    and asking the first question naturally.
+    and asking the first question naturally. The server loads the
+    approved questions of the application's job posting and keeps
+    track of the interview progress.
     
     Request body:
     - aplicacion_id: Unique application identifier
-    - candidato_nombre: Candidate's name for personalization
-    - vacante_titulo: Job title for context
-    - preguntas: List of questions to ask during interview
+    - candidato_nombre: Optional, loaded from the application if omitted
+    - vacante_titulo: Optional, loaded from the application if omitted
+    - preguntas: Optional (legacy clients), approved questions are used if omitted
     
     Returns:
     - mensaje: Greeting and first question from chatbot
     - aplicacion_id: Application ID for tracking
+    - total_preguntas: Number of questions in the interview
     """
     try:
         mensaje = await chatbot_service.iniciar_conversacion(
@@ -318,9 +366,12 @@ async def iniciar_chatbot(
         return {
             "mensaje": mensaje,
             "aplicacion_id": aplicacion_id,
-            "estado": "iniciado"
+            "estado": "iniciado",
+            "total_preguntas": chatbot_service.estado_entrevista(aplicacion_id)["total_preguntas"]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -332,19 +383,21 @@ async def iniciar_chatbot(
 async def siguiente_pregunta_chatbot(
     aplicacion_id: str,
     respuesta_anterior: str,
-    preguntas_restantes: List[str]
+    preguntas_restantes: Optional[List[str]] = Body(None)
 ):
     """
     Process candidate's answer and get next question from chatbot.
     
     Maintains conversation context using LangChain memory,
     acknowledging the previous response and naturally transitioning
-    to the next question.
+    to the next question. The server tracks which question comes next,
+    so the client only sends the answer.
     
     Request body:
     - aplicacion_id: Application ID for conversation tracking
     - respuesta_anterior: Candidate's previous answer
-    - preguntas_restantes: Remaining questions to ask
+    - preguntas_restantes: Optional (legacy clients), ignored once the
+      interview plan exists
     
     Returns:
     - mensaje: Acknowledgment and next question
@@ -357,12 +410,16 @@ async def siguiente_pregunta_chatbot(
             preguntas_restantes=preguntas_restantes
         )
         
+        estado = chatbot_service.estado_entrevista(aplicacion_id)
+        
         return {
             "mensaje": mensaje,
-            "quedan_preguntas": len(preguntas_restantes) > 0,
-            "preguntas_restantes": len(preguntas_restantes)
+            "quedan_preguntas": estado["quedan_preguntas"],
+            "preguntas_restantes": estado["preguntas_restantes"]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -384,15 +441,14 @@ async def finalizar_chatbot(aplicacion_id: str):
     Returns:
     - mensaje: Farewell message from chatbot
     - finalizado: Boolean indicating conversation ended
+    - evaluacion_en_proceso: True if the compatibility evaluation was
+      started in the background from the stored answers
     """
     try:
+        fin = _estado_final(aplicacion_id)
         mensaje = await chatbot_service.finalizar_conversacion(aplicacion_id)
         
-        return {
-            "mensaje": mensaje,
-            "finalizado": True,
-            "aplicacion_id": aplicacion_id
-        }
+        return {"mensaje": mensaje, **fin}
         
     except Exception as e:
         raise HTTPException(
@@ -401,6 +457,197 @@ async def finalizar_chatbot(aplicacion_id: str):
         )
 
 
+# ----------------------------------------------------------------------------
+# Streaming variants: Server-Sent Events and a WebSocket session.
+# Tokens are pushed as the LLM produces them, so the candidate sees the
+# first words after time-to-first-token instead of the full generation.
+# ----------------------------------------------------------------------------
+
+def _sse_event(evento: str, data: Dict) -> str:
+    """Format one Server-Sent Event (data is JSON so newlines are safe)"""
+    return f"event: {evento}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(chunks: AsyncIterator[str], fin: Callable[[], Dict]) -> StreamingResponse:
+    """
+    Stream chatbot text as `token` events followed by one `fin` event
+    carrying the same metadata as the non-streaming endpoint
+    (computed once the message is complete).
+    """
+    async def eventos():
+        async for texto in chunks:
+            yield _sse_event("token", {"texto": texto})
+        yield _sse_event("fin", fin())
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/chatbot/iniciar/stream")
+async def iniciar_chatbot_stream(
+    aplicacion_id: str,
+    candidato_nombre: Optional[str] = None,
+    vacante_titulo: Optional[str] = None,
+    preguntas: Optional[List[str]] = Body(None)
+):
+    """
+    Streaming (SSE) variant of `/chatbot/iniciar`.
+    
+    Events:
+    - token: {"texto": "..."} partial greeting text
+    - fin: {"aplicacion_id": "...", "estado": "iniciado", "total_preguntas": int}
+    """
+    try:
+        chunks = chatbot_service.iniciar_conversacion_stream(
+            aplicacion_id=aplicacion_id,
+            candidato_nombre=candidato_nombre,
+            vacante_titulo=vacante_titulo,
+            preguntas=preguntas
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return _sse_response(chunks, lambda: {
+        "aplicacion_id": aplicacion_id,
+        "estado": "iniciado",
+        "total_preguntas": chatbot_service.estado_entrevista(aplicacion_id)["total_preguntas"]
+    })
+
+
+@router.post("/chatbot/siguiente/stream")
+async def siguiente_pregunta_chatbot_stream(
+    aplicacion_id: str,
+    respuesta_anterior: str,
+    preguntas_restantes: Optional[List[str]] = Body(None)
+):
+    """
+    Streaming (SSE) variant of `/chatbot/siguiente`.
+    
+    Events:
+    - token: {"texto": "..."} partial message text
+    - fin: {"quedan_preguntas": bool, "preguntas_restantes": int}
+    """
+    try:
+        chunks = chatbot_service.siguiente_pregunta_stream(
+            aplicacion_id=aplicacion_id,
+            respuesta_anterior=respuesta_anterior,
+            preguntas_restantes=preguntas_restantes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return _sse_response(chunks, lambda: _estado_siguiente(aplicacion_id))
+
+
+@router.post("/chatbot/finalizar/stream")
+async def finalizar_chatbot_stream(aplicacion_id: str):
+    """
+    Streaming (SSE) variant of `/chatbot/finalizar`.
+    
+    Events:
+    - token: {"texto": "..."} partial farewell text
+    - fin: {"finalizado": true, "aplicacion_id": "...", "evaluacion_en_proceso": bool}
+    """
+    fin = _estado_final(aplicacion_id)
+    chunks = chatbot_service.finalizar_conversacion_stream(aplicacion_id)
+    return _sse_response(chunks, lambda: fin)
+
+
+def _estado_final(aplicacion_id: str) -> Dict:
+    # Se calcula antes de finalizar: al cerrar se libera el plan
+    estado = chatbot_service.estado_entrevista(aplicacion_id)
+    return {
+        "finalizado": True,
+        "aplicacion_id": aplicacion_id,
+        "evaluacion_en_proceso": estado["respuestas_registradas"] > 0
+    }
+
+
+def _estado_siguiente(aplicacion_id: str) -> Dict:
+    estado = chatbot_service.estado_entrevista(aplicacion_id)
+    return {
+        "quedan_preguntas": estado["quedan_preguntas"],
+        "preguntas_restantes": estado["preguntas_restantes"]
+    }
+
+
+@router.websocket("/chatbot/ws/{aplicacion_id}")
+async def chatbot_websocket(websocket: WebSocket, aplicacion_id: str):
+    """
+    Whole chatbot interview over a single WebSocket connection.
+    
+    Client messages (JSON):
+    - {"tipo": "iniciar"} (optional legacy fields: candidato_nombre, vacante_titulo, preguntas)
+    - {"tipo": "responder", "respuesta": "..."}
+    - {"tipo": "finalizar"}
+    
+    Server messages (JSON):
+    - {"tipo": "token", "texto": "..."} for each generated chunk
+    - {"tipo": "fin", ...} when the message is complete (same metadata as REST)
+    - {"tipo": "error", "detalle": "..."} for invalid messages
+    
+    The connection is closed by the server after "finalizar".
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                await websocket.send_json({"tipo": "error", "detalle": "El mensaje debe ser JSON"})
+                continue
+            if not isinstance(data, dict):
+                await websocket.send_json({"tipo": "error", "detalle": "El mensaje debe ser un objeto JSON"})
+                continue
+            tipo = data.get("tipo")
+            
+            try:
+                if tipo == "iniciar":
+                    chunks = chatbot_service.iniciar_conversacion_stream(
+                        aplicacion_id=aplicacion_id,
+                        candidato_nombre=data.get("candidato_nombre"),
+                        vacante_titulo=data.get("vacante_titulo"),
+                        preguntas=data.get("preguntas")
+                    )
+                    fin = lambda: {
+                        "aplicacion_id": aplicacion_id,
+                        "estado": "iniciado",
+                        "total_preguntas": chatbot_service.estado_entrevista(aplicacion_id)["total_preguntas"]
+                    }
+                elif tipo == "responder":
+                    chunks = chatbot_service.siguiente_pregunta_stream(
+                        aplicacion_id=aplicacion_id,
+                        respuesta_anterior=data.get("respuesta", ""),
+                        preguntas_restantes=data.get("preguntas_restantes")
+                    )
+                    fin = lambda: _estado_siguiente(aplicacion_id)
+                elif tipo == "finalizar":
+                    estado_final = _estado_final(aplicacion_id)
+                    chunks = chatbot_service.finalizar_conversacion_stream(aplicacion_id)
+                    fin = lambda: estado_final
+                else:
+                    await websocket.send_json({"tipo": "error", "detalle": f"Tipo de mensaje no soportado: {tipo}"})
+                    continue
+            except ValueError as e:
+                await websocket.send_json({"tipo": "error", "detalle": str(e)})
+                continue
+            
+            async for texto in chunks:
+                await websocket.send_json({"tipo": "token", "texto": texto})
+            await websocket.send_json({"tipo": "fin", **fin()})
+            
+            if tipo == "finalizar":
+                await websocket.close()
+                return
+                
+    except WebSocketDisconnect:
+        # La memoria se conserva: el candidato puede reconectarse y continuar
+        pass
+
+
 @router.delete("/chatbot/limpiar/{aplicacion_id}")
 async def limpiar_chatbot(aplicacion_id: str):
     """
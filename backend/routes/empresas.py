@@ -1,14 +1,34 @@
 """
 Empresa routes - Company endpoints
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from models.empresa import EmpresaRegistro, EmpresaResponse
 from models.vacante import VacanteCrear, VacanteConPreguntas, AprobarPreguntas
 from models.candidato import AplicacionDetalle
 from database import get_db
-from services.ia_service import ia_service
+from services.embedding_service import embedding_service
+from services.chatbot_service import chatbot_service
+from services.preguntas_service import preguntas_service
+from services.dashboard_service import dashboard_service
+from services import aplicaciones_service
+from services.respuesta_json import RespuestaJSON
+from services.aplicaciones_service import CursorInvalidoError, FiltrosAplicaciones
+from services.importacion_service import (
+    ImportacionDemasiadoGrandeError,
+    ImportacionInvalidaError,
+    fila_vacante,
+    importacion_service,
+    leer_cuerpo,
+    parsear
+)
+from config import settings
+import asyncio
+import json
+import threading
 import uuid
 from datetime import datetime
+from typing import Optional
 
 router = APIRouter(prefix="/api/empresa", tags=["Empresas"])
 
@@ -60,14 +80,20 @@ async def registrar_empresa(empresa: EmpresaRegistro):
 
 
 @router.post("/crear-vacante", response_model=VacanteConPreguntas)
-async def crear_vacante(vacante: VacanteCrear):
+async def crear_vacante(
+    vacante: VacanteCrear,
+    esperar: bool = Query(False, description="Esperar a que las preguntas estén listas")
+):
     """
     Create a new job posting and generate AI questions
     
     1. Saves job posting as draft
-    2. Generates intelligent questions using Claude AI
-    3. Saves questions to database
-    4. Returns questions for company approval
+    2. Starts generating questions in the background
+    3. Returns right away with estado_preguntas="generando"
+    4. Questions are saved in one insert when ready; follow them at
+       GET /vacantes/{vacante_id}/preguntas (polling) or /preguntas/stream (SSE)
+    
+    With esperar=true the response waits for the questions (previous behavior).
     """
     try:
         db = get_db()
@@ -79,57 +105,21 @@ async def crear_vacante(vacante: VacanteCrear):
         
         # Create job posting
         vacante_id = str(uuid.uuid4())
-        vacante_data = {
-            "id": vacante_id,
-            "empresa_id": vacante.empresa_id,
-            "titulo": vacante.titulo,
-            "descripcion": vacante.descripcion,
-            "cargo": vacante.cargo,
-            "tipo_contrato": vacante.tipo_contrato,
-            "modalidad": vacante.modalidad,
-            "habilidades_requeridas": vacante.habilidades_requeridas,
-            "experiencia_min": vacante.experiencia_min,
-            "experiencia_max": vacante.experiencia_max,
-            "salario_min": float(vacante.salario_min) if vacante.salario_min else None,
-            "salario_max": float(vacante.salario_max) if vacante.salario_max else None,
-            "ciudad": vacante.ciudad,
-            "estado": "borrador"
-            # created_at y updated_at se generan automáticamente con DEFAULT now()
-        }
+        db.table("vacantes").insert(fila_vacante(vacante, vacante_id)).execute()
         
-        db.table("vacantes").insert(vacante_data).execute()
+        # Generate questions using AI (background job)
+        preguntas_service.iniciar(vacante_id, vacante)
+        if esperar:
+            await preguntas_service.esperar(vacante_id, timeout=settings.preguntas_stream_timeout_seconds)
         
-        # Generate questions using AI
-        preguntas_ia = await ia_service.generar_preguntas_vacante(
-            titulo=vacante.titulo,
-            descripcion=vacante.descripcion,
-            habilidades_requeridas=vacante.habilidades_requeridas,
-            experiencia_min=vacante.experiencia_min
-        )
-        
-        # Save questions to database
-        preguntas_guardadas = []
-        for pregunta_data in preguntas_ia:
-            pregunta_id = str(uuid.uuid4())
-            pregunta_record = {
-                "id": pregunta_id,
-                "vacante_id": vacante_id,
-                "pregunta": pregunta_data["pregunta"],
-                "tipo_pregunta": pregunta_data["tipo_pregunta"],
-                "aprobada_por_empresa": False
-                # created_at se genera automáticamente con DEFAULT now()
-            }
-            
-            db.table("vacante_preguntas").insert(pregunta_record).execute()
-            
-            preguntas_guardadas.append({
-                "pregunta_id": pregunta_id,
-                **pregunta_data
-            })
+        estado = preguntas_service.estado(vacante_id)
+        if estado["estado"] == "error":
+            raise HTTPException(status_code=500, detail=f"Error generando preguntas: {estado['error']}")
         
         return VacanteConPreguntas(
             vacante_id=vacante_id,
-            preguntas_sugeridas=preguntas_ia
+            preguntas_sugeridas=estado["preguntas_sugeridas"],
+            estado_preguntas=estado["estado"]
         )
         
     except HTTPException:
@@ -138,6 +128,112 @@ async def crear_vacante(vacante: VacanteCrear):
         raise HTTPException(status_code=500, detail=f"Error creando vacante: {str(e)}")
 
 
+@router.get("/vacantes/{vacante_id}/preguntas")
+async def obtener_preguntas_vacante(vacante_id: str):
+    """
+    Poll the questions of a job posting created with `crear-vacante`
+    
+    Returns:
+    - estado: "generando", "listas", "error" or "pendiente"
+    - preguntas_sugeridas: Questions with pregunta_id (once "listas")
+    """
+    try:
+        return preguntas_service.estado(vacante_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo preguntas: {str(e)}")
+
+
+@router.get("/vacantes/{vacante_id}/preguntas/stream")
+async def stream_preguntas_vacante(vacante_id: str):
+    """
+    Server-Sent Events variant of `/vacantes/{vacante_id}/preguntas`
+    
+    Events:
+    - `estado`: current state right away
+    - `listas` / `error` / `pendiente`: final state once generation ends
+      (or after PREGUNTAS_STREAM_TIMEOUT_SECONDS)
+    """
+    def evento(nombre: str, data: dict) -> str:
+        return f"event: {nombre}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    async def eventos():
+        estado = preguntas_service.estado(vacante_id)
+        yield evento("estado", estado)
+        if estado["estado"] != "generando":
+            return
+        if not await preguntas_service.esperar(vacante_id, timeout=settings.preguntas_stream_timeout_seconds):
+            yield evento("error", {**estado, "estado": "error", "error": "Tiempo de espera agotado"})
+            return
+        estado = preguntas_service.estado(vacante_id)
+        yield evento(estado["estado"], estado)
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/importar-vacantes")
+async def importar_vacantes(request: Request):
+    """
+    Create many job postings at once
+    
+    Body (by Content-Type, up to IMPORTACION_MAX_MB):
+    - application/json: list of VacanteCrear (or {"vacantes": [...]})
+    - application/x-ndjson: one VacanteCrear per line
+    - text/csv: header row with VacanteCrear fields; habilidades_requeridas
+      separated by ";" or "|"
+    
+    The import runs as a background job: postings are inserted in one
+    batch as drafts, questions are generated concurrently and saved in one
+    insert. The response is an NDJSON stream of its events, starting with
+    the importacion_id; disconnecting doesn't stop the import, which can
+    be followed again at /importaciones/{importacion_id}.
+    """
+    try:
+        body = await leer_cuerpo(request.stream(), request.headers.get("content-length"))
+        items = parsear(request.headers.get("content-type", "application/json"), body)
+    except ImportacionDemasiadoGrandeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ImportacionInvalidaError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="No hay vacantes para importar")
+    if len(items) > settings.importacion_max_vacantes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo {settings.importacion_max_vacantes} vacantes por importación"
+        )
+    
+    importacion_id = importacion_service.iniciar(items)
+    return _eventos_importacion(importacion_id, 0, {"estado": "iniciada", "importacion_id": importacion_id})
+
+
+@router.get("/importaciones/{importacion_id}")
+async def seguir_importacion(importacion_id: str, desde: int = Query(0, ge=0)):
+    """
+    Follow an import started with /importar-vacantes
+    
+    Replays its events from `desde` (0 = all) and keeps streaming until it
+    finishes. Finished imports are kept for 10 minutes.
+    """
+    if not importacion_service.existe(importacion_id):
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    return _eventos_importacion(importacion_id, desde)
+
+
+def _eventos_importacion(importacion_id: str, desde: int, inicio: Optional[dict] = None) -> StreamingResponse:
+    async def lineas():
+        if inicio is not None:
+            yield json.dumps(inicio, ensure_ascii=False) + "\n"
+        async for evento in importacion_service.seguir(importacion_id, desde):
+            yield json.dumps(evento, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(lineas(), media_type="application/x-ndjson")
+
+
 @router.post("/aprobar-preguntas")
 async def aprobar_preguntas(aprobacion: AprobarPreguntas):
     """
@@ -160,6 +256,19 @@ async def aprobar_preguntas(aprobacion: AprobarPreguntas):
             "fecha_publicacion": datetime.utcnow().isoformat()
         }).eq("id", aprobacion.vacante_id).execute()
         
+        # Index job posting for semantic search (no bloquea la publicación si falla)
+        try:
+            vacante = db.table("vacantes").select(
+                "id, titulo, cargo, descripcion, habilidades_requeridas"
+            ).eq("id", aprobacion.vacante_id).execute()
+            if vacante.data:
+                await asyncio.to_thread(embedding_service.indexar_vacante, vacante.data[0])
+        except Exception as e:
+            print(f"Error indexing job posting embedding: {e}")
+        
+        # Pre-generate the chatbot opener in the background
+        chatbot_service.programar_apertura(aprobacion.vacante_id)
+        
         return {
             "mensaje": "Vacante publicada exitosamente",
             "vacante_id": aprobacion.vacante_id
@@ -170,63 +279,212 @@ async def aprobar_preguntas(aprobacion: AprobarPreguntas):
 
 
 @router.get("/{empresa_id}/aplicaciones")
-async def obtener_aplicaciones(empresa_id: str):
+async def obtener_aplicaciones(
+    empresa_id: str,
+    estado: Optional[str] = Query(None, description="Estados separados por coma (ej. aplicado,en_revision)"),
+    vacante_id: Optional[str] = Query(None, description="Solo una vacante"),
+    min_puntuacion: Optional[int] = Query(None, ge=0, le=100, description="Puntuación IA mínima"),
+    min_compatibilidad: Optional[int] = Query(None, ge=0, le=100, description="Compatibilidad mínima (%)"),
+    desde: Optional[datetime] = Query(None, description="Aplicaciones desde esta fecha (incluida)"),
+    hasta: Optional[datetime] = Query(None, description="Aplicaciones antes de esta fecha"),
+    orden: str = Query("fecha", pattern="^(fecha|puntuacion|compatibilidad)$", description="Clave de orden"),
+    desc: bool = Query(True, description="Orden descendente (mejores / más recientes primero)"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Tamaño de página (sin limit ni cursor: todas)"),
+    cursor: Optional[str] = Query(None, description="siguiente_cursor de la página anterior")
+):
     """
-    Get all applications for company's job postings
+    Get applications for company's job postings
     
-    Returns list of applications with candidate info and scores
+    Filters, sort and limit run in the database and pages are chained
+    with a keyset cursor. Sorting by puntuacion or compatibilidad only
+    includes evaluated applications, so `orden=compatibilidad&limit=10`
+    is the top 10. Without `limit` and `cursor` every application is
+    returned, as before pagination existed.
+    
+    Returns:
+    - aplicaciones: Applications with candidate info and scores
+    - siguiente_cursor: Pass as `cursor` for the next page (null on the last)
     """
     try:
-        db = get_db()
-        
-        # Get applications for this company's job postings
-        query = """
-            SELECT 
-                a.id as aplicacion_id,
-                a.estado,
-                a.created_at as fecha_aplicacion,
-                a.puntuacion_ia,
-                a.compatibilidad_porcentaje,
-                c.nombre_anonimo as candidato_nombre,
-                v.titulo as vacante_titulo
-            FROM aplicaciones a
-            JOIN candidatos c ON a.candidato_id = c.id
-            JOIN vacantes v ON a.vacante_id = v.id
-            WHERE v.empresa_id = '{}'
-            ORDER BY a.fecha_aplicacion DESC
-        """.format(empresa_id)
-        
-        result = db.rpc('exec_sql', {'query': query}).execute()
-        
-        if not result.data:
-            # Fallback: manual join
-            vacantes = db.table("vacantes").select("id").eq("empresa_id", empresa_id).execute()
-            vacante_ids = [v["id"] for v in vacantes.data]
-            
-            if not vacante_ids:
-                return {"aplicaciones": []}
-            
-            aplicaciones_data = []
-            for vacante_id in vacante_ids:
-                apps = db.table("aplicaciones").select("*").eq("vacante_id", vacante_id).execute()
-                
-                for app in apps.data:
-                    candidato = db.table("candidatos").select("nombre_anonimo").eq("id", app["candidato_id"]).execute()
-                    vacante = db.table("vacantes").select("titulo").eq("id", app["vacante_id"]).execute()
-                    
-                    aplicaciones_data.append({
-                        "aplicacion_id": app["id"],
-                        "candidato_nombre": candidato.data[0]["nombre_anonimo"] if candidato.data else "N/A",
-                        "vacante_titulo": vacante.data[0]["titulo"] if vacante.data else "N/A",
-                        "puntuacion_ia": app.get("puntuacion_ia"),
-                        "compatibilidad_porcentaje": app.get("compatibilidad_porcentaje"),
-                        "estado": app["estado"],
-                        "fecha_aplicacion": app.get("created_at")
-                    })
+        filtros = FiltrosAplicaciones(
+            estados=[e.strip() for e in estado.split(",") if e.strip()] if estado else None,
+            vacante_id=vacante_id,
+            min_puntuacion=min_puntuacion,
+            min_compatibilidad=min_compatibilidad,
+            desde=desde,
+            hasta=hasta
+        )
+        if limit is None and cursor is None:
+            # Clientes anteriores a la paginación: la lista completa
+            def todas():
+                return [
+                    fila
+                    for filas in aplicaciones_service.paginas(
+                        empresa_id, filtros, settings.exportacion_pagina, orden, desc
+                    )
+                    for fila in filas
+                ]
             
-            return {"aplicaciones": aplicaciones_data}
+            aplicaciones, siguiente_cursor = await asyncio.to_thread(todas), None
+        else:
+            aplicaciones, siguiente_cursor = await asyncio.to_thread(
+                aplicaciones_service.pagina, empresa_id, filtros, orden, desc, limit or 50, cursor
+            )
         
-        return {"aplicaciones": result.data}
+        return RespuestaJSON({"aplicaciones": aplicaciones, "siguiente_cursor": siguiente_cursor})
         
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo aplicaciones: {str(e)}")
+
+
+@router.get("/{empresa_id}/aplicaciones/exportar")
+async def exportar_aplicaciones(
+    empresa_id: str,
+    formato: str = Query("csv", pattern="^(csv|ndjson)$", description="csv o ndjson"),
+    estado: Optional[str] = Query(None, description="Estados separados por coma"),
+    vacante_id: Optional[str] = Query(None, description="Solo una vacante"),
+    min_puntuacion: Optional[int] = Query(None, ge=0, le=100),
+    min_compatibilidad: Optional[int] = Query(None, ge=0, le=100),
+    desde: Optional[datetime] = Query(None),
+    hasta: Optional[datetime] = Query(None)
+):
+    """
+    Download every application of a company as CSV or NDJSON
+    
+    Rows are read in keyset pages of EXPORTACION_PAGINA (oldest first)
+    and written as each page arrives, so memory stays flat and the first
+    bytes go out before the export is complete. Same filters as
+    `/aplicaciones`.
+    """
+    filtros = FiltrosAplicaciones(
+        estados=[e.strip() for e in estado.split(",") if e.strip()] if estado else None,
+        vacante_id=vacante_id,
+        min_puntuacion=min_puntuacion,
+        min_compatibilidad=min_compatibilidad,
+        desde=desde,
+        hasta=hasta
+    )
+    
+    async def filas():
+        if formato == "csv":
+            # BOM para que Excel detecte UTF-8 (tildes y ñ)
+            yield "\ufeff" + aplicaciones_service.a_csv([], encabezado=True)
+        
+        paginas = aplicaciones_service.paginas(empresa_id, filtros, settings.exportacion_pagina)
+        # Cada página se lee en un hilo; el cierre espera a que termine la
+        # lectura en curso (cerrar un generador que se está ejecutando falla)
+        candado = threading.Lock()
+        
+        def siguiente():
+            with candado:
+                return next(paginas, None)
+        
+        def cerrar():
+            with candado:
+                paginas.close()
+        
+        try:
+            while True:
+                pagina = await asyncio.to_thread(siguiente)
+                if pagina is None:
+                    break
+                if formato == "csv":
+                    yield aplicaciones_service.a_csv(pagina)
+                else:
+                    yield "".join(json.dumps(f, ensure_ascii=False, default=str) + "\n" for f in pagina)
+        except Exception as e:
+            print(f"Error exporting applications for {empresa_id}: {e}")
+            if formato == "ndjson":
+                yield json.dumps({"error": f"Exportación incompleta: {str(e)}"}, ensure_ascii=False) + "\n"
+            # Los encabezados ya se enviaron: se corta la conexión sin el
+            # fragmento final para que el cliente no tome el archivo por completo
+            raise
+        finally:
+            # Sin esperar: si el cliente se desconectó la tarea ya está cancelada
+            asyncio.get_running_loop().run_in_executor(None, cerrar)
+    
+    fecha = datetime.utcnow().strftime("%Y%m%d")
+    return StreamingResponse(
+        filas(),
+        media_type="text/csv; charset=utf-8" if formato == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="aplicaciones-{fecha}.{formato}"'}
+    )
+
+
+@router.get("/{empresa_id}/dashboard")
+async def obtener_dashboard(empresa_id: str):
+    """
+    Applications dashboard of a company
+    
+    Maintained incrementally as candidates apply and get evaluated, so a
+    load costs the same however many applications there are. It is built
+    from the database on first use and every DASHBOARD_TTL_SECONDS.
+    
+    Returns:
+    - total_aplicaciones, por_estado: Counts
+    - histograma_puntuacion: AI scores in ranges of 10
+    - top_compatibilidad: Best DASHBOARD_TOP_N applications by compatibility
+    - ultimas_aplicaciones: Most recent DASHBOARD_TOP_N applications
+    """
+    try:
+        return RespuestaJSON(await asyncio.to_thread(dashboard_service.resumen, empresa_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo dashboard: {str(e)}")
+
+
+@router.get("/vacantes/{vacante_id}/candidatos-similares")
+async def obtener_candidatos_similares(
+    vacante_id: str,
+    k: int = Query(10, ge=1, le=50, description="Número de candidatos a retornar")
+):
+    """
+    Find candidates whose CV is semantically closest to a job posting
+    
+    Searches every indexed CV, not only the applicants of this posting.
+    
+    Path parameter:
+    - vacante_id: UUID of the job posting
+    
+    Returns:
+    - candidatos: Candidates sorted by similarity (0-1)
+    """
+    try:
+        db = get_db()
+        
+        vacante = db.table("vacantes").select(
+            "id, titulo, cargo, descripcion, habilidades_requeridas"
+        ).eq("id", vacante_id).execute()
+        if not vacante.data:
+            raise HTTPException(status_code=404, detail="Vacante no encontrada")
+        
+        resultados = await asyncio.to_thread(
+            embedding_service.candidatos_similares, vacante.data[0], k
+        )
+        if not resultados:
+            return {"candidatos": []}
+        
+        similitudes = dict(resultados)
+        candidatos = db.table("candidatos").select(
+            "id, nombre_anonimo, años_experiencia, resumen_profesional"
+        ).in_("id", list(similitudes.keys())).execute()
+        
+        candidatos_lista = [
+            {
+                "candidato_id": c["id"],
+                "nombre_anonimo": c["nombre_anonimo"],
+                "años_experiencia": c.get("años_experiencia"),
+                "resumen_profesional": c.get("resumen_profesional"),
+                "similitud": round(similitudes[str(c["id"])], 4)
+            }
+            for c in candidatos.data
+        ]
+        candidatos_lista.sort(key=lambda c: c["similitud"], reverse=True)
+        
+        return {"candidatos": candidatos_lista}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo candidatos similares: {str(e)}")
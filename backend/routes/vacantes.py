@@ -4,6 +4,7 @@ Vacante routes - Job posting endpoints
 from fastapi import APIRouter, HTTPException, Query
 from models.vacante import VacantePublicada, VacanteDetalle
 from database import get_db
+from services.respuesta_json import RespuestaJSON
 from typing import Optional, List
 
 router = APIRouter(prefix="/api/vacantes", tags=["Vacantes"])
@@ -79,12 +80,13 @@ async def obtener_vacantes_publicadas(
                 "fecha_publicacion": vacante.get("fecha_publicacion")
             })
         
-        return {
+        # Respuesta directa: se serializa una sola vez, sin jsonable_encoder
+        return RespuestaJSON({
             "vacantes": vacantes_lista,
             "total": result.count if hasattr(result, 'count') else len(vacantes_lista),
             "limit": limit,
             "offset": offset
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo vacantes: {str(e)}")
@@ -0,0 +1,170 @@
+"""
+Answer Log - Batched, append-only storage of candidate answers
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from config import settings
+from database import get_db
+from services.background import background_jobs
+
+
+class AnswerLog:
+    """
+    Append-only log of candidate answers backed by `respuestas_candidato`.
+
+    `append` only buffers the row, so recording an answer never waits for
+    the database. Buffered rows are written with a single multi-row insert
+    when the batch is full or `answer_log_flush_seconds` after the first
+    pending row, whichever comes first. Rows are never updated.
+
+    Readers that need every answer (e.g. the evaluation after an
+    interview) call `flush()` first.
+    """
+
+    TABLE = "respuestas_candidato"
+
+    def __init__(self):
+        self._buffer: List[Dict] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def append(
+        self,
+        aplicacion_id: str,
+        respuesta: str,
+        pregunta: Optional[str] = None,
+        pregunta_id: Optional[str] = None,
+        orden: Optional[int] = None,
+        origen: str = "chatbot",
+        sesion_id: Optional[str] = None
+    ) -> None:
+        """
+        Buffer one answer
+
+        Args:
+            aplicacion_id: Application ID
+            respuesta: Candidate's answer
+            pregunta: Question text as asked
+            pregunta_id: vacante_preguntas ID (None for ad-hoc questions)
+            orden: Position of the question in the interview
+            origen: "chatbot" or "formulario"
+            sesion_id: Chatbot interview the answer belongs to
+        """
+        self._buffer.append({
+            "aplicacion_id": aplicacion_id,
+            "pregunta_id": pregunta_id,
+            "pregunta": pregunta,
+            "respuesta": respuesta,
+            "orden": orden,
+            "origen": origen,
+            "sesion_id": sesion_id,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
+
+        if len(self._buffer) >= settings.answer_log_batch_size:
+            background_jobs.submit(self.flush(), key="answer_log:flush")
+        self._programar()
+
+    def _programar(self) -> None:
+        """Schedule a flush for rows that don't fill a batch"""
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._timer = loop.call_later(settings.answer_log_flush_seconds, self._flush_programado)
+
+    def _flush_programado(self) -> None:
+        self._timer = None
+        # Si ya hay un flush en curso, reprogramar: sus filas no incluyen estas
+        if self._buffer and not background_jobs.submit(self.flush(), key="answer_log:flush"):
+            self._programar()
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self) -> int:
+        """
+        Write all buffered rows in one insert
+
+        If the batch insert fails, the rows are retried one by one so a
+        single bad row (unknown pregunta_id, broken foreign key) can't
+        block everyone else's answers; rows that still fail are logged
+        and dropped.
+
+        Returns:
+            Number of rows written
+        """
+        try:
+            return await self._escribir()
+        finally:
+            # Filas añadidas mientras se escribía este lote
+            if self._buffer:
+                self._programar()
+
+    async def _escribir(self) -> int:
+        async with self._lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer = self._buffer, []
+
+            try:
+                await asyncio.to_thread(
+                    lambda: get_db().table(self.TABLE).insert(rows).execute()
+                )
+                return len(rows)
+            except Exception as e:
+                print(f"Error writing answer log ({len(rows)} rows), retrying one by one: {e}")
+
+            escritas = 0
+            for row in rows:
+                try:
+                    await asyncio.to_thread(
+                        lambda: get_db().table(self.TABLE).insert(row).execute()
+                    )
+                    escritas += 1
+                except Exception as e:
+                    print(
+                        f"Dropping answer of application {row['aplicacion_id']} "
+                        f"(pregunta_id={row['pregunta_id']}): {e}"
+                    )
+            return escritas
+
+    async def respuestas(
+        self,
+        aplicacion_id: str,
+        origen: Optional[str] = None,
+        sesion_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Stored answers of an application, in interview order
+
+        Args:
+            aplicacion_id: Application ID
+            origen: Only answers from "chatbot" or "formulario"
+            sesion_id: Only answers of this chatbot interview
+
+        Returns:
+            List of {"pregunta_id", "pregunta", "respuesta", "orden"} dicts
+        """
+        await self.flush()
+
+        def consultar():
+            query = get_db().table(self.TABLE).select(
+                "pregunta_id, pregunta, respuesta, orden"
+            ).eq("aplicacion_id", aplicacion_id)
+            if origen is not None:
+                query = query.eq("origen", origen)
+            if sesion_id is not None:
+                query = query.eq("sesion_id", sesion_id)
+            return query.order("orden").order("created_at").execute()
+
+        result = await asyncio.to_thread(consultar)
+        return result.data or []
+
+
+# Singleton instance
+answer_log = AnswerLog()
@@ -0,0 +1,250 @@
+"""
+Aplicaciones Service - Filtered, sorted and paginated applications of a company
+"""
+import base64
+import csv
+import heapq
+import io
+import itertools
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from database import get_db
+
+
+# Claves de orden aceptadas -> columna de aplicaciones
+ORDENES = {
+    "fecha": "fecha_aplicacion",
+    "puntuacion": "puntuacion_ia",
+    "compatibilidad": "compatibilidad_porcentaje"
+}
+
+COLUMNAS = "id, vacante_id, candidato_id, estado, puntuacion_ia, compatibilidad_porcentaje, fecha_aplicacion"
+
+# IDs de aplicaciones aceptados en un cursor (UUID)
+_ID_RE = re.compile(r"^[0-9A-Za-z-]{1,64}$")
+
+# Vacantes por filtro in_ (la lista viaja en la URL de PostgREST)
+LOTE_VACANTES = 100
+
+# Columnas de la exportación, en orden
+CAMPOS_EXPORTACION = [
+    "aplicacion_id", "candidato_nombre", "vacante_id", "vacante_titulo",
+    "puntuacion_ia", "compatibilidad_porcentaje", "estado", "fecha_aplicacion"
+]
+
+
+class CursorInvalidoError(ValueError):
+    """The cursor is malformed or belongs to a different sort order"""
+
+
+@dataclass
+class FiltrosAplicaciones:
+    """Filters pushed down to the `aplicaciones` query"""
+    estados: Optional[List[str]] = None
+    vacante_id: Optional[str] = None
+    min_puntuacion: Optional[int] = None
+    min_compatibilidad: Optional[int] = None
+    desde: Optional[datetime] = None
+    hasta: Optional[datetime] = None
+
+
+def codificar_cursor(orden: str, desc: bool, fila: Dict[str, Any]) -> str:
+    """Opaque keyset cursor: sort value and id of the last row returned"""
+    datos = json.dumps([orden, desc, fila[ORDENES[orden]], fila["id"]], default=str)
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip("=")
+
+
+def _valor_valido(columna: str, valor: Any) -> bool:
+    """The cursor comes from the client and ends up in a PostgREST filter"""
+    if columna == "fecha_aplicacion":
+        if not isinstance(valor, str):
+            return False
+        try:
+            datetime.fromisoformat(valor)
+        except ValueError:
+            return False
+        return True
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def decodificar_cursor(cursor: str, orden: str, desc: bool) -> Tuple[Any, Any]:
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        orden_cursor, desc_cursor, valor, fila_id = datos
+    except Exception:
+        raise CursorInvalidoError("Cursor inválido")
+    if orden_cursor != orden or desc_cursor != desc:
+        raise CursorInvalidoError("El cursor pertenece a otro orden")
+    if not _valor_valido(ORDENES[orden], valor) or not isinstance(fila_id, str) or not _ID_RE.match(fila_id):
+        raise CursorInvalidoError("Cursor inválido")
+    return valor, fila_id
+
+
+def vacantes_empresa(empresa_id: str, vacante_id: Optional[str] = None) -> Dict[Any, str]:
+    """Titles of the company's job postings (optionally just one)"""
+    db = get_db()
+    query = db.table("vacantes").select("id, titulo").eq("empresa_id", empresa_id)
+    if vacante_id:
+        query = query.eq("id", vacante_id)
+    return {v["id"]: v["titulo"] for v in query.execute().data}
+
+
+def _consulta(
+    vacante_ids: List[Any],
+    filtros: FiltrosAplicaciones,
+    columna: str,
+    desc: bool,
+    limite: int,
+    despues_de: Optional[Tuple[Any, Any]]
+) -> List[Dict[str, Any]]:
+    db = get_db()
+    query = db.table("aplicaciones").select(COLUMNAS).in_("vacante_id", vacante_ids)
+
+    if filtros.estados:
+        query = query.in_("estado", filtros.estados)
+    if filtros.min_puntuacion is not None:
+        query = query.gte("puntuacion_ia", filtros.min_puntuacion)
+    if filtros.min_compatibilidad is not None:
+        query = query.gte("compatibilidad_porcentaje", filtros.min_compatibilidad)
+    if columna != "fecha_aplicacion":
+        # Ordenar por puntaje solo tiene sentido entre aplicaciones evaluadas
+        query = query.gte(columna, 0)
+    if filtros.desde is not None:
+        query = query.gte("fecha_aplicacion", filtros.desde.isoformat())
+    if filtros.hasta is not None:
+        query = query.lt("fecha_aplicacion", filtros.hasta.isoformat())
+
+    if despues_de is not None:
+        valor, fila_id = despues_de
+        op = "lt" if desc else "gt"
+        query = query.or_(f'{columna}.{op}."{valor}",and({columna}.eq."{valor}",id.{op}."{fila_id}")')
+
+    return query.order(columna, desc=desc).order("id", desc=desc).limit(limite).execute().data
+
+
+def pagina(
+    empresa_id: str,
+    filtros: FiltrosAplicaciones,
+    orden: str = "fecha",
+    desc: bool = True,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    titulos: Optional[Dict[Any, str]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of a company's applications with filters, sort and keyset cursor
+
+    Filtering, sorting and the limit run in the database. Companies with
+    more than LOTE_VACANTES job postings are queried in chunks, each chunk
+    already sorted and limited, and the chunks are merged with a heap, so
+    at most limit + 1 rows per chunk are ever loaded.
+
+    Args:
+        empresa_id: Company ID
+        filtros: Filters to apply
+        orden: "fecha", "puntuacion" or "compatibilidad"
+        desc: Descending order (best / newest first)
+        limit: Page size
+        cursor: `siguiente_cursor` of the previous page
+        titulos: Job posting titles if the caller already loaded them
+
+    Returns:
+        (rows, siguiente_cursor) where siguiente_cursor is None on the last page
+
+    Raises:
+        CursorInvalidoError: If the cursor can't be used with this order
+    """
+    columna = ORDENES[orden]
+    despues_de = decodificar_cursor(cursor, orden, desc) if cursor else None
+
+    if titulos is None:
+        titulos = vacantes_empresa(empresa_id, filtros.vacante_id)
+    vacante_ids = list(titulos)
+    if not vacante_ids:
+        return [], None
+
+    lotes = [vacante_ids[i:i + LOTE_VACANTES] for i in range(0, len(vacante_ids), LOTE_VACANTES)]
+    if len(lotes) == 1:
+        filas = _consulta(lotes[0], filtros, columna, desc, limit + 1, despues_de)
+    else:
+        filas = list(itertools.islice(heapq.merge(
+            *(_consulta(lote, filtros, columna, desc, limit + 1, despues_de) for lote in lotes),
+            key=lambda f: (f[columna], str(f["id"])),
+            reverse=desc
+        ), limit + 1))
+
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        siguiente = codificar_cursor(orden, desc, filas[-1])
+
+    # Nombres solo de los candidatos de esta página
+    nombres: Dict[Any, str] = {}
+    candidato_ids = list({f["candidato_id"] for f in filas})
+    if candidato_ids:
+        candidatos = get_db().table("candidatos").select("id, nombre_anonimo").in_(
+            "id", candidato_ids
+        ).execute()
+        nombres = {c["id"]: c["nombre_anonimo"] for c in candidatos.data}
+
+    return [
+        {
+            "aplicacion_id": f["id"],
+            "candidato_nombre": nombres.get(f["candidato_id"], "N/A"),
+            "vacante_id": f["vacante_id"],
+            "vacante_titulo": titulos.get(f["vacante_id"], "N/A"),
+            "puntuacion_ia": f.get("puntuacion_ia"),
+            "compatibilidad_porcentaje": f.get("compatibilidad_porcentaje"),
+            "estado": f["estado"],
+            "fecha_aplicacion": f.get("fecha_aplicacion")
+        }
+        for f in filas
+    ], siguiente
+
+
+def paginas(
+    empresa_id: str,
+    filtros: FiltrosAplicaciones,
+    tamaño: int,
+    orden: str = "fecha",
+    desc: bool = False
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Every application of a company (oldest first by default), one keyset page at a time
+
+    Only one page is held in memory; job posting titles are loaded once.
+
+    Args:
+        empresa_id: Company ID
+        filtros: Filters to apply
+        tamaño: Rows per page
+        orden: Sort key (see `pagina`)
+        desc: Descending order
+
+    Yields:
+        Pages of rows (same fields as `pagina`)
+    """
+    titulos = vacantes_empresa(empresa_id, filtros.vacante_id)
+    cursor = None
+    while True:
+        filas, cursor = pagina(
+            empresa_id, filtros, orden=orden, desc=desc,
+            limit=tamaño, cursor=cursor, titulos=titulos
+        )
+        if filas:
+            yield filas
+        if cursor is None:
+            return
+
+
+def a_csv(filas: List[Dict[str, Any]], encabezado: bool = False) -> str:
+    """Render rows as CSV text (with the header row if asked)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CAMPOS_EXPORTACION, extrasaction="ignore", lineterminator="\n")
+    if encabezado:
+        writer.writeheader()
+    writer.writerows(filas)
+    return buffer.getvalue()
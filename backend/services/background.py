@@ -0,0 +1,76 @@
+"""
+Background Jobs - Fire-and-forget coroutines that outlive the request
+"""
+import asyncio
+from typing import Awaitable, Dict, Optional
+
+
+class BackgroundJobs:
+    """
+    Registry of background asyncio tasks.
+
+    Keeps a reference to every task (the event loop only holds weak
+    references), logs failures instead of losing them, and can wait for
+    pending work on shutdown.
+
+    Jobs submitted with a key are deduplicated: while a job with the same
+    key is running, new submissions are ignored.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[asyncio.Task, Optional[str]] = {}
+
+    def submit(self, coro: Awaitable, key: Optional[str] = None) -> bool:
+        """
+        Schedule a coroutine on the running event loop
+
+        Args:
+            coro: Coroutine to run
+            key: Optional deduplication key (e.g. "evaluacion:<aplicacion_id>")
+
+        Returns:
+            True if scheduled, False if a job with the same key is running
+        """
+        if key is not None and key in self._tasks.values():
+            coro.close()
+            return False
+
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks[task] = key
+        task.add_done_callback(self._done)
+        return True
+
+    def _done(self, task: asyncio.Task) -> None:
+        key = self._tasks.pop(task, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            print(f"Background job {key or task.get_name()} failed: {error}")
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Wait for pending jobs to finish
+
+        Args:
+            timeout: Seconds to wait; jobs still running afterwards are cancelled
+
+        Returns:
+            Number of jobs cancelled because of the timeout
+        """
+        tasks = list(self._tasks)
+        if not tasks:
+            return 0
+
+        _, pendientes = await asyncio.wait(tasks, timeout=timeout)
+        for task in pendientes:
+            task.cancel()
+        return len(pendientes)
+
+
+# Singleton instance
+background_jobs = BackgroundJobs()
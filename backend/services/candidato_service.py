@@ -0,0 +1,206 @@
+"""
+Candidato Service - Find or create the candidate behind an application
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from config import settings
+from database import get_db
+from services.ia_service import IAService
+from services.lazy import LazyService
+
+
+def normalizar_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class CandidatoService:
+    """
+    Email-keyed lookup of candidates, so repeat applicants keep one
+    `usuarios` / `candidatos` pair and their stored CV analysis.
+
+    Found candidate IDs are cached per process (email -> candidato_id)
+    for CANDIDATO_CACHE_TTL_SECONDS. Misses are never cached: a candidate
+    created by another worker is found on the next lookup.
+    """
+
+    def __init__(self):
+        self._cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cache_get(self, email: str) -> Optional[str]:
+        with self._cache_lock:
+            entry = self._cache.get(email)
+            if entry is None:
+                return None
+            candidato_id, expira = entry
+            if expira < time.monotonic():
+                del self._cache[email]
+                return None
+            self._cache.move_to_end(email)
+            return candidato_id
+
+    def _cache_set(self, email: str, candidato_id: str) -> None:
+        with self._cache_lock:
+            self._cache[email] = (candidato_id, time.monotonic() + settings.candidato_cache_ttl_seconds)
+            self._cache.move_to_end(email)
+            while len(self._cache) > settings.candidato_cache_max:
+                self._cache.popitem(last=False)
+
+    def olvidar(self, email: str) -> None:
+        """Drop a cached email (e.g. after deleting the candidate)"""
+        with self._cache_lock:
+            self._cache.pop(normalizar_email(email), None)
+
+    def buscar(self, email: str) -> Optional[str]:
+        """
+        Find the candidate that applied with this email
+
+        Args:
+            email: Candidate's email (case-insensitive)
+
+        Returns:
+            candidato_id or None if the email never applied
+        """
+        email = normalizar_email(email)
+        candidato_id = self._cache_get(email)
+        if candidato_id is not None:
+            return candidato_id
+
+        db = get_db()
+        result = db.table("candidatos").select("id").eq("email", email).order(
+            "id"
+        ).limit(1).execute()
+        if not result.data:
+            return None
+
+        candidato_id = result.data[0]["id"]
+        self._cache_set(email, candidato_id)
+        return candidato_id
+
+    def _completar(self, candidato_id: str, datos: Dict) -> None:
+        """Fill only the fields the stored candidate is missing"""
+        db = get_db()
+        actual = db.table("candidatos").select(", ".join(datos)).eq("id", candidato_id).execute()
+        if not actual.data:
+            return
+        faltan = {k: v for k, v in datos.items() if actual.data[0].get(k) in (None, "")}
+        if faltan:
+            db.table("candidatos").update(faltan).eq("id", candidato_id).execute()
+
+    def _guardar(self, clave: str, datos: Dict) -> Tuple[str, bool]:
+        db = get_db()
+
+        candidato_id = self.buscar(clave)
+        if candidato_id is not None:
+            self._completar(candidato_id, datos)
+            return candidato_id, False
+
+        # Create user record (si otro proceso lo creó primero, se reutiliza)
+        db.table("usuarios").upsert({
+            "id": str(uuid.uuid4()),
+            "email": clave,
+            "tipo_usuario": "candidato",
+            "nombre_completo": datos["nombre_anonimo"],
+            "telefono": datos["telefono"]
+            # created_at y updated_at se generan automáticamente
+        }, on_conflict="email,tipo_usuario", ignore_duplicates=True).execute()
+        usuario = db.table("usuarios").select("id").eq("email", clave).eq(
+            "tipo_usuario", "candidato"
+        ).limit(1).execute()
+
+        # Create candidate record (índice único de la migración 006). Si otro
+        # proceso lo creó entre medias, no se pisan sus datos
+        # IMPORTANTE: candidato_id es BIGINT autoincremental, NO se genera manualmente
+        result = db.table("candidatos").upsert({
+            "usuario_id": usuario.data[0]["id"],
+            "email": clave,
+            **datos
+        }, on_conflict="email", ignore_duplicates=True).execute()
+        if result.data:
+            return result.data[0]["id"], True
+
+        candidato_id = self.buscar(clave)
+        self._completar(candidato_id, datos)
+        return candidato_id, False
+
+    async def obtener_o_crear(
+        self,
+        email: str,
+        nombre_anonimo: str,
+        telefono: str,
+        años_experiencia: int,
+        resumen_profesional: str = ""
+    ) -> Tuple[str, bool]:
+        """
+        Find or create the candidate for this email
+
+        A returning email keeps its candidate record as stored: the email
+        is not proven, so the submitted name, phone, experience and CV
+        summary only fill fields that are still empty. New emails are
+        inserted with an upsert on the unique email index, so two workers
+        racing on the same first application end up with one candidate.
+
+        Args:
+            email: Candidate's email
+            nombre_anonimo: Display name
+            telefono: Phone
+            años_experiencia: Years of experience
+            resumen_profesional: CV summary (ignored when empty)
+
+        Returns:
+            (candidato_id, creado)
+        """
+        clave = normalizar_email(email)
+        datos = {
+            "nombre_anonimo": nombre_anonimo,
+            "telefono": telefono,
+            "años_experiencia": años_experiencia
+        }
+        if resumen_profesional:
+            datos["resumen_profesional"] = resumen_profesional
+
+        candidato_id, creado = await asyncio.to_thread(self._guardar, clave, datos)
+        self._cache_set(clave, candidato_id)
+        return candidato_id, creado
+
+    def cv_previo(self, candidato_id: str, sha256: str) -> Optional[Dict]:
+        """
+        Stored text and analysis of a CV this candidate already sent
+
+        The analysis is read from the `documentos` row of that same content
+        (migration 006), so it always belongs to this CV. The defaults
+        `analizar_cv` returns when the LLM fails are not usable: that CV is
+        analyzed again.
+
+        Args:
+            candidato_id: Candidate ID
+            sha256: Content hash of the uploaded CV
+
+        Returns:
+            {"texto_extraido", "analisis_cv"} or None if this CV is new
+            for the candidate or no usable analysis was stored
+        """
+        db = get_db()
+        try:
+            documento = db.table("documentos").select("texto_extraido, analisis_cv").eq(
+                "candidato_id", candidato_id
+            ).eq("hash_contenido", sha256).not_.is_("analisis_cv", "null").limit(1).execute()
+        except Exception as e:
+            # Sin las migraciones 004/006 no hay hash ni análisis: se analiza de nuevo
+            print(f"Error loading previous CV: {e}")
+            return None
+
+        if not documento.data or IAService.formatear_analisis_cv(documento.data[0]["analisis_cv"]) is None:
+            return None
+        return {
+            "texto_extraido": documento.data[0].get("texto_extraido") or "",
+            "analisis_cv": documento.data[0]["analisis_cv"]
+        }
+
+
+# Singleton instance
+candidato_service = LazyService(CandidatoService, "candidato_service")
@@ -1,12 +1,174 @@
 """
 Chatbot Service - Conversational AI for candidate interviews using LangChain
 """
+import asyncio
+import functools
 import os
-from typing import List, Dict
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional
 from config import settings
+from database import get_db
+from services.cv_compactor import count_tokens
+from services.answer_log import answer_log
+from services.background import background_jobs
+from services.evaluacion_service import evaluacion_service
+from services.lazy import LazyService
+
+
+# Prompt messages by name; all per-interview data goes in as variables.
+# Each template is compiled once, on first use (see _prompt()), so
+# importing this module does not load LangChain.
+MENSAJES = {
+    "inicio": [
+        ("system", """Eres un asistente de reclutamiento amigable y profesional llamado Alex.
+
+Estás conversando con {candidato_nombre} quien aplicó a la vacante: {vacante_titulo}.
+La entrevista tiene {total_preguntas} preguntas.
+
+Tu trabajo es:
+1. Hacer que el candidato se sienta cómodo y bienvenido
+2. Hacer preguntas de forma natural, una a la vez
+3. Mostrar empatía y profesionalismo
+
+La primera pregunta es:
+{pregunta}
+
+IMPORTANTE:
+- Haz SOLO esta pregunta y espera respuesta
+- Sé conversacional, no robótico
+- Usa un tono cálido pero profesional
+"""),
+        ("placeholder", "{chat_history}"),
+        ("user", "{input}")
+    ],
+    "siguiente": [
+        ("system", """Eres Alex, asistente de reclutamiento conversacional, entrevistando a {candidato_nombre} para la vacante: {vacante_titulo}.
+
+Resumen de la entrevista hasta ahora:
+{resumen}
+
+El candidato acaba de responder. Debes:
+1. Agradecer brevemente su respuesta (1 frase corta y natural)
+2. {instruccion}
+
+Mantén un tono profesional pero cálido. No seas repetitivo en los agradecimientos.
+"""),
+        ("placeholder", "{chat_history}"),
+        ("user", "{input}")
+    ],
+    "cierre": [
+        ("system", """Genera un mensaje de despedida profesional y motivador.
+
+Agradece al candidato por:
+- Su tiempo
+- Sus respuestas honestas
+- Su interés en la posición
+
+Menciona que:
+- El equipo revisará su aplicación
+- Recibirán noticias pronto
+- Pueden contactarnos si tienen preguntas
+
+Mantén un tono positivo y profesional. Sé breve (2-3 frases).
+
+Resumen de la entrevista:
+{resumen}
+"""),
+        ("placeholder", "{chat_history}"),
+        ("user", "{input}")
+    ],
+    "resumen": [
+        ("system", """Mantienes el resumen de una entrevista de trabajo.
+
+Actualiza el resumen existente incorporando los nuevos turnos de la conversación.
+- Conserva los datos concretos del candidato: años de experiencia, tecnologías, logros, disponibilidad
+- Una línea por tema, en viñetas
+- Máximo 8 viñetas, sin saludos ni comentarios del entrevistador
+
+Resumen actual:
+{resumen}
+"""),
+        ("user", "Nuevos turnos:\n{conversacion}\n\nDevuelve solo el resumen actualizado.")
+    ]
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _prompt(nombre: str):
+    """Compiled ChatPromptTemplate for a prompt in MENSAJES"""
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages(MENSAJES[nombre])
+
+
+# Placeholder for the candidate's name in cached openers (replaced at serve time)
+MARCADOR_NOMBRE = "{candidato_nombre}"
+
+INPUT_INICIO = "Inicia la conversación con un saludo cálido y haz la primera pregunta."
+
+
+class TurnoChat(NamedTuple):
+    """A prepared chatbot turn: what to run and what to do with the result"""
+    chain: object
+    inputs: Dict
+    on_complete: Callable[[str], None]
+    fallback: str
+
+
+@dataclass
+class PlanEntrevista:
+    """
+    Server-side interview state for one application.
+    
+    The approved questions are loaded once; `cursor` points to the
+    question the candidate is currently answering.
+    """
+    candidato_nombre: str
+    vacante_titulo: str
+    preguntas: List[Dict[str, Optional[str]]]  # {"id", "pregunta"}
+    vacante_id: Optional[str] = None
+    # Greeting pre-generated for the vacancy, with MARCADOR_NOMBRE
+    apertura: Optional[str] = None
+    cursor: int = 0
+    respuestas: List[Dict[str, Optional[str]]] = field(default_factory=list)
+    # Older turns condensed by the LLM (see ChatbotService._condensar)
+    resumen: str = ""
+    # Identifica las respuestas guardadas de esta entrevista (no de una anterior)
+    sesion_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    
+    @property
+    def pregunta_actual(self) -> Optional[str]:
+        if self.cursor < len(self.preguntas):
+            return self.preguntas[self.cursor]["pregunta"]
+        return None
+    
+    @property
+    def preguntas_restantes(self) -> int:
+        """Questions still to be answered, including the one just asked"""
+        return max(0, len(self.preguntas) - self.cursor)
+    
+    def registrar_respuesta(self, respuesta: str) -> Optional[Dict]:
+        """
+        Store the answer to the current question and advance the cursor.
+        
+        Returns:
+            The stored answer, or None if there was no pending question
+        """
+        registro = None
+        if self.cursor < len(self.preguntas):
+            pregunta = self.preguntas[self.cursor]
+            registro = {
+                "pregunta_id": pregunta.get("id"),
+                "pregunta": pregunta["pregunta"],
+                "respuesta": respuesta,
+                "orden": self.cursor,
+                "sesion_id": self.sesion_id
+            }
+            self.respuestas.append(registro)
+        self.cursor += 1
+        return registro
 
 
 class ChatbotService:
@@ -16,6 +178,14 @@ class ChatbotService:
     Uses LangChain with conversation memory to maintain context across
     multiple messages, creating a natural and engaging interview experience.
     
+    The server owns the interview plan: approved questions are loaded once
+    per application and each turn sends the LLM only the next question,
+    a rolling summary and the last few raw messages.
+    
+    Memory is bounded: once the summary plus raw history cross
+    `chatbot_memory_max_tokens`, older turns are folded into the summary
+    by a background task, so the reply to the candidate never waits for it.
+    
     Features:
     - Maintains conversation history per application
     - Natural language question flow
@@ -24,25 +194,44 @@ class ChatbotService:
     """
     
     def __init__(self):
-        """Initialize LangChain Groq client for chatbot conversations"""
-        if not settings.groq_api_key:
-            raise ValueError(
-                "Groq API key not configured. "
-                "Please set GROQ_API_KEY in .env file"
-            )
+        """Initialize the LangChain chat model for chatbot conversations"""
+        from services.llm_provider import crear_llm
         
-        # Configure Groq with LangChain for conversational AI
-        # Modelo: llama-3.1-8b-instant (rápido y conversacional)
-        self.llm = ChatGroq(
-            model="llama-3.1-8b-instant",
-            groq_api_key=settings.groq_api_key,
+        # Modelo: llama-3.1-8b-instant (rápido y conversacional) o el proveedor fake
+        self.llm = crear_llm(
             max_tokens=500,  # Shorter responses for chatbot
-            temperature=0.8  # More creativity for natural conversation
+            temperature=0.8,  # More creativity for natural conversation
+            servicio="chatbot"
         )
         
         # Store conversation history for each application
         # Key: aplicacion_id, Value: List of messages
         self.conversations: Dict[str, List] = {}
+        
+        # Interview plan for each application
+        # Key: aplicacion_id, Value: PlanEntrevista
+        self.planes: Dict[str, PlanEntrevista] = {}
+        
+        # Last use per application, oldest first; idle or excess
+        # conversations are evicted by _tocar()
+        self._ultimo_uso: "OrderedDict[str, float]" = OrderedDict()
+        
+        # Job postings whose opener is being generated; True = generate it
+        # again when done (questions changed while it was running)
+        self._aperturas_en_curso: Dict[str, bool] = {}
+        
+        # Job postings whose opener was already (re)generated on a cache miss
+        self._aperturas_intentadas: "OrderedDict[str, None]" = OrderedDict()
+        
+        # In-flight summarization task per application (at most one)
+        self._condensando: Dict[str, asyncio.Task] = {}
+    
+    @staticmethod
+    def precompilar_prompts() -> int:
+        """Compile every prompt template ahead of the first conversation"""
+        for nombre in MENSAJES:
+            _prompt(nombre)
+        return len(MENSAJES)
     
     def _get_or_create_history(self, aplicacion_id: str) -> List:
         """
@@ -50,91 +239,470 @@ class ChatbotService:
         
         Args:
             aplicacion_id: Unique application identifier
-            
+        
         Returns:
             List of messages for this conversation
         """
+        self._tocar(aplicacion_id)
         if aplicacion_id not in self.conversations:
             self.conversations[aplicacion_id] = []
         return self.conversations[aplicacion_id]
     
+    def _cargar_plan(self, aplicacion_id: str) -> PlanEntrevista:
+        """
+        Load the interview plan for an application from the database.
+        
+        Args:
+            aplicacion_id: Application ID
+        
+        Returns:
+            Plan with candidate name, job title and approved questions
+        
+        Raises:
+            ValueError: If the application does not exist
+        """
+        db = get_db()
+        
+        aplicacion = db.table("aplicaciones").select(
+            "candidato_id, vacante_id"
+        ).eq("id", aplicacion_id).execute()
+        if not aplicacion.data:
+            raise ValueError(f"Aplicación no encontrada: {aplicacion_id}")
+        aplicacion_data = aplicacion.data[0]
+        
+        candidato = db.table("candidatos").select("nombre_anonimo").eq(
+            "id", aplicacion_data["candidato_id"]
+        ).execute()
+        vacante = db.table("vacantes").select("titulo, apertura_chatbot").eq(
+            "id", aplicacion_data["vacante_id"]
+        ).execute()
+        preguntas = db.table("vacante_preguntas").select("id, pregunta").eq(
+            "vacante_id", aplicacion_data["vacante_id"]
+        ).eq("aprobada_por_empresa", True).order("created_at").execute()
+        
+        return PlanEntrevista(
+            candidato_nombre=candidato.data[0]["nombre_anonimo"] if candidato.data else "candidato",
+            vacante_titulo=vacante.data[0]["titulo"] if vacante.data else "la vacante",
+            preguntas=[{"id": p["id"], "pregunta": p["pregunta"]} for p in preguntas.data],
+            vacante_id=aplicacion_data["vacante_id"],
+            apertura=vacante.data[0].get("apertura_chatbot") if vacante.data else None
+        )
+    
+    def obtener_plan(
+        self,
+        aplicacion_id: str,
+        preguntas: Optional[List[str]] = None
+    ) -> PlanEntrevista:
+        """
+        Get the interview plan, loading it on first use.
+        
+        Args:
+            aplicacion_id: Application ID
+            preguntas: Legacy clients may still send the question list;
+                it is only used when there is no plan yet
+        
+        Returns:
+            Interview plan for this application
+        """
+        self._tocar(aplicacion_id)
+        plan = self.planes.get(aplicacion_id)
+        if plan is None:
+            if preguntas is not None:
+                plan = PlanEntrevista(
+                    candidato_nombre="candidato",
+                    vacante_titulo="la vacante",
+                    preguntas=[{"id": None, "pregunta": p} for p in preguntas]
+                )
+            else:
+                plan = self._cargar_plan(aplicacion_id)
+            self.planes[aplicacion_id] = plan
+        return plan
+    
+    def _tocar(self, aplicacion_id: str) -> None:
+        """
+        Mark an application as in use and evict stale conversations.
+        
+        Conversations idle for longer than `chatbot_sesion_ttl_seconds`, or
+        beyond the `chatbot_sesiones_max` most recent, are dropped; a
+        returning candidate gets a fresh plan loaded from the database.
+        """
+        ahora = time.monotonic()
+        self._ultimo_uso[aplicacion_id] = ahora
+        self._ultimo_uso.move_to_end(aplicacion_id)
+        limite = ahora - settings.chatbot_sesion_ttl_seconds
+        while self._ultimo_uso:
+            vieja, uso = next(iter(self._ultimo_uso.items()))
+            if vieja == aplicacion_id or (
+                uso >= limite and len(self._ultimo_uso) <= settings.chatbot_sesiones_max
+            ):
+                break
+            self.limpiar_conversacion(vieja)
+    
+    def _plan_para_respuesta(
+        self,
+        aplicacion_id: str,
+        preguntas_restantes: Optional[List[str]]
+    ) -> PlanEntrevista:
+        """
+        Plan for an incoming answer. Legacy clients without a plan send the
+        questions *after* the one being answered, so a placeholder stands in
+        for the answered question.
+        """
+        if aplicacion_id not in self.planes and preguntas_restantes is not None:
+            return self.obtener_plan(aplicacion_id, ["Pregunta anterior"] + preguntas_restantes)
+        return self.obtener_plan(aplicacion_id)
+    
+    def estado_entrevista(self, aplicacion_id: str) -> Dict:
+        """
+        Progress of an interview (used by the endpoints' responses).
+        
+        Args:
+            aplicacion_id: Application ID
+        
+        Returns:
+            quedan_preguntas, preguntas_restantes, total_preguntas and
+            respuestas_registradas
+        """
+        plan = self.planes.get(aplicacion_id)
+        if plan is None:
+            return {
+                "quedan_preguntas": False,
+                "preguntas_restantes": 0,
+                "total_preguntas": 0,
+                "respuestas_registradas": 0
+            }
+        return {
+            "quedan_preguntas": plan.pregunta_actual is not None,
+            "preguntas_restantes": plan.preguntas_restantes,
+            "total_preguntas": len(plan.preguntas),
+            "respuestas_registradas": len(plan.respuestas)
+        }
+    
+    def _programar_resumen(self, aplicacion_id: str) -> None:
+        """
+        Fold older turns into the summary once memory crosses the threshold.
+        
+        Runs as a background task; until it finishes the next turn simply
+        uses the previous summary and the full raw history.
+        """
+        history = self.conversations.get(aplicacion_id)
+        plan = self.planes.get(aplicacion_id)
+        if not history or plan is None or aplicacion_id in self._condensando:
+            return
+        
+        recientes = 2 * max(settings.chatbot_memory_keep_turns, 0)
+        antiguos = len(history) - recientes
+        if antiguos <= 0:
+            return
+        
+        tokens = count_tokens(plan.resumen) + sum(count_tokens(m.content) for m in history)
+        if tokens <= settings.chatbot_memory_max_tokens:
+            return
+        
+        task = asyncio.get_running_loop().create_task(
+            self._condensar(aplicacion_id, plan, history, history[:antiguos])
+        )
+        self._condensando[aplicacion_id] = task
+        
+        def terminar(t: asyncio.Task) -> None:
+            # Solo quitar la entrada si sigue siendo esta tarea
+            if self._condensando.get(aplicacion_id) is t:
+                del self._condensando[aplicacion_id]
+        
+        task.add_done_callback(terminar)
+    
+    async def _condensar(
+        self,
+        aplicacion_id: str,
+        plan: PlanEntrevista,
+        history: List,
+        antiguos: List
+    ) -> None:
+        """
+        Summarize `antiguos` into the plan summary and drop them from history.
+        
+        Messages appended while the LLM runs are kept: only the folded
+        prefix is removed. If the LLM fails, the turns are folded as plain
+        truncated lines so memory stays bounded anyway.
+        """
+        from langchain_core.messages import HumanMessage
+        
+        conversacion = "\n".join(
+            f"{'Candidato' if isinstance(m, HumanMessage) else 'Entrevistador'}: {m.content}"
+            for m in antiguos
+        )
+        try:
+            response = await (_prompt("resumen") | self.llm).ainvoke({
+                "resumen": plan.resumen or "(vacío)",
+                "conversacion": conversacion
+            })
+            plan.resumen = response.content.strip()
+        except Exception as e:
+            print(f"Error summarizing chatbot conversation: {e}")
+            plan.resumen += "".join(
+                f"- {m.content[:200]}\n" for m in antiguos if isinstance(m, HumanMessage)
+            )
+        
+        # Solo quitar el prefijo condensado si sigue intacto
+        if history[:len(antiguos)] == antiguos:
+            del history[:len(antiguos)]
+    
+    async def _ejecutar(self, turno: TurnoChat, contexto: str) -> str:
+        """Run a prepared turn and return the whole message"""
+        try:
+            response = await turno.chain.ainvoke(turno.inputs)
+            turno.on_complete(response.content)
+            return response.content
+        except Exception as e:
+            print(f"Error {contexto}: {e}")
+            return turno.fallback
+    
+    async def _stream(self, turno: TurnoChat, contexto: str) -> AsyncIterator[str]:
+        """
+        Run a prepared turn yielding text chunks as the LLM produces them.
+        
+        History is updated once the full message is known. If the LLM
+        fails before producing anything, the fallback message is yielded.
+        """
+        partes = []
+        try:
+            async for chunk in turno.chain.astream(turno.inputs):
+                if chunk.content:
+                    partes.append(chunk.content)
+                    yield chunk.content
+        except Exception as e:
+            print(f"Error {contexto}: {e}")
+            if not partes:
+                yield turno.fallback
+                return
+        turno.on_complete("".join(partes))
+    
+    def _preparar_inicio(
+        self,
+        aplicacion_id: str,
+        candidato_nombre: Optional[str] = None,
+        vacante_titulo: Optional[str] = None,
+        preguntas: Optional[List[str]] = None
+    ) -> TurnoChat:
+        """Build the greeting turn (prompt, inputs, history update, fallback)"""
+        from langchain_core.messages import AIMessage, HumanMessage
+        from langchain_core.runnables import RunnableLambda
+        
+        history = self._get_or_create_history(aplicacion_id)
+        plan = self.obtener_plan(aplicacion_id, preguntas)
+        if candidato_nombre:
+            plan.candidato_nombre = candidato_nombre
+        if vacante_titulo:
+            plan.vacante_titulo = vacante_titulo
+        
+        primera_pregunta = plan.pregunta_actual or "¿Puedes contarme sobre tu experiencia?"
+        user_input = INPUT_INICIO
+        
+        def on_complete(mensaje: str) -> None:
+            # Update history
+            history.append(HumanMessage(content=user_input))
+            history.append(AIMessage(content=mensaje))
+        
+        # Saludo pre-generado de la vacante: solo sustituir el nombre
+        if plan.apertura and not history:
+            mensaje = plan.apertura.replace(MARCADOR_NOMBRE, plan.candidato_nombre)
+            chain = RunnableLambda(lambda _: AIMessage(content=mensaje))
+        else:
+            # Vacantes publicadas antes de existir la caché: generarla una vez
+            if plan.vacante_id and not history and plan.vacante_id not in self._aperturas_intentadas:
+                self._aperturas_intentadas[plan.vacante_id] = None
+                while len(self._aperturas_intentadas) > settings.chatbot_sesiones_max:
+                    self._aperturas_intentadas.popitem(last=False)
+                self.programar_apertura(plan.vacante_id, repetir_si_ocupada=False)
+            chain = _prompt("inicio") | self.llm
+        
+        return TurnoChat(
+            chain=chain,
+            inputs={
+                "candidato_nombre": plan.candidato_nombre,
+                "vacante_titulo": plan.vacante_titulo,
+                "total_preguntas": len(plan.preguntas),
+                "pregunta": primera_pregunta,
+                "chat_history": list(history),
+                "input": user_input
+            },
+            on_complete=on_complete,
+            # Fallback greeting
+            fallback=f"¡Hola {plan.candidato_nombre}! Gracias por tu interés en {plan.vacante_titulo}. Comencemos con algunas preguntas. {primera_pregunta}"
+        )
+    
+    def programar_apertura(self, vacante_id: str, repetir_si_ocupada: bool = True) -> None:
+        """
+        Generate the opener of a job posting in the background.
+        
+        If one is already being generated, it is not dropped: the running
+        job generates it again once it finishes, so the stored opener
+        always reflects the latest approved questions.
+        
+        Args:
+            vacante_id: Job posting ID
+            repetir_si_ocupada: False to skip (instead of re-queue) when a
+                generation is already running
+        """
+        if vacante_id in self._aperturas_en_curso:
+            if repetir_si_ocupada:
+                self._aperturas_en_curso[vacante_id] = True
+            return
+        self._aperturas_en_curso[vacante_id] = False
+        # Sin key: la deduplicación la lleva _aperturas_en_curso, que se
+        # libera antes de que background_jobs olvide la tarea
+        background_jobs.submit(self._generar_aperturas(vacante_id))
+    
+    async def _generar_aperturas(self, vacante_id: str) -> None:
+        """Run generar_apertura until no new request arrived meanwhile"""
+        try:
+            while True:
+                self._aperturas_en_curso[vacante_id] = False
+                await self.generar_apertura(vacante_id)
+                if not self._aperturas_en_curso.get(vacante_id):
+                    return
+        finally:
+            self._aperturas_en_curso.pop(vacante_id, None)
+    
+    async def generar_apertura(self, vacante_id: str) -> Optional[str]:
+        """
+        Pre-generate the interview opener for a job posting.
+        
+        The greeting and first question are the same for every candidate,
+        so they are generated once (when the posting is published) with a
+        name placeholder and stored in `vacantes.apertura_chatbot`.
+        Starting a conversation then only substitutes the name.
+        
+        Args:
+            vacante_id: Job posting ID
+        
+        Returns:
+            Opener template, or None if it could not be generated
+            (conversations then fall back to live generation)
+        """
+        db = get_db()
+        
+        vacante = db.table("vacantes").select("titulo").eq("id", vacante_id).execute()
+        preguntas = db.table("vacante_preguntas").select("pregunta").eq(
+            "vacante_id", vacante_id
+        ).eq("aprobada_por_empresa", True).order("created_at").execute()
+        
+        apertura = None
+        if vacante.data and preguntas.data:
+            try:
+                response = await (_prompt("inicio") | self.llm).ainvoke({
+                    "candidato_nombre": MARCADOR_NOMBRE,
+                    "vacante_titulo": vacante.data[0]["titulo"],
+                    "total_preguntas": len(preguntas.data),
+                    "pregunta": preguntas.data[0]["pregunta"],
+                    "chat_history": [],
+                    "input": f"{INPUT_INICIO} Escribe el nombre del candidato exactamente como {MARCADOR_NOMBRE}."
+                })
+                if MARCADOR_NOMBRE in response.content:
+                    apertura = response.content
+                else:
+                    print(f"Generated opener for job posting {vacante_id} has no name placeholder, discarding")
+            except Exception as e:
+                print(f"Error generating chatbot opener: {e}")
+        
+        # Guardar también None: un saludo viejo no debe sobrevivir a nuevas preguntas
+        db.table("vacantes").update({"apertura_chatbot": apertura}).eq("id", vacante_id).execute()
+        return apertura
+    
     async def iniciar_conversacion(
         self,
         aplicacion_id: str,
-        candidato_nombre: str,
-        vacante_titulo: str,
-        preguntas: List[str]
+        candidato_nombre: Optional[str] = None,
+        vacante_titulo: Optional[str] = None,
+        preguntas: Optional[List[str]] = None
     ) -> str:
         """
         Start a conversation with personalized greeting and first question.
         
         Creates a warm, professional introduction and naturally transitions
-        into the first interview question.
+        into the first interview question. Uses the job posting's cached
+        opener when available (see `generar_apertura`).
         
         Args:
             aplicacion_id: Application ID for tracking
-            candidato_nombre: Candidate's name
-            vacante_titulo: Job posting title
-            preguntas: List of questions to ask during interview
-            
+            candidato_nombre: Candidate's name (loaded from DB if omitted)
+            vacante_titulo: Job posting title (loaded from DB if omitted)
+            preguntas: Legacy question list (approved questions are
+                loaded from DB if omitted)
+        
         Returns:
             Greeting message with first question
         """
-        history = self._get_or_create_history(aplicacion_id)
+        turno = self._preparar_inicio(aplicacion_id, candidato_nombre, vacante_titulo, preguntas)
+        return await self._ejecutar(turno, "starting chatbot conversation")
+    
+    def iniciar_conversacion_stream(
+        self,
+        aplicacion_id: str,
+        candidato_nombre: Optional[str] = None,
+        vacante_titulo: Optional[str] = None,
+        preguntas: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """Streaming variant of `iniciar_conversacion` (yields text chunks)"""
+        turno = self._preparar_inicio(aplicacion_id, candidato_nombre, vacante_titulo, preguntas)
+        return self._stream(turno, "starting chatbot conversation")
+    
+    def _preparar_siguiente(
+        self,
+        aplicacion_id: str,
+        respuesta_anterior: str,
+        preguntas_restantes: Optional[List[str]] = None
+    ) -> TurnoChat:
+        """Record the answer, advance the plan and build the next turn"""
+        from langchain_core.messages import AIMessage, HumanMessage
         
-        # Format questions for the prompt
-        preguntas_formateadas = "\n".join([f"- {p}" for p in preguntas])
+        history = self._get_or_create_history(aplicacion_id)
+        plan = self._plan_para_respuesta(aplicacion_id, preguntas_restantes)
+        registro = plan.registrar_respuesta(respuesta_anterior)
+        if registro:
+            answer_log.append(aplicacion_id=aplicacion_id, **registro)
+        siguiente = plan.pregunta_actual
         
-        # Define conversational prompt template
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""Eres un asistente de reclutamiento amigable y profesional llamado Alex.
-
-Estás conversando con {candidato_nombre} quien aplicó a la vacante: {vacante_titulo}.
-
-Tu trabajo es:
-1. Hacer que el candidato se sienta cómodo y bienvenido
-2. Hacer preguntas de forma natural, una a la vez
-3. Mostrar empatía y profesionalismo
-4. Agradecer cada respuesta antes de la siguiente pregunta
-
-Tienes estas preguntas para hacer:
-{preguntas_formateadas}
-
-IMPORTANTE: 
-- Haz UNA sola pregunta a la vez y espera respuesta
-- Sé conversacional, no robótico
-- Usa un tono cálido pero profesional
-"""),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("user", "{input}")
-        ])
+        user_input = f"El candidato respondió: '{respuesta_anterior}'. "
         
-        # Create the chain
-        chain = prompt | self.llm
+        if siguiente:
+            instruccion = f"Hacer de forma natural la siguiente pregunta: {siguiente}"
+            user_input += "Ahora haz la siguiente pregunta."
+        else:
+            instruccion = "No quedan preguntas: despídete agradeciendo su tiempo y menciona que recibirá noticias pronto."
+            user_input += "Ya no hay más preguntas. Despídete de forma profesional."
         
-        try:
-            # Generate greeting and first question
-            response = await chain.ainvoke({
-                "chat_history": history,
-                "input": "Inicia la conversación con un saludo cálido y haz la primera pregunta."
-            })
-            
+        def on_complete(mensaje: str) -> None:
             # Update history
-            history.append(HumanMessage(content="Inicia la conversación con un saludo cálido y haz la primera pregunta."))
-            history.append(AIMessage(content=response.content))
-            
-            return response.content
-            
-        except Exception as e:
-            print(f"Error starting chatbot conversation: {e}")
-            # Fallback greeting
-            return f"¡Hola {candidato_nombre}! Gracias por tu interés en {vacante_titulo}. Comencemos con algunas preguntas. {preguntas[0] if preguntas else '¿Puedes contarme sobre tu experiencia?'}"
+            history.append(HumanMessage(content=user_input))
+            history.append(AIMessage(content=mensaje))
+            self._programar_resumen(aplicacion_id)
+        
+        # Fallback response
+        if siguiente:
+            fallback = f"Gracias por tu respuesta. {siguiente}"
+        else:
+            fallback = "Gracias por tu tiempo. Hemos completado la entrevista. Recibirás noticias pronto."
+        
+        return TurnoChat(
+            chain=_prompt("siguiente") | self.llm,
+            inputs={
+                "candidato_nombre": plan.candidato_nombre,
+                "vacante_titulo": plan.vacante_titulo,
+                "resumen": plan.resumen or "Aún no hay respuestas.",
+                "instruccion": instruccion,
+                "chat_history": list(history),
+                "input": user_input
+            },
+            on_complete=on_complete,
+            fallback=fallback
+        )
     
     async def siguiente_pregunta(
         self,
         aplicacion_id: str,
         respuesta_anterior: str,
-        preguntas_restantes: List[str]
+        preguntas_restantes: Optional[List[str]] = None
     ) -> str:
         """
         Process previous answer and ask the next question naturally.
@@ -145,125 +713,76 @@ IMPORTANTE:
         Args:
             aplicacion_id: Application ID
             respuesta_anterior: Candidate's previous answer
-            preguntas_restantes: Remaining questions to ask
-            
+            preguntas_restantes: Ignored when the server already has the
+                interview plan (kept for older clients)
+        
         Returns:
             Next question from the chatbot
         """
+        turno = self._preparar_siguiente(aplicacion_id, respuesta_anterior, preguntas_restantes)
+        return await self._ejecutar(turno, "in chatbot next question")
+    
+    def siguiente_pregunta_stream(
+        self,
+        aplicacion_id: str,
+        respuesta_anterior: str,
+        preguntas_restantes: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """Streaming variant of `siguiente_pregunta` (yields text chunks)"""
+        turno = self._preparar_siguiente(aplicacion_id, respuesta_anterior, preguntas_restantes)
+        return self._stream(turno, "in chatbot next question")
+    
+    def _preparar_cierre(self, aplicacion_id: str) -> TurnoChat:
+        """Build the closing turn and start the evaluation of the interview"""
         history = self._get_or_create_history(aplicacion_id)
+        plan = self.planes.get(aplicacion_id)
         
-        # Format remaining questions
-        preguntas_formateadas = "\n".join([f"- {p}" for p in preguntas_restantes]) if preguntas_restantes else "No hay más preguntas"
-        
-        # Define conversational prompt template
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""Eres un asistente de reclutamiento conversacional.
-
-El candidato acaba de responder. Debes:
-1. Agradecer brevemente su respuesta (1 frase corta y natural)
-2. Hacer la siguiente pregunta de forma natural
-
-Preguntas restantes: 
-{preguntas_formateadas}
-
-Si no quedan preguntas, despídete agradeciendo su tiempo y menciona que recibirán noticias pronto.
-
-Mantén un tono profesional pero cálido. No seas repetitivo en los agradecimientos.
-"""),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("user", "{input}")
-        ])
+        # La evaluación corre en segundo plano con las respuestas guardadas,
+        # en paralelo con el mensaje de despedida
+        if plan and plan.respuestas:
+            background_jobs.submit(
+                evaluacion_service.evaluar_desde_respuestas_guardadas(aplicacion_id, plan.sesion_id),
+                key=f"evaluacion:{aplicacion_id}"
+            )
         
-        # Create the chain
-        chain = prompt | self.llm
+        def on_complete(mensaje: str) -> None:
+            # Clean up memory after conversation ends
+            self.limpiar_conversacion(aplicacion_id)
         
-        try:
-            user_input = f"El candidato respondió: '{respuesta_anterior}'. "
-            
-            if preguntas_restantes:
-                user_input += "Ahora haz la siguiente pregunta."
-            else:
-                user_input += "Ya no hay más preguntas. Despídete de forma profesional."
-            
-            # Generate acknowledgment and next question
-            response = await chain.ainvoke({
-                "chat_history": history,
-                "input": user_input
-            })
-            
-            # Update history
-            history.append(HumanMessage(content=user_input))
-            history.append(AIMessage(content=response.content))
-            
-            # Limit history to last 20 messages to avoid token limits
-            if len(history) > 20:
-                self.conversations[aplicacion_id] = history[-20:]
-            
-            return response.content
-            
-        except Exception as e:
-            print(f"Error in chatbot next question: {e}")
-            # Fallback response
-            if preguntas_restantes:
-                return f"Gracias por tu respuesta. {preguntas_restantes[0]}"
-            else:
-                return "Gracias por tu tiempo. Hemos completado la entrevista. Recibirás noticias pronto."
+        return TurnoChat(
+            chain=_prompt("cierre") | self.llm,
+            inputs={
+                "resumen": plan.resumen if plan and plan.resumen else "Sin resumen: la entrevista fue breve.",
+                "chat_history": list(history),
+                "input": "Genera el mensaje de cierre de la entrevista."
+            },
+            on_complete=on_complete,
+            # Fallback closing
+            fallback="¡Muchas gracias por tu tiempo! Hemos completado la entrevista. Nuestro equipo revisará tu aplicación y te contactaremos pronto. ¡Mucho éxito!"
+        )
     
     async def finalizar_conversacion(self, aplicacion_id: str) -> str:
         """
         Generate closing message for the conversation.
         
         Creates a professional and motivating farewell message,
-        thanking the candidate and setting expectations.
+        thanking the candidate and setting expectations. If the candidate
+        answered any question, the compatibility evaluation is started in
+        the background from the stored answers.
         
         Args:
             aplicacion_id: Application ID
-            
+        
         Returns:
             Farewell message
         """
-        history = self._get_or_create_history(aplicacion_id)
-        
-        # Define closing prompt template
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Genera un mensaje de despedida profesional y motivador.
-
-Agradece al candidato por:
-- Su tiempo
-- Sus respuestas honestas
-- Su interés en la posición
-
-Menciona que:
-- El equipo revisará su aplicación
-- Recibirán noticias pronto
-- Pueden contactarnos si tienen preguntas
-
-Mantén un tono positivo y profesional. Sé breve (2-3 frases).
-"""),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("user", "Genera el mensaje de cierre de la entrevista.")
-        ])
-        
-        # Create the chain
-        chain = prompt | self.llm
-        
-        try:
-            # Generate closing message
-            response = await chain.ainvoke({
-                "chat_history": history,
-                "input": "Genera el mensaje de cierre de la entrevista."
-            })
-            
-            # Clean up memory after conversation ends
-            if aplicacion_id in self.conversations:
-                del self.conversations[aplicacion_id]
-            
-            return response.content
-            
-        except Exception as e:
-            print(f"Error finalizing chatbot conversation: {e}")
-            # Fallback closing
-            return "¡Muchas gracias por tu tiempo! Hemos completado la entrevista. Nuestro equipo revisará tu aplicación y te contactaremos pronto. ¡Mucho éxito!"
+        turno = self._preparar_cierre(aplicacion_id)
+        return await self._ejecutar(turno, "finalizing chatbot conversation")
+    
+    def finalizar_conversacion_stream(self, aplicacion_id: str) -> AsyncIterator[str]:
+        """Streaming variant of `finalizar_conversacion` (yields text chunks)"""
+        turno = self._preparar_cierre(aplicacion_id)
+        return self._stream(turno, "finalizing chatbot conversation")
     
     def limpiar_conversacion(self, aplicacion_id: str) -> None:
         """
@@ -275,10 +794,15 @@ Mantén un tono positivo y profesional. Sé breve (2-3 frases).
         Args:
             aplicacion_id: Application ID to clean up
         """
+        self._ultimo_uso.pop(aplicacion_id, None)
+        self.planes.pop(aplicacion_id, None)
+        task = self._condensando.pop(aplicacion_id, None)
+        if task:
+            task.cancel()
         if aplicacion_id in self.conversations:
             del self.conversations[aplicacion_id]
             print(f"Conversation memory cleaned for application: {aplicacion_id}")
 
 
 # Singleton instance
-chatbot_service = ChatbotService()
\ No newline at end of file
+chatbot_service = LazyService(ChatbotService, "chatbot_service")
@@ -0,0 +1,278 @@
+"""
+CV Compactor - Fit the most relevant parts of a CV into a token budget
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Tuple
+
+
+# Encabezados reconocidos por sección (texto normalizado, sin tildes)
+SECTION_HEADINGS = {
+    "perfil": (
+        "perfil", "perfil profesional", "resumen", "resumen profesional",
+        "sobre mi", "acerca de mi", "objetivo", "objetivo profesional",
+        "profile", "summary", "professional summary", "about me", "objective",
+    ),
+    "experiencia": (
+        "experiencia", "experiencia laboral", "experiencia profesional",
+        "historial laboral", "trayectoria profesional",
+        "experience", "work experience", "professional experience", "employment history",
+    ),
+    "habilidades": (
+        "habilidades", "habilidades tecnicas", "competencias", "conocimientos",
+        "conocimientos tecnicos", "tecnologias", "herramientas", "aptitudes",
+        "skills", "technical skills", "tech stack",
+    ),
+    "educacion": (
+        "educacion", "formacion", "formacion academica", "estudios",
+        "education", "academic background",
+    ),
+    "certificaciones": (
+        "certificaciones", "certificados", "cursos", "cursos y certificaciones",
+        "certifications", "courses",
+    ),
+    "proyectos": ("proyectos", "proyectos destacados", "projects"),
+    "idiomas": ("idiomas", "languages"),
+    "datos": (
+        "datos personales", "informacion personal", "contacto", "datos de contacto",
+        "personal information", "contact",
+    ),
+    "referencias": (
+        "referencias", "referencias personales", "referencias laborales", "references",
+    ),
+}
+
+_HEADING_LOOKUP = {
+    heading: section
+    for section, headings in SECTION_HEADINGS.items()
+    for heading in headings
+}
+
+# Orden de relevancia según el uso del CV. Las secciones que no aparecen
+# (encabezado con nombre y contacto, datos personales, referencias) nunca
+# se envían al LLM.
+PRIORIDAD_ANALISIS = (
+    "perfil", "experiencia", "habilidades", "educacion",
+    "certificaciones", "proyectos", "idiomas",
+)
+PRIORIDAD_EVALUACION = (
+    "habilidades", "experiencia", "perfil", "certificaciones",
+    "proyectos", "educacion", "idiomas",
+)
+
+_BOILERPLATE_RE = re.compile(
+    r"^(curriculum vitae|curriculum|hoja de vida|cv|resume"
+    r"|pagina \d+( de \d+)?|page \d+( of \d+)?|\d{1,2}|\d{1,2}\s*/\s*\d{1,2})$"
+)
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Candidato a teléfono: 7+ caracteres entre dígitos, espacios, puntos,
+# guiones y paréntesis (se descartan luego los rangos de años)
+_TELEFONO_RE = re.compile(r"\+?\(?\d[\d ().-]{5,}\d")
+_CIFRA_RE = re.compile(r"^\d{1,3}([.,]\d{3})+$")
+_ETIQUETA_RE = re.compile(
+    r"^(e-?mail|correo( electronico)?|tel(efono)?|cel(ular)?|movil|phone|whatsapp)\.?$"
+)
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+
+# Secciones más pequeñas que esto no vale la pena incluir recortadas
+_MIN_PARTIAL_TOKENS = 25
+
+
+def _normalize(line: str) -> str:
+    line = unicodedata.normalize("NFKD", line.lower())
+    line = "".join(c for c in line if not unicodedata.combining(c))
+    return line.strip(" :-•*#|_").strip()
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate LLaMA token count without loading a tokenizer.
+
+    Punctuation counts as one token and words as roughly one token per
+    four characters, which tracks the BPE count of Spanish text closely
+    enough for budgeting.
+    """
+    return sum(math.ceil(len(tok) / 4) for tok in _TOKEN_RE.findall(text))
+
+
+def limpiar_texto(cv_text: str) -> List[str]:
+    """
+    Normalize whitespace and drop boilerplate lines.
+
+    Removes empty lines, page numbers, "Curriculum Vitae" titles and
+    headers/footers repeated on every page.
+
+    Returns:
+        Clean, non-empty lines
+    """
+    lines = [_SPACES_RE.sub(" ", line).strip() for line in cv_text.splitlines()]
+    lines = [line for line in lines if line]
+
+    repeated = {
+        line for line, count in Counter(lines).items()
+        if count >= 3 and len(line) < 80
+    }
+    seen = set()
+    clean = []
+    for line in lines:
+        if _BOILERPLATE_RE.match(_normalize(line)):
+            continue
+        if line in repeated:
+            if line in seen:
+                continue
+            seen.add(line)
+        clean.append(line)
+    return clean
+
+
+def _es_telefono(match: re.Match) -> bool:
+    texto = match.group()
+    grupos = re.findall(r"\d+", texto)
+    digitos = sum(len(g) for g in grupos)
+    # "2019 - 2023" o "(2020-2024)" son fechas de experiencia y
+    # "1.500.000" una cifra, no teléfonos
+    if all(len(g) == 4 and g[:2] in ("19", "20") for g in grupos):
+        return False
+    if _CIFRA_RE.match(texto):
+        return False
+    return 7 <= digitos <= 15
+
+
+def quitar_contacto(lines: List[str]) -> List[str]:
+    """
+    Remove email addresses and phone numbers from CV lines
+
+    Lines left with nothing but a label ("Email:", "Tel.") are dropped.
+    Contact data is never needed to analyze or evaluate a CV, so it is
+    not sent to the LLM even when it sits outside the contact section.
+    """
+    clean = []
+    for line in lines:
+        line = _EMAIL_RE.sub("", line)
+        line = _TELEFONO_RE.sub(lambda m: "" if _es_telefono(m) else m.group(), line)
+        line = _SPACES_RE.sub(" ", line).strip(" ,;|/-–·•")
+        if line and not _ETIQUETA_RE.match(_normalize(line)):
+            clean.append(line)
+    return clean
+
+
+def detectar_secciones(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """
+    Split CV lines into (section, lines) blocks in document order.
+
+    Lines before the first recognized heading belong to "encabezado"
+    (name, title, contact).
+    """
+    sections: List[Tuple[str, List[str]]] = [("encabezado", [])]
+    for line in lines:
+        normalized = _normalize(line)
+        section = _HEADING_LOOKUP.get(normalized) if len(normalized) <= 40 else None
+        if section:
+            sections.append((section, []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, body) for name, body in sections if body]
+
+
+def _cortar_linea(line: str, max_tokens: int) -> str:
+    """Longest word prefix of a line within the budget (characters for a single long word)"""
+    kept, used = [], 0
+    for word in line.split(" "):
+        cost = count_tokens(word)
+        if used + cost > max_tokens:
+            if not kept:
+                # Una sola "palabra" enorme (URL, texto sin espacios)
+                return word[:max_tokens * 4]
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept)
+
+
+def _truncar(lines: List[str], max_tokens: int) -> Tuple[List[str], int]:
+    """
+    Keep whole lines while they fit, then cut the next one inside
+
+    Returns:
+        (kept lines, tokens used)
+    """
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line)
+        if used + cost > max_tokens:
+            partial = _cortar_linea(line, max_tokens - used)
+            if partial:
+                kept.append(partial)
+                used += count_tokens(partial)
+            break
+        kept.append(line)
+        used += cost
+    return kept, used
+
+
+def compactar_cv(cv_text: str, max_tokens: int, prioridad=PRIORIDAD_ANALISIS) -> str:
+    """
+    Build a compact CV that fits in a token budget
+
+    Sections are added by relevance; the first one that doesn't fit
+    entirely is cut (inside a line if needed) and only the tokens kept
+    count against the budget. The result keeps the original section
+    order, each under an uppercase label, and is never empty when the
+    clean CV isn't: if no section can be kept it falls back to a plain
+    prefix of the sections in `prioridad`. Emails and phone numbers are
+    removed first, wherever they appear.
+
+    Args:
+        cv_text: Raw text extracted from the PDF
+        max_tokens: Approximate token budget for the CV
+        prioridad: Section names by decreasing relevance
+
+    Returns:
+        Compacted CV text
+    """
+    lines = quitar_contacto(limpiar_texto(cv_text or ""))
+    sections = detectar_secciones(lines)
+
+    # CV sin encabezados reconocibles: solo limpiar y recortar
+    if len(sections) <= 1:
+        return "\n".join(_truncar(lines, max_tokens)[0])
+
+    rank = {name: i for i, name in enumerate(prioridad)}
+    order = sorted(
+        (i for i, (name, _) in enumerate(sections) if name in rank),
+        key=lambda i: rank[sections[i][0]]
+    )
+
+    selected = {}
+    remaining = max_tokens
+    for i in order:
+        name, body = sections[i]
+        label_cost = count_tokens(name) + 2
+        cost = label_cost + sum(count_tokens(line) for line in body)
+        if cost <= remaining:
+            selected[i] = body
+            remaining -= cost
+        elif remaining - label_cost >= _MIN_PARTIAL_TOKENS:
+            kept, used = _truncar(body, remaining - label_cost)
+            if kept:
+                selected[i] = kept
+                remaining -= label_cost + used
+        if remaining < _MIN_PARTIAL_TOKENS:
+            break
+
+    compacto = "\n\n".join(
+        f"{sections[i][0].upper()}:\n" + "\n".join(selected[i])
+        for i in sorted(selected)
+    )
+    if compacto:
+        return compacto
+
+    # Nada cabe ni recortado: el inicio de las secciones permitidas, sin
+    # etiquetas (el encabezado solo si el CV no tiene otras)
+    permitidas = [line for name, body in sections if name in rank for line in body]
+    if not permitidas:
+        permitidas = [line for name, body in sections if name == "encabezado" for line in body]
+    return "\n".join(_truncar(permitidas, max_tokens)[0])
@@ -0,0 +1,191 @@
+"""
+CV Upload - Stream uploaded CVs to disk with size and type checks
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Optional
+from fastapi import UploadFile
+from config import settings
+
+
+# La cabecera "%PDF-" puede aparecer dentro del primer KB (especificación PDF)
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_VENTANA = 1024
+
+
+class CVInvalidoError(ValueError):
+    """Uploaded CV rejected; `status_code` is the HTTP status to answer with"""
+
+    def __init__(self, mensaje: str, status_code: int = 400):
+        super().__init__(mensaje)
+        self.status_code = status_code
+
+
+def max_bytes() -> int:
+    return int(settings.cv_max_mb * 1024 * 1024)
+
+
+class CVTemporal:
+    """
+    An uploaded CV stored in a temporary file.
+
+    Nothing keeps the file content in memory: text extraction reads the
+    file as a stream and storage uploads it by path. The SHA-256 digest
+    is computed while streaming. Use as a context manager, or call
+    `cerrar()`, to delete the file.
+    """
+
+    def __init__(self, path: str, size: int, sha256: str, filename: str, content_type: Optional[str]):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.content_type = content_type or "application/pdf"
+
+    @property
+    def size_kb(self) -> int:
+        return self.size // 1024
+
+    def abrir(self) -> BinaryIO:
+        return open(self.path, "rb")
+
+    def cerrar(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "CVTemporal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+def _copiar(origen: BinaryIO, filename: str, content_type: Optional[str]) -> CVTemporal:
+    """Copy the upload chunk by chunk, validating type and size as it goes"""
+    limite = max_bytes()
+    chunk_size = settings.cv_upload_chunk_kb * 1024
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, path = tempfile.mkstemp(prefix="cv_", suffix=".pdf", dir=settings.cv_tmp_dir or None)
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            origen.seek(0)
+            while True:
+                chunk = origen.read(chunk_size)
+                if not chunk:
+                    break
+                if size == 0 and PDF_MAGIC not in chunk[:PDF_MAGIC_VENTANA]:
+                    raise CVInvalidoError("El CV debe ser un archivo PDF válido", 400)
+                size += len(chunk)
+                if size > limite:
+                    raise CVInvalidoError(f"El CV supera el tamaño máximo de {settings.cv_max_mb:g} MB", 413)
+                digest.update(chunk)
+                destino.write(chunk)
+
+        if size == 0:
+            raise CVInvalidoError("El CV está vacío", 400)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return CVTemporal(path, size, digest.hexdigest(), filename, content_type)
+
+
+async def recibir_cv(upload: UploadFile) -> CVTemporal:
+    """
+    Stream an uploaded CV to a temporary file
+
+    Args:
+        upload: Multipart file from the request
+
+    Returns:
+        The stored CV (caller must close it)
+
+    Raises:
+        CVInvalidoError: Not a PDF (400), empty (400) or too large (413)
+    """
+    if upload.size is not None and upload.size > max_bytes():
+        raise CVInvalidoError(f"El CV supera el tamaño máximo de {settings.cv_max_mb:g} MB", 413)
+
+    return await asyncio.to_thread(
+        _copiar, upload.file, upload.filename or "cv.pdf", upload.content_type
+    )
+
+
+class LimiteSubidaMiddleware:
+    """
+    ASGI middleware that rejects oversized multipart bodies before they
+    are parsed: by Content-Length when present, otherwise by counting
+    the bytes as they arrive.
+    """
+
+    # Margen para los demás campos del formulario y los separadores multipart
+    MARGEN = 64 * 1024
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limite = max_bytes() + self.MARGEN
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limite:
+            await self._rechazar(send)
+            return
+
+        recibidos = 0
+        excedido = False
+        rechazado = False
+
+        async def receive_limitado():
+            nonlocal recibidos, excedido
+            message = await receive()
+            if message["type"] == "http.request":
+                recibidos += len(message.get("body", b""))
+                if recibidos > limite:
+                    excedido = True
+                    raise CVInvalidoError("Cuerpo demasiado grande", 413)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal rechazado
+            # El parser convierte el error en un 400 genérico: responder 413
+            if excedido:
+                if not rechazado and message["type"] == "http.response.start":
+                    rechazado = True
+                    await self._rechazar(send)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive_limitado, send_wrapper)
+        except CVInvalidoError:
+            pass
+        if excedido and not rechazado:
+            await self._rechazar(send)
+
+    @staticmethod
+    async def _rechazar(send) -> None:
+        body = f'{{"detail":"El CV supera el tamaño máximo de {settings.cv_max_mb:g} MB"}}'.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
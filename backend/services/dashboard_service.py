@@ -0,0 +1,358 @@
+"""
+Dashboard Service - Incrementally maintained applications summary per company
+"""
+import bisect
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from config import settings
+from database import get_db
+from services.lazy import LazyService
+
+
+# Rangos del histograma de puntuación (0-9, 10-19, ..., 90-100)
+RANGOS_PUNTUACION = [f"{i}-{i + 9}" for i in range(0, 90, 10)] + ["90-100"]
+
+
+def _rango(puntuacion: Optional[float]) -> Optional[str]:
+    if puntuacion is None:
+        return None
+    return RANGOS_PUNTUACION[min(int(puntuacion) // 10, 9)]
+
+
+def _paginas(query_fn, page_size: int = 1000) -> Iterator[List[Dict]]:
+    """Page through a PostgREST select (one page is capped server-side)"""
+    inicio = 0
+    while True:
+        pagina = query_fn().range(inicio, inicio + page_size - 1).execute().data
+        yield pagina
+        if len(pagina) < page_size:
+            return
+        inicio += page_size
+
+
+class ResumenEmpresa:
+    """
+    Dashboard state of one company.
+
+    Aggregates are kept (the total, counts by estado and a score
+    histogram) plus the rows of the top-N by compatibility (kept sorted)
+    and of the N most recent applications. `render()` costs the same with
+    10 or 100k applications.
+
+    The counted values of every application (estado and scores, not the
+    whole row) are kept too: an update is applied against what was
+    counted, and one for an application this summary never counted marks
+    it for rebuilding instead of pushing a counter below zero.
+    """
+
+    def __init__(self, empresa_id: str, n: int, titulos: Optional[Dict[str, str]] = None):
+        self.empresa_id = empresa_id
+        self.n = n
+        self.titulos: Dict[str, str] = titulos or {}
+        self.total = 0
+        self.por_estado: Counter = Counter()
+        self.histograma: Counter = Counter()
+        # (-compatibilidad, aplicacion_id), ordenado: el primero es el mejor
+        self.top: List[tuple] = []
+        # IDs de las N más recientes, la primera es la última
+        self.ultimas: Deque[str] = deque()
+        # Filas del top y de "últimas" (las únicas que se guardan)
+        self.filas: Dict[str, Dict[str, Any]] = {}
+        # aplicacion_id -> (estado, puntuacion_ia, compatibilidad_porcentaje) contados
+        self.contadas: Dict[str, tuple] = {}
+        # Reconstruir: una entrada bajó del top y no se sabe cuál la
+        # sustituye, o llegó una actualización de una aplicación no contada
+        self.incompleto = False
+        self.construido = time.monotonic()
+        self._render: Optional[Dict[str, Any]] = None
+
+    def vigente(self) -> bool:
+        return not self.incompleto and time.monotonic() - self.construido < settings.dashboard_ttl_seconds
+
+    def _contar(self, fila: Dict[str, Any], signo: int) -> None:
+        self.por_estado[fila["estado"]] += signo
+        rango = _rango(fila["puntuacion_ia"])
+        if rango is not None:
+            self.histograma[rango] += signo
+
+    @staticmethod
+    def _valores(fila: Dict[str, Any]) -> tuple:
+        return fila["estado"], fila["puntuacion_ia"], fila["compatibilidad_porcentaje"]
+
+    @staticmethod
+    def _entrada(fila: Dict[str, Any]) -> Optional[tuple]:
+        if fila["compatibilidad_porcentaje"] is None:
+            return None
+        return (-fila["compatibilidad_porcentaje"], fila["aplicacion_id"])
+
+    def _soltar(self, aplicacion_id: str) -> None:
+        """Forget a row once it is neither in the top nor among the latest"""
+        if aplicacion_id not in self.ultimas and all(a != aplicacion_id for _, a in self.top):
+            self.filas.pop(aplicacion_id, None)
+
+    def _poner_en_top(self, fila: Dict[str, Any]) -> None:
+        entrada = self._entrada(fila)
+        if entrada is None:
+            return
+        if len(self.top) >= self.n and entrada > self.top[-1]:
+            return
+        bisect.insort(self.top, entrada)
+        self.filas[fila["aplicacion_id"]] = fila
+        self._recortar_top()
+
+    def _recortar_top(self) -> None:
+        while len(self.top) > self.n:
+            _, fuera = self.top.pop()
+            self._soltar(fuera)
+
+    def agregar(self, fila: Dict[str, Any]) -> None:
+        """Add an application (rows arrive oldest first)"""
+        # Ya contada (p. ej. la reconstrucción leyó la fila recién insertada)
+        if fila["aplicacion_id"] in self.contadas:
+            return
+        self.total += 1
+        self._contar(fila, 1)
+        self.contadas[fila["aplicacion_id"]] = self._valores(fila)
+        self.filas[fila["aplicacion_id"]] = fila
+        self.ultimas.appendleft(fila["aplicacion_id"])
+        while len(self.ultimas) > self.n:
+            self._soltar(self.ultimas.pop())
+        self._poner_en_top(fila)
+        self._render = None
+
+    def actualizar(self, antes: Dict[str, Any], despues: Dict[str, Any]) -> None:
+        """
+        Apply an update to an application
+
+        Args:
+            antes: Dashboard row before the change (as the caller saw it)
+            despues: Dashboard row after the change
+        """
+        aplicacion_id = despues["aplicacion_id"]
+        contada = self.contadas.get(aplicacion_id)
+        if contada is None:
+            # Insertada por otro worker (o después de leer la BD): no se
+            # puede restar lo que nunca se sumó
+            self.incompleto = True
+            self._render = None
+            return
+        # Lo contado es más reciente que la copia del llamador
+        antes = dict(antes, estado=contada[0], puntuacion_ia=contada[1], compatibilidad_porcentaje=contada[2])
+        if contada == self._valores(despues):
+            return
+
+        fila = self.filas.get(aplicacion_id)
+        if fila is not None:
+            fila.update(despues)
+        else:
+            fila = dict(despues)
+
+        self._contar(antes, -1)
+        self._contar(fila, 1)
+        self.contadas[aplicacion_id] = self._valores(fila)
+
+        limite = self.top[-1] if len(self.top) >= self.n else None
+        entrada = self._entrada(antes)
+        i = bisect.bisect_left(self.top, entrada) if entrada is not None else len(self.top)
+        estaba_en_top = i < len(self.top) and self.top[i] == entrada
+        if estaba_en_top:
+            del self.top[i]
+
+        nueva = self._entrada(fila)
+        if nueva is not None and (limite is None or nueva <= limite):
+            bisect.insort(self.top, nueva)
+            self.filas[aplicacion_id] = fila
+            self._recortar_top()
+        elif estaba_en_top:
+            # Solo ocurre al re-evaluar a la baja una aplicación del top:
+            # la siguiente mejor no está en memoria
+            self.incompleto = True
+        self._soltar(aplicacion_id)
+        self._render = None
+
+    def render(self) -> Dict[str, Any]:
+        if self._render is None:
+            self._render = {
+                "empresa_id": self.empresa_id,
+                "total_aplicaciones": self.total,
+                "por_estado": {e: n for e, n in self.por_estado.items() if n > 0},
+                "histograma_puntuacion": {r: self.histograma.get(r, 0) for r in RANGOS_PUNTUACION},
+                "top_compatibilidad": [dict(self.filas[a]) for _, a in self.top],
+                "ultimas_aplicaciones": [dict(self.filas[a]) for a in self.ultimas],
+                "actualizado": datetime.now(timezone.utc).isoformat()
+            }
+        return self._render
+
+
+class DashboardService:
+    """
+    Per-company applications dashboard, built once from the database and
+    then maintained by the write paths (`aplicar_vacante` registers new
+    applications, the evaluation updates estado and scores).
+
+    Summaries are per process: writes handled by another worker show up
+    when the summary is rebuilt after DASHBOARD_TTL_SECONDS. Only one
+    request rebuilds a company at a time; the others keep getting the
+    previous summary meanwhile. Writes that arrive during a rebuild are
+    queued and replayed on the new summary, since the rebuild may have
+    read the table before them. At most DASHBOARD_MAX_EMPRESAS summaries
+    are kept (least recently viewed are dropped).
+    """
+
+    def __init__(self):
+        self._resumenes: "OrderedDict[str, ResumenEmpresa]" = OrderedDict()
+        # empresa_id -> lock de la reconstrucción en curso
+        self._construyendo: Dict[str, threading.Lock] = {}
+        # empresa_id -> escrituras recibidas durante la reconstrucción
+        self._pendientes: Dict[str, List[Callable[[ResumenEmpresa], None]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fila(aplicacion: Dict[str, Any], candidato_nombre: str, vacante_titulo: str) -> Dict[str, Any]:
+        """Dashboard row of an application (same fields as obtener_aplicaciones)"""
+        return {
+            "aplicacion_id": aplicacion["id"],
+            "candidato_nombre": candidato_nombre,
+            "vacante_id": aplicacion.get("vacante_id"),
+            "vacante_titulo": vacante_titulo,
+            "puntuacion_ia": aplicacion.get("puntuacion_ia"),
+            "compatibilidad_porcentaje": aplicacion.get("compatibilidad_porcentaje"),
+            "estado": aplicacion.get("estado") or "aplicado",
+            "fecha_aplicacion": aplicacion.get("fecha_aplicacion") or aplicacion.get("created_at")
+        }
+
+    def _construir(self, empresa_id: str) -> ResumenEmpresa:
+        """Stream every application of the company into a new summary (blocking)"""
+        db = get_db()
+
+        vacantes = db.table("vacantes").select("id, titulo").eq("empresa_id", empresa_id).execute()
+        titulos = {v["id"]: v["titulo"] for v in vacantes.data}
+        resumen = ResumenEmpresa(empresa_id, settings.dashboard_top_n, titulos)
+        if not titulos:
+            return resumen
+
+        # Candidato de cada fila conservada, para poner los nombres al final
+        candidatos: Dict[str, Any] = {}
+        for pagina in _paginas(lambda: db.table("aplicaciones").select(
+            "id, vacante_id, candidato_id, estado, puntuacion_ia, compatibilidad_porcentaje, fecha_aplicacion, created_at"
+        ).in_("vacante_id", list(titulos)).order("fecha_aplicacion").order("id")):
+            for a in pagina:
+                resumen.agregar(self.fila(a, "N/A", titulos.get(a["vacante_id"], "N/A")))
+                candidatos[a["id"]] = a["candidato_id"]
+            candidatos = {k: v for k, v in candidatos.items() if k in resumen.filas}
+
+        if candidatos:
+            nombres = db.table("candidatos").select("id, nombre_anonimo").in_(
+                "id", list(set(candidatos.values()))
+            ).execute()
+            nombres = {c["id"]: c["nombre_anonimo"] for c in nombres.data}
+            for aplicacion_id, fila in resumen.filas.items():
+                fila["candidato_nombre"] = nombres.get(candidatos.get(aplicacion_id), "N/A")
+        return resumen
+
+    def resumen(self, empresa_id: str) -> Dict[str, Any]:
+        """
+        Dashboard of a company, built on first use and after the TTL
+
+        Args:
+            empresa_id: Company ID
+
+        Returns:
+            total_aplicaciones, por_estado, histograma_puntuacion,
+            top_compatibilidad, ultimas_aplicaciones, actualizado
+        """
+        with self._lock:
+            anterior = self._resumenes.get(empresa_id)
+            if anterior is not None:
+                self._resumenes.move_to_end(empresa_id)
+                if anterior.vigente():
+                    return anterior.render()
+            construccion = self._construyendo.setdefault(empresa_id, threading.Lock())
+
+        # Otra petición ya lo está reconstruyendo: servir el anterior
+        if not construccion.acquire(blocking=anterior is None):
+            with self._lock:
+                return anterior.render()
+        try:
+            with self._lock:
+                actual = self._resumenes.get(empresa_id)
+                if actual is not None and actual is not anterior and actual.vigente():
+                    return actual.render()
+                self._pendientes[empresa_id] = []
+
+            resumen = self._construir(empresa_id)
+            with self._lock:
+                # En orden de llegada; las que la lectura ya vio no cambian nada
+                for aplicar in self._pendientes.pop(empresa_id, []):
+                    aplicar(resumen)
+                self._resumenes[empresa_id] = resumen
+                self._resumenes.move_to_end(empresa_id)
+                while len(self._resumenes) > settings.dashboard_max_empresas:
+                    self._resumenes.popitem(last=False)
+                return resumen.render()
+        finally:
+            with self._lock:
+                self._pendientes.pop(empresa_id, None)
+                if self._construyendo.get(empresa_id) is construccion:
+                    del self._construyendo[empresa_id]
+            construccion.release()
+
+    def registrar_aplicacion(
+        self,
+        empresa_id: str,
+        aplicacion: Dict[str, Any],
+        candidato_nombre: str,
+        vacante_titulo: str
+    ) -> None:
+        """
+        Add a new application to its company's summary, if materialized
+
+        Args:
+            empresa_id: Company that owns the job posting
+            aplicacion: Inserted `aplicaciones` row
+            candidato_nombre: Candidate display name
+            vacante_titulo: Job title
+        """
+        fila = self.fila(aplicacion, candidato_nombre, vacante_titulo)
+        if fila["fecha_aplicacion"] is None:
+            fila["fecha_aplicacion"] = datetime.now(timezone.utc).isoformat()
+        self._aplicar(empresa_id, lambda resumen: resumen.agregar(dict(fila)))
+
+    def actualizar_aplicacion(
+        self,
+        empresa_id: str,
+        aplicacion: Dict[str, Any],
+        cambios: Dict[str, Any],
+        candidato_nombre: str,
+        vacante_titulo: str
+    ) -> None:
+        """
+        Apply an update (estado, puntuacion_ia, compatibilidad_porcentaje)
+
+        Args:
+            empresa_id: Company that owns the job posting
+            aplicacion: `aplicaciones` row before the update
+            cambios: Columns written to `aplicaciones`
+            candidato_nombre: Candidate display name
+            vacante_titulo: Job title
+        """
+        antes = self.fila(aplicacion, candidato_nombre, vacante_titulo)
+        despues = self.fila({**aplicacion, **cambios}, candidato_nombre, vacante_titulo)
+        self._aplicar(empresa_id, lambda resumen: resumen.actualizar(dict(antes), dict(despues)))
+
+    def _aplicar(self, empresa_id: str, aplicar: Callable[[ResumenEmpresa], None]) -> None:
+        """Apply a write to the materialized summary and queue it for a running rebuild"""
+        with self._lock:
+            resumen = self._resumenes.get(empresa_id)
+            if resumen is not None:
+                aplicar(resumen)
+            pendientes = self._pendientes.get(empresa_id)
+            if pendientes is not None:
+                pendientes.append(aplicar)
+
+
+# Singleton instance
+dashboard_service = LazyService(DashboardService, "dashboard_service")
@@ -6,6 +6,8 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from config import settings
 from typing import Optional
+from services.metrics import metrics
+from services.lazy import LazyService
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
@@ -120,6 +122,27 @@ class EmailService:
             print(f"Error sending email: {e}")
             return False
     
+    async def cerrar(self, timeout: float) -> bool:
+        """
+        Wait for queued emails and shut the thread pool down
+        
+        Args:
+            timeout: Seconds to wait; unsent emails are dropped afterwards
+            
+        Returns:
+            True if every queued email was sent before the timeout
+        """
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self.executor.shutdown, wait=True),
+                timeout=timeout
+            )
+            return True
+        except asyncio.TimeoutError:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            return False
+    
+    @metrics.timed("email.smtp")
     def _send_smtp(self, host: str, port: int, user: str, password: str, msg: MIMEMultipart, to_email: str) -> bool:
         """Helper method to send SMTP email synchronously"""
         try:
@@ -136,4 +159,4 @@ class EmailService:
 
 
 # Singleton instance
-email_service = EmailService()
+email_service = LazyService(EmailService, "email_service")
@@ -0,0 +1,472 @@
+"""
+Embedding Service - Local semantic search over CVs and job postings
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from services.lazy import LazyService
+
+try:
+    import hnswlib  # Índice ANN opcional
+except ImportError:
+    hnswlib = None
+
+try:
+    import fcntl  # Bloqueo entre procesos (no existe en Windows)
+except ImportError:
+    fcntl = None
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+_STOPWORDS = {
+    "a", "al", "con", "de", "del", "e", "el", "en", "es", "la", "las", "lo",
+    "los", "o", "para", "por", "que", "se", "su", "sus", "un", "una", "y",
+    "and", "for", "in", "of", "on", "or", "the", "to", "with",
+}
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and strip accents so 'Programación' matches 'programacion'"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into unigram and bigram features"""
+    words = [
+        w for w in _TOKEN_RE.findall(_normalize(text or ""))
+        if len(w) > 1 and w not in _STOPWORDS
+    ]
+    bigrams = [f"{a}_{b}" for a, b in zip(words, words[1:])]
+    return words + bigrams
+
+
+class HashedTfidfEncoder:
+    """
+    TF-IDF vectorizer using the hashing trick.
+
+    No vocabulary is stored: each feature is hashed into a fixed number
+    of buckets, so new documents can be encoded without refitting.
+    IDF weights are learned by `fit` during the offline rebuild and
+    persisted next to the vectors.
+    """
+
+    name = "hashed-tfidf"
+
+    def __init__(self, dim: int, idf_path: Optional[str] = None):
+        self.dim = dim
+        self.idf_path = idf_path
+        self.idf = np.ones(dim, dtype=np.float32)
+        if idf_path and os.path.exists(idf_path):
+            idf = np.fromfile(idf_path, dtype=np.float32)
+            if idf.shape[0] == dim:
+                self.idf = idf
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        sign = 1.0 if value >> 63 else -1.0
+        return value % self.dim, sign
+
+    def fit(self, texts: Iterable[str]) -> None:
+        """Learn IDF weights from a corpus and persist them"""
+        df = np.zeros(self.dim, dtype=np.float64)
+        n_docs = 0
+        for text in texts:
+            n_docs += 1
+            buckets = {self._bucket(f)[0] for f in set(tokenize(text))}
+            df[list(buckets)] += 1
+        self.idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+        if self.idf_path:
+            self.idf.tofile(self.idf_path)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalized float32 vectors"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in Counter(tokenize(text)).items():
+                bucket, sign = self._bucket(feature)
+                matrix[row, bucket] += sign * (1 + math.log(count))
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+
+class SentenceTransformerEncoder:
+    """Small local CPU model (e.g. paraphrase-multilingual-MiniLM-L12-v2)"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def fit(self, texts: Iterable[str]) -> None:
+        """Pretrained model, nothing to learn"""
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+class VectorStore:
+    """
+    Float32 matrix stored on disk and memory-mapped for search.
+
+    Rows are appended to `<name>.f32` and the row → id mapping is kept
+    in `<name>.ids.json`. Search is a vectorized brute-force dot product
+    (vectors are normalized, so it is cosine similarity), with an optional
+    HNSW index for large collections.
+
+    Several worker processes can share the directory: every write holds
+    an exclusive lock on `<name>.lock` and starts from the files on disk,
+    and readers reload the ids when another process changed them.
+    """
+
+    def __init__(self, directory: str, name: str, dim: int):
+        self.name = name
+        self.dim = dim
+        self.vectors_path = os.path.join(directory, f"{name}.f32")
+        self.ids_path = os.path.join(directory, f"{name}.ids.json")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._ann = None
+        self._version = None
+
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        with self._lock, self._file_lock():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared by every process using this collection"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Changes whenever the ids file is rewritten (by any process)"""
+        try:
+            stat = os.stat(self.ids_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        """
+        Read the ids from disk and check them against the vector file
+
+        Must be called holding both locks. If the counts differ (a process
+        died between the two writes, or the files belong to another
+        dimension) only the rows present in both are kept.
+        """
+        ids: List[str] = []
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "r", encoding="utf-8") as f:
+                ids = json.load(f)
+
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        rows = size // row_bytes
+        if rows != len(ids) or size % row_bytes:
+            keep = min(rows, len(ids))
+            print(
+                f"⚠️ Embedding store '{self.name}' has {len(ids)} ids for {rows} vectors, "
+                f"keeping the first {keep}; rebuild with `python -m services.embedding_service`"
+            )
+            if os.path.exists(self.vectors_path):
+                os.truncate(self.vectors_path, keep * row_bytes)
+            self.ids = ids[:keep]
+            self._save_ids()
+        else:
+            self.ids = ids
+        self._rows = {item_id: i for i, item_id in enumerate(self.ids)}
+        self._version = self._stamp()
+        self._matrix = None
+        self._ann = None
+
+    def _refresh(self) -> None:
+        """Reload if another process wrote since the last load (holding `_lock`)"""
+        if self._stamp() != self._version:
+            with self._file_lock():
+                self._load()
+
+    def _save_ids(self) -> None:
+        tmp_path = f"{self.ids_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+        os.replace(tmp_path, self.ids_path)
+        self._version = self._stamp()
+
+    def _view(self) -> np.ndarray:
+        if not self.ids:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self._matrix is None or self._matrix.shape[0] != len(self.ids):
+            self._matrix = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r",
+                shape=(len(self.ids), self.dim)
+            )
+        return self._matrix
+
+    def upsert(self, item_id: str, vector: np.ndarray) -> None:
+        """Insert or overwrite the vector for an id"""
+        vector = np.ascontiguousarray(vector, dtype=np.float32).reshape(self.dim)
+        with self._lock, self._file_lock():
+            # Otro proceso pudo añadir filas: la nueva va detrás de las suyas
+            if self._stamp() != self._version:
+                self._load()
+            row = self._rows.get(item_id)
+            if row is not None:
+                matrix = np.memmap(
+                    self.vectors_path, dtype=np.float32, mode="r+",
+                    shape=(len(self.ids), self.dim)
+                )
+                matrix[row] = vector
+                matrix.flush()
+            else:
+                with open(self.vectors_path, "ab") as f:
+                    f.write(vector.tobytes())
+                row = len(self.ids)
+                self.ids.append(item_id)
+                self._rows[item_id] = row
+                self._save_ids()
+            self._matrix = None
+            if self._ann is not None:
+                if row >= self._ann.get_max_elements():
+                    self._ann.resize_index(max(row + 1, 2 * self._ann.get_max_elements()))
+                self._ann.add_items(vector.reshape(1, -1), np.array([row]))
+
+    def rebuild(self, ids: List[str], matrix: np.ndarray) -> None:
+        """Replace the whole collection (used by the offline pipeline)"""
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32).reshape(len(ids), self.dim)
+        with self._lock, self._file_lock():
+            tmp_path = f"{self.vectors_path}.tmp"
+            matrix.tofile(tmp_path)
+            os.replace(tmp_path, self.vectors_path)
+            self.ids = list(ids)
+            self._rows = {item_id: i for i, item_id in enumerate(self.ids)}
+            self._save_ids()
+            self._matrix = None
+            self._ann = None
+
+    def get_vector(self, item_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(item_id)
+            if row is None:
+                return None
+            return np.array(self._view()[row])
+
+    def _ann_index(self, matrix: np.ndarray):
+        """Build the HNSW index lazily, only when enabled and worth it"""
+        if hnswlib is None or not settings.embedding_ann:
+            return None
+        if matrix.shape[0] < settings.embedding_ann_min_items:
+            return None
+        if self._ann is None:
+            index = hnswlib.Index(space="ip", dim=self.dim)
+            index.init_index(max_elements=matrix.shape[0], ef_construction=200, M=16)
+            index.add_items(matrix, np.arange(matrix.shape[0]))
+            self._ann = index
+        return self._ann
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exclude: Optional[set] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return the top-k (id, similarity) pairs for a query vector
+
+        Args:
+            query: Normalized query vector
+            k: Number of results
+            exclude: Ids to leave out of the results
+
+        Returns:
+            List of (id, cosine similarity) sorted by similarity
+        """
+        with self._lock:
+            self._refresh()
+            matrix = self._view()
+            ids = self.ids
+            ann = self._ann_index(matrix) if matrix.shape[0] else None
+
+        n = matrix.shape[0]
+        if n == 0:
+            return []
+        exclude = exclude or set()
+        wanted = min(n, k + len(exclude))
+
+        if ann is not None:
+            ann.set_ef(max(50, 2 * wanted))
+            labels, distances = ann.knn_query(query.reshape(1, -1), k=wanted)
+            candidates = [(int(row), 1.0 - float(dist)) for row, dist in zip(labels[0], distances[0])]
+        else:
+            scores = matrix @ query.astype(np.float32)
+            top = np.argpartition(-scores, wanted - 1)[:wanted]
+            top = top[np.argsort(-scores[top])]
+            candidates = [(int(row), float(scores[row])) for row in top]
+
+        results = []
+        for row, score in candidates:
+            if ids[row] in exclude:
+                continue
+            results.append((ids[row], score))
+            if len(results) == k:
+                break
+        return results
+
+
+class EmbeddingService:
+    """
+    Service for semantic matching between CVs and job postings.
+
+    Keeps two vector collections:
+    - cvs: one vector per candidate (key: candidato_id)
+    - vacantes: one vector per published job posting (key: vacante_id)
+    """
+
+    def __init__(self):
+        self.directory = settings.embeddings_dir
+        os.makedirs(self.directory, exist_ok=True)
+
+        if settings.embedding_model:
+            self.encoder = SentenceTransformerEncoder(settings.embedding_model)
+        else:
+            self.encoder = HashedTfidfEncoder(
+                settings.embedding_dim,
+                idf_path=os.path.join(self.directory, "idf.f32")
+            )
+
+        self.cvs = VectorStore(self.directory, "cvs", self.encoder.dim)
+        self.vacantes = VectorStore(self.directory, "vacantes", self.encoder.dim)
+
+    @staticmethod
+    def texto_vacante(vacante: Dict) -> str:
+        """Build the text that represents a job posting"""
+        habilidades = vacante.get("habilidades_requeridas") or []
+        return "\n".join([
+            vacante.get("titulo") or "",
+            vacante.get("cargo") or "",
+            " ".join(habilidades),
+            vacante.get("descripcion") or "",
+        ])
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.encoder.encode([text])[0]
+
+    def indexar_cv(self, candidato_id, cv_text: str) -> None:
+        """Add or refresh a candidate's CV vector"""
+        self.cvs.upsert(str(candidato_id), self.encode(cv_text))
+
+    def indexar_vacante(self, vacante: Dict) -> None:
+        """Add or refresh a job posting vector"""
+        self.vacantes.upsert(str(vacante["id"]), self.encode(self.texto_vacante(vacante)))
+
+    def candidatos_similares(self, vacante: Dict, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k candidates whose CV is closest to a job posting"""
+        query = self.vacantes.get_vector(str(vacante["id"]))
+        if query is None:
+            query = self.encode(self.texto_vacante(vacante))
+        return self.cvs.search(query, k)
+
+    def vacantes_para_cv(
+        self,
+        candidato_id,
+        cv_text: Optional[str] = None,
+        k: int = 10
+    ) -> List[Tuple[str, float]]:
+        """Top-k job postings closest to a candidate's CV"""
+        query = self.cvs.get_vector(str(candidato_id))
+        if query is None:
+            if not cv_text:
+                return []
+            query = self.encode(cv_text)
+        return self.vacantes.search(query, k)
+
+    def reconstruir_indices(self, db, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Offline pipeline: re-read every CV and published job posting,
+        refit the encoder and rewrite both collections.
+
+        Args:
+            db: Supabase client
+            batch_size: Rows fetched per request
+
+        Returns:
+            Number of indexed items per collection
+        """
+        def fetch_all(query_factory):
+            rows, offset = [], 0
+            while True:
+                batch = query_factory().range(offset, offset + batch_size - 1).execute().data
+                rows.extend(batch)
+                if len(batch) < batch_size:
+                    return rows
+                offset += batch_size
+
+        documentos = fetch_all(lambda: db.table("documentos").select(
+            "candidato_id, texto_extraido, created_at"
+        ).eq("tipo_documento", "cv").order("created_at"))
+
+        # Último CV de cada candidato
+        cvs: Dict[str, str] = {}
+        for doc in documentos:
+            if doc.get("texto_extraido"):
+                cvs[str(doc["candidato_id"])] = doc["texto_extraido"]
+
+        vacantes = fetch_all(lambda: db.table("vacantes").select(
+            "id, titulo, cargo, descripcion, habilidades_requeridas"
+        ).eq("estado", "publicada").order("id"))
+        textos_vacantes = [self.texto_vacante(v) for v in vacantes]
+
+        self.encoder.fit(list(cvs.values()) + textos_vacantes)
+
+        cv_ids = list(cvs.keys())
+        self.cvs.rebuild(cv_ids, self.encoder.encode(list(cvs.values())))
+        self.vacantes.rebuild(
+            [str(v["id"]) for v in vacantes],
+            self.encoder.encode(textos_vacantes)
+        )
+
+        return {"cvs": len(cv_ids), "vacantes": len(vacantes)}
+
+
+# Singleton instance
+embedding_service = LazyService(EmbeddingService, "embedding_service")
+
+
+if __name__ == "__main__":
+    # Reconstrucción offline: python -m services.embedding_service
+    from database import get_db
+
+    totales = embedding_service.reconstruir_indices(get_db())
+    print(f"Índices reconstruidos: {totales}")
@@ -0,0 +1,162 @@
+"""
+Evaluacion Service - Score an application from the candidate's answers
+"""
+from typing import Dict, List, Optional
+from database import get_db
+from services.ia_service import ia_service
+from services.email_service import email_service
+from services.answer_log import answer_log
+from services.dashboard_service import dashboard_service
+from services.lazy import LazyService
+
+
+class EvaluacionService:
+    """
+    Evaluate-and-save flow shared by the answers form and the chatbot.
+
+    Steps:
+    1. Load application, candidate and job posting
+    2. Evaluate compatibility with AI (reusing the stored CV analysis)
+    3. Update application with scores and save the evaluation
+    4. Send confirmation email
+    """
+
+    async def evaluar_aplicacion(
+        self,
+        aplicacion_id: str,
+        respuestas: List[Dict[str, str]],
+        aplicacion_data: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Evaluate an application and persist the result
+
+        Args:
+            aplicacion_id: Application ID
+            respuestas: List of {"pregunta", "respuesta"} dicts
+            aplicacion_data: Application row if the caller already loaded it
+
+        Returns:
+            Dict with puntuacion, compatibilidad and email_enviado
+
+        Raises:
+            ValueError: If the application does not exist
+        """
+        db = get_db()
+
+        if aplicacion_data is None:
+            aplicacion = db.table("aplicaciones").select("*").eq("id", aplicacion_id).execute()
+            if not aplicacion.data:
+                raise ValueError(f"Aplicación no encontrada: {aplicacion_id}")
+            aplicacion_data = aplicacion.data[0]
+
+        candidato_id = aplicacion_data["candidato_id"]
+        vacante_id = aplicacion_data["vacante_id"]
+
+        # Get candidate info
+        candidato = db.table("candidatos").select("*").eq("id", candidato_id).execute()
+        candidato_data = candidato.data[0]
+
+        # Email está en la tabla candidatos (no necesitamos buscar en usuarios)
+        candidato_email = candidato_data.get("email", "")
+
+        # Get job posting info
+        vacante = db.table("vacantes").select("*").eq("id", vacante_id).execute()
+        vacante_data = vacante.data[0]
+
+        # Reuse the CV analysis stored at application time; only load
+        # the raw CV text when there is no usable analysis
+        cv_analisis = aplicacion_data.get("analisis_cv")
+        cv_text = ""
+        if ia_service.formatear_analisis_cv(cv_analisis) is None:
+            documento = db.table("documentos").select("texto_extraido").eq(
+                "candidato_id", candidato_id
+            ).eq("tipo_documento", "cv").execute()
+            cv_text = documento.data[0]["texto_extraido"] if documento.data else ""
+
+        # Evaluate compatibility with AI
+        evaluacion = await ia_service.evaluar_compatibilidad(
+            cv_text=cv_text,
+            respuestas=respuestas,
+            titulo=vacante_data["titulo"],
+            habilidades_requeridas=vacante_data["habilidades_requeridas"],
+            experiencia_min=vacante_data["experiencia_min"],
+            cv_analisis=cv_analisis
+        )
+
+        # Update application with scores
+        cambios = {
+            "puntuacion_ia": evaluacion["puntuacion"],
+            "compatibilidad_porcentaje": evaluacion["compatibilidad"],
+            "estado": "en_revision"
+        }
+        db.table("aplicaciones").update(cambios).eq("id", aplicacion_id).execute()
+        dashboard_service.actualizar_aplicacion(
+            vacante_data["empresa_id"], aplicacion_data, cambios,
+            candidato_data.get("nombre_anonimo") or "N/A", vacante_data["titulo"]
+        )
+
+        # Save evaluation to evaluaciones table
+        evaluacion_record = {
+            "entrevista_id": None,  # Puede vincularse después si hay entrevista
+            "puntaje_general": evaluacion["puntuacion"],
+            "fortalezas": evaluacion.get("fortalezas", []),
+            "debilidades": evaluacion.get("debilidades", []),
+            "evaluador_nombre": "IA - Groq LLaMA 3.1",
+            "aspectos_positivos": evaluacion.get("fortalezas", []),
+            "aspectos_negativos": evaluacion.get("debilidades", []),
+            "decision_final": "Pendiente de revisión"
+            # created_at se genera automáticamente
+        }
+
+        db.table("evaluaciones").insert(evaluacion_record).execute()
+
+        # Get company info for email
+        empresa = db.table("empresas").select("nombre_empresa").eq("id", vacante_data["empresa_id"]).execute()
+        empresa_nombre = empresa.data[0]["nombre_empresa"] if empresa.data else "La empresa"
+
+        # Send confirmation email
+        email_enviado = await email_service.send_application_confirmation(
+            to_email=candidato_email,
+            candidato_nombre=candidato_data["nombre_anonimo"],
+            vacante_titulo=vacante_data["titulo"],
+            empresa_nombre=empresa_nombre,
+            puntuacion=evaluacion["puntuacion"]
+        )
+
+        return {
+            "puntuacion": evaluacion["puntuacion"],
+            "compatibilidad": evaluacion["compatibilidad"],
+            "email_enviado": email_enviado
+        }
+
+    async def evaluar_desde_respuestas_guardadas(self, aplicacion_id: str, sesion_id: str) -> Optional[Dict]:
+        """
+        Evaluate an application from the answers stored in the answer log.
+
+        Used as a background job when a chatbot interview ends, so the
+        client doesn't have to resubmit the answers. Only the answers of
+        that interview are used: form answers and earlier, abandoned
+        chatbot sessions of the same application are left out.
+
+        Args:
+            aplicacion_id: Application ID
+            sesion_id: Chatbot interview that just ended
+
+        Returns:
+            Evaluation result, or None if there are no stored answers
+        """
+        respuestas = await answer_log.respuestas(aplicacion_id, origen="chatbot", sesion_id=sesion_id)
+        if not respuestas:
+            print(f"No stored answers for application {aplicacion_id}, skipping evaluation")
+            return None
+
+        resultado = await self.evaluar_aplicacion(
+            aplicacion_id,
+            [{"pregunta": r.get("pregunta") or "", "respuesta": r["respuesta"]} for r in respuestas]
+        )
+        print(f"Application {aplicacion_id} evaluated from chatbot answers: {resultado['puntuacion']}")
+        return resultado
+
+
+# Singleton instance
+evaluacion_service = LazyService(EvaluacionService, "evaluacion_service")
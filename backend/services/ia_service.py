@@ -1,16 +1,126 @@
 """
 AI Service - Integration with Groq API (LLaMA 3.1) using LangChain
 """
-import json
-import os
-from typing import List, Dict
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
+import functools
+from typing import Any, List, Dict, Optional
 from config import settings
+from models.candidato import AnalisisCV, EvaluacionIA
+from models.vacante import PreguntaSugerida
+from services.llm_parser import LLMParseError, parse_llm_json, parse_metrics
+from services.cv_compactor import compactar_cv, PRIORIDAD_ANALISIS, PRIORIDAD_EVALUACION
+from services.metrics import metrics
+from services.lazy import LazyService
+from services.plantillas_preguntas import plantillas_preguntas
+
+
+# Prompt messages by name. LangChain is only imported (and each template
+# compiled, once) the first time a prompt is used; see _prompt().
+MENSAJES = {
+    "generar_preguntas": [
+        ("system", """Eres un experto en reclutamiento de tecnología con 10+ años de experiencia.
+Tu trabajo es generar preguntas inteligentes que evalúen de forma efectiva a los candidatos.
+
+Las preguntas deben:
+- Ser específicas al cargo y tecnologías
+- Evaluar tanto habilidades técnicas como blandas
+- Ser claras y directas
+- Permitir al candidato demostrar su experiencia real
+"""),
+        ("user", """Genera 5-7 preguntas para esta vacante:
+
+**Título:** {titulo}
+**Descripción:** {descripcion}
+**Habilidades requeridas:** {habilidades}
+**Experiencia mínima:** {experiencia_min} años
+
+Retorna ÚNICAMENTE un JSON válido con este formato exacto:
+[
+  {{
+    "pregunta": "texto de la pregunta aquí",
+    "tipo_pregunta": "abierta"
+  }},
+  {{
+    "pregunta": "texto de la pregunta aquí",
+    "tipo_pregunta": "si_no"
+  }}
+]
+
+Tipos válidos: "abierta", "si_no", "escala"
+No incluyas markdown, ni código, ni explicaciones. Solo el JSON.
+""")
+    ],
+    "analizar_cv": [
+        ("system", """Eres un experto en análisis de CVs y perfiles profesionales.
+Extrae información clave de forma precisa y estructurada."""),
+        ("user", """Analiza este CV y extrae:
+
+**CV:**
+{cv_text}
+
+Retorna ÚNICAMENTE un JSON con este formato:
+{{
+  "habilidades": ["Python", "React", "..."],
+  "experiencia_años": 4,
+  "educacion": "Ingeniería de Sistemas",
+  "resumen": "Breve resumen profesional en 2-3 líneas"
+}}
+
+Si no encuentras algún dato, usa null o [] según corresponda.
+No incluyas markdown ni explicaciones, solo el JSON.
+""")
+    ],
+    "evaluar_compatibilidad": [
+        ("system", """Eres un experto en evaluación de candidatos para posiciones tecnológicas.
+Tu análisis debe ser objetivo, justo y basado en evidencia concreta."""),
+        ("user", """Evalúa la compatibilidad entre este candidato y la vacante.
+
+**VACANTE:**
+- Título: {titulo}
+- Habilidades requeridas: {habilidades}
+- Experiencia mínima: {experiencia_min} años
+
+**CANDIDATO:**
+{perfil_candidato}
+
+**RESPUESTAS A PREGUNTAS:**
+{respuestas}
+
+Analiza y retorna ÚNICAMENTE un JSON:
+{{
+  "puntuacion": 85,
+  "compatibilidad": 78,
+  "fortalezas": ["Experiencia sólida en React", "Buena comunicación"],
+  "debilidades": ["Poca experiencia con microservicios"]
+}}
+
+- puntuacion: 0-100 (evaluación general del candidato)
+- compatibilidad: 0-100 (qué tan bien encaja con esta vacante específica)
+- fortalezas: lista de 2-4 puntos fuertes
+- debilidades: lista de 1-3 áreas de mejora
+
+Sé honesto pero constructivo. No incluyas markdown ni explicaciones.
+""")
+    ],
+    # Used only when the first response can't be parsed
+    "reparar_json": [
+        ("system", "Corriges respuestas JSON inválidas. Responde ÚNICAMENTE con el JSON corregido, sin markdown ni explicaciones."),
+        ("user", """Esta respuesta debía ser un JSON válido pero falló con el error:
+{error}
+
+Respuesta original:
+{respuesta}
+
+Devuelve el mismo contenido como JSON válido con la estructura pedida.""")
+    ]
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _prompt(nombre: str):
+    """Compiled ChatPromptTemplate for a prompt in MENSAJES"""
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages(MENSAJES[nombre])
 
-print("--- DEBUG GROQ KEY START ---")
-print(f"GROQ_API_KEY value: {os.getenv('GROQ_API_KEY')}")
-print("--- DEBUG GROQ KEY END ---")
 
 class IAService:
     """
@@ -25,21 +135,18 @@ class IAService:
     """
     
     def __init__(self):
-        """Initialize LangChain Groq client with configuration"""
-        if not settings.groq_api_key:
-            raise ValueError(
-                "Groq API key not configured. "
-                "Please set GROQ_API_KEY in .env file"
-            )
+        """Initialize the LangChain chat model for the configured provider"""
+        from services.llm_provider import crear_llm
         
-        # Configure Groq with LangChain
-        # Modelo: llama-3.1-8b-instant (rápido y eficiente)
-        self.llm = ChatGroq(
-            model="llama-3.1-8b-instant",
-            groq_api_key=settings.groq_api_key,
-            max_tokens=2000,
-            temperature=0.7
-        )
+        # Modelo: llama-3.1-8b-instant (rápido y eficiente) o el proveedor fake
+        self.llm = crear_llm(max_tokens=2000, temperature=0.7)
+    
+    @staticmethod
+    def precompilar_prompts() -> int:
+        """Compile every prompt template ahead of the first request"""
+        for nombre in MENSAJES:
+            _prompt(nombre)
+        return len(MENSAJES)
     
     async def generar_preguntas_vacante(
         self,
@@ -52,7 +159,8 @@ class IAService:
         Generate intelligent questions for a job posting using LangChain.
         
         Uses a structured prompt template and LLMChain for better
-        prompt management and consistency.
+        prompt management and consistency. Questions already generated for
+        an equivalent posting are reused without calling the LLM.
         
         Args:
             titulo: Job title
@@ -63,66 +171,43 @@ class IAService:
         Returns:
             List of questions with type (abierta, si_no, escala)
         """
+        plantilla = plantillas_preguntas.buscar(titulo, habilidades_requeridas, experiencia_min)
+        if plantilla is not None:
+            return plantilla
+        
         habilidades_str = ", ".join(habilidades_requeridas)
         
-        # Define structured prompt template
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """Eres un experto en reclutamiento de tecnología con 10+ años de experiencia.
-Tu trabajo es generar preguntas inteligentes que evalúen de forma efectiva a los candidatos.
-
-Las preguntas deben:
-- Ser específicas al cargo y tecnologías
-- Evaluar tanto habilidades técnicas como blandas
-- Ser claras y directas
-- Permitir al candidato demostrar su experiencia real
-"""),
-            ("user", """Genera 5-7 preguntas para esta vacante:
-
-**Título:** {titulo}
-**Descripción:** {descripcion}
-**Habilidades requeridas:** {habilidades}
-**Experiencia mínima:** {experiencia_min} años
-
-Retorna ÚNICAMENTE un JSON válido con este formato exacto:
-[
-  {{
-    "pregunta": "texto de la pregunta aquí",
-    "tipo_pregunta": "abierta"
-  }},
-  {{
-    "pregunta": "texto de la pregunta aquí",
-    "tipo_pregunta": "si_no"
-  }}
-]
-
-Tipos válidos: "abierta", "si_no", "escala"
-No incluyas markdown, ni código, ni explicaciones. Solo el JSON.
-""")
-        ])
+        # Structured prompt template (compiled once)
+        prompt_template = _prompt("generar_preguntas")
         
         # Create LangChain chain
         chain = prompt_template | self.llm
         
         try:
-            # Execute chain asynchronously
-            response = await chain.ainvoke({
-                "titulo": titulo,
-                "descripcion": descripcion,
-                "habilidades": habilidades_str,
-                "experiencia_min": experiencia_min
-            })
-            
-            response_text = response.content.strip()
-            
-            # Parse JSON response
-            preguntas = self._parse_json_response(response_text)
+            # Execute chain asynchronously and parse JSON response
+            # (timed here: template hits must not count as LLM latency)
+            with metrics.timer("llm.generar_preguntas"):
+                preguntas = await self._invoke_json(
+                    "generar_preguntas",
+                    chain,
+                    {
+                        "titulo": titulo,
+                        "descripcion": descripcion,
+                        "habilidades": habilidades_str,
+                        "experiencia_min": experiencia_min
+                    },
+                    schema=List[PreguntaSugerida]
+                )
+            plantillas_preguntas.guardar(titulo, habilidades_requeridas, experiencia_min, preguntas)
             return preguntas
             
         except Exception as e:
             print(f"Error generating questions with LangChain: {e}")
+            parse_metrics.record("generar_preguntas", "fallback")
             # Fallback questions
             return self._get_fallback_questions(habilidades_requeridas, experiencia_min)
     
+    @metrics.timed("llm.analizar_cv")
     async def analizar_cv(self, cv_text: str) -> Dict:
         """
         Analyze CV and extract key information using LangChain.
@@ -136,46 +221,30 @@ No incluyas markdown, ni código, ni explicaciones. Solo el JSON.
         Returns:
             Dictionary with extracted information
         """
-        # Define structured prompt template
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """Eres un experto en análisis de CVs y perfiles profesionales.
-Extrae información clave de forma precisa y estructurada."""),
-            ("user", """Analiza este CV y extrae:
-
-**CV:**
-{cv_text}
-
-Retorna ÚNICAMENTE un JSON con este formato:
-{{
-  "habilidades": ["Python", "React", "..."],
-  "experiencia_años": 4,
-  "educacion": "Ingeniería de Sistemas",
-  "resumen": "Breve resumen profesional en 2-3 líneas"
-}}
-
-Si no encuentras algún dato, usa null o [] según corresponda.
-No incluyas markdown ni explicaciones, solo el JSON.
-""")
-        ])
+        # Structured prompt template (compiled once)
+        prompt_template = _prompt("analizar_cv")
         
         # Create LangChain chain
         chain = prompt_template | self.llm
         
         try:
-            # Limit CV text to avoid token limits
-            cv_text_limited = cv_text[:4000]
-            
-            # Execute chain asynchronously
-            response = await chain.ainvoke({"cv_text": cv_text_limited})
-            
-            response_text = response.content.strip()
+            # Keep only the most relevant CV sections within the token budget
+            cv_text_limited = compactar_cv(
+                cv_text, settings.cv_tokens_analisis, PRIORIDAD_ANALISIS
+            )
             
-            # Parse JSON response
-            analisis = self._parse_json_response(response_text)
+            # Execute chain asynchronously and parse JSON response
+            analisis = await self._invoke_json(
+                "analizar_cv",
+                chain,
+                {"cv_text": cv_text_limited},
+                schema=AnalisisCV
+            )
             return analisis
             
         except Exception as e:
             print(f"Error analyzing CV with LangChain: {e}")
+            parse_metrics.record("analizar_cv", "fallback")
             return {
                 "habilidades": [],
                 "experiencia_años": 0,
@@ -183,13 +252,15 @@ No incluyas markdown ni explicaciones, solo el JSON.
                 "resumen": "Error al analizar CV"
             }
     
+    @metrics.timed("llm.evaluar_compatibilidad")
     async def evaluar_compatibilidad(
         self,
         cv_text: str,
         respuestas: List[Dict[str, str]],
         titulo: str,
         habilidades_requeridas: List[str],
-        experiencia_min: int
+        experiencia_min: int,
+        cv_analisis: Optional[Dict] = None
     ) -> Dict:
         """
         Evaluate candidate compatibility with job posting using LangChain.
@@ -197,12 +268,16 @@ No incluyas markdown ni explicaciones, solo el JSON.
         Analyzes CV and interview responses to calculate compatibility
         scores and identify strengths and weaknesses.
         
+        When the structured CV analysis from `analizar_cv` is available it
+        is sent instead of the CV text, which is a fraction of the tokens.
+        
         Args:
-            cv_text: CV text
+            cv_text: CV text (only used when there is no usable analysis)
             respuestas: Candidate's answers to interview questions
             titulo: Job title
             habilidades_requeridas: Required skills
             experiencia_min: Minimum experience required
+            cv_analisis: Stored result of `analizar_cv`, if any
             
         Returns:
             Evaluation with score, compatibility, strengths, and weaknesses
@@ -215,69 +290,41 @@ No incluyas markdown ni explicaciones, solo el JSON.
             for r in respuestas
         ])
         
-        # Define structured prompt template
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """Eres un experto en evaluación de candidatos para posiciones tecnológicas.
-Tu análisis debe ser objetivo, justo y basado en evidencia concreta."""),
-            ("user", """Evalúa la compatibilidad entre este candidato y la vacante.
-
-**VACANTE:**
-- Título: {titulo}
-- Habilidades requeridas: {habilidades}
-- Experiencia mínima: {experiencia_min} años
-
-**CANDIDATO:**
-CV: {cv_text}
-
-**RESPUESTAS A PREGUNTAS:**
-{respuestas}
-
-Analiza y retorna ÚNICAMENTE un JSON:
-{{
-  "puntuacion": 85,
-  "compatibilidad": 78,
-  "fortalezas": ["Experiencia sólida en React", "Buena comunicación"],
-  "debilidades": ["Poca experiencia con microservicios"]
-}}
-
-- puntuacion: 0-100 (evaluación general del candidato)
-- compatibilidad: 0-100 (qué tan bien encaja con esta vacante específica)
-- fortalezas: lista de 2-4 puntos fuertes
-- debilidades: lista de 1-3 áreas de mejora
-
-Sé honesto pero constructivo. No incluyas markdown ni explicaciones.
-""")
-        ])
+        # Structured prompt template (compiled once)
+        prompt_template = _prompt("evaluar_compatibilidad")
         
         # Create LangChain chain
         chain = prompt_template | self.llm
         
         try:
-            # Limit CV text to avoid token limits
-            cv_text_limited = cv_text[:3000]
-            
-            # Execute chain asynchronously
-            response = await chain.ainvoke({
-                "titulo": titulo,
-                "habilidades": habilidades_str,
-                "experiencia_min": experiencia_min,
-                "cv_text": cv_text_limited,
-                "respuestas": respuestas_formateadas
-            })
-            
-            response_text = response.content.strip()
+            # Prefer the compact CV analysis; otherwise keep only the most
+            # relevant CV sections within the token budget
+            perfil_candidato = self.formatear_analisis_cv(cv_analisis)
+            if perfil_candidato is None:
+                perfil_candidato = "CV: " + compactar_cv(
+                    cv_text, settings.cv_tokens_evaluacion, PRIORIDAD_EVALUACION
+                )
             
-            # Parse JSON response
-            evaluacion = self._parse_json_response(response_text)
-            
-            # Validate scores are within range
-            evaluacion["puntuacion"] = max(0, min(100, evaluacion.get("puntuacion", 50)))
-            evaluacion["compatibilidad"] = max(0, min(100, evaluacion.get("compatibilidad", 50)))
+            # Execute chain asynchronously and parse JSON response
+            # (EvaluacionIA validates fields and clamps scores to 0-100)
+            evaluacion = await self._invoke_json(
+                "evaluar_compatibilidad",
+                chain,
+                {
+                    "titulo": titulo,
+                    "habilidades": habilidades_str,
+                    "experiencia_min": experiencia_min,
+                    "perfil_candidato": perfil_candidato,
+                    "respuestas": respuestas_formateadas
+                },
+                schema=EvaluacionIA
+            )
             
             return evaluacion
             
         except Exception as e:
             print(f"Error evaluating compatibility with LangChain: {e}")
+            parse_metrics.record("evaluar_compatibilidad", "fallback")
             return {
                 "puntuacion": 50,
                 "compatibilidad": 50,
@@ -285,28 +332,90 @@ Sé honesto pero constructivo. No incluyas markdown ni explicaciones.
                 "debilidades": ["Requiere evaluación manual"]
             }
     
-    def _parse_json_response(self, response_text: str) -> Dict:
+    @staticmethod
+    def formatear_analisis_cv(cv_analisis: Optional[Dict]) -> Optional[str]:
         """
-        Parse JSON from LLM response, handling markdown code blocks.
+        Render a stored CV analysis as a compact candidate profile.
         
         Args:
-            response_text: Raw response from LLM
+            cv_analisis: Result of `analizar_cv`
+            
+        Returns:
+            A few lines of text, or None if the analysis is missing or
+            empty (e.g. the analysis failed and returned defaults)
+        """
+        if not cv_analisis:
+            return None
+        habilidades = cv_analisis.get("habilidades") or []
+        experiencia = cv_analisis.get("experiencia_años")
+        if not habilidades and not experiencia:
+            return None
+        
+        lineas = [f"- Habilidades (CV): {', '.join(habilidades) or 'No especificadas'}"]
+        if isinstance(experiencia, (int, float)):
+            lineas.append(f"- Experiencia (CV): {experiencia:g} años")
+        if cv_analisis.get("educacion"):
+            lineas.append(f"- Educación: {cv_analisis['educacion']}")
+        if cv_analisis.get("resumen"):
+            lineas.append(f"- Resumen: {cv_analisis['resumen']}")
+        return "\n".join(lineas)
+    
+    async def _invoke_json(
+        self,
+        prompt_name: str,
+        chain,
+        inputs: Dict,
+        schema: Any = None
+    ) -> Any:
+        """
+        Run a chain and parse its JSON output.
+        
+        If the response has no valid JSON even after local repair, the LLM
+        is asked once to fix its own output before giving up.
+        
+        Args:
+            prompt_name: Prompt name used for parse metrics
+            chain: LangChain runnable (prompt | llm)
+            inputs: Prompt variables
+            schema: Optional Pydantic schema to validate against
             
         Returns:
-            Parsed JSON as dictionary
+            Parsed (and validated) JSON
         """
+        response = await chain.ainvoke(inputs)
+        response_text = response.content.strip()
+        
         try:
-            # Try direct JSON parsing first
-            return json.loads(response_text)
-        except json.JSONDecodeError:
-            # Remove markdown code blocks if present
-            text = response_text.strip()
-            if text.startswith("```"):
-                lines = text.split("\n")
-                text = "\n".join(lines[1:-1])
-                if text.startswith("json"):
-                    text = text[4:]
-            return json.loads(text.strip())
+            return self._parse_json_response(response_text, schema, prompt_name)
+        except LLMParseError as e:
+            print(f"Invalid JSON from LLM ({prompt_name}), retrying with repair prompt: {e}")
+            parse_metrics.record(prompt_name, "retried")
+            repair_chain = _prompt("reparar_json") | self.llm
+            response = await repair_chain.ainvoke({
+                "error": str(e)[:500],
+                "respuesta": response_text
+            })
+            return self._parse_json_response(response.content, schema, prompt_name)
+    
+    def _parse_json_response(
+        self,
+        response_text: str,
+        schema: Any = None,
+        prompt_name: str = None
+    ) -> Any:
+        """
+        Parse JSON from LLM response, tolerating prose, markdown code
+        blocks and common syntax defects.
+        
+        Args:
+            response_text: Raw response from LLM
+            schema: Optional Pydantic schema to validate against
+            prompt_name: Prompt name used for parse metrics
+            
+        Returns:
+            Parsed JSON as dictionary (or list)
+        """
+        return parse_llm_json(response_text, schema=schema, prompt=prompt_name)
     
     def _get_fallback_questions(
         self,
@@ -340,4 +449,4 @@ Sé honesto pero constructivo. No incluyas markdown ni explicaciones.
 
 
 # Singleton instance
-ia_service = IAService()
+ia_service = LazyService(IAService, "ia_service")
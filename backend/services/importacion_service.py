@@ -0,0 +1,390 @@
+"""
+Importacion Service - Bulk creation of job postings with AI questions
+"""
+import asyncio
+import csv
+import io
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic import ValidationError
+from config import settings
+from database import get_db
+from models.vacante import VacanteCrear
+from services.ia_service import ia_service
+from services.background import background_jobs
+
+
+# Separadores aceptados para habilidades_requeridas en CSV
+SEPARADORES_HABILIDADES = (";", "|")
+
+
+class ImportacionInvalidaError(ValueError):
+    """The import body could not be read at all (not a per-item error)"""
+
+
+class ImportacionDemasiadoGrandeError(ImportacionInvalidaError):
+    """The import body is larger than IMPORTACION_MAX_MB"""
+
+
+async def leer_cuerpo(chunks: AsyncIterator[bytes], content_length: Optional[str]) -> bytes:
+    """
+    Read an import body, refusing it as soon as it passes IMPORTACION_MAX_MB
+
+    Args:
+        chunks: Request body stream
+        content_length: Content-Length header, if sent
+
+    Returns:
+        The whole body
+
+    Raises:
+        ImportacionDemasiadoGrandeError: If the body is too large
+    """
+    limite = settings.importacion_max_mb * 1024 * 1024
+    mensaje = f"El archivo supera {settings.importacion_max_mb} MB"
+    if content_length and content_length.isdigit() and int(content_length) > limite:
+        raise ImportacionDemasiadoGrandeError(mensaje)
+
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > limite:
+            raise ImportacionDemasiadoGrandeError(mensaje)
+    return bytes(body)
+
+
+def filas_preguntas(vacante_id: str, preguntas: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Rows for `vacante_preguntas`, ready for one multi-row insert
+
+    Args:
+        vacante_id: Job posting ID
+        preguntas: Generated questions ({"pregunta", "tipo_pregunta"})
+
+    Returns:
+        One row per question, pending company approval
+    """
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "vacante_id": vacante_id,
+            "pregunta": p["pregunta"],
+            "tipo_pregunta": p["tipo_pregunta"],
+            "aprobada_por_empresa": False
+            # created_at se genera automáticamente con DEFAULT now()
+        }
+        for p in preguntas
+    ]
+
+
+def fila_vacante(vacante: VacanteCrear, vacante_id: str) -> Dict[str, Any]:
+    """Row for `vacantes`, saved as draft until the company approves the questions"""
+    return {
+        "id": vacante_id,
+        "empresa_id": vacante.empresa_id,
+        "titulo": vacante.titulo,
+        "descripcion": vacante.descripcion,
+        "cargo": vacante.cargo,
+        "tipo_contrato": vacante.tipo_contrato,
+        "modalidad": vacante.modalidad,
+        "habilidades_requeridas": vacante.habilidades_requeridas,
+        "experiencia_min": vacante.experiencia_min,
+        "experiencia_max": vacante.experiencia_max,
+        "salario_min": float(vacante.salario_min) if vacante.salario_min else None,
+        "salario_max": float(vacante.salario_max) if vacante.salario_max else None,
+        "ciudad": vacante.ciudad,
+        "estado": "borrador"
+        # created_at y updated_at se generan automáticamente con DEFAULT now()
+    }
+
+
+def _fila_csv(fila: Dict[str, str]) -> Dict[str, Any]:
+    """CSV cells are strings: split skills and drop empty optional columns"""
+    datos: Dict[str, Any] = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in fila.items() if k}
+    habilidades = datos.get("habilidades_requeridas") or ""
+    for separador in SEPARADORES_HABILIDADES:
+        if separador in habilidades:
+            break
+    else:
+        separador = ","
+    datos["habilidades_requeridas"] = [h.strip() for h in habilidades.split(separador) if h.strip()]
+    return {k: v for k, v in datos.items() if v != ""}
+
+
+def parsear(content_type: str, body: bytes) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Read the raw items of an import body
+
+    Accepts a JSON list (or {"vacantes": [...]}), NDJSON (one object per
+    line) or CSV with a header row. A line that cannot be read becomes an
+    exception in its slot so the other items still go through.
+
+    Args:
+        content_type: Request Content-Type
+        body: Request body
+
+    Returns:
+        One dict (or exception) per item, in input order
+
+    Raises:
+        ImportacionInvalidaError: If the body cannot be read at all
+    """
+    tipo = content_type.split(";")[0].strip().lower()
+    try:
+        texto = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportacionInvalidaError("El archivo debe estar en UTF-8")
+
+    if tipo in ("text/csv", "application/csv"):
+        return [_fila_csv(fila) for fila in csv.DictReader(io.StringIO(texto))]
+
+    if tipo in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        items: List[Union[Dict[str, Any], Exception]] = []
+        for linea in texto.splitlines():
+            if not linea.strip():
+                continue
+            try:
+                items.append(json.loads(linea))
+            except json.JSONDecodeError as e:
+                items.append(e)
+        return items
+
+    try:
+        datos = json.loads(texto)
+    except json.JSONDecodeError as e:
+        raise ImportacionInvalidaError(f"JSON inválido: {e}")
+    if isinstance(datos, dict):
+        datos = datos.get("vacantes")
+    if not isinstance(datos, list):
+        raise ImportacionInvalidaError("Se esperaba una lista de vacantes")
+    return datos
+
+
+def _error_validacion(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+async def importar(items: List[Union[Dict[str, Any], Exception]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Create many job postings, yielding one status event per step
+
+    1. Validate every item and check the companies in one query
+    2. Insert all valid postings in one batch (as drafts)
+    3. Generate questions concurrently (IMPORTACION_CONCURRENCIA at a time)
+    4. Insert every question in one multi-row insert
+
+    Events: {"indice", "estado": "invalida" | "creada" | "preguntas" | "error", ...}
+    per item, {"estado": "progreso", "generadas", "total"} while questions
+    are generated, then a final {"estado": "completada", "resumen": {...}}.
+    "preguntas" is only reported once the questions are saved.
+
+    Args:
+        items: Output of `parsear`
+
+    Yields:
+        Status events, in the order they happen
+    """
+    db = get_db()
+    resumen = {"recibidas": len(items), "invalidas": 0, "creadas": 0, "preguntas": 0, "errores": 0}
+
+    # 1. Validate
+    validas: List[Tuple[int, VacanteCrear]] = []
+    for indice, item in enumerate(items):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            validas.append((indice, VacanteCrear.model_validate(item)))
+        except (ValidationError, ValueError, TypeError) as e:
+            resumen["invalidas"] += 1
+            yield {"indice": indice, "estado": "invalida", "error": _error_validacion(e)}
+
+    empresa_ids = list({v.empresa_id for _, v in validas})
+    existentes = set()
+    if empresa_ids:
+        empresas = await asyncio.to_thread(
+            lambda: db.table("empresas").select("id").in_("id", empresa_ids).execute()
+        )
+        existentes = {str(e["id"]) for e in empresas.data}
+
+    pendientes: List[Tuple[int, str, VacanteCrear]] = []
+    for indice, vacante in validas:
+        if vacante.empresa_id not in existentes:
+            resumen["invalidas"] += 1
+            yield {"indice": indice, "estado": "invalida", "error": "Empresa no encontrada"}
+        else:
+            pendientes.append((indice, str(uuid.uuid4()), vacante))
+
+    # 2. One batch insert for every posting
+    if pendientes:
+        filas = [fila_vacante(vacante, vacante_id) for _, vacante_id, vacante in pendientes]
+        try:
+            await asyncio.to_thread(lambda: db.table("vacantes").insert(filas).execute())
+        except Exception as e:
+            resumen["errores"] += len(pendientes)
+            for indice, _, _ in pendientes:
+                yield {"indice": indice, "estado": "error", "error": f"Error creando vacante: {e}"}
+            yield {"estado": "completada", "resumen": resumen}
+            return
+
+        resumen["creadas"] = len(pendientes)
+        for indice, vacante_id, _ in pendientes:
+            yield {"indice": indice, "estado": "creada", "vacante_id": vacante_id}
+
+    # 3. Questions, several LLM calls at a time
+    semaforo = asyncio.Semaphore(settings.importacion_concurrencia)
+
+    async def generar(indice: int, vacante_id: str, vacante: VacanteCrear):
+        async with semaforo:
+            try:
+                preguntas = await ia_service.generar_preguntas_vacante(
+                    titulo=vacante.titulo,
+                    descripcion=vacante.descripcion,
+                    habilidades_requeridas=vacante.habilidades_requeridas,
+                    experiencia_min=vacante.experiencia_min
+                )
+                return indice, vacante_id, preguntas, None
+            except Exception as e:
+                return indice, vacante_id, [], e
+
+    filas_todas: List[Dict[str, Any]] = []
+    generadas: List[Tuple[int, str, List[Dict[str, str]]]] = []
+    for tarea in asyncio.as_completed([generar(*p) for p in pendientes]):
+        indice, vacante_id, preguntas, error = await tarea
+        if error is not None:
+            resumen["errores"] += 1
+            yield {"indice": indice, "estado": "error", "vacante_id": vacante_id,
+                   "error": f"Error generando preguntas: {error}"}
+            continue
+        filas_todas.extend(filas_preguntas(vacante_id, preguntas))
+        generadas.append((indice, vacante_id, preguntas))
+        yield {"estado": "progreso", "generadas": len(generadas), "total": len(pendientes)}
+
+    # 4. One multi-row insert for every question; items are reported after it
+    if filas_todas:
+        try:
+            await asyncio.to_thread(lambda: db.table("vacante_preguntas").insert(filas_todas).execute())
+            resumen["preguntas"] = len(filas_todas)
+        except Exception as e:
+            resumen["errores"] += len(generadas)
+            for indice, vacante_id, _ in generadas:
+                yield {"indice": indice, "estado": "error", "vacante_id": vacante_id,
+                       "error": f"Error guardando preguntas: {e}"}
+            generadas = []
+
+    for indice, vacante_id, preguntas in generadas:
+        yield {"indice": indice, "estado": "preguntas", "vacante_id": vacante_id,
+               "preguntas_sugeridas": preguntas}
+
+    yield {"estado": "completada", "resumen": resumen}
+
+
+class _Importacion:
+    """Events of one import; readers wait on `cambio` for new ones"""
+
+    def __init__(self):
+        self.eventos: List[Dict[str, Any]] = []
+        self.terminada = False
+        self.terminado: Optional[float] = None
+        self.cambio = asyncio.Condition()
+
+
+class ImportacionService:
+    """
+    Imports run as background jobs, independent of the request.
+
+    The POST that starts an import and any later GET only follow its
+    events, so a client that disconnects or times out doesn't cancel the
+    import: drafts and questions are still saved, and the events can be
+    read again from the start (or from an offset). Finished imports are
+    kept in memory for RETENCION seconds.
+    """
+
+    # Segundos que se conservan los eventos tras terminar
+    RETENCION = 600
+
+    def __init__(self):
+        self._importaciones: Dict[str, _Importacion] = {}
+
+    def _purgar(self) -> None:
+        limite = time.monotonic() - self.RETENCION
+        for importacion_id in [
+            i for i, imp in self._importaciones.items()
+            if imp.terminado is not None and imp.terminado < limite
+        ]:
+            del self._importaciones[importacion_id]
+
+    def iniciar(self, items: List[Union[Dict[str, Any], Exception]]) -> str:
+        """
+        Start an import in the background
+
+        Args:
+            items: Output of `parsear`
+
+        Returns:
+            importacion_id to follow it with `seguir`
+        """
+        self._purgar()
+        importacion_id = str(uuid.uuid4())
+        self._importaciones[importacion_id] = _Importacion()
+        background_jobs.submit(self._ejecutar(importacion_id, items), key=f"importacion:{importacion_id}")
+        return importacion_id
+
+    async def _publicar(self, importacion: _Importacion, evento: Optional[Dict[str, Any]], terminada: bool) -> None:
+        async with importacion.cambio:
+            if evento is not None:
+                importacion.eventos.append(evento)
+            importacion.terminada = terminada
+            importacion.cambio.notify_all()
+
+    async def _ejecutar(self, importacion_id: str, items: List[Union[Dict[str, Any], Exception]]) -> None:
+        importacion = self._importaciones[importacion_id]
+        try:
+            async for evento in importar(items):
+                await self._publicar(importacion, evento, terminada=evento["estado"] == "completada")
+        except Exception as e:
+            print(f"Error importing job postings ({importacion_id}): {e}")
+            await self._publicar(importacion, {"estado": "error", "error": f"Importación interrumpida: {e}"}, True)
+        finally:
+            importacion.terminado = time.monotonic()
+            if not importacion.terminada:
+                # Cancelada (p. ej. al apagar): los lectores no deben seguir esperando
+                await self._publicar(importacion, None, True)
+
+    def existe(self, importacion_id: str) -> bool:
+        return importacion_id in self._importaciones
+
+    async def seguir(self, importacion_id: str, desde: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Events of an import, waiting for new ones until it finishes
+
+        Args:
+            importacion_id: ID returned by `iniciar`
+            desde: Number of events already read
+
+        Yields:
+            Events in order, ending with "completada" (or a final "error")
+        """
+        importacion = self._importaciones[importacion_id]
+        leidos = desde
+        while True:
+            async with importacion.cambio:
+                await importacion.cambio.wait_for(
+                    lambda: leidos < len(importacion.eventos) or importacion.terminada
+                )
+                nuevos = importacion.eventos[leidos:]
+                terminada = importacion.terminada
+            for evento in nuevos:
+                yield evento
+            leidos += len(nuevos)
+            if terminada:
+                return
+
+
+# Singleton instance
+importacion_service = ImportacionService()
@@ -0,0 +1,205 @@
+"""
+Lazy Services - Deferred service construction and a startup cost report
+"""
+import importlib.abc
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _LoaderCronometrado(importlib.abc.Loader):
+    """Wraps a module loader to time its execution (restored after loading)"""
+
+    def __init__(self, loader: Any, reporte: "StartupReport"):
+        self._loader = loader
+        self._reporte = reporte
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        with self._reporte._cronometrar(module.__name__):
+            self._loader.exec_module(module)
+        # Nadie más debe ver el envoltorio
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class StartupReport(importlib.abc.MetaPathFinder):
+    """
+    Import and initialization cost per module.
+
+    Installed at the top of main.py as a meta path finder (only with
+    STARTUP_REPORT_ENABLED): every module imported afterwards records its
+    inclusive and self time, attributed to the startup phase or to the lazy
+    service being built. `finalizar()` removes the finder, so imports after
+    startup go through the normal finders; their cost is still included in
+    the construction time of the service that triggered them.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.modulos: List[Dict[str, Any]] = []
+        self.servicios: Dict[str, float] = {}
+        self._inicio: Optional[float] = None
+        self.arranque_ms: Optional[float] = None
+
+    # --- Fase actual ---
+    def _pila(self, nombre: str) -> list:
+        pila = getattr(self._local, nombre, None)
+        if pila is None:
+            pila = []
+            setattr(self._local, nombre, pila)
+        return pila
+
+    @property
+    def _fase(self) -> str:
+        servicios = self._pila("servicios")
+        if servicios:
+            return servicios[-1]
+        return "arranque" if self.arranque_ms is None else "diferido"
+
+    # --- Meta path finder ---
+    def iniciar(self) -> None:
+        """Start recording imports (call before importing the app modules)"""
+        if self not in sys.meta_path:
+            self._inicio = time.perf_counter()
+            sys.meta_path.insert(0, self)
+
+    def finalizar(self) -> None:
+        """Mark the end of startup: stop recording imports and print the summary once"""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        if self.arranque_ms is None and self._inicio is not None:
+            self.arranque_ms = round((time.perf_counter() - self._inicio) * 1000, 1)
+            paquetes = self.por_paquete("arranque")[:5]
+            print(f"⏱️ Arranque: {self.arranque_ms} ms ("
+                  + ", ".join(f"{p['paquete']} {p['ms']} ms" for p in paquetes) + ")")
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _LoaderCronometrado(spec.loader, self)
+            return spec
+        return None
+
+    @contextmanager
+    def _cronometrar(self, modulo: str):
+        pila = self._pila("imports")
+        pila.append(0.0)  # tiempo de los imports anidados
+        fase = self._fase
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            hijos = pila.pop()
+            if pila:
+                pila[-1] += total
+            with self._lock:
+                self.modulos.append({
+                    "modulo": modulo,
+                    "fase": fase,
+                    "ms": round(total * 1000, 2),
+                    "propio_ms": round((total - hijos) * 1000, 2)
+                })
+
+    # --- Servicios ---
+    @contextmanager
+    def servicio(self, nombre: str):
+        """Attribute imports to a service while it is built, and time it"""
+        pila = self._pila("servicios")
+        pila.append(nombre)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            pila.pop()
+            with self._lock:
+                self.servicios[nombre] = round((time.perf_counter() - start) * 1000, 2)
+
+    # --- Reporte ---
+    def por_paquete(self, fase: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Self time summed by top-level package, most expensive first"""
+        totales: Dict[str, float] = defaultdict(float)
+        with self._lock:
+            for m in self.modulos:
+                if fase is None or m["fase"] == fase:
+                    totales[m["modulo"].split(".")[0]] += m["propio_ms"]
+        return [
+            {"paquete": paquete, "ms": round(ms, 1)}
+            for paquete, ms in sorted(totales.items(), key=lambda kv: -kv[1])
+        ]
+
+    def reporte(self, top: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            modulos = sorted(self.modulos, key=lambda m: -m["propio_ms"])[:top]
+            servicios = dict(self.servicios)
+        fases = {m["fase"] for m in self.modulos}
+        return {
+            "arranque_ms": self.arranque_ms,
+            "paquetes": {fase: self.por_paquete(fase)[:top] for fase in sorted(fases)},
+            "modulos": modulos,
+            "servicios": [
+                {"servicio": nombre, "init_ms": ms}
+                for nombre, ms in sorted(servicios.items(), key=lambda kv: -kv[1])
+            ]
+        }
+
+
+startup_report = StartupReport()
+
+
+class LazyService:
+    """
+    Proxy that builds a service on first use.
+
+    Module singletons are declared as `servicio = LazyService(Clase)` so
+    importing a route does not create LLM clients, thread pools or load
+    indexes; attribute access is forwarded to the real instance.
+    """
+
+    def __init__(self, factory: Callable[[], Any], nombre: Optional[str] = None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_nombre", nombre or getattr(factory, "__name__", "servicio"))
+        object.__setattr__(self, "_instancia", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def iniciado(self) -> bool:
+        return self._instancia is not None
+
+    def obtener(self) -> Any:
+        """Return the service, building it the first time"""
+        instancia = self._instancia
+        if instancia is None:
+            with self._lock:
+                instancia = self._instancia
+                if instancia is None:
+                    with startup_report.servicio(self._nombre):
+                        instancia = self._factory()
+                    object.__setattr__(self, "_instancia", instancia)
+        return instancia
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.obtener(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.obtener(), name, value)
+
+    def __repr__(self) -> str:
+        estado = "iniciado" if self.iniciado else "pendiente"
+        return f"<LazyService {self._nombre} ({estado})>"
@@ -0,0 +1,132 @@
+"""
+Lifecycle - Warm-up on startup and graceful drain on shutdown
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+from config import settings
+from database import get_db
+from services.lazy import startup_report
+from services.ia_service import ia_service
+from services.chatbot_service import chatbot_service
+from services.embedding_service import embedding_service
+from services.email_service import email_service
+from services.storage_service import storage_service
+from services.answer_log import answer_log
+from services.background import background_jobs
+
+
+# Peticiones internas que calientan routing, validación, serialización y BD
+RUTAS_CALENTAMIENTO = ("/health", "/api/vacantes/publicadas")
+
+
+async def _paso(nombre: str, fn: Callable[[], Awaitable[Any]], tiempos: Dict[str, Any]) -> None:
+    """Run one warm-up step; failures are logged, never raised"""
+    start = time.perf_counter()
+    try:
+        with startup_report.servicio(f"calentamiento.{nombre}"):
+            await asyncio.wait_for(fn(), timeout=settings.warmup_timeout_seconds)
+        tiempos[nombre] = round((time.perf_counter() - start) * 1000, 1)
+    except Exception as e:
+        print(f"⚠️ Warm-up step '{nombre}' failed: {e!r}")
+        tiempos[nombre] = None
+
+
+async def calentar(app) -> Dict[str, Any]:
+    """
+    Prepare everything the first request would otherwise pay for
+
+    - db: create the Supabase client and open its HTTP connection
+    - servicios: build the lazy services (LLM clients, embedding stores)
+    - prompts: compile every LangChain prompt template
+    - llm: one tiny completion per chat model to open the provider connection
+    - rutas: in-process requests to the hot read endpoints
+
+    Args:
+        app: FastAPI application (for the in-process requests)
+
+    Returns:
+        Milliseconds per step (None for failed steps)
+    """
+    tiempos: Dict[str, Any] = {}
+    start = time.perf_counter()
+
+    async def db():
+        await asyncio.to_thread(
+            lambda: get_db().table("vacantes").select("id").limit(1).execute()
+        )
+
+    async def servicios():
+        for servicio in (ia_service, chatbot_service, embedding_service, email_service, storage_service):
+            await asyncio.to_thread(servicio.obtener)
+
+    async def prompts():
+        ia_service.precompilar_prompts()
+        chatbot_service.precompilar_prompts()
+
+    async def llm():
+        await asyncio.gather(
+            ia_service.llm.ainvoke("ping", max_tokens=1),
+            chatbot_service.llm.ainvoke("ping", max_tokens=1)
+        )
+
+    async def rutas():
+        import httpx
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+            for ruta in RUTAS_CALENTAMIENTO:
+                await client.get(ruta)
+
+    await _paso("db", db, tiempos)
+    await _paso("servicios", servicios, tiempos)
+    await _paso("prompts", prompts, tiempos)
+    if settings.warmup_llm:
+        await _paso("llm", llm, tiempos)
+    await _paso("rutas", rutas, tiempos)
+
+    total = round((time.perf_counter() - start) * 1000, 1)
+    print(f"🔥 Warm-up: {total} ms (" + ", ".join(
+        f"{paso} {'falló' if ms is None else f'{ms} ms'}" for paso, ms in tiempos.items()
+    ) + ")")
+    return tiempos
+
+
+async def drenar(timeout: float) -> Dict[str, Any]:
+    """
+    Finish pending work before the process exits, within a deadline
+
+    Order matters: buffered answers are written first, then background
+    jobs (evaluations, chatbot openers) finish and may buffer more answers
+    or queue emails, then the answer log and the email pool are flushed.
+
+    Args:
+        timeout: Total seconds available for the whole drain
+
+    Returns:
+        Summary of what was flushed and what had to be cancelled
+    """
+    fin = time.monotonic() + timeout
+    restante = lambda: max(0.0, fin - time.monotonic())
+    # Tiempo reservado para el último flush y los emails tras los trabajos
+    reserva = min(2.0, timeout * 0.2)
+    resumen: Dict[str, Any] = {"trabajos_pendientes": background_jobs.pending}
+
+    async def flush_respuestas() -> int:
+        if not answer_log.pendientes:
+            return 0
+        try:
+            return await asyncio.wait_for(answer_log.flush(), timeout=restante())
+        except Exception as e:
+            print(f"⚠️ Could not flush answer log on shutdown: {e!r}")
+            return 0
+
+    resumen["respuestas_escritas"] = await flush_respuestas()
+    resumen["trabajos_cancelados"] = await background_jobs.drain(timeout=max(0.0, restante() - reserva))
+    resumen["respuestas_escritas"] += await flush_respuestas()
+    resumen["respuestas_perdidas"] = answer_log.pendientes
+
+    if email_service.iniciado:
+        resumen["emails_completos"] = await email_service.cerrar(timeout=restante())
+
+    print(f"🛑 Shutdown drain: {resumen}")
+    return resumen
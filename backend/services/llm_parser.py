@@ -0,0 +1,215 @@
+"""
+LLM Output Parser - Extract and validate JSON from LLM responses
+"""
+import json
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from services.metrics import metrics
+
+
+class LLMParseError(ValueError):
+    """Raised when no valid JSON (or no schema-valid JSON) is found"""
+
+
+_OPENERS = {"{": "}", "[": "]"}
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def iter_json_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) of each balanced JSON object/array in the text.
+
+    Single forward scan: tracks bracket depth and string state (double
+    or single quoted, with escapes) so brackets inside strings are ignored.
+    Spans are yielded in order, so the first one is usually the answer and
+    nothing after it is scanned. When the caller asks for the next span,
+    scanning resumes after the end of the previous one (never inside it),
+    so a broken outer object doesn't turn into one of its fragments and
+    the whole text is scanned at most once.
+    """
+    n = len(text)
+    start = 0
+    while True:
+        # Saltar prosa hasta el primer '{' o '['
+        brace, bracket = text.find("{", start), text.find("[", start)
+        candidates = [i for i in (brace, bracket) if i != -1]
+        if not candidates:
+            return
+        begin = min(candidates)
+
+        stack = []
+        quote = None
+        i = begin
+        while i < n:
+            c = text[i]
+            if quote:
+                if c == "\\":
+                    i += 1
+                elif c == quote:
+                    quote = None
+            elif c == '"' or c == "'":
+                quote = c
+            elif c in _OPENERS:
+                stack.append(_OPENERS[c])
+            elif c == "}" or c == "]":
+                if not stack or stack.pop() != c:
+                    break
+                if not stack:
+                    yield begin, i + 1
+                    break
+            i += 1
+        # Seguir después del span (o del cierre que no coincide), no dentro
+        start = i + 1
+
+
+def repair_json(span: str) -> str:
+    """
+    Fix the defects LLMs commonly produce, in one pass:
+    - single-quoted strings → double-quoted
+    - trailing commas before '}' or ']'
+    - Python literals (True/False/None) → JSON literals
+    """
+    out = []
+    n = len(span)
+    i = 0
+    while i < n:
+        c = span[i]
+        if c == '"':
+            # Copiar string con comillas dobles tal cual
+            j = i + 1
+            while j < n and span[j] != '"':
+                j += 2 if span[j] == "\\" else 1
+            out.append(span[i:j + 1])
+            i = j + 1
+        elif c == "'":
+            j = i + 1
+            chars = []
+            while j < n and span[j] != "'":
+                if span[j] == "\\" and j + 1 < n:
+                    chars.append(span[j + 1] if span[j + 1] == "'" else span[j:j + 2])
+                    j += 2
+                    continue
+                chars.append('\\"' if span[j] == '"' else span[j])
+                j += 1
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+        elif c == ",":
+            j = i + 1
+            while j < n and span[j] in " \t\r\n":
+                j += 1
+            if j >= n or span[j] not in "}]":
+                out.append(c)
+            i += 1
+        elif c.isalpha():
+            j = i
+            while j < n and (span[j].isalnum() or span[j] == "_"):
+                j += 1
+            word = span[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+class ParseMetrics:
+    """
+    Per-prompt counters of how LLM responses were parsed.
+
+    Outcomes:
+    - direct: response was valid JSON as-is
+    - extracted: JSON found inside surrounding prose / markdown fences
+    - repaired: JSON needed syntactic repair
+    - failed: no schema-valid JSON in the response
+    - retried: a repair prompt was sent to the LLM
+    - fallback: the caller gave up and used default values
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, prompt: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(prompt, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {prompt: dict(counts) for prompt, counts in self._counts.items()}
+
+
+parse_metrics = ParseMetrics()
+metrics.add_collector(lambda: (
+    ("reclutamiento_llm_parse_total", {"prompt": prompt, "outcome": outcome}, n)
+    for prompt, counts in parse_metrics.snapshot().items()
+    for outcome, n in counts.items()
+))
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter(schema: Any) -> TypeAdapter:
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    return adapter
+
+
+def parse_llm_json(
+    text: str,
+    schema: Any = None,
+    prompt: Optional[str] = None
+) -> Any:
+    """
+    Parse the first valid JSON value in an LLM response
+
+    Args:
+        text: Raw LLM response
+        schema: Optional Pydantic model or type (e.g. List[PreguntaSugerida])
+        prompt: Prompt name used for metrics
+
+    Returns:
+        Parsed JSON (validated and dumped back to plain dicts/lists
+        when a schema is given)
+
+    Raises:
+        LLMParseError: If no JSON value matches the schema
+    """
+    adapter = _adapter(schema) if schema is not None else None
+    last_error: Optional[Exception] = None
+
+    def attempts() -> Iterator[Tuple[str, str]]:
+        stripped = text.strip()
+        if stripped[:1] in _OPENERS:
+            yield "direct", stripped
+        for begin, end in iter_json_spans(text):
+            span = text[begin:end]
+            if span != stripped:
+                yield "extracted", span
+            repaired = repair_json(span)
+            if repaired != span:
+                yield "repaired", repaired
+
+    for outcome, candidate in attempts():
+        try:
+            data = json.loads(candidate)
+            if adapter is not None:
+                data = adapter.dump_python(adapter.validate_python(data))
+        except (json.JSONDecodeError, ValidationError, RecursionError) as e:
+            last_error = e
+            continue
+        if prompt:
+            parse_metrics.record(prompt, outcome)
+        return data
+
+    if prompt:
+        parse_metrics.record(prompt, "failed")
+    raise LLMParseError(
+        f"No valid JSON in LLM response: {last_error}" if last_error
+        else "No JSON found in LLM response"
+    )
@@ -0,0 +1,233 @@
+"""
+LLM Provider - Build the chat model used by the AI services
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
+from config import settings
+from services.cv_compactor import count_tokens
+from services.metrics import metrics
+
+
+# Skills the fake provider recognizes in CVs
+_HABILIDADES_CONOCIDAS = (
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Angular", "Vue",
+    "Node.js", "Django", "FastAPI", "Flask", "SQL", "PostgreSQL", "MongoDB",
+    "Docker", "Kubernetes", "AWS", "Azure", "Git", "Excel", "Scrum",
+)
+_PREGUNTA_RE = re.compile(r"(?:La primera pregunta es:|siguiente pregunta:)\s*(.+)")
+_NOMBRE_RE = re.compile(r"conversando con (.+?) quien")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Local stand-in for the Groq model, for load tests and offline runs.
+
+    Answers are deterministic for a given prompt and valid for the schema
+    each prompt asks for (questions list, CV analysis, evaluation), so the
+    whole request path runs as in production without network access.
+
+    Latency is simulated with asyncio.sleep (the event loop stays free,
+    like a real HTTP call) and a fraction of calls can fail on purpose.
+    """
+
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    error_rate: float = 0.0
+    chunk_words: int = 3
+    seed: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-reclutamiento"
+
+    def _rng(self, texto: str) -> random.Random:
+        digest = hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest()
+        return random.Random(int.from_bytes(digest, "big") ^ (self.seed or 0))
+
+    def _demora(self) -> float:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _fallar(self) -> None:
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Simulated LLM provider error")
+
+    def _responder(self, messages: List[BaseMessage]) -> str:
+        """Pick a schema-valid answer from the prompt's wording"""
+        prompt = "\n".join(str(m.content) for m in messages)
+        rng = self._rng(prompt)
+
+        if "Genera 5-7 preguntas" in prompt:
+            titulo = re.search(r"\*\*Título:\*\* (.+)", prompt)
+            titulo = titulo.group(1).strip() if titulo else "el cargo"
+            tipos = ["abierta", "abierta", "si_no", "escala", "abierta"]
+            return json.dumps([
+                {"pregunta": f"Pregunta {i + 1} sobre tu experiencia para {titulo}", "tipo_pregunta": tipo}
+                for i, tipo in enumerate(tipos)
+            ], ensure_ascii=False)
+
+        if "Analiza este CV" in prompt:
+            cv = prompt.lower()
+            habilidades = [h for h in _HABILIDADES_CONOCIDAS if h.lower() in cv]
+            años = re.search(r"(\d{1,2})\s*(?:años|years)", cv)
+            return json.dumps({
+                "habilidades": habilidades,
+                "experiencia_años": int(años.group(1)) if años else rng.randint(0, 10),
+                "educacion": "Ingeniería de Sistemas",
+                "resumen": f"Profesional con {len(habilidades)} habilidades técnicas identificadas."
+            }, ensure_ascii=False)
+
+        if "Evalúa la compatibilidad" in prompt:
+            return json.dumps({
+                "puntuacion": rng.randint(40, 95),
+                "compatibilidad": rng.randint(40, 95),
+                "fortalezas": ["Experiencia relevante", "Buena comunicación"],
+                "debilidades": ["Poca experiencia con la tecnología principal"]
+            }, ensure_ascii=False)
+
+        if "Corriges respuestas JSON" in prompt:
+            return "{}"
+
+        if "Mantienes el resumen" in prompt:
+            return "- El candidato describió su experiencia y las tecnologías que usa."
+
+        # Chatbot: saludo/agradecimiento + la pregunta pedida en el system prompt
+        system = str(messages[0].content) if messages else ""
+        pregunta = _PREGUNTA_RE.search(system)
+        if pregunta:
+            nombre = _NOMBRE_RE.search(system)
+            saludo = (
+                f"¡Hola {nombre.group(1)}! Gracias por tu interés. "
+                if nombre and "La primera pregunta es:" in system else "Gracias por tu respuesta. "
+            )
+            return saludo + pregunta.group(1).strip()
+        return "¡Muchas gracias por tu tiempo! El equipo revisará tu aplicación y te contactaremos pronto."
+
+    def _mensaje(self, messages: List[BaseMessage]) -> AIMessage:
+        content = self._responder(messages)
+        input_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        output_tokens = count_tokens(content)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            }
+        )
+
+    def _partes(self, content: str) -> Iterator[str]:
+        palabras = content.split(" ")
+        for i in range(0, len(palabras), self.chunk_words):
+            parte = " ".join(palabras[i:i + self.chunk_words])
+            yield parte if i + self.chunk_words >= len(palabras) else parte + " "
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self._demora())
+        self._fallar()
+        return ChatResult(generations=[ChatGeneration(message=self._mensaje(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self._demora())
+        self._fallar()
+        return ChatResult(generations=[ChatGeneration(message=self._mensaje(messages))])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # Latencia hasta el primer token; el resto llega en trozos rápidos
+        await asyncio.sleep(self._demora())
+        self._fallar()
+        mensaje = self._mensaje(messages)
+        partes = list(self._partes(mensaje.content))
+        for i, parte in enumerate(partes):
+            chunk = AIMessageChunk(content=parte)
+            if i == len(partes) - 1:
+                chunk.usage_metadata = mensaje.usage_metadata
+            yield ChatGenerationChunk(message=chunk)
+            await asyncio.sleep(0)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Count the tokens reported by the provider in llm_tokens_total"""
+
+    def __init__(self, servicio: str):
+        self.servicio = servicio
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                metrics.inc("reclutamiento_llm_tokens_total", usage.get("input_tokens", 0), servicio=self.servicio, tipo="input")
+                metrics.inc("reclutamiento_llm_tokens_total", usage.get("output_tokens", 0), servicio=self.servicio, tipo="output")
+
+
+def crear_llm(max_tokens: int, temperature: float, servicio: str = "ia") -> BaseChatModel:
+    """
+    Build the chat model for the configured provider (LLM_PROVIDER)
+
+    Args:
+        max_tokens: Maximum tokens per response
+        temperature: Sampling temperature
+        servicio: Label for the token metrics ("ia", "chatbot")
+
+    Returns:
+        LangChain chat model
+
+    Raises:
+        ValueError: If the provider is unknown or not configured
+    """
+    provider = settings.llm_provider.lower()
+    callbacks = [TokenUsageCallback(servicio)] if metrics.enabled else None
+
+    if provider == "fake":
+        return FakeChatModel(
+            latency_ms=settings.llm_fake_latency_ms,
+            jitter_ms=settings.llm_fake_jitter_ms,
+            error_rate=settings.llm_fake_error_rate,
+            callbacks=callbacks
+        )
+
+    if provider == "groq":
+        if not settings.groq_api_key:
+            raise ValueError(
+                "Groq API key not configured. "
+                "Please set GROQ_API_KEY in .env file"
+            )
+        from langchain_groq import ChatGroq
+        return ChatGroq(
+            model=settings.llm_model,
+            groq_api_key=settings.groq_api_key,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            callbacks=callbacks
+        )
+
+    raise ValueError(f"Unknown LLM provider: {settings.llm_provider} (use 'groq' or 'fake')")
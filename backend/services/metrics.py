@@ -0,0 +1,262 @@
+"""
+Metrics Service - Stage latency histograms, counters and Prometheus output
+"""
+import bisect
+import contextlib
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from config import settings
+
+
+# Límites de los buckets en segundos (mismos que el cliente oficial de Prometheus + LLM lentos)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    In-process metrics registry.
+
+    - `timer(stage)`: context manager that records the elapsed time of a block
+    - `timed(stage)`: decorator for sync and async functions
+    - `inc(name, value, **labels)`: monotonically increasing counters
+
+    When disabled (METRICS_ENABLED=false) `timed` returns the function
+    unchanged and `timer` returns a shared no-op context, so the cost is
+    one attribute check per block.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def add_collector(self, fn: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]) -> None:
+        """
+        Register counters owned by another module, read at render time
+
+        Args:
+            fn: Returns (name, labels, value) tuples
+        """
+        self._collectors.append(fn)
+
+    @contextlib.contextmanager
+    def _timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("reclutamiento_stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def timer(self, stage: str):
+        """
+        Time a block of code
+
+        Args:
+            stage: Stage name, e.g. "pdf.extraer_texto" or "db.insert.candidatos"
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timer(stage)
+
+    def timed(self, stage: str) -> Callable:
+        """Decorator version of `timer` (works on sync and async functions)"""
+        def decorator(fn: Callable) -> Callable:
+            if not self.enabled:
+                return fn
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self._timer(stage):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self._timer(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format (0.0.4)"""
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                counters[(name, self._labels(labels))] = value
+
+        def fmt_labels(labels: Labels, extra: Tuple = ()) -> str:
+            pares = list(labels) + list(extra)
+            if not pares:
+                return ""
+            escaped = (
+                (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for k, v in pares
+            )
+            return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+        lines = []
+        seen = set()
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            acumulado = 0
+            for bound, n in zip(BUCKETS + (float("inf"),), counts):
+                acumulado += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{fmt_labels(labels, (('le', le),))} {acumulado}")
+            lines.append(f"{name}_sum{fmt_labels(labels)} {total}")
+            lines.append(f"{name}_count{fmt_labels(labels)} {count}")
+
+        for (name, labels), value in sorted(counters.items()):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{fmt_labels(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(enabled=settings.metrics_enabled)
+metrics.describe("reclutamiento_stage_seconds", "Latency of internal stages (PDF, LLM, storage, email, DB)")
+metrics.describe("reclutamiento_http_request_seconds", "HTTP request latency by route")
+metrics.describe("reclutamiento_llm_tokens_total", "LLM tokens reported by the provider")
+metrics.describe("reclutamiento_llm_parse_total", "How LLM JSON responses were parsed, by prompt and outcome")
+metrics.describe("reclutamiento_storage_cv_total", "CV uploads by outcome (indice, existente, subido)")
+metrics.describe("reclutamiento_plantillas_preguntas_total", "Question template lookups by result (exacta, similar, fallo)")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template.
+
+    Uses the matched route path (/api/vacantes/{vacante_id}/detalles)
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            metrics.observe(
+                "reclutamiento_http_request_seconds",
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"]
+            )
+
+
+class _TimedQuery:
+    """Proxy over a Supabase query builder that times `execute()`"""
+
+    __slots__ = ("_builder", "_table", "_op")
+
+    def __init__(self, builder: Any, table: str, op: str = "select"):
+        self._builder = builder
+        self._table = table
+        self._op = op
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        op = name if name in ("select", "insert", "update", "upsert", "delete") else self._op
+
+        def call(*args, **kwargs):
+            if name == "execute":
+                with metrics.timer(f"db.{op}.{self._table}"):
+                    return attr(*args, **kwargs)
+            result = attr(*args, **kwargs)
+            # Los builders devuelven otro builder: seguir envolviendo
+            if hasattr(result, "execute"):
+                return _TimedQuery(result, self._table, op)
+            return result
+        return call
+
+
+class TimedClient:
+    """
+    Proxy over the Supabase client that times every DB round trip as
+    `db.<operation>.<table>` (and `db.rpc.<function>`).
+    """
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, name: str) -> _TimedQuery:
+        return _TimedQuery(self._client.table(name), name)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, *args, **kwargs) -> _TimedQuery:
+        return _TimedQuery(self._client.rpc(fn, params, *args, **kwargs), fn, "rpc")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -1,28 +1,23 @@
 """
 PDF Service - Extract text from PDF files
 """
-from PyPDF2 import PdfReader
+import asyncio
 from io import BytesIO
-from typing import Optional
+from typing import BinaryIO
+from services.metrics import metrics
 
 
 class PDFService:
     """Service for PDF text extraction"""
     
     @staticmethod
-    async def extract_text_from_pdf(pdf_bytes: bytes) -> str:
-        """
-        Extract text from PDF file
+    def _extraer(stream: BinaryIO) -> str:
+        """Extract text from a seekable PDF stream (blocking)"""
+        # PyPDF2 se importa con el primer CV, no al arrancar
+        from PyPDF2 import PdfReader
         
-        Args:
-            pdf_bytes: PDF file content as bytes
-            
-        Returns:
-            Extracted text from PDF
-        """
         try:
-            pdf_file = BytesIO(pdf_bytes)
-            reader = PdfReader(pdf_file)
+            reader = PdfReader(stream)
             
             text = ""
             for page in reader.pages:
@@ -41,6 +36,38 @@ class PDFService:
         except Exception as e:
             print(f"Error extracting PDF text: {e}")
             return f"Error al procesar PDF: {str(e)}"
+    
+    @staticmethod
+    @metrics.timed("pdf.extraer_texto")
+    async def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+        """
+        Extract text from PDF file
+        
+        Args:
+            pdf_bytes: PDF file content as bytes
+            
+        Returns:
+            Extracted text from PDF
+        """
+        return await asyncio.to_thread(PDFService._extraer, BytesIO(pdf_bytes))
+    
+    @staticmethod
+    @metrics.timed("pdf.extraer_texto")
+    async def extract_text_from_file(path: str) -> str:
+        """
+        Extract text from a PDF on disk, reading it as a stream
+        
+        Args:
+            path: Path to the PDF file
+            
+        Returns:
+            Extracted text from PDF
+        """
+        def extraer() -> str:
+            with open(path, "rb") as stream:
+                return PDFService._extraer(stream)
+        
+        return await asyncio.to_thread(extraer)
 
 
 # Singleton instance
@@ -0,0 +1,154 @@
+"""
+Plantillas de Preguntas - Reuse generated questions across similar job postings
+"""
+import copy
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from config import settings
+from services.metrics import metrics
+
+
+# Palabras que no distinguen un cargo de otro
+STOPWORDS = frozenset({"de", "del", "en", "la", "el", "los", "las", "y", "para", "con", "a", "o"})
+
+# Rangos de experiencia mínima que comparten preguntas (años)
+RANGOS_EXPERIENCIA = ((0, "junior"), (2, "intermedio"), (5, "senior"), (10, "experto"))
+
+Clave = Tuple[Tuple[str, ...], Tuple[str, ...], str]
+
+
+def _tokens(texto: str) -> List[str]:
+    """Lowercase, accent-free words (keeps tech names such as c++ or c#)"""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    tokens = (t.strip(".") for t in re.findall(r"[a-z0-9+#.]+", texto))
+    return [t for t in tokens if t and t not in STOPWORDS]
+
+
+def rango_experiencia(años: int) -> str:
+    rango = RANGOS_EXPERIENCIA[0][1]
+    for desde, nombre in RANGOS_EXPERIENCIA:
+        if años >= desde:
+            rango = nombre
+    return rango
+
+
+def clave(titulo: str, habilidades: List[str], experiencia_min: int) -> Clave:
+    """
+    Normalized cache key of a job posting
+
+    Word order, accents, case and duplicated skills do not change the key,
+    so "Desarrollador Backend Python" and "desarrollador python backend"
+    with the same skills and experience range share one entry.
+    """
+    return (
+        tuple(sorted(set(_tokens(titulo)))),
+        tuple(sorted({" ".join(_tokens(h)) for h in habilidades if _tokens(h)})),
+        rango_experiencia(experiencia_min)
+    )
+
+
+class PlantillasPreguntas:
+    """
+    Process-local library of generated questions keyed by `clave()`.
+
+    An exact key match is served first. Otherwise, when PLANTILLAS_SIMILITUD
+    is below 1, the closest entry in the same experience range is used if
+    the Jaccard similarity of its title words plus skills reaches it.
+    Entries are evicted least-recently-used beyond PLANTILLAS_MAX.
+    """
+
+    def __init__(self):
+        self._plantillas: "OrderedDict[Clave, List[Dict[str, str]]]" = OrderedDict()
+        # Rango de experiencia -> {clave: palabras del título + habilidades}
+        self._por_rango: Dict[str, Dict[Clave, FrozenSet[str]]] = {}
+        self._lock = threading.Lock()
+        self.aciertos = {"exacta": 0, "similar": 0}
+        self.fallos = 0
+
+    @staticmethod
+    def _firma(k: Clave) -> FrozenSet[str]:
+        return frozenset(k[0]) | frozenset(f"h:{h}" for h in k[1])
+
+    def _similar(self, k: Clave) -> Optional[Clave]:
+        firma = self._firma(k)
+        mejor, mejor_similitud = None, settings.plantillas_similitud
+        for otra, firma_otra in self._por_rango.get(k[2], {}).items():
+            similitud = len(firma & firma_otra) / len(firma | firma_otra)
+            if similitud >= mejor_similitud:
+                mejor, mejor_similitud = otra, similitud
+        return mejor
+
+    def buscar(self, titulo: str, habilidades: List[str], experiencia_min: int) -> Optional[List[Dict[str, str]]]:
+        """
+        Questions of an equal or near-identical job posting
+
+        Args:
+            titulo: Job title
+            habilidades: Required skills
+            experiencia_min: Minimum years of experience
+
+        Returns:
+            A copy of the stored questions, or None on a miss
+        """
+        if not settings.plantillas_enabled:
+            return None
+
+        k = clave(titulo, habilidades, experiencia_min)
+        with self._lock:
+            tipo = "exacta"
+            if k not in self._plantillas:
+                tipo = "similar"
+                k = self._similar(k) if settings.plantillas_similitud < 1 else None
+            if k is None:
+                self.fallos += 1
+                metrics.inc("reclutamiento_plantillas_preguntas_total", resultado="fallo")
+                return None
+            self._plantillas.move_to_end(k)
+            preguntas = copy.deepcopy(self._plantillas[k])
+            self.aciertos[tipo] += 1
+
+        metrics.inc("reclutamiento_plantillas_preguntas_total", resultado=tipo)
+        return preguntas
+
+    def guardar(self, titulo: str, habilidades: List[str], experiencia_min: int, preguntas: List[Dict[str, str]]) -> None:
+        """
+        Store questions generated for a job posting
+
+        Args:
+            titulo: Job title
+            habilidades: Required skills
+            experiencia_min: Minimum years of experience
+            preguntas: Questions returned by the LLM (not the fallback ones)
+        """
+        if not settings.plantillas_enabled or not preguntas:
+            return
+
+        k = clave(titulo, habilidades, experiencia_min)
+        with self._lock:
+            self._plantillas[k] = copy.deepcopy(preguntas)
+            self._plantillas.move_to_end(k)
+            self._por_rango.setdefault(k[2], {})[k] = self._firma(k)
+            while len(self._plantillas) > settings.plantillas_max:
+                vieja, _ = self._plantillas.popitem(last=False)
+                self._por_rango[vieja[2]].pop(vieja, None)
+
+    def estadisticas(self) -> Dict[str, float]:
+        """Entries, hits by type, misses and hit rate (0-1)"""
+        with self._lock:
+            aciertos = sum(self.aciertos.values())
+            total = aciertos + self.fallos
+            return {
+                "plantillas": len(self._plantillas),
+                "aciertos_exactos": self.aciertos["exacta"],
+                "aciertos_similares": self.aciertos["similar"],
+                "fallos": self.fallos,
+                "tasa_aciertos": round(aciertos / total, 4) if total else 0.0
+            }
+
+
+# Singleton instance
+plantillas_preguntas = PlantillasPreguntas()
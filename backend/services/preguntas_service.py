@@ -0,0 +1,163 @@
+"""
+Preguntas Service - Generate job posting questions in the background
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from database import get_db
+from models.vacante import VacanteCrear
+from services.ia_service import ia_service
+from services.background import background_jobs
+from services.importacion_service import filas_preguntas
+
+
+class _Generacion:
+    """State of one generation: `listo` is set once it succeeds or fails"""
+
+    def __init__(self):
+        self.estado = "generando"
+        self.preguntas: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.listo = asyncio.Event()
+        self.terminado: Optional[float] = None
+
+
+class PreguntasService:
+    """
+    Question generation detached from `crear_vacante`.
+
+    The draft is returned right away and the LLM call runs as a background
+    job; the questions are saved in one multi-row insert when ready.
+    Progress is tracked in memory so pollers and SSE clients in this
+    process are woken up as soon as it finishes. Other workers (or a
+    restarted process) fall back to the saved `vacante_preguntas` rows.
+    """
+
+    # Segundos que se conserva el estado en memoria tras terminar
+    RETENCION = 600
+
+    def __init__(self):
+        self._generaciones: Dict[str, _Generacion] = {}
+
+    def _purgar(self) -> None:
+        limite = time.monotonic() - self.RETENCION
+        for vacante_id in [
+            v for v, g in self._generaciones.items()
+            if g.terminado is not None and g.terminado < limite
+        ]:
+            del self._generaciones[vacante_id]
+
+    def iniciar(self, vacante_id: str, vacante: VacanteCrear) -> bool:
+        """
+        Start generating questions for a saved draft
+
+        Args:
+            vacante_id: Job posting ID
+            vacante: Job posting data
+
+        Returns:
+            True if started, False if a generation is already running
+        """
+        self._purgar()
+        actual = self._generaciones.get(vacante_id)
+        if actual is not None and actual.estado == "generando":
+            return False
+
+        self._generaciones[vacante_id] = _Generacion()
+        return background_jobs.submit(
+            self._generar(vacante_id, vacante),
+            key=f"preguntas:{vacante_id}"
+        )
+
+    async def _generar(self, vacante_id: str, vacante: VacanteCrear) -> None:
+        generacion = self._generaciones[vacante_id]
+        try:
+            preguntas_ia = await ia_service.generar_preguntas_vacante(
+                titulo=vacante.titulo,
+                descripcion=vacante.descripcion,
+                habilidades_requeridas=vacante.habilidades_requeridas,
+                experiencia_min=vacante.experiencia_min
+            )
+
+            # Save questions to database (one multi-row insert)
+            filas = filas_preguntas(vacante_id, preguntas_ia)
+            if filas:
+                db = get_db()
+                await asyncio.to_thread(lambda: db.table("vacante_preguntas").insert(filas).execute())
+
+            generacion.preguntas = [self._pregunta(f) for f in filas]
+            generacion.estado = "listas"
+        except Exception as e:
+            print(f"Error generating questions for {vacante_id}: {e}")
+            generacion.error = str(e)
+            generacion.estado = "error"
+        finally:
+            generacion.terminado = time.monotonic()
+            generacion.listo.set()
+
+    @staticmethod
+    def _pregunta(fila: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "pregunta_id": fila["id"],
+            "pregunta": fila["pregunta"],
+            "tipo_pregunta": fila["tipo_pregunta"]
+        }
+
+    def estado(self, vacante_id: str) -> Dict[str, Any]:
+        """
+        Current state of the questions of a job posting
+
+        Args:
+            vacante_id: Job posting ID
+
+        Returns:
+            {"vacante_id", "estado", "preguntas_sugeridas"} where estado is
+            "generando", "listas", "error" or "pendiente" (no saved
+            questions and no generation tracked here); "error" also
+            carries the message
+        """
+        generacion = self._generaciones.get(vacante_id)
+        if generacion is not None:
+            resultado = {
+                "vacante_id": vacante_id,
+                "estado": generacion.estado,
+                "preguntas_sugeridas": generacion.preguntas
+            }
+            if generacion.error is not None:
+                resultado["error"] = generacion.error
+            return resultado
+
+        # Generada en otro proceso: las filas guardadas son la fuente de verdad
+        db = get_db()
+        preguntas = db.table("vacante_preguntas").select(
+            "id, pregunta, tipo_pregunta"
+        ).eq("vacante_id", vacante_id).execute()
+        return {
+            "vacante_id": vacante_id,
+            "estado": "listas" if preguntas.data else "pendiente",
+            "preguntas_sugeridas": [self._pregunta(p) for p in preguntas.data]
+        }
+
+    async def esperar(self, vacante_id: str, timeout: float) -> bool:
+        """
+        Wait until a generation running in this process finishes
+
+        Args:
+            vacante_id: Job posting ID
+            timeout: Seconds to wait
+
+        Returns:
+            True if it finished (or is not tracked here), False on timeout
+        """
+        generacion = self._generaciones.get(vacante_id)
+        if generacion is None:
+            return True
+        try:
+            await asyncio.wait_for(generacion.listo.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+# Singleton instance
+preguntas_service = PreguntasService()
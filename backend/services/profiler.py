@@ -0,0 +1,245 @@
+"""
+Profiler Service - Opt-in sampling profiler for individual requests
+"""
+import asyncio
+import collections
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import weakref
+from datetime import datetime, timezone
+from typing import Any, Counter, Deque, Dict, List, Optional
+from config import settings
+
+
+# Perfil activo en el contexto actual (lo heredan las tareas hijas)
+_perfil_actual: contextvars.ContextVar[Optional["Perfil"]] = contextvars.ContextVar("perfil_actual", default=None)
+
+ESPERANDO = "[esperando]"
+
+
+class Perfil:
+    """Statistical profile of one HTTP request and the tasks it spawned"""
+
+    def __init__(self, method: str, path: str, loop: asyncio.AbstractEventLoop):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.inicio = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self.duracion_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.muestras = 0
+        self.stacks: Counter[str] = collections.Counter()
+        self.tareas: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+
+    def cerrar(self, status: Optional[int]) -> None:
+        self.status = status
+        self.duracion_ms = round((time.perf_counter() - self._t0) * 1000, 2)
+
+    def resumen(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "inicio": self.inicio.isoformat(),
+            "duracion_ms": self.duracion_ms,
+            "muestras": self.muestras
+        }
+
+    def folded(self) -> str:
+        """Collapsed stacks ("a;b;c count"), readable by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def _etiqueta(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack_hilo(frame) -> str:
+    """Fold a thread's frame chain, root first"""
+    partes = []
+    while frame is not None:
+        partes.append(_etiqueta(frame))
+        frame = frame.f_back
+    return ";".join(reversed(partes))
+
+
+def _stack_espera(task: asyncio.Task) -> Optional[str]:
+    """Fold the await chain of a suspended task, outermost coroutine first"""
+    partes = [ESPERANDO]
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            partes.append(_etiqueta(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return ";".join(partes) if len(partes) > 1 else None
+
+
+class Profiler:
+    """
+    Sampling profiler toggled per request.
+
+    A daemon thread wakes every `interval_ms` while at least one request
+    is being profiled and reads the event-loop thread's stack with
+    sys._current_frames(). A sample is attributed to a profile when the
+    running task belongs to that request (the request task or any task it
+    created). Suspended tasks of the request are sampled too, under a
+    "[esperando]" root, so time spent awaiting Groq or the DB shows up.
+
+    Finished profiles are kept in a bounded ring buffer.
+    """
+
+    def __init__(self, interval_ms: float, buffer_size: int):
+        self.interval = interval_ms / 1000
+        self.perfiles: Deque[Perfil] = collections.deque(maxlen=buffer_size)
+        self._activos: List[Perfil] = []
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._loops_instrumentados: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+
+    def debe_perfilar(self, header: Optional[str]) -> bool:
+        """Decide from the X-Profile header or the configured sample rate"""
+        if header is not None:
+            return header.lower() in ("1", "true", "yes")
+        return settings.profiler_sample_rate > 0 and random.random() < settings.profiler_sample_rate
+
+    def _instrumentar_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Wrap the loop's task factory so child tasks join their parent's profile"""
+        if loop in self._loops_instrumentados:
+            return
+        anterior = loop.get_task_factory()
+
+        def factory(loop, coro, **kwargs):
+            if anterior is not None:
+                task = anterior(loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            perfil = _perfil_actual.get()
+            if perfil is not None and perfil.duracion_ms is None:
+                with self._lock:
+                    perfil.tareas.add(task)
+            return task
+
+        loop.set_task_factory(factory)
+        self._loops_instrumentados.add(loop)
+
+    def iniciar(self, method: str, path: str) -> Perfil:
+        """Start profiling the current request (call from the request task)"""
+        loop = asyncio.get_running_loop()
+        self._instrumentar_loop(loop)
+
+        perfil = Perfil(method, path, loop)
+        tarea = asyncio.current_task()
+        _perfil_actual.set(perfil)
+
+        with self._lock:
+            if tarea is not None:
+                perfil.tareas.add(tarea)
+            self._activos.append(perfil)
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._muestrear, name="profiler", daemon=True)
+                self._hilo.start()
+        self._despertar.set()
+        return perfil
+
+    def terminar(self, perfil: Perfil, status: Optional[int]) -> None:
+        perfil.cerrar(status)
+        with self._lock:
+            if perfil in self._activos:
+                self._activos.remove(perfil)
+            self.perfiles.append(perfil)
+        _perfil_actual.set(None)
+
+    def _muestrear(self) -> None:
+        while True:
+            with self._lock:
+                if not self._activos:
+                    self._despertar.clear()
+                else:
+                    self._tomar_muestra()
+            if not self._despertar.is_set():
+                self._despertar.wait()
+                continue
+            time.sleep(self.interval)
+
+    def _tomar_muestra(self) -> None:
+        """Record one sample for every active profile (caller holds the lock)"""
+        frames = sys._current_frames()
+        for perfil in self._activos:
+            frame = frames.get(perfil.thread_id)
+            try:
+                actual = asyncio.current_task(perfil.loop)
+            except RuntimeError:
+                actual = None
+
+            for tarea in list(perfil.tareas):
+                if tarea is actual and frame is not None:
+                    stack = _stack_hilo(frame)
+                elif not tarea.done():
+                    stack = _stack_espera(tarea)
+                else:
+                    continue
+                if stack:
+                    perfil.stacks[stack] += 1
+            perfil.muestras += 1
+
+    def listar(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [p.resumen() for p in reversed(self.perfiles)]
+
+    def obtener(self, perfil_id: str) -> Optional[Perfil]:
+        with self._lock:
+            return next((p for p in self.perfiles if p.id == perfil_id), None)
+
+
+profiler = Profiler(
+    interval_ms=settings.profiler_interval_ms,
+    buffer_size=settings.profiler_buffer_size
+)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware that profiles requests sent with `X-Profile: 1` or
+    picked by PROFILER_SAMPLE_RATE. The profile id is returned in the
+    `X-Profile-Id` response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiler_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        header = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-profile"), None)
+        if not profiler.debe_perfilar(header):
+            await self.app(scope, receive, send)
+            return
+
+        perfil = profiler.iniciar(scope["method"], scope["path"])
+        status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", perfil.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.terminar(perfil, status["code"])
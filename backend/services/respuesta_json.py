@@ -0,0 +1,73 @@
+"""
+Respuesta JSON - Fast JSON responses (orjson when installed, stdlib otherwise)
+"""
+import dataclasses
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson  # Serializador opcional, mucho más rápido que json
+except ImportError:
+    orjson = None
+
+
+SERIALIZADOR = "orjson" if orjson is not None else "json"
+
+
+def _default(obj: Any) -> Any:
+    """Types neither serializer handles natively (same output as jsonable_encoder)"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "tolist"):
+        # Escalares y arreglos de numpy (puntajes de similitud)
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(content: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON"""
+        return orjson.dumps(content, default=_default, option=_OPCIONES)
+else:
+    def dumps(content: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON"""
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class RespuestaJSON(JSONResponse):
+    """
+    JSONResponse rendered with `dumps`.
+
+    Set as the app's default response class, so every endpoint gets the
+    faster encoder. FastAPI still runs `jsonable_encoder` on values an
+    endpoint returns; high-volume endpoints return `RespuestaJSON(...)`
+    directly to skip that pass, and Pydantic models inside the content are
+    dumped by pydantic-core instead of being walked field by field.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -2,50 +2,128 @@
 Storage Service - Upload files to Supabase Storage
 """
 from database import get_db
-from typing import Optional
-import uuid
+from services.metrics import metrics
+from services.lazy import LazyService
+from collections import OrderedDict
+from typing import Optional, Union
+import asyncio
+import hashlib
+import threading
 
 
 class StorageService:
     """Service for file storage operations"""
     
+    # Hashes recordados por proceso (cada entrada ocupa ~200 bytes)
+    INDICE_MAX = 10_000
+    
     def __init__(self):
         self.bucket_name = "convocatoria"
+        # sha256 -> URL pública de los CVs que ya están en el bucket
+        self._indice: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def ruta_cv(sha256: str) -> str:
+        """Object path of a CV, derived from its content"""
+        return f"cv/{sha256}.pdf"
+    
+    @staticmethod
+    def _hash(file_bytes: Union[bytes, str]) -> str:
+        """SHA-256 of the content (reads a path in 1 MB blocks)"""
+        if isinstance(file_bytes, (bytes, bytearray)):
+            return hashlib.sha256(file_bytes).hexdigest()
+        digest = hashlib.sha256()
+        with open(file_bytes, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _recordar(self, sha256: str, url: str) -> None:
+        with self._lock:
+            self._indice[sha256] = url
+            self._indice.move_to_end(sha256)
+            while len(self._indice) > self.INDICE_MAX:
+                self._indice.popitem(last=False)
+    
+    def _en_indice(self, sha256: str) -> Optional[str]:
+        with self._lock:
+            url = self._indice.get(sha256)
+            if url is not None:
+                self._indice.move_to_end(sha256)
+            return url
+    
+    def _referenciado(self, sha256: str) -> bool:
+        """True if a `documentos` row points at this content after a successful upload"""
+        try:
+            result = get_db().table("documentos").select("id").eq(
+                "hash_contenido", sha256
+            ).not_.is_("url_archivo", "null").limit(1).execute()
+            return bool(result.data)
+        except Exception as e:
+            # Sin la migración 004 la columna no existe: se sube igual
+            print(f"Error checking stored CV hash: {e}")
+            return False
     
+    @metrics.timed("storage.upload_cv")
     async def upload_cv(
         self,
-        file_bytes: bytes,
+        file_bytes: Union[bytes, str],
         candidato_id: str,
-        filename: str
+        filename: str,
+        sha256: Optional[str] = None
     ) -> Optional[str]:
         """
-        Upload CV PDF to Supabase Storage
+        Upload CV PDF to Supabase Storage, once per distinct content
+        
+        The object is stored under its SHA-256, so the same PDF sent by
+        several applications is uploaded only the first time. Known hashes
+        are answered from a local index; otherwise `documentos` is checked
+        before sending any bytes.
         
         Args:
-            file_bytes: PDF file content
+            file_bytes: PDF file content, or path to the PDF on disk
             candidato_id: Candidate ID
             filename: Original filename
+            sha256: Content hash if already known (computed otherwise)
             
         Returns:
             Public URL of uploaded file or None if failed
         """
         try:
-            db = get_db()
+            if sha256 is None:
+                sha256 = await asyncio.to_thread(self._hash, file_bytes)
+            
+            url = self._en_indice(sha256)
+            if url is not None:
+                metrics.inc("reclutamiento_storage_cv_total", resultado="indice")
+                return url
             
-            # Generate unique filename
-            file_extension = filename.split('.')[-1] if '.' in filename else 'pdf'
-            unique_filename = f"{candidato_id}_{uuid.uuid4()}.{file_extension}"
+            db = get_db()
+            ruta = self.ruta_cv(sha256)
+            public_url = db.storage.from_(self.bucket_name).get_public_url(ruta)
             
-            # Upload to Supabase Storage
-            response = db.storage.from_(self.bucket_name).upload(
-                path=unique_filename,
-                file=file_bytes,
-                file_options={"content-type": "application/pdf"}
-            )
+            if await asyncio.to_thread(self._referenciado, sha256):
+                metrics.inc("reclutamiento_storage_cv_total", resultado="existente")
+                self._recordar(sha256, public_url)
+                return public_url
             
-            # Get public URL
-            public_url = db.storage.from_(self.bucket_name).get_public_url(unique_filename)
+            # Upload to Supabase Storage (con una ruta, storage3 lee el archivo por partes)
+            try:
+                await asyncio.to_thread(
+                    db.storage.from_(self.bucket_name).upload,
+                    path=ruta,
+                    file=file_bytes,
+                    file_options={"content-type": "application/pdf"}
+                )
+                metrics.inc("reclutamiento_storage_cv_total", resultado="subido")
+            except Exception as e:
+                # Otra petición subió el mismo contenido primero
+                if "409" not in str(e) and "Duplicate" not in str(e):
+                    raise
+                metrics.inc("reclutamiento_storage_cv_total", resultado="existente")
             
+            self._recordar(sha256, public_url)
             return public_url
             
         except Exception as e:
@@ -54,4 +132,4 @@ class StorageService:
 
 
 # Singleton instance
-storage_service = StorageService()
+storage_service = LazyService(StorageService, "storage_service")
@@ -0,0 +1,83 @@
+"""
+Unit tests run without Supabase, Groq or SMTP: the LLM provider is the
+local fake and the services that need the database use benchmarks.fakes.
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("LLM_FAKE_LATENCY_MS", "0")
+os.environ.setdefault("LLM_FAKE_JITTER_MS", "0")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+os.environ.setdefault("SUPABASE_URL", "https://fake.supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "fake")
+os.environ.setdefault("SMTP_USER", "tests@example.com")
+os.environ.setdefault("SMTP_PASSWORD", "fake")
+os.environ.setdefault("EMBEDDINGS_DIR", tempfile.mkdtemp(prefix="tests-embeddings-"))
+
+import pytest
+
+from benchmarks.fakes import FakeSupabase
+from database import Database
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """In-memory PostgREST stand-in installed as the app's Supabase client"""
+    fake = FakeSupabase()
+    monkeypatch.setattr(Database, "_client", fake)
+    return fake
+
+
+@pytest.fixture
+def cliente(db, monkeypatch):
+    """HTTP client for the app over the fake database and SMTP server"""
+    import smtplib
+    from fastapi.testclient import TestClient
+    from benchmarks.fakes import FakeSMTP
+    from services.lazy import LazyService
+    from main import app
+
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    with TestClient(app) as client:
+        yield client
+
+    # Los servicios construidos guardan estado (cachés, índices): la
+    # siguiente prueba los construye de nuevo sobre su propia base
+    for nombre, modulo in list(sys.modules.items()):
+        if nombre.startswith("services.") and modulo is not None:
+            for valor in list(vars(modulo).values()):
+                if isinstance(valor, LazyService):
+                    object.__setattr__(valor, "_instancia", None)
+
+
+PREGUNTAS_ENTREVISTA = [
+    "¿Qué proyecto con Python te enorgullece más?",
+    "¿Has trabajado con PostgreSQL en producción?",
+    "Del 1 al 5, ¿cuánto dominas Docker?",
+]
+
+
+@pytest.fixture
+def entrevista(db):
+    """Application ID whose job posting has PREGUNTAS_ENTREVISTA approved"""
+    empresa = db.table("empresas").insert({"nombre_empresa": "Acme"}).execute().data[0]
+    vacante = db.table("vacantes").insert({
+        "empresa_id": empresa["id"], "titulo": "Backend Python", "estado": "publicada",
+        "habilidades_requeridas": ["Python"], "experiencia_min": 2
+    }).execute().data[0]
+    db.table("vacante_preguntas").insert([
+        {
+            "vacante_id": vacante["id"], "pregunta": pregunta, "aprobada_por_empresa": True,
+            "created_at": f"2024-01-01T00:00:0{i}+00:00"
+        }
+        for i, pregunta in enumerate(PREGUNTAS_ENTREVISTA)
+    ] + [{
+        "vacante_id": vacante["id"], "pregunta": "Pregunta descartada", "aprobada_por_empresa": False,
+        "created_at": "2024-01-01T00:00:09+00:00"
+    }]).execute()
+    candidato = db.table("candidatos").insert({"nombre_anonimo": "Ana", "email": "ana@example.com"}).execute().data[0]
+    return db.table("aplicaciones").insert({
+        "candidato_id": candidato["id"], "vacante_id": vacante["id"], "estado": "aplicado"
+    }).execute().data[0]["id"]
@@ -0,0 +1,90 @@
+"""
+Tests for services.answer_log (batching, flush scheduling, bad rows)
+"""
+import asyncio
+
+import pytest
+
+from config import settings
+from services.answer_log import AnswerLog
+from services.background import background_jobs
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    monkeypatch.setattr(settings, "answer_log_flush_seconds", 0.02)
+    monkeypatch.setattr(settings, "answer_log_batch_size", 100)
+
+
+def _filas(db):
+    return db.tables.get(AnswerLog.TABLE, [])
+
+
+def test_el_temporizador_escribe_un_lote_incompleto(db):
+    async def main():
+        log = AnswerLog()
+        log.append("a1", "respuesta 1", orden=0)
+        log.append("a1", "respuesta 2", orden=1)
+        assert log.pendientes == 2
+        await asyncio.sleep(0.1)
+        await background_jobs.drain(1)
+        return log
+
+    log = asyncio.run(main())
+    assert log.pendientes == 0
+    assert [f["respuesta"] for f in _filas(db)] == ["respuesta 1", "respuesta 2"]
+    assert db.queries == 1
+
+
+def test_filas_que_llegan_durante_un_flush_no_se_quedan_sin_escribir(db):
+    # Cada insert tarda más que el temporizador: el flush programado se
+    # deduplica contra el que está en curso
+    db.latency_ms = 100
+
+    async def main():
+        log = AnswerLog()
+        log.append("a1", "primera")
+        await asyncio.sleep(0.04)  # el flush de "primera" está escribiendo
+        log.append("a1", "segunda")
+        await asyncio.sleep(0.4)
+        await background_jobs.drain(1)
+        return log
+
+    log = asyncio.run(main())
+    assert log.pendientes == 0
+    assert [f["respuesta"] for f in _filas(db)] == ["primera", "segunda"]
+
+
+def test_una_fila_mala_no_bloquea_las_demas(db, monkeypatch):
+    insert = db.table(AnswerLog.TABLE).__class__.insert
+
+    def insert_con_fk(self, rows):
+        filas = rows if isinstance(rows, list) else [rows]
+        if any(f.get("pregunta_id") == "no-existe" for f in filas):
+            raise RuntimeError("violates foreign key constraint")
+        return insert(self, rows)
+
+    monkeypatch.setattr(db.table(AnswerLog.TABLE).__class__, "insert", insert_con_fk)
+
+    async def main():
+        log = AnswerLog()
+        log.append("a1", "buena 1")
+        log.append("a1", "mala", pregunta_id="no-existe")
+        log.append("a1", "buena 2")
+        return await log.flush(), log
+
+    escritas, log = asyncio.run(main())
+    assert escritas == 2 and log.pendientes == 0
+    assert [f["respuesta"] for f in _filas(db)] == ["buena 1", "buena 2"]
+
+
+def test_respuestas_filtra_por_origen_y_sesion(db):
+    async def main():
+        log = AnswerLog()
+        log.append("a1", "form", orden=0, origen="formulario")
+        log.append("a1", "vieja", orden=0, sesion_id="s1")
+        log.append("a1", "nueva", orden=0, sesion_id="s2")
+        log.append("a2", "otra aplicación", orden=0, sesion_id="s2")
+        return await log.respuestas("a1", origen="chatbot", sesion_id="s2")
+
+    assert [r["respuesta"] for r in asyncio.run(main())] == ["nueva"]
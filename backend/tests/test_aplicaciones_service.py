@@ -0,0 +1,159 @@
+"""
+Tests for services.aplicaciones_service (keyset cursor and chunk merge)
+"""
+import base64
+import json
+import random
+
+import pytest
+
+from services import aplicaciones_service
+from services.aplicaciones_service import (
+    CursorInvalidoError,
+    FiltrosAplicaciones,
+    a_csv,
+    codificar_cursor,
+    decodificar_cursor,
+    pagina,
+    paginas,
+)
+
+
+def test_cursor_ida_y_vuelta():
+    fila = {"id": "a-1", "puntuacion_ia": 87, "fecha_aplicacion": "2024-05-01T10:00:00"}
+    cursor = codificar_cursor("puntuacion", True, fila)
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor, "puntuacion", True) == (87, "a-1")
+
+
+def test_cursor_de_otro_orden():
+    cursor = codificar_cursor("fecha", True, {"id": "a-1", "fecha_aplicacion": "2024-05-01"})
+    with pytest.raises(CursorInvalidoError, match="otro orden"):
+        decodificar_cursor(cursor, "fecha", False)
+    with pytest.raises(CursorInvalidoError, match="otro orden"):
+        decodificar_cursor(cursor, "puntuacion", True)
+
+
+@pytest.mark.parametrize("cursor", ["", "no-es-base64!!", "eyJhIjogMX0", "WzEsIDJd"])
+def test_cursor_malformado(cursor):
+    with pytest.raises(CursorInvalidoError):
+        decodificar_cursor(cursor, "fecha", True)
+
+
+def _cursor(*datos):
+    return base64.urlsafe_b64encode(json.dumps(list(datos)).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("orden, valor, fila_id", [
+    ("fecha", '2024-01-01",id.gt."0', "a-1"),
+    ("fecha", "ayer", "a-1"),
+    ("fecha", 5, "a-1"),
+    ("puntuacion", "87", "a-1"),
+    ("puntuacion", True, "a-1"),
+    ("puntuacion", None, "a-1"),
+    ("puntuacion", 87, 'x",estado.eq."aplicado'),
+    ("puntuacion", 87, 12),
+])
+def test_cursor_con_valores_manipulados(orden, valor, fila_id):
+    with pytest.raises(CursorInvalidoError):
+        decodificar_cursor(_cursor(orden, True, valor, fila_id), orden, True)
+
+
+def test_cursor_con_fecha_iso_con_zona():
+    cursor = _cursor("fecha", False, "2024-05-01T10:00:00+00:00", "0b1c-22")
+    assert decodificar_cursor(cursor, "fecha", False) == ("2024-05-01T10:00:00+00:00", "0b1c-22")
+
+
+@pytest.fixture
+def empresa(db, monkeypatch):
+    """Company with 5 job postings and 60 applications (many score ties)"""
+    # Lotes de 2 vacantes: pagina() mezcla 3 consultas
+    monkeypatch.setattr(aplicaciones_service, "LOTE_VACANTES", 2)
+    rnd = random.Random(7)
+    db.table("vacantes").insert([
+        {"id": f"v{i}", "titulo": f"Vacante {i}", "empresa_id": "e1"} for i in range(5)
+    ] + [{"id": "otra", "titulo": "Otra empresa", "empresa_id": "e2"}]).execute()
+    db.table("candidatos").insert([{"id": i, "nombre_anonimo": f"Candidato {i}"} for i in range(60)]).execute()
+    filas = [
+        {
+            "id": f"{rnd.getrandbits(64):016x}",
+            "vacante_id": f"v{i % 5}",
+            "candidato_id": i,
+            "estado": rnd.choice(["aplicado", "en_revision"]),
+            "puntuacion_ia": rnd.choice([None, 50, 70, 90]),
+            "compatibilidad_porcentaje": rnd.randint(0, 100),
+            "fecha_aplicacion": f"2024-01-{1 + i % 28:02d}T00:00:00"
+        }
+        for i in range(60)
+    ]
+    db.table("aplicaciones").insert(filas + [{
+        "id": "ajena", "vacante_id": "otra", "candidato_id": 0, "estado": "aplicado",
+        "puntuacion_ia": 99, "compatibilidad_porcentaje": 99, "fecha_aplicacion": "2024-01-01T00:00:00"
+    }]).execute()
+    return filas
+
+
+def _recorrer(orden, desc, limit, filtros=None):
+    filtros = filtros or FiltrosAplicaciones()
+    vistas, cursor = [], None
+    while True:
+        filas, cursor = pagina("e1", filtros, orden=orden, desc=desc, limit=limit, cursor=cursor)
+        assert len(filas) <= limit
+        vistas.extend(filas)
+        if cursor is None:
+            return vistas
+
+
+@pytest.mark.parametrize("orden, columna", [("puntuacion", "puntuacion_ia"), ("fecha", "fecha_aplicacion")])
+@pytest.mark.parametrize("desc", [True, False])
+def test_paginas_mezcladas_en_orden_sin_huecos_ni_repetidos(empresa, orden, columna, desc):
+    vistas = _recorrer(orden, desc, limit=7)
+    esperadas = sorted(
+        (f for f in empresa if f[columna] is not None),
+        key=lambda f: (f[columna], f["id"]),
+        reverse=desc
+    )
+    assert [f["aplicacion_id"] for f in vistas] == [f["id"] for f in esperadas]
+    assert all(f["candidato_nombre"].startswith("Candidato") for f in vistas)
+
+
+def test_filtros(empresa):
+    filtros = FiltrosAplicaciones(estados=["en_revision"], vacante_id="v3", min_compatibilidad=40)
+    vistas = _recorrer("compatibilidad", True, limit=4, filtros=filtros)
+    esperadas = {
+        f["id"] for f in empresa
+        if f["estado"] == "en_revision" and f["vacante_id"] == "v3" and f["compatibilidad_porcentaje"] >= 40
+    }
+    assert {f["aplicacion_id"] for f in vistas} == esperadas
+    assert all(f["vacante_titulo"] == "Vacante 3" for f in vistas)
+
+
+def test_empresa_sin_vacantes(db):
+    assert pagina("nadie", FiltrosAplicaciones()) == ([], None)
+
+
+def test_exportacion_por_paginas_a_csv(empresa):
+    bloques = list(paginas("e1", FiltrosAplicaciones(), tamaño=25))
+    assert [len(b) for b in bloques] == [25, 25, 10]
+    csv = a_csv(bloques[0], encabezado=True) + "".join(a_csv(b) for b in bloques[1:])
+    lineas = csv.splitlines()
+    assert lineas[0].startswith("aplicacion_id,candidato_nombre,vacante_id")
+    assert len(lineas) == 61
+
+
+def test_endpoint_sin_limit_ni_cursor_devuelve_todas(empresa, cliente):
+    respuesta = cliente.get("/api/empresa/e1/aplicaciones")
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert len(datos["aplicaciones"]) == 60 and datos["siguiente_cursor"] is None
+    fechas = [f["fecha_aplicacion"] for f in datos["aplicaciones"]]
+    assert fechas == sorted(fechas, reverse=True)
+
+
+def test_endpoint_paginado_y_cursor_invalido(empresa, cliente):
+    datos = cliente.get("/api/empresa/e1/aplicaciones", params={"limit": 10}).json()
+    assert len(datos["aplicaciones"]) == 10 and datos["siguiente_cursor"]
+    respuesta = cliente.get("/api/empresa/e1/aplicaciones", params={
+        "cursor": _cursor("fecha", True, '2024",id.gt."0', "a")
+    })
+    assert respuesta.status_code == 400
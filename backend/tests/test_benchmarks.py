@@ -0,0 +1,93 @@
+"""
+Tests for the load benchmark (benchmarks/run_load.py) and its fake Supabase
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.fakes import FakeSupabase
+from benchmarks.run_load import ESCENARIOS, parse_mix, percentil, resumir
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("p, esperado", [(50, 5), (95, 10), (99, 10), (0, 1)])
+def test_percentil_rango_mas_cercano(p, esperado):
+    assert percentil(list(range(1, 11)), p) == esperado
+
+
+def test_percentil_sin_valores():
+    assert percentil([], 95) == 0.0
+
+
+def test_resumir_por_endpoint():
+    mediciones = [("GET /a", 200, 0.010), ("GET /a", 500, 0.030), ("POST /b", 201, 0.020)]
+    reporte = resumir(mediciones, duracion=2.0)
+
+    assert reporte["total"]["requests"] == 3
+    assert reporte["total"]["errores"] == 1
+    assert reporte["total"]["throughput_rps"] == 1.5
+    assert list(reporte["endpoints"]) == ["GET /a", "POST /b"]
+    assert reporte["endpoints"]["GET /a"]["media_ms"] == 20.0
+    assert reporte["endpoints"]["GET /a"]["max_ms"] == 30.0
+
+
+def test_parse_mix():
+    assert parse_mix("publicadas=3, chatbot") == {"publicadas": 3.0, "chatbot": 1.0}
+    with pytest.raises(SystemExit, match="Escenario desconocido: borrar"):
+        parse_mix("publicadas=1,borrar=2")
+
+
+def test_fake_filtros_orden_y_paginas():
+    db = FakeSupabase()
+    db.table("vacantes").insert([
+        {"id": "v1", "titulo": "Backend Python", "salario": 5},
+        {"id": "v2", "titulo": "Frontend", "salario": None},
+        {"id": "v3", "titulo": "Data python", "salario": 8},
+    ]).execute()
+
+    r = db.table("vacantes").select("id", count="exact").order("salario", desc=True).range(0, 1).execute()
+    # Como PostgreSQL: en orden descendente los nulos van primero
+    assert [f["id"] for f in r.data] == ["v2", "v3"] and r.count == 3
+    assert [f["id"] for f in db.table("vacantes").select("id").ilike("titulo", "%PYTHON%").execute().data] == ["v1", "v3"]
+    assert [f["id"] for f in db.table("vacantes").select("id").or_("salario.gt.6,titulo.eq.Frontend").execute().data] == ["v2", "v3"]
+    assert [f["id"] for f in db.table("vacantes").select("id").not_.is_("salario", "null").execute().data] == ["v1", "v3"]
+    assert db.queries == 5
+
+
+def test_fake_upsert_con_columnas_de_conflicto():
+    db = FakeSupabase()
+    usuarios = db.table("usuarios")
+    usuarios.upsert({"email": "a@x.co", "tipo_usuario": "empresa", "nombre": "A"}, on_conflict="email,tipo_usuario").execute()
+    db.table("usuarios").upsert({"email": "a@x.co", "tipo_usuario": "empresa", "nombre": "B"}, on_conflict="email,tipo_usuario").execute()
+    db.table("usuarios").upsert({"email": "a@x.co", "tipo_usuario": "candidato"}, on_conflict="email,tipo_usuario").execute()
+    ignorada = db.table("usuarios").upsert(
+        {"email": "a@x.co", "tipo_usuario": "candidato", "nombre": "C"},
+        on_conflict="email,tipo_usuario", ignore_duplicates=True
+    ).execute()
+
+    filas = db.tables["usuarios"]
+    assert [(f["tipo_usuario"], f.get("nombre")) for f in filas] == [("empresa", "B"), ("candidato", None)]
+    assert ignorada.data == []
+    assert all(f["id"] and f["created_at"] for f in filas)
+
+
+def test_corrida_corta_sin_errores(tmp_path):
+    salida = tmp_path / "reporte.json"
+    subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.run_load", "--requests", "15", "--concurrency", "3",
+            "--llm-latency-ms", "0", "--llm-jitter-ms", "0", "--db-latency-ms", "0", "--smtp-latency-ms", "0",
+            "--empresas", "2", "--vacantes", "6", "--aplicaciones", "6", "--output", str(salida)
+        ],
+        cwd=BACKEND, check=True, capture_output=True, timeout=120
+    )
+
+    reporte = json.loads(salida.read_text(encoding="utf-8"))
+    assert reporte["total"]["errores"] == 0
+    assert reporte["total"]["requests"] >= 15
+    assert reporte["db_queries"] > 0
+    assert set(reporte["config"]["mix"]) == set(ESCENARIOS)
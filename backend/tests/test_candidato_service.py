@@ -0,0 +1,117 @@
+"""
+Tests for services.candidato_service (one candidate per email)
+"""
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import pdf_minimo
+from services.candidato_service import CandidatoService
+
+
+def _crear(servicio, email, nombre="Ana", telefono="300", años=3):
+    return asyncio.run(servicio.obtener_o_crear(email, nombre, telefono, años))
+
+
+def test_mismo_email_sin_importar_mayusculas_es_un_candidato(db):
+    servicio = CandidatoService()
+    candidato_id, creado = _crear(servicio, "Ana@Example.com ")
+    assert creado
+    assert _crear(CandidatoService(), "ana@example.com") == (candidato_id, False)
+    assert len(db.table("candidatos").select("id").execute().data) == 1
+    assert db.table("candidatos").select("email").execute().data[0]["email"] == "ana@example.com"
+
+
+def test_empresa_y_candidato_pueden_compartir_email(db):
+    db.table("usuarios").insert({
+        "id": "u-empresa", "email": "rrhh@acme.co", "tipo_usuario": "empresa", "nombre_completo": "Acme"
+    }).execute()
+    _crear(CandidatoService(), "rrhh@acme.co")
+    usuarios = db.table("usuarios").select("id, tipo_usuario").eq("email", "rrhh@acme.co").execute().data
+    assert sorted(u["tipo_usuario"] for u in usuarios) == ["candidato", "empresa"]
+    candidato = db.table("candidatos").select("usuario_id").execute().data[0]
+    assert candidato["usuario_id"] != "u-empresa"
+
+
+def test_email_existente_no_sobrescribe_los_datos(db):
+    candidato_id, _ = _crear(CandidatoService(), "ana@example.com", "Ana", "", 3)
+    # Alguien escribe el email de Ana con otros datos
+    assert _crear(CandidatoService(), "ana@example.com", "Intruso", "999", 20) == (candidato_id, False)
+    candidato = db.table("candidatos").select("*").eq("id", candidato_id).execute().data[0]
+    assert candidato["nombre_anonimo"] == "Ana"
+    assert candidato["años_experiencia"] == 3
+    # El teléfono estaba vacío: se completa
+    assert candidato["telefono"] == "999"
+
+
+def test_carrera_con_otro_proceso_no_pisa_sus_datos(db, monkeypatch):
+    servicio = CandidatoService()
+    buscar = servicio.buscar
+    primera = []
+
+    def buscar_tarde(email):
+        # Otro worker crea el candidato justo después de nuestra búsqueda
+        if not primera:
+            primera.append(email)
+            db.table("candidatos").insert({"email": email, "nombre_anonimo": "Otro worker", "telefono": None}).execute()
+            return None
+        return buscar(email)
+
+    monkeypatch.setattr(servicio, "buscar", buscar_tarde)
+    candidato_id, creado = _crear(servicio, "bea@example.com", "Bea", "301")
+    assert not creado
+    filas = db.table("candidatos").select("*").eq("email", "bea@example.com").execute().data
+    assert len(filas) == 1 and filas[0]["id"] == candidato_id
+    assert filas[0]["nombre_anonimo"] == "Otro worker"
+    assert filas[0]["telefono"] == "301"
+
+
+ANALISIS_FALLIDO = {"habilidades": [], "experiencia_años": 0, "educacion": "No especificada", "resumen": "Error al analizar CV"}
+ANALISIS = {"habilidades": ["Python"], "experiencia_años": 4, "educacion": "Ingeniería", "resumen": "Backend"}
+
+
+@pytest.fixture
+def vacante(db):
+    empresa = db.table("empresas").insert({"nombre_empresa": "Acme"}).execute().data[0]
+    return db.table("vacantes").insert({
+        "empresa_id": empresa["id"], "titulo": "Backend", "estado": "publicada",
+        "habilidades_requeridas": ["Python"], "experiencia_min": 1
+    }).execute().data[0]
+
+
+def _aplicar(cliente, vacante, email="ana@example.com", nombre="Ana", telefono="300", años=3):
+    response = cliente.post("/api/candidato/aplicar", data={
+        "vacante_id": vacante["id"], "nombre_anonimo": nombre, "email": email,
+        "telefono": telefono, "ciudad": "Bogotá", "años_experiencia": str(años)
+    }, files={"cv_pdf": ("cv.pdf", pdf_minimo("Ana\nPERFIL\nBackend con Python"), "application/pdf")})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_cv_previo_descarta_el_analisis_por_defecto(db):
+    db.table("documentos").insert([
+        {"candidato_id": 1, "hash_contenido": "fallido", "texto_extraido": "cv", "analisis_cv": ANALISIS_FALLIDO},
+        {"candidato_id": 1, "hash_contenido": "bueno", "texto_extraido": "cv", "analisis_cv": ANALISIS},
+    ]).execute()
+    servicio = CandidatoService()
+    assert servicio.cv_previo(1, "fallido") is None
+    assert servicio.cv_previo(1, "bueno") == {"texto_extraido": "cv", "analisis_cv": ANALISIS}
+    assert servicio.cv_previo(2, "bueno") is None
+
+
+def test_analisis_fallido_no_se_reutiliza(cliente, db, vacante, monkeypatch):
+    from services.ia_service import ia_service
+    resultados = [ANALISIS_FALLIDO, ANALISIS, ANALISIS]
+    llamadas = []
+
+    async def analizar_cv(texto):
+        llamadas.append(texto)
+        return dict(resultados[len(llamadas) - 1])
+
+    monkeypatch.setattr(ia_service, "analizar_cv", analizar_cv)
+    for _ in range(3):
+        _aplicar(cliente, vacante)
+    # 1: falla y no se guarda; 2: se analiza de nuevo; 3: reutiliza el de la 2
+    assert len(llamadas) == 2
+    documentos = db.table("documentos").select("analisis_cv").order("created_at").execute().data
+    assert [d["analisis_cv"] for d in documentos] == [None, ANALISIS]
@@ -0,0 +1,83 @@
+"""
+Tests for the per-vacancy chatbot opener (generated once, name filled in per candidate)
+"""
+import asyncio
+
+from conftest import PREGUNTAS_ENTREVISTA
+from services.background import background_jobs
+from services.chatbot_service import MARCADOR_NOMBRE, ChatbotService
+from services.llm_provider import FakeChatModel
+
+
+def _vacante_id(db, aplicacion_id):
+    return db.table("aplicaciones").select("vacante_id").eq("id", aplicacion_id).execute().data[0]["vacante_id"]
+
+
+def _apertura_guardada(db, vacante_id):
+    return db.table("vacantes").select("apertura_chatbot").eq("id", vacante_id).execute().data[0]["apertura_chatbot"]
+
+
+def test_apertura_se_genera_una_vez_y_se_personaliza(db, entrevista):
+    servicio = ChatbotService()
+    vacante_id = _vacante_id(db, entrevista)
+    apertura = asyncio.run(servicio.generar_apertura(vacante_id))
+    assert MARCADOR_NOMBRE in apertura and PREGUNTAS_ENTREVISTA[0] in apertura
+    assert _apertura_guardada(db, vacante_id) == apertura
+
+    # Sin LLM disponible el saludo sale igual de la plantilla guardada
+    servicio.llm.error_rate = 1.0
+    mensaje = asyncio.run(servicio.iniciar_conversacion(entrevista))
+    assert mensaje == apertura.replace(MARCADOR_NOMBRE, "Ana")
+    assert len(servicio.conversations[entrevista]) == 2
+
+
+def test_apertura_sin_marcador_se_descarta(db, entrevista, monkeypatch):
+    vacante_id = _vacante_id(db, entrevista)
+    db.table("vacantes").update({"apertura_chatbot": "Hola {candidato_nombre}, saludo viejo"}).eq("id", vacante_id).execute()
+    monkeypatch.setattr(FakeChatModel, "_responder", lambda self, messages: "¡Hola Ana! Empecemos.")
+
+    assert asyncio.run(ChatbotService().generar_apertura(vacante_id)) is None
+    # Un saludo viejo no sobrevive a la nueva generación
+    assert _apertura_guardada(db, vacante_id) is None
+
+
+def test_vacante_sin_preguntas_aprobadas(db, entrevista):
+    vacante_id = _vacante_id(db, entrevista)
+    db.table("vacante_preguntas").update({"aprobada_por_empresa": False}).eq("vacante_id", vacante_id).execute()
+    assert asyncio.run(ChatbotService().generar_apertura(vacante_id)) is None
+
+
+def test_reaprobar_durante_la_generacion_la_repite(monkeypatch):
+    servicio = ChatbotService()
+    llamadas = []
+
+    async def generar(vacante_id):
+        llamadas.append(vacante_id)
+        await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(servicio, "generar_apertura", generar)
+
+    async def escenario():
+        servicio.programar_apertura("v1")
+        await asyncio.sleep(0)
+        # Mientras corre: dos reaprobaciones se agrupan en una repetición,
+        # y el arranque de una conversación no la pide
+        servicio.programar_apertura("v1")
+        servicio.programar_apertura("v1")
+        servicio.programar_apertura("v1", repetir_si_ocupada=False)
+        await background_jobs.drain(5)
+
+    asyncio.run(escenario())
+    assert llamadas == ["v1", "v1"]
+    assert servicio._aperturas_en_curso == {}
+
+
+def test_vacante_antigua_genera_la_apertura_en_el_primer_inicio(db, entrevista, monkeypatch):
+    servicio = ChatbotService()
+    programadas = []
+    monkeypatch.setattr(servicio, "programar_apertura", lambda v, repetir_si_ocupada=True: programadas.append(v))
+
+    asyncio.run(servicio.iniciar_conversacion(entrevista))
+    servicio.limpiar_conversacion(entrevista)
+    asyncio.run(servicio.iniciar_conversacion(entrevista))
+    assert programadas == [_vacante_id(db, entrevista)]
@@ -0,0 +1,175 @@
+"""
+Tests for services.chatbot_service (server-side interview plan)
+"""
+import asyncio
+
+import pytest
+
+from config import settings
+from conftest import PREGUNTAS_ENTREVISTA
+from services import chatbot_service as modulo
+from services.chatbot_service import ChatbotService, PlanEntrevista
+
+
+@pytest.fixture
+def guardadas(monkeypatch):
+    """Answers sent to the answer log"""
+    filas = []
+    monkeypatch.setattr(modulo.answer_log, "append", lambda **fila: filas.append(fila))
+    return filas
+
+
+def test_plan_con_preguntas_aprobadas_en_orden(db, entrevista):
+    plan = ChatbotService().obtener_plan(entrevista)
+    assert [p["pregunta"] for p in plan.preguntas] == PREGUNTAS_ENTREVISTA
+    assert (plan.candidato_nombre, plan.vacante_titulo) == ("Ana", "Backend Python")
+    assert plan.pregunta_actual == PREGUNTAS_ENTREVISTA[0]
+
+
+def test_aplicacion_inexistente(db):
+    with pytest.raises(ValueError, match="Aplicación no encontrada"):
+        ChatbotService().obtener_plan("no-existe")
+
+
+def test_cada_turno_envia_solo_la_siguiente_pregunta(db, entrevista, guardadas):
+    servicio = ChatbotService()
+    asyncio.run(servicio.iniciar_conversacion(entrevista))
+
+    turno = servicio._preparar_siguiente(entrevista, "Un ETL en Python")
+    assert PREGUNTAS_ENTREVISTA[1] in turno.inputs["instruccion"]
+    # Ni la pregunta ya respondida ni las siguientes viajan en el prompt
+    texto = str(turno.inputs)
+    assert PREGUNTAS_ENTREVISTA[2] not in texto
+
+    assert [(f["orden"], f["pregunta"], f["respuesta"]) for f in guardadas] == [
+        (0, PREGUNTAS_ENTREVISTA[0], "Un ETL en Python")
+    ]
+    assert guardadas[0]["sesion_id"] == servicio.planes[entrevista].sesion_id
+    assert guardadas[0]["pregunta_id"] is not None
+
+
+def test_estado_hasta_la_ultima_respuesta(db, entrevista, guardadas):
+    servicio = ChatbotService()
+    asyncio.run(servicio.iniciar_conversacion(entrevista))
+    estados = []
+    for respuesta in ("uno", "dos", "tres"):
+        asyncio.run(servicio.siguiente_pregunta(entrevista, respuesta))
+        estados.append(servicio.estado_entrevista(entrevista))
+
+    assert [e["preguntas_restantes"] for e in estados] == [2, 1, 0]
+    assert estados[-1] == {
+        "quedan_preguntas": False, "preguntas_restantes": 0,
+        "total_preguntas": 3, "respuestas_registradas": 3
+    }
+    # Una respuesta de más no se registra ni mueve el estado
+    turno = servicio._preparar_siguiente(entrevista, "cuatro")
+    assert "No quedan preguntas" in turno.inputs["instruccion"]
+    assert len(guardadas) == 3
+
+
+def test_cliente_antiguo_sin_plan(db, guardadas):
+    servicio = ChatbotService()
+    # Envía las preguntas que quedan después de la que responde
+    servicio._preparar_siguiente("legado", "Mi respuesta", ["¿Y ahora?", "¿Algo más?"])
+    plan = servicio.planes["legado"]
+    assert plan.pregunta_actual == "¿Y ahora?"
+    assert guardadas[0]["pregunta"] == "Pregunta anterior"
+    # Con plan, la lista que mande el cliente se ignora
+    servicio._preparar_siguiente("legado", "Otra", ["Pregunta inventada"])
+    assert plan.pregunta_actual == "¿Algo más?"
+
+
+def test_estado_sin_plan():
+    assert ChatbotService().estado_entrevista("nadie") == {
+        "quedan_preguntas": False, "preguntas_restantes": 0,
+        "total_preguntas": 0, "respuestas_registradas": 0
+    }
+
+
+def test_registrar_respuesta_sin_pregunta_pendiente():
+    plan = PlanEntrevista("Ana", "Dev", [{"id": "p1", "pregunta": "¿Uno?"}])
+    assert plan.registrar_respuesta("sí")["orden"] == 0
+    assert plan.registrar_respuesta("extra") is None
+    assert plan.preguntas_restantes == 0 and len(plan.respuestas) == 1
+
+
+def test_conversaciones_viejas_o_de_mas_se_descartan(monkeypatch):
+    monkeypatch.setattr(settings, "chatbot_sesiones_max", 2)
+    servicio = ChatbotService()
+    for aplicacion_id in ("a", "b", "c"):
+        servicio.obtener_plan(aplicacion_id, ["¿Pregunta?"])
+    assert set(servicio.planes) == {"b", "c"}
+
+    monkeypatch.setattr(settings, "chatbot_sesion_ttl_seconds", 0)
+    servicio.obtener_plan("d", ["¿Pregunta?"])
+    assert set(servicio.planes) == {"d"}
+
+
+async def _esperar_resumen(servicio):
+    while servicio._condensando:
+        await asyncio.gather(*servicio._condensando.values())
+
+
+def test_turnos_viejos_se_condensan_en_el_resumen(db, entrevista, guardadas, monkeypatch):
+    monkeypatch.setattr(settings, "chatbot_memory_max_tokens", 40)
+    monkeypatch.setattr(settings, "chatbot_memory_keep_turns", 1)
+    servicio = ChatbotService()
+
+    async def entrevista_completa():
+        await servicio.iniciar_conversacion(entrevista)
+        for respuesta in ("Construí un ETL en Python con Airflow", "Sí, en una fintech"):
+            await servicio.siguiente_pregunta(entrevista, respuesta)
+            await _esperar_resumen(servicio)
+        return servicio._preparar_siguiente(entrevista, "4")
+
+    turno = asyncio.run(entrevista_completa())
+    plan = servicio.planes[entrevista]
+    assert plan.resumen.startswith("- El candidato describió")
+    # Quedan solo los últimos keep_turns turnos en crudo
+    assert len(servicio.conversations[entrevista]) == 2
+    assert turno.inputs["resumen"] == plan.resumen
+    assert len(turno.inputs["chat_history"]) == 2
+
+
+def test_bajo_el_limite_no_se_condensa(db, entrevista, guardadas):
+    servicio = ChatbotService()
+
+    async def turnos():
+        await servicio.iniciar_conversacion(entrevista)
+        await servicio.siguiente_pregunta(entrevista, "corta")
+        return dict(servicio._condensando)
+
+    assert asyncio.run(turnos()) == {}
+    assert servicio.planes[entrevista].resumen == ""
+    assert len(servicio.conversations[entrevista]) == 4
+
+
+def test_mensajes_nuevos_sobreviven_al_resumen(monkeypatch):
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    servicio = ChatbotService()
+    plan = PlanEntrevista("Ana", "Dev", [])
+    antiguos = [HumanMessage(content="respuesta vieja"), AIMessage(content="pregunta vieja")]
+    history = list(antiguos)
+
+    async def condensar_mientras_llega_otro_turno():
+        tarea = asyncio.create_task(servicio._condensar("a1", plan, history, list(antiguos)))
+        history.extend([HumanMessage(content="nueva"), AIMessage(content="siguiente")])
+        await tarea
+
+    asyncio.run(condensar_mientras_llega_otro_turno())
+    assert [m.content for m in history] == ["nueva", "siguiente"]
+    assert plan.resumen
+
+
+def test_resumen_sin_llm_conserva_las_respuestas_recortadas():
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    servicio = ChatbotService()
+    servicio.llm.error_rate = 1.0
+    plan = PlanEntrevista("Ana", "Dev", [], resumen="- previo\n")
+    history = [HumanMessage(content="x" * 500), AIMessage(content="¿Y luego?"), HumanMessage(content="fin")]
+
+    asyncio.run(servicio._condensar("a1", plan, history, history[:2]))
+    assert plan.resumen == "- previo\n- " + "x" * 200 + "\n"
+    assert [m.content for m in history] == ["fin"]
@@ -0,0 +1,104 @@
+"""
+Tests for the streaming chatbot endpoints (SSE and WebSocket)
+"""
+import json
+
+from conftest import PREGUNTAS_ENTREVISTA
+
+
+def _eventos(cuerpo: str):
+    """Parse a Server-Sent Events body into (event, data) pairs"""
+    eventos = []
+    for bloque in cuerpo.strip().split("\n\n"):
+        campos = dict(linea.split(": ", 1) for linea in bloque.splitlines())
+        eventos.append((campos["event"], json.loads(campos["data"])))
+    return eventos
+
+
+def _sse(cliente, ruta, **params):
+    respuesta = cliente.post(f"/api/candidato/chatbot/{ruta}/stream", params=params)
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.headers["content-type"].startswith("text/event-stream")
+    eventos = _eventos(respuesta.text)
+    assert [e for e, _ in eventos[:-1]] == ["token"] * (len(eventos) - 1)
+    assert eventos[-1][0] == "fin"
+    return "".join(d["texto"] for _, d in eventos[:-1]), eventos[-1][1]
+
+
+def test_sse_entrevista_completa(cliente, entrevista):
+    texto, fin = _sse(cliente, "iniciar", aplicacion_id=entrevista)
+    assert "Ana" in texto and PREGUNTAS_ENTREVISTA[0] in texto
+    assert fin == {"aplicacion_id": entrevista, "estado": "iniciado", "total_preguntas": 3}
+
+    texto, fin = _sse(cliente, "siguiente", aplicacion_id=entrevista, respuesta_anterior="Un ETL en Python")
+    assert PREGUNTAS_ENTREVISTA[1] in texto
+    assert fin == {"quedan_preguntas": True, "preguntas_restantes": 2}
+
+    texto, fin = _sse(cliente, "finalizar", aplicacion_id=entrevista)
+    assert texto
+    assert fin == {"finalizado": True, "aplicacion_id": entrevista, "evaluacion_en_proceso": True}
+
+
+def test_sse_aplicacion_inexistente(cliente, db):
+    respuesta = cliente.post("/api/candidato/chatbot/iniciar/stream", params={"aplicacion_id": "no-existe"})
+    assert respuesta.status_code == 404
+
+
+def test_sse_fallo_del_llm_envia_el_mensaje_de_respaldo(cliente, entrevista):
+    from services.chatbot_service import chatbot_service
+
+    chatbot_service.llm.error_rate = 1.0
+    texto, fin = _sse(cliente, "iniciar", aplicacion_id=entrevista)
+    assert texto.startswith("¡Hola Ana! Gracias por tu interés en Backend Python.")
+    assert texto.endswith(PREGUNTAS_ENTREVISTA[0])
+    assert fin["total_preguntas"] == 3
+
+
+def _mensaje_completo(ws):
+    """Tokens until the fin frame: (text, fin frame)"""
+    partes = []
+    while True:
+        mensaje = ws.receive_json()
+        if mensaje["tipo"] == "fin":
+            return "".join(partes), mensaje
+        assert mensaje["tipo"] == "token", mensaje
+        partes.append(mensaje["texto"])
+
+
+def test_websocket_entrevista_completa(cliente, entrevista):
+    with cliente.websocket_connect(f"/api/candidato/chatbot/ws/{entrevista}") as ws:
+        ws.send_json({"tipo": "iniciar"})
+        texto, fin = _mensaje_completo(ws)
+        assert PREGUNTAS_ENTREVISTA[0] in texto and fin["total_preguntas"] == 3
+
+        for i, respuesta in enumerate(["Un ETL", "Sí, cinco años", "4"]):
+            ws.send_json({"tipo": "responder", "respuesta": respuesta})
+            texto, fin = _mensaje_completo(ws)
+            assert fin["preguntas_restantes"] == 2 - i
+            if i < 2:
+                assert PREGUNTAS_ENTREVISTA[i + 1] in texto
+        assert fin["quedan_preguntas"] is False
+
+        ws.send_json({"tipo": "finalizar"})
+        _, fin = _mensaje_completo(ws)
+        assert fin["finalizado"] and fin["evaluacion_en_proceso"]
+
+
+def test_websocket_mensajes_invalidos_no_cierran_la_sesion(cliente, entrevista):
+    with cliente.websocket_connect(f"/api/candidato/chatbot/ws/{entrevista}") as ws:
+        ws.send_text("no es json")
+        assert ws.receive_json() == {"tipo": "error", "detalle": "El mensaje debe ser JSON"}
+        ws.send_json(["iniciar"])
+        assert ws.receive_json()["detalle"] == "El mensaje debe ser un objeto JSON"
+        ws.send_json({"tipo": "saltar"})
+        assert ws.receive_json()["detalle"] == "Tipo de mensaje no soportado: saltar"
+
+        ws.send_json({"tipo": "iniciar"})
+        texto, _ = _mensaje_completo(ws)
+        assert PREGUNTAS_ENTREVISTA[0] in texto
+
+
+def test_websocket_aplicacion_inexistente(cliente, db):
+    with cliente.websocket_connect("/api/candidato/chatbot/ws/no-existe") as ws:
+        ws.send_json({"tipo": "iniciar"})
+        assert ws.receive_json() == {"tipo": "error", "detalle": "Aplicación no encontrada: no-existe"}
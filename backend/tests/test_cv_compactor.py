@@ -0,0 +1,120 @@
+"""
+Tests for services.cv_compactor
+"""
+from services.cv_compactor import (
+    PRIORIDAD_ANALISIS,
+    PRIORIDAD_EVALUACION,
+    compactar_cv,
+    count_tokens,
+    detectar_secciones,
+    limpiar_texto,
+    quitar_contacto,
+)
+
+
+CV = """Curriculum Vitae
+Ana Pérez
+Desarrolladora Backend
+Página 1 de 2
+Perfil profesional
+Ingeniera con cinco años construyendo APIs en Python.
+Experiencia laboral
+Acme S.A.S. - Desarrolladora (2020-2024)
+Diseñé servicios REST con FastAPI y PostgreSQL.
+Habilidades
+Python, FastAPI, Docker, SQL
+Referencias
+Juan Gómez - 300 123 4567
+Página 2 de 2
+"""
+
+
+def test_limpiar_texto_quita_boilerplate_y_encabezados_repetidos():
+    texto = "Hoja de vida\nEmpresa X - Confidencial\nLínea 1\nEmpresa X - Confidencial\n\n  3  \nLínea   2\nEmpresa X - Confidencial"
+    assert limpiar_texto(texto) == ["Empresa X - Confidencial", "Línea 1", "Línea 2"]
+
+
+def test_detectar_secciones_con_y_sin_tildes():
+    secciones = dict(detectar_secciones(limpiar_texto(CV)))
+    assert secciones["encabezado"] == ["Ana Pérez", "Desarrolladora Backend"]
+    assert secciones["habilidades"] == ["Python, FastAPI, Docker, SQL"]
+    assert "referencias" in secciones
+    assert dict(detectar_secciones(["EDUCACIÓN:", "Universidad"]))["educacion"] == ["Universidad"]
+
+
+def test_cv_completo_cabe_y_conserva_el_orden():
+    compacto = compactar_cv(CV, 1000)
+    assert compacto.index("PERFIL:") < compacto.index("EXPERIENCIA:") < compacto.index("HABILIDADES:")
+    # Datos personales y referencias nunca se envían al LLM
+    assert "REFERENCIAS" not in compacto and "300 123 4567" not in compacto
+
+
+def test_prioridad_decide_que_se_conserva():
+    evaluacion = compactar_cv(CV, 20, PRIORIDAD_EVALUACION)
+    assert evaluacion.startswith("HABILIDADES:")
+    analisis = compactar_cv(CV, 20, PRIORIDAD_ANALISIS)
+    assert analisis.startswith("PERFIL:")
+
+
+def test_respeta_el_presupuesto():
+    cv = "Experiencia\n" + "\n".join(f"Proyecto {i}: migración de servicios y automatización" for i in range(200))
+    for presupuesto in (30, 100, 400):
+        assert count_tokens(compactar_cv(cv, presupuesto)) <= presupuesto
+
+
+def test_seccion_de_una_sola_linea_larga_se_corta_dentro():
+    cv = "Perfil\n" + " ".join(["palabra"] * 500) + "\nHabilidades\nPython"
+    compacto = compactar_cv(cv, 60)
+    assert compacto.startswith("PERFIL:\npalabra")
+    assert 0 < count_tokens(compacto) <= 60
+
+
+def test_nunca_vacio_si_el_cv_no_lo_esta():
+    # Una sola "palabra" enorme sin espacios y sin encabezados
+    assert compactar_cv("x" * 10_000, 10) == "x" * 40
+    # Con secciones que no caben ni recortadas: se usa el prefijo limpio
+    cv = "Ana Pérez\nExperiencia\n" + "y" * 10_000
+    assert compactar_cv(cv, 5)
+
+
+def test_texto_vacio():
+    assert compactar_cv("", 100) == ""
+    assert compactar_cv(None, 100) == ""
+
+
+CONTACTO = ("ana.perez@correo.com", "+57 300 123 4567", "(601) 555-1234", "3009876543")
+
+
+def test_quitar_contacto_conserva_fechas_y_cifras():
+    lineas = [
+        "Ana Pérez | ana.perez@correo.com | +57 300 123 4567",
+        "Email: ana@b.co",
+        "Tel. (601) 555-1234",
+        "Acme S.A.S. (2020-2024)",
+        "Gestioné un presupuesto de 1.500.000 USD en 2019 - 2023",
+    ]
+    assert quitar_contacto(lineas) == [
+        "Ana Pérez",
+        "Acme S.A.S. (2020-2024)",
+        "Gestioné un presupuesto de 1.500.000 USD en 2019 - 2023",
+    ]
+
+
+def test_analisis_no_envia_datos_de_contacto():
+    cv = (
+        "Ana Pérez\nana.perez@correo.com · +57 300 123 4567\n"
+        + CV.split("Curriculum Vitae\nAna Pérez\n", 1)[1]
+        + "Contacto\n(601) 555-1234\n"
+    ).replace("Python, FastAPI", "Python, FastAPI (escríbeme: 3009876543)")
+    for presupuesto in (15, 40, 1000):
+        for prioridad in (PRIORIDAD_ANALISIS, PRIORIDAD_EVALUACION):
+            compacto = compactar_cv(cv, presupuesto, prioridad)
+            assert compacto
+            assert not any(dato in compacto for dato in CONTACTO)
+            assert "ENCABEZADO" not in compacto and "Ana Pérez" not in compacto
+
+
+def test_cv_sin_encabezados_no_envia_datos_de_contacto():
+    cv = "Ana Pérez\nana.perez@correo.com\nTeléfono: (601) 555-1234\nDesarrolladora con 5 años en Python\nCel 3009876543"
+    compacto = compactar_cv(cv, 1000)
+    assert compacto == "Ana Pérez\nDesarrolladora con 5 años en Python"
@@ -0,0 +1,69 @@
+"""
+Tests for services.cv_upload._copiar (size, type and temp file cleanup)
+"""
+import hashlib
+import io
+
+import pytest
+
+from config import settings
+from services.cv_upload import CVInvalidoError, _copiar
+
+
+@pytest.fixture(autouse=True)
+def limites(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "cv_max_mb", 1 / 1024)  # 1 KB
+    monkeypatch.setattr(settings, "cv_upload_chunk_kb", 1)
+    monkeypatch.setattr(settings, "cv_tmp_dir", str(tmp_path))
+    return tmp_path
+
+
+def test_copia_pdf_y_calcula_hash(limites):
+    contenido = b"%PDF-1.7\n" + b"a" * 500
+    with _copiar(io.BytesIO(contenido), "cv.pdf", None) as cv:
+        assert cv.size == len(contenido)
+        assert cv.sha256 == hashlib.sha256(contenido).hexdigest()
+        assert cv.content_type == "application/pdf"
+        with cv.abrir() as f:
+            assert f.read() == contenido
+    assert list(limites.iterdir()) == []
+
+
+def test_cabecera_pdf_dentro_del_primer_kb():
+    contenido = b"\x00" * 100 + b"%PDF-1.4\n"
+    with _copiar(io.BytesIO(contenido), "cv.pdf", "application/pdf") as cv:
+        assert cv.size == len(contenido)
+
+
+def test_rechaza_si_no_es_pdf(limites):
+    with pytest.raises(CVInvalidoError) as error:
+        _copiar(io.BytesIO(b"PK\x03\x04 esto es un zip"), "cv.pdf", None)
+    assert error.value.status_code == 400
+    assert list(limites.iterdir()) == []
+
+
+def test_rechaza_si_supera_el_tamano(limites):
+    # Dos bloques de 1 KB: el segundo excede el límite
+    with pytest.raises(CVInvalidoError) as error:
+        _copiar(io.BytesIO(b"%PDF-" + b"a" * 2000), "cv.pdf", None)
+    assert error.value.status_code == 413
+    assert list(limites.iterdir()) == []
+
+
+def test_justo_en_el_limite():
+    with _copiar(io.BytesIO(b"%PDF-" + b"a" * 1019), "cv.pdf", None) as cv:
+        assert cv.size == 1024
+
+
+def test_rechaza_vacio(limites):
+    with pytest.raises(CVInvalidoError, match="vacío") as error:
+        _copiar(io.BytesIO(b""), "cv.pdf", None)
+    assert error.value.status_code == 400
+    assert list(limites.iterdir()) == []
+
+
+def test_lee_desde_el_inicio():
+    origen = io.BytesIO(b"%PDF-1.7 contenido")
+    origen.read()
+    with _copiar(origen, "cv.pdf", None) as cv:
+        assert cv.size == len(b"%PDF-1.7 contenido")
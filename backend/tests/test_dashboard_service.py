@@ -0,0 +1,237 @@
+"""
+Tests for services.dashboard_service (aggregates, top-N upkeep, rebuilds)
+"""
+import random
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from config import settings
+from services.dashboard_service import DashboardService, ResumenEmpresa, _rango
+
+N = 5
+
+
+def _fila(i, compatibilidad=None, puntuacion=None, estado="aplicado"):
+    return {
+        "aplicacion_id": f"a{i:04d}",
+        "candidato_nombre": f"C{i}",
+        "vacante_id": "v1",
+        "vacante_titulo": "Dev",
+        "puntuacion_ia": puntuacion,
+        "compatibilidad_porcentaje": compatibilidad,
+        "estado": estado,
+        "fecha_aplicacion": f"2024-01-01T00:00:{i:04d}"
+    }
+
+
+def _verificar(resumen, todas):
+    """Compare a summary with the brute-force result over every row"""
+    salida = resumen.render()
+    assert salida["total_aplicaciones"] == len(todas)
+    assert salida["por_estado"] == dict(Counter(f["estado"] for f in todas.values()))
+    histograma = Counter(_rango(f["puntuacion_ia"]) for f in todas.values() if f["puntuacion_ia"] is not None)
+    assert {r: n for r, n in salida["histograma_puntuacion"].items() if n} == dict(histograma)
+    top = sorted(
+        (-f["compatibilidad_porcentaje"], a) for a, f in todas.items()
+        if f["compatibilidad_porcentaje"] is not None
+    )[:N]
+    assert [f["aplicacion_id"] for f in salida["top_compatibilidad"]] == [a for _, a in top]
+    assert [f["aplicacion_id"] for f in salida["ultimas_aplicaciones"]] == sorted(todas, reverse=True)[:N]
+    for f in salida["top_compatibilidad"] + salida["ultimas_aplicaciones"]:
+        assert f == todas[f["aplicacion_id"]]
+    # Solo se guardan las filas del top y de las últimas
+    assert len(resumen.filas) <= 2 * N
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_resumen_coincide_con_recalcular_todo(semilla):
+    rnd = random.Random(semilla)
+    resumen, todas = ResumenEmpresa("e1", N), {}
+    for _ in range(80):
+        if todas and rnd.random() < 0.5:
+            antes = dict(todas[rnd.choice(list(todas))])
+            despues = dict(
+                antes,
+                compatibilidad_porcentaje=rnd.choice([None, rnd.randint(0, 100)]),
+                puntuacion_ia=rnd.randint(0, 100),
+                estado=rnd.choice(["aplicado", "en_revision"])
+            )
+            todas[despues["aplicacion_id"]] = despues
+            resumen.actualizar(dict(antes), dict(despues))
+        else:
+            fila = _fila(len(todas), rnd.choice([None, rnd.randint(0, 100)]))
+            todas[fila["aplicacion_id"]] = dict(fila)
+            resumen.agregar(dict(fila))
+
+        if resumen.incompleto:
+            # Lo que haría DashboardService: reconstruir desde la BD
+            resumen = ResumenEmpresa("e1", N)
+            for fila in todas.values():
+                resumen.agregar(dict(fila))
+        _verificar(resumen, todas)
+
+
+def test_bajar_del_top_marca_reconstruccion():
+    resumen = ResumenEmpresa("e1", 2)
+    for i, compatibilidad in enumerate([90, 80, 70]):
+        resumen.agregar(_fila(i, compatibilidad))
+    assert resumen.vigente()
+    # Subir o bajar dentro del top no necesita la BD
+    resumen.actualizar(_fila(1, 80), _fila(1, 95))
+    assert resumen.vigente()
+    # a0000 baja por debajo del corte: la tercera mejor no está en memoria
+    resumen.actualizar(_fila(0, 90), _fila(0, 10))
+    assert resumen.incompleto and not resumen.vigente()
+
+
+def test_agregar_dos_veces_no_cuenta_doble():
+    resumen = ResumenEmpresa("e1", N)
+    resumen.agregar(_fila(1, 50))
+    resumen.agregar(_fila(1, 50))
+    assert resumen.render()["total_aplicaciones"] == 1
+
+
+def test_actualizacion_ya_aplicada_se_ignora():
+    resumen = ResumenEmpresa("e1", N)
+    resumen.agregar(_fila(1, None, None, "aplicado"))
+    evaluada = _fila(1, 80, 75, "en_revision")
+    resumen.actualizar(_fila(1), evaluada)
+    resumen.actualizar(_fila(1), evaluada)
+    assert resumen.render()["por_estado"] == {"en_revision": 1}
+
+
+@pytest.fixture
+def empresa(db, monkeypatch):
+    monkeypatch.setattr(settings, "dashboard_top_n", N)
+    db.table("vacantes").insert([{"id": "v1", "titulo": "Dev", "empresa_id": "e1"}]).execute()
+    db.table("candidatos").insert([{"id": i, "nombre_anonimo": f"C{i}"} for i in range(2500)]).execute()
+    # Más de una página de 1000 filas
+    db.table("aplicaciones").insert([
+        {
+            "id": f"x{i:05d}", "vacante_id": "v1", "candidato_id": i, "estado": "aplicado",
+            "compatibilidad_porcentaje": i % 97, "puntuacion_ia": 50,
+            "fecha_aplicacion": f"2024-01-01T00:00:{i:05d}"
+        }
+        for i in range(2500)
+    ]).execute()
+    return db
+
+
+def test_construccion_por_paginas(empresa):
+    salida = DashboardService().resumen("e1")
+    assert salida["total_aplicaciones"] == 2500
+    assert salida["histograma_puntuacion"]["50-59"] == 2500
+    assert [f["compatibilidad_porcentaje"] for f in salida["top_compatibilidad"]] == [96] * N
+    assert salida["ultimas_aplicaciones"][0]["aplicacion_id"] == "x02499"
+    assert all(
+        f["candidato_nombre"] == f"C{int(f['aplicacion_id'][1:])}"
+        for f in salida["top_compatibilidad"] + salida["ultimas_aplicaciones"]
+    )
+
+
+def test_actualizar_fila_fuera_de_memoria(empresa):
+    servicio = DashboardService()
+    servicio.resumen("e1")
+    antes = empresa.table("aplicaciones").select("*").eq("id", "x00001").execute().data[0]
+    cambios = {"estado": "en_revision", "compatibilidad_porcentaje": 100, "puntuacion_ia": 95}
+    servicio.actualizar_aplicacion("e1", antes, cambios, "C1", "Dev")
+    salida = servicio.resumen("e1")
+    assert salida["por_estado"] == {"aplicado": 2499, "en_revision": 1}
+    assert salida["histograma_puntuacion"]["90-100"] == 1
+    assert salida["top_compatibilidad"][0]["aplicacion_id"] == "x00001"
+
+
+def test_una_sola_construccion_a_la_vez(empresa, monkeypatch):
+    servicio = DashboardService()
+    construcciones = []
+    construir = servicio._construir
+
+    def lento(empresa_id):
+        construcciones.append(empresa_id)
+        time.sleep(0.2)
+        return construir(empresa_id)
+
+    monkeypatch.setattr(servicio, "_construir", lento)
+    salidas = []
+    hilos = [threading.Thread(target=lambda: salidas.append(servicio.resumen("e1"))) for _ in range(5)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert construcciones == ["e1"]
+    assert all(s["total_aplicaciones"] == 2500 for s in salidas)
+
+    # Caducado: una petición reconstruye y las demás reciben el anterior sin esperar
+    servicio._resumenes["e1"].construido -= settings.dashboard_ttl_seconds + 1
+    hilo = threading.Thread(target=servicio.resumen, args=("e1",))
+    hilo.start()
+    time.sleep(0.05)
+    inicio = time.monotonic()
+    assert servicio.resumen("e1")["total_aplicaciones"] == 2500
+    assert time.monotonic() - inicio < 0.1
+    hilo.join()
+    assert construcciones == ["e1", "e1"]
+
+
+def test_lru_de_empresas(db, monkeypatch):
+    monkeypatch.setattr(settings, "dashboard_max_empresas", 2)
+    servicio = DashboardService()
+    for empresa_id in ("e1", "e2", "e1", "e3"):
+        servicio.resumen(empresa_id)
+    assert list(servicio._resumenes) == ["e1", "e3"]
+
+
+def test_actualizar_aplicacion_no_contada_pide_reconstruir(empresa):
+    servicio = DashboardService()
+    servicio.resumen("e1")
+    # Otro worker insertó y evaluó una aplicación que este resumen no contó
+    nueva = {
+        "id": "otra", "vacante_id": "v1", "candidato_id": 7, "estado": "aplicado",
+        "compatibilidad_porcentaje": None, "puntuacion_ia": None,
+        "fecha_aplicacion": "2024-02-01T00:00:00"
+    }
+    empresa.table("aplicaciones").insert(nueva).execute()
+    cambios = {"estado": "evaluado", "puntuacion_ia": 10, "compatibilidad_porcentaje": 20}
+    empresa.table("aplicaciones").update(cambios).eq("id", "otra").execute()
+    servicio.actualizar_aplicacion("e1", nueva, cambios, "C7", "Dev")
+
+    resumen = servicio._resumenes["e1"]
+    assert resumen.incompleto
+    assert all(n >= 0 for n in resumen.por_estado.values())
+    salida = servicio.resumen("e1")
+    assert salida["total_aplicaciones"] == 2501
+    assert salida["por_estado"] == {"aplicado": 2500, "evaluado": 1}
+
+
+def test_escrituras_durante_la_reconstruccion_se_aplican(empresa, monkeypatch):
+    servicio = DashboardService()
+    construir = servicio._construir
+    nueva = {
+        "id": "y00001", "vacante_id": "v1", "candidato_id": 1, "estado": "aplicado",
+        "compatibilidad_porcentaje": 99, "puntuacion_ia": None,
+        "fecha_aplicacion": "2024-02-01T00:00:00"
+    }
+
+    def con_escrituras(empresa_id):
+        # Evaluada antes de la lectura: la reconstrucción ya ve el cambio
+        antes = empresa.table("aplicaciones").select("*").eq("id", "x00003").execute().data[0]
+        cambios = {"estado": "en_revision", "puntuacion_ia": 95}
+        empresa.table("aplicaciones").update(cambios).eq("id", "x00003").execute()
+        servicio.actualizar_aplicacion("e1", antes, cambios, "C3", "Dev")
+        resumen = construir(empresa_id)
+        # Insertada después de la lectura: solo llega por el registro
+        empresa.table("aplicaciones").insert(nueva).execute()
+        servicio.registrar_aplicacion("e1", nueva, "C1", "Dev")
+        return resumen
+
+    monkeypatch.setattr(servicio, "_construir", con_escrituras)
+    salida = servicio.resumen("e1")
+    assert salida["total_aplicaciones"] == 2501
+    assert salida["por_estado"] == {"aplicado": 2500, "en_revision": 1}
+    assert salida["histograma_puntuacion"]["90-100"] == 1
+    assert salida["top_compatibilidad"][0]["aplicacion_id"] == "y00001"
+    assert salida["ultimas_aplicaciones"][0]["aplicacion_id"] == "y00001"
+    assert servicio._pendientes == {}
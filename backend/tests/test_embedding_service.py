@@ -0,0 +1,117 @@
+"""
+Tests for services.embedding_service (encoder and on-disk vector store)
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from services.embedding_service import HashedTfidfEncoder, VectorStore, tokenize
+
+DIM = 16
+
+
+def _vector(item_id: str) -> np.ndarray:
+    """Deterministic unit vector for an id, to check rows and ids stay paired"""
+    rnd = np.random.default_rng(int.from_bytes(hashlib.blake2b(item_id.encode()).digest()[:4], "little"))
+    v = rnd.standard_normal(DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _emparejados(store: VectorStore) -> bool:
+    return all(np.allclose(store.get_vector(i), _vector(i)) for i in store.ids)
+
+
+def _trabajador(directorio: str, prefijo: str, n: int) -> None:
+    store = VectorStore(directorio, "cvs", DIM)
+    for i in range(n):
+        store.upsert(f"{prefijo}-{i}", _vector(f"{prefijo}-{i}"))
+
+
+def test_tokenize_sin_tildes_ni_stopwords():
+    assert tokenize("Programación en Python y SQL") == [
+        "programacion", "python", "sql", "programacion_python", "python_sql"
+    ]
+
+
+def test_encoder_similitud_por_contenido():
+    encoder = HashedTfidfEncoder(256)
+    a, b, c = encoder.encode(["python django backend", "backend en python", "diseño gráfico"])
+    assert float(a @ b) > float(a @ c)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+
+
+def test_upsert_sobrescribe_y_busca(tmp_path):
+    store = VectorStore(str(tmp_path), "cvs", DIM)
+    for item_id in ["a", "b", "c"]:
+        store.upsert(item_id, _vector(item_id))
+    store.upsert("b", _vector("a"))
+    assert len(store) == 3
+    assert [i for i, _ in store.search(_vector("a"), k=2)] in (["a", "b"], ["b", "a"])
+    assert store.search(_vector("a"), k=1, exclude={"a", "b"})[0][0] == "c"
+
+
+def test_dos_instancias_no_se_pisan_las_filas(tmp_path):
+    # Dos workers con su propia copia de los ids en memoria
+    uno = VectorStore(str(tmp_path), "cvs", DIM)
+    otro = VectorStore(str(tmp_path), "cvs", DIM)
+    uno.upsert("a", _vector("a"))
+    otro.upsert("b", _vector("b"))
+    uno.upsert("c", _vector("c"))
+
+    # otro ve la fila de uno en la siguiente búsqueda
+    assert otro.search(_vector("c"), k=1)[0][0] == "c"
+    assert uno.ids == otro.ids == ["a", "b", "c"]
+    assert _emparejados(uno) and _emparejados(otro)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_procesos_concurrentes(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    procesos = [ctx.Process(target=_trabajador, args=(str(tmp_path), f"w{p}", 25)) for p in range(4)]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join(30)
+        assert proceso.exitcode == 0
+
+    store = VectorStore(str(tmp_path), "cvs", DIM)
+    assert sorted(store.ids) == sorted(f"w{p}-{i}" for p in range(4) for i in range(25))
+    assert os.path.getsize(store.vectors_path) == 100 * DIM * 4
+    assert _emparejados(store)
+
+
+def test_vector_sin_id_se_descarta_al_cargar(tmp_path):
+    store = VectorStore(str(tmp_path), "cvs", DIM)
+    store.upsert("a", _vector("a"))
+    # Proceso cortado después de escribir el vector y antes de los ids
+    with open(store.vectors_path, "ab") as f:
+        f.write(_vector("b").tobytes())
+
+    cargado = VectorStore(str(tmp_path), "cvs", DIM)
+    assert cargado.ids == ["a"]
+    assert os.path.getsize(cargado.vectors_path) == DIM * 4
+    cargado.upsert("c", _vector("c"))
+    assert _emparejados(cargado)
+
+
+def test_ids_sin_vector_se_descartan_al_cargar(tmp_path):
+    store = VectorStore(str(tmp_path), "cvs", DIM)
+    store.rebuild(["a", "b"], np.stack([_vector("a"), _vector("b")]))
+    with open(store.ids_path, "w", encoding="utf-8") as f:
+        json.dump(["a", "b", "fantasma"], f)
+
+    cargado = VectorStore(str(tmp_path), "cvs", DIM)
+    assert cargado.ids == ["a", "b"]
+    assert cargado.get_vector("fantasma") is None
+    assert [i for i, _ in cargado.search(_vector("b"), k=3)][0] == "b"
+
+
+def test_archivos_de_otra_dimension(tmp_path):
+    VectorStore(str(tmp_path), "cvs", DIM).upsert("a", _vector("a"))
+    store = VectorStore(str(tmp_path), "cvs", DIM * 2)
+    assert len(store) == 0
+    assert store.search(np.ones(DIM * 2, dtype=np.float32), k=5) == []
@@ -0,0 +1,85 @@
+"""
+Tests for services.evaluacion_service (evaluation reusing the CV analysis)
+"""
+import asyncio
+import smtplib
+
+import pytest
+
+from benchmarks.fakes import FakeSMTP
+from services.evaluacion_service import EvaluacionService
+from services.ia_service import IAService
+
+CV = "Perfil\nDesarrolladora backend\nHabilidades\nPython, Django, PostgreSQL\nReferencias\nJuan - 300 111 2222"
+ANALISIS = {"habilidades": ["Python", "Django"], "experiencia_años": 4.5, "educacion": "Ingeniería", "resumen": "Backend"}
+RESPUESTAS = [{"pregunta": "¿Usaste Django?", "respuesta": "Sí, tres años"}]
+
+
+@pytest.fixture
+def aplicacion(db, monkeypatch):
+    """Application with its candidate, job posting and CV document"""
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    empresa = db.table("empresas").insert({"nombre_empresa": "Acme"}).execute().data[0]
+    vacante = db.table("vacantes").insert({
+        "empresa_id": empresa["id"], "titulo": "Backend", "estado": "publicada",
+        "habilidades_requeridas": ["Python"], "experiencia_min": 2
+    }).execute().data[0]
+    candidato = db.table("candidatos").insert({"nombre_anonimo": "Ana", "email": "ana@example.com"}).execute().data[0]
+    db.table("documentos").insert({
+        "candidato_id": candidato["id"], "tipo_documento": "cv", "texto_extraido": CV
+    }).execute()
+    return db.table("aplicaciones").insert({
+        "candidato_id": candidato["id"], "vacante_id": vacante["id"], "estado": "aplicado"
+    }).execute().data[0]
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """Inputs of every LLM call, answered with a fixed evaluation"""
+    enviados = []
+
+    async def invoke_json(self, prompt_name, chain, inputs, schema=None):
+        enviados.append(inputs)
+        return {"puntuacion": 80, "compatibilidad": 75, "fortalezas": [], "debilidades": []}
+
+    monkeypatch.setattr(IAService, "_invoke_json", invoke_json)
+    return enviados
+
+
+@pytest.mark.parametrize("analisis", [
+    None,
+    {},
+    {"habilidades": [], "experiencia_años": 0, "resumen": "Error al analizar CV"},
+])
+def test_formatear_analisis_vacio_o_fallido(analisis):
+    assert IAService.formatear_analisis_cv(analisis) is None
+
+
+def test_formatear_analisis():
+    assert IAService.formatear_analisis_cv(ANALISIS).splitlines() == [
+        "- Habilidades (CV): Python, Django",
+        "- Experiencia (CV): 4.5 años",
+        "- Educación: Ingeniería",
+        "- Resumen: Backend",
+    ]
+
+
+def test_con_analisis_guardado_no_se_envia_el_cv(db, aplicacion, prompts):
+    db.table("aplicaciones").update({"analisis_cv": ANALISIS}).eq("id", aplicacion["id"]).execute()
+
+    resultado = asyncio.run(EvaluacionService().evaluar_aplicacion(aplicacion["id"], RESPUESTAS))
+
+    assert resultado["puntuacion"] == 80
+    perfil = prompts[0]["perfil_candidato"]
+    assert perfil == IAService.formatear_analisis_cv(ANALISIS)
+    assert "Django, PostgreSQL" not in perfil
+    guardada = db.table("aplicaciones").select("*").eq("id", aplicacion["id"]).execute().data[0]
+    assert (guardada["puntuacion_ia"], guardada["estado"]) == (80, "en_revision")
+
+
+def test_sin_analisis_se_envia_el_cv_compactado(db, aplicacion, prompts):
+    asyncio.run(EvaluacionService().evaluar_aplicacion(aplicacion["id"], RESPUESTAS))
+
+    perfil = prompts[0]["perfil_candidato"]
+    assert perfil == "CV: PERFIL:\nDesarrolladora backend\n\nHABILIDADES:\nPython, Django, PostgreSQL"
+    assert "¿Usaste Django?" in prompts[0]["respuestas"]
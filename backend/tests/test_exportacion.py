@@ -0,0 +1,97 @@
+"""
+Tests for the streamed export (GET /api/empresa/{id}/aplicaciones/exportar)
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from services import aplicaciones_service
+
+
+@pytest.fixture
+def aplicaciones(db, monkeypatch):
+    """Company e1 with 7 applications, exported in pages of 3"""
+    monkeypatch.setattr("config.settings.exportacion_pagina", 3)
+    db.table("vacantes").insert({"id": "v1", "titulo": "Analista de datos", "empresa_id": "e1"}).execute()
+    db.table("candidatos").insert([{"id": i, "nombre_anonimo": f"Candidato {i}"} for i in range(7)]).execute()
+    db.table("aplicaciones").insert([
+        {
+            "id": f"a{i}", "vacante_id": "v1", "candidato_id": i, "estado": "aplicado",
+            "puntuacion_ia": 60 + i, "compatibilidad_porcentaje": 50,
+            "fecha_aplicacion": f"2024-03-0{i + 1}T09:00:00"
+        }
+        for i in range(7)
+    ]).execute()
+
+
+def _paginas_que_fallan(*args, **kwargs):
+    yield [{"aplicacion_id": "a0", "candidato_nombre": "Candidato 0"}]
+    raise RuntimeError("se cayó la base")
+
+
+def test_csv_completo_con_bom(aplicaciones, cliente):
+    respuesta = cliente.get("/api/empresa/e1/aplicaciones/exportar")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("text/csv")
+    texto = respuesta.content.decode("utf-8")
+    assert texto.startswith("\ufeffaplicacion_id,")
+    lineas = texto.splitlines()[1:]
+    assert [l.split(",")[0] for l in lineas] == [f"a{i}" for i in range(7)]
+    assert all("Analista de datos" in l for l in lineas)
+
+
+def test_ndjson_con_filtro(aplicaciones, cliente):
+    respuesta = cliente.get("/api/empresa/e1/aplicaciones/exportar", params={
+        "formato": "ndjson", "min_puntuacion": 64
+    })
+    filas = [json.loads(l) for l in respuesta.text.splitlines()]
+    assert [f["aplicacion_id"] for f in filas] == ["a4", "a5", "a6"]
+
+
+@pytest.mark.parametrize("formato", ["csv", "ndjson"])
+def test_fallo_a_mitad_corta_la_descarga(formato, db, cliente, monkeypatch):
+    # Un archivo truncado no debe terminar como una respuesta completa
+    monkeypatch.setattr(aplicaciones_service, "paginas", _paginas_que_fallan)
+    with pytest.raises(RuntimeError, match="se cayó la base"):
+        cliente.get("/api/empresa/e1/aplicaciones/exportar", params={"formato": formato})
+
+
+def test_desconexion_con_lectura_en_curso(monkeypatch):
+    from routes.empresas import exportar_aplicaciones
+
+    leyendo = threading.Event()
+    seguir = threading.Event()
+    cerrado = threading.Event()
+
+    def paginas_lentas(*args, **kwargs):
+        try:
+            yield [{"aplicacion_id": "a0"}]
+            leyendo.set()
+            seguir.wait(5)
+            yield [{"aplicacion_id": "a1"}]
+        finally:
+            cerrado.set()
+
+    monkeypatch.setattr(aplicaciones_service, "paginas", paginas_lentas)
+
+    async def descargar_y_cortar():
+        respuesta = await exportar_aplicaciones(
+            "e1", formato="ndjson", estado=None, vacante_id=None, min_puntuacion=None,
+            min_compatibilidad=None, desde=None, hasta=None
+        )
+        cuerpo = respuesta.body_iterator
+        assert "a0" in await cuerpo.__anext__()
+        # El cliente se va mientras la segunda página se lee en un hilo
+        tarea = asyncio.ensure_future(cuerpo.__anext__())
+        await asyncio.to_thread(leyendo.wait, 5)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+        assert not cerrado.is_set()
+        seguir.set()
+        await asyncio.to_thread(cerrado.wait, 5)
+
+    asyncio.run(descargar_y_cortar())
+    assert cerrado.is_set()
@@ -0,0 +1,156 @@
+"""
+Tests for services.importacion_service and the bulk import routes
+"""
+import asyncio
+import json
+
+import pytest
+
+from config import settings
+from services.background import background_jobs
+from services.ia_service import IAService
+from services.importacion_service import (
+    ImportacionDemasiadoGrandeError,
+    ImportacionInvalidaError,
+    ImportacionService,
+    leer_cuerpo,
+    parsear,
+)
+
+PREGUNTAS = [{"pregunta": "¿Cuántos años llevas con Python?", "tipo_pregunta": "abierta"}]
+
+
+def _vacante(empresa_id="e1", **cambios):
+    return {
+        "empresa_id": empresa_id, "titulo": "Desarrollador Python",
+        "descripcion": "Construir y mantener las APIs del producto.", "cargo": "Desarrollador",
+        "tipo_contrato": "indefinido", "modalidad": "remoto", "habilidades_requeridas": ["Python"],
+        "experiencia_min": 2, "ciudad": "Cali", **cambios
+    }
+
+
+def _eventos(respuesta):
+    return [json.loads(l) for l in respuesta.text.splitlines()]
+
+
+@pytest.fixture
+def empresa(db):
+    db.table("empresas").insert({"id": "e1", "nombre_empresa": "Acme"}).execute()
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Question generator that fails for titles containing "falla" and records concurrency"""
+    estado = {"activas": 0, "max": 0}
+
+    async def generar(self, titulo, descripcion, habilidades_requeridas, experiencia_min):
+        estado["activas"] += 1
+        estado["max"] = max(estado["max"], estado["activas"])
+        try:
+            await asyncio.sleep(0.01)
+            if "falla" in titulo:
+                raise RuntimeError("sin respuesta del LLM")
+            return PREGUNTAS
+        finally:
+            estado["activas"] -= 1
+
+    monkeypatch.setattr(IAService, "generar_preguntas_vacante", generar)
+    return estado
+
+
+def test_parsear_csv_con_habilidades_separadas():
+    csv = "\ufeffempresa_id,titulo,habilidades_requeridas,experiencia_max\ne1,Analista,SQL; Excel;,\n"
+    assert parsear("text/csv; charset=utf-8", csv.encode()) == [
+        {"empresa_id": "e1", "titulo": "Analista", "habilidades_requeridas": ["SQL", "Excel"]}
+    ]
+
+
+def test_parsear_ndjson_conserva_la_posicion_de_lineas_rotas():
+    items = parsear("application/x-ndjson", b'{"titulo": "a"}\n\n{roto\n{"titulo": "b"}\n')
+    assert items[0] == {"titulo": "a"} and items[2] == {"titulo": "b"}
+    assert isinstance(items[1], json.JSONDecodeError)
+
+
+@pytest.mark.parametrize("body, mensaje", [
+    (b"{no es json", "JSON inválido"),
+    (b'{"otra": []}', "Se esperaba una lista"),
+    ("título".encode("latin-1"), "UTF-8"),
+])
+def test_parsear_cuerpo_ilegible(body, mensaje):
+    with pytest.raises(ImportacionInvalidaError, match=mensaje):
+        parsear("application/json", body)
+
+
+def test_leer_cuerpo_corta_al_pasar_el_limite(monkeypatch):
+    monkeypatch.setattr(settings, "importacion_max_mb", 1)
+    leidos = []
+
+    async def trozos():
+        for _ in range(4):
+            leidos.append(1)
+            yield b"x" * 400_000
+
+    with pytest.raises(ImportacionDemasiadoGrandeError):
+        asyncio.run(leer_cuerpo(trozos(), None))
+    assert len(leidos) == 3
+    with pytest.raises(ImportacionDemasiadoGrandeError):
+        asyncio.run(leer_cuerpo(trozos(), str(2 * 1024 * 1024)))
+
+
+def test_importacion_completa(cliente, db, empresa, llm, monkeypatch):
+    monkeypatch.setattr(settings, "importacion_concurrencia", 2)
+    vacantes = [_vacante(titulo=f"Desarrollador {i}") for i in range(4)] + [
+        _vacante(titulo="Vacante que falla"),
+        _vacante(empresa_id="no-existe"),
+        _vacante(titulo="Dev"),
+    ]
+    respuesta = cliente.post("/api/empresa/importar-vacantes", json=vacantes)
+
+    assert respuesta.headers["content-type"].startswith("application/x-ndjson")
+    eventos = _eventos(respuesta)
+    assert eventos[0]["estado"] == "iniciada"
+    assert eventos[-1] == {"estado": "completada", "resumen": {
+        "recibidas": 7, "invalidas": 2, "creadas": 5, "preguntas": 4, "errores": 1
+    }}
+    por_estado = {}
+    for evento in eventos:
+        por_estado.setdefault(evento["estado"], []).append(evento.get("indice"))
+    assert sorted(por_estado["invalida"]) == [5, 6]
+    assert por_estado["error"] == [4]
+    assert sorted(por_estado["preguntas"]) == [0, 1, 2, 3]
+    assert llm["max"] == 2
+
+    assert all(v["estado"] == "borrador" for v in db.tables["vacantes"])
+    assert len(db.tables["vacante_preguntas"]) == 4
+    assert not any(p["aprobada_por_empresa"] for p in db.tables["vacante_preguntas"])
+
+
+def test_seguir_desde_un_evento(cliente, empresa, llm):
+    eventos = _eventos(cliente.post("/api/empresa/importar-vacantes", json={"vacantes": [_vacante()]}))
+    importacion_id = eventos[0]["importacion_id"]
+
+    repetidos = _eventos(cliente.get(f"/api/empresa/importaciones/{importacion_id}", params={"desde": 1}))
+    assert repetidos == eventos[2:]
+    assert cliente.get("/api/empresa/importaciones/otra").status_code == 404
+
+
+@pytest.mark.parametrize("body, estado", [
+    ([], 400),
+    ([_vacante()] * 3, 413),
+])
+def test_importacion_rechazada(body, estado, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "importacion_max_vacantes", 2)
+    assert cliente.post("/api/empresa/importar-vacantes", json=body).status_code == estado
+
+
+def test_sigue_sin_nadie_leyendo(db, empresa, llm):
+    servicio = ImportacionService()
+
+    async def importar_y_desconectar():
+        importacion_id = servicio.iniciar([_vacante()])
+        await background_jobs.drain(5)
+        return [e async for e in servicio.seguir(importacion_id)]
+
+    eventos = asyncio.run(importar_y_desconectar())
+    assert [e["estado"] for e in eventos] == ["creada", "progreso", "preguntas", "completada"]
+    assert len(db.tables["vacante_preguntas"]) == 1
@@ -0,0 +1,84 @@
+"""
+Tests for services.lazy (LazyService and the startup import report)
+"""
+import sys
+import threading
+
+import pytest
+
+from services.lazy import LazyService, StartupReport, startup_report
+
+
+@pytest.fixture
+def modulos(tmp_path, monkeypatch):
+    """Write importable throwaway modules into a temp dir on sys.path"""
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def crear(nombre, codigo=""):
+        (tmp_path / f"{nombre}.py").write_text(codigo, encoding="utf-8")
+        monkeypatch.delitem(sys.modules, nombre, raising=False)
+        return nombre
+
+    return crear
+
+
+def test_reporte_mide_imports_solo_hasta_finalizar(modulos):
+    reporte = StartupReport()
+    modulos("lazy_hijo", "import time\ntime.sleep(0.02)\n")
+    modulos("lazy_padre", "import lazy_hijo\n")
+    modulos("lazy_tardio")
+
+    reporte.iniciar()
+    try:
+        assert sys.meta_path[0] is reporte
+        __import__("lazy_padre")
+    finally:
+        reporte.finalizar()
+
+    assert reporte not in sys.meta_path
+    assert reporte.arranque_ms is not None
+    medidos = {m["modulo"]: m for m in reporte.modulos}
+    assert medidos["lazy_hijo"]["propio_ms"] >= 15
+    # El tiempo del hijo cuenta en el total del padre, no en su tiempo propio
+    assert medidos["lazy_padre"]["ms"] >= medidos["lazy_hijo"]["ms"]
+    assert medidos["lazy_padre"]["propio_ms"] < medidos["lazy_hijo"]["propio_ms"]
+    assert sys.modules["lazy_padre"].__loader__.__class__.__name__ != "_LoaderCronometrado"
+
+    __import__("lazy_tardio")
+    assert "lazy_tardio" not in {m["modulo"] for m in reporte.modulos}
+
+
+def test_finalizar_sin_iniciar_no_hace_nada():
+    reporte = StartupReport()
+    reporte.finalizar()
+    assert reporte.arranque_ms is None
+    assert reporte.reporte()["modulos"] == []
+
+
+def test_app_no_deja_el_finder_instalado():
+    import main  # noqa: F401
+
+    assert startup_report not in sys.meta_path
+
+
+def test_lazy_service_se_construye_una_vez():
+    construcciones = []
+
+    class Servicio:
+        def __init__(self):
+            construcciones.append(1)
+            self.valor = 41
+
+    servicio = LazyService(Servicio, "servicio_de_prueba")
+    assert not servicio.iniciado and "pendiente" in repr(servicio)
+
+    hilos = [threading.Thread(target=servicio.obtener) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    servicio.valor += 1
+    assert servicio.valor == 42
+    assert construcciones == [1]
+    assert "servicio_de_prueba" in startup_report.servicios
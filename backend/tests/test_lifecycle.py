@@ -0,0 +1,99 @@
+"""
+Tests for services.lifecycle (startup warm-up and shutdown drain)
+"""
+import asyncio
+
+import pytest
+
+from config import settings
+from services import lifecycle
+from services.answer_log import AnswerLog
+from services.background import background_jobs
+
+
+class EmailsEnCola:
+    """Email service stand-in that records how long the drain let it wait"""
+
+    iniciado = True
+
+    def __init__(self):
+        self.timeout = None
+
+    async def cerrar(self, timeout):
+        self.timeout = timeout
+        return True
+
+
+@pytest.fixture
+def log(monkeypatch):
+    """Fresh answer log whose timer never fires during the test"""
+    monkeypatch.setattr(settings, "answer_log_flush_seconds", 60)
+    nuevo = AnswerLog()
+    monkeypatch.setattr(lifecycle, "answer_log", nuevo)
+    return nuevo
+
+
+def test_calentamiento_completo(cliente):
+    from main import app
+
+    tiempos = asyncio.run(lifecycle.calentar(app))
+    assert list(tiempos) == ["db", "servicios", "prompts", "llm", "rutas"]
+    assert all(ms is not None for ms in tiempos.values())
+
+
+def test_paso_fallido_no_detiene_el_calentamiento(cliente, monkeypatch):
+    from main import app
+
+    def sin_base():
+        raise ConnectionError("Supabase caído")
+
+    monkeypatch.setattr(lifecycle, "get_db", sin_base)
+    monkeypatch.setattr(settings, "warmup_llm", False)
+    tiempos = asyncio.run(lifecycle.calentar(app))
+    assert tiempos["db"] is None
+    assert "llm" not in tiempos
+    assert tiempos["rutas"] is not None
+
+
+def test_drenar_escribe_respuestas_de_trabajos_terminados(db, log, monkeypatch):
+    emails = EmailsEnCola()
+    monkeypatch.setattr(lifecycle, "email_service", emails)
+
+    async def evaluar():
+        await asyncio.sleep(0.01)
+        log.append("a1", "respuesta del trabajo", orden=1)
+
+    async def apagar():
+        log.append("a1", "respuesta en el buffer", orden=0)
+        background_jobs.submit(evaluar(), key="evaluacion:a1")
+        return await lifecycle.drenar(timeout=5)
+
+    resumen = asyncio.run(apagar())
+    assert resumen == {
+        "trabajos_pendientes": 1, "respuestas_escritas": 2, "trabajos_cancelados": 0,
+        "respuestas_perdidas": 0, "emails_completos": True
+    }
+    assert [f["respuesta"] for f in db.tables[AnswerLog.TABLE]] == ["respuesta en el buffer", "respuesta del trabajo"]
+    assert 0 < emails.timeout <= 5
+
+
+def test_drenar_cancela_trabajos_que_no_terminan(db, log, monkeypatch):
+    monkeypatch.setattr(lifecycle, "email_service", EmailsEnCola())
+    cancelado = asyncio.Event()
+
+    async def colgado():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelado.set()
+            raise
+
+    async def apagar():
+        background_jobs.submit(colgado())
+        resumen = await lifecycle.drenar(timeout=0.2)
+        await asyncio.sleep(0)
+        return resumen
+
+    resumen = asyncio.run(apagar())
+    assert resumen["trabajos_cancelados"] == 1
+    assert cancelado.is_set()
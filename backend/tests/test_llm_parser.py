@@ -0,0 +1,72 @@
+"""
+Tests for services.llm_parser and the score clamping of EvaluacionIA
+"""
+from typing import List
+
+import pytest
+
+from models.candidato import EvaluacionIA
+from models.vacante import PreguntaSugerida
+from services.llm_parser import LLMParseError, iter_json_spans, parse_llm_json, repair_json
+
+
+def test_json_directo():
+    assert parse_llm_json('{"a": 1}') == {"a": 1}
+
+
+def test_json_entre_prosa_y_bloque_markdown():
+    texto = 'Claro, aquí está:\n```json\n{"a": [1, 2], "b": "x}"}\n```\nSaludos'
+    assert parse_llm_json(texto) == {"a": [1, 2], "b": "x}"}
+
+
+def test_reparaciones_comunes():
+    assert repair_json("{'a': True, 'b': None, 'c': [1, 2,],}") == '{"a": true, "b": null, "c": [1, 2]}'
+    assert parse_llm_json("Resultado: {'ok': False, 'lista': ['x', \"y\",]}") == {"ok": False, "lista": ["x", "y"]}
+
+
+def test_spans_no_devuelve_fragmentos_de_un_objeto_roto():
+    texto = '{"a": {"b": 1}] y luego {"c": 2}'
+    spans = [texto[b:e] for b, e in iter_json_spans(texto)]
+    assert spans == ['{"c": 2}']
+
+
+def test_objeto_roto_no_se_sustituye_por_su_fragmento():
+    with pytest.raises(LLMParseError):
+        parse_llm_json('{"a": {"b": 1}, "c": [1, 2}')
+
+
+def test_escaneo_lineal_con_muchos_corchetes_abiertos():
+    # Antes se reescaneaba desde cada '{': cuadrático
+    texto = "{" * 50_000
+    assert list(iter_json_spans(texto)) == []
+
+
+def test_anidamiento_profundo_no_propaga_recursion_error():
+    texto = "[" * 100_000 + "]" * 100_000
+    with pytest.raises(LLMParseError):
+        parse_llm_json(texto)
+
+
+def test_sin_json():
+    with pytest.raises(LLMParseError, match="No JSON found"):
+        parse_llm_json("no hay nada aquí")
+
+
+def test_esquema_salta_candidatos_invalidos():
+    texto = 'Primero [1, 2] y luego [{"pregunta": "¿Por qué?", "tipo_pregunta": "abierta"}]'
+    datos = parse_llm_json(texto, schema=List[PreguntaSugerida])
+    assert datos[0]["pregunta"] == "¿Por qué?"
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (105, 100), (-5, 0), (87.9, 87), ("85%", 85), (" 72 ", 72), ("120", 100)
+])
+def test_clamp_score(valor, esperado):
+    evaluacion = EvaluacionIA(puntuacion=valor, compatibilidad=valor, fortalezas=[], debilidades=[])
+    assert evaluacion.puntuacion == esperado
+    assert evaluacion.compatibilidad == esperado
+
+
+def test_clamp_score_rechaza_texto_no_numerico():
+    with pytest.raises(ValueError):
+        EvaluacionIA(puntuacion="alto", compatibilidad=50, fortalezas=[], debilidades=[])
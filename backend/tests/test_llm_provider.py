@@ -0,0 +1,92 @@
+"""
+Tests for services.llm_provider (provider selection and the fake model)
+"""
+import asyncio
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from config import settings
+from models.candidato import AnalisisCV, EvaluacionIA
+from services.llm_provider import FakeChatModel, crear_llm
+from services.metrics import metrics
+
+
+@pytest.fixture
+def modelo():
+    return FakeChatModel(latency_ms=0, jitter_ms=0)
+
+
+def _tokens(servicio, tipo):
+    return metrics._counters.get(("reclutamiento_llm_tokens_total", (("servicio", servicio), ("tipo", tipo))), 0)
+
+
+def test_proveedor_fake_usa_la_configuracion(monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "FAKE")
+    monkeypatch.setattr(settings, "llm_fake_latency_ms", 12.0)
+    monkeypatch.setattr(settings, "llm_fake_error_rate", 0.25)
+    llm = crear_llm(max_tokens=100, temperature=0.5)
+    assert isinstance(llm, FakeChatModel)
+    assert (llm.latency_ms, llm.error_rate) == (12.0, 0.25)
+
+
+@pytest.mark.parametrize("provider, clave, error", [
+    ("openai", "x", "Unknown LLM provider: openai"),
+    ("groq", "", "Groq API key not configured"),
+])
+def test_proveedor_invalido_o_sin_clave(monkeypatch, provider, clave, error):
+    monkeypatch.setattr(settings, "llm_provider", provider)
+    monkeypatch.setattr(settings, "groq_api_key", clave)
+    with pytest.raises(ValueError, match=error):
+        crear_llm(max_tokens=100, temperature=0.5)
+
+
+def test_respuestas_validas_para_cada_esquema(modelo):
+    preguntas = json.loads(modelo.invoke("Genera 5-7 preguntas\n**Título:** Contador").content)
+    assert len(preguntas) == 5 and all("Contador" in p["pregunta"] for p in preguntas)
+
+    analisis = AnalisisCV(**json.loads(modelo.invoke("Analiza este CV: Python y Docker, 6 años").content))
+    assert analisis.habilidades == ["Python", "Docker"] and analisis.experiencia_años == 6
+
+    evaluacion = EvaluacionIA(**json.loads(modelo.invoke("Evalúa la compatibilidad del candidato").content))
+    assert 40 <= evaluacion.puntuacion <= 95
+
+
+def test_mismo_prompt_misma_respuesta(modelo):
+    prompt = "Evalúa la compatibilidad de Ana"
+    assert modelo.invoke(prompt).content == modelo.invoke(prompt).content
+    assert FakeChatModel(latency_ms=0, jitter_ms=0, seed=3).invoke(prompt).content != modelo.invoke(prompt).content
+
+
+def test_chatbot_repite_la_pregunta_del_system_prompt(modelo):
+    mensajes = [
+        SystemMessage(content="Estás conversando con Ana quien aplica. La primera pregunta es: ¿Usas Git?"),
+        HumanMessage(content="Inicia la conversación"),
+    ]
+    assert modelo.invoke(mensajes).content == "¡Hola Ana! Gracias por tu interés. ¿Usas Git?"
+
+
+def test_stream_en_trozos_con_uso_de_tokens(modelo):
+    async def leer():
+        return [chunk async for chunk in modelo.astream("Mantienes el resumen de la entrevista")]
+
+    chunks = asyncio.run(leer())
+    assert len(chunks) > 1
+    assert "".join(c.content for c in chunks) == modelo.invoke("Mantienes el resumen de la entrevista").content
+    completo = sum(chunks[1:], chunks[0])
+    assert completo.usage_metadata["output_tokens"] > 0
+
+
+def test_errores_simulados():
+    with pytest.raises(RuntimeError, match="Simulated LLM provider error"):
+        FakeChatModel(latency_ms=0, jitter_ms=0, error_rate=1.0).invoke("hola")
+
+
+def test_tokens_en_metricas(monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    llm = crear_llm(max_tokens=100, temperature=0.5, servicio="prueba_tokens")
+    antes = _tokens("prueba_tokens", "output")
+    respuesta = llm.invoke("Evalúa la compatibilidad")
+    assert _tokens("prueba_tokens", "output") - antes == respuesta.usage_metadata["output_tokens"]
+    assert _tokens("prueba_tokens", "input") > 0
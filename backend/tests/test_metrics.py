@@ -0,0 +1,105 @@
+"""
+Tests for services.metrics (registry, Prometheus output, DB timing) and /metrics
+"""
+import asyncio
+
+import pytest
+
+from config import settings
+from database import get_db
+from services.metrics import Metrics, TimedClient, metrics
+
+
+def _linea(texto: str, prefijo: str) -> str:
+    return next(l for l in texto.splitlines() if l.startswith(prefijo))
+
+
+def test_histograma_acumulado():
+    registro = Metrics()
+    for segundos in (0.003, 0.02, 0.02, 45.0):
+        registro.observe("latencia", segundos, stage="pdf")
+    texto = registro.render_prometheus()
+
+    assert "# TYPE latencia histogram" in texto
+    assert _linea(texto, 'latencia_bucket{stage="pdf",le="0.005"}').endswith(" 1")
+    assert _linea(texto, 'latencia_bucket{stage="pdf",le="0.025"}').endswith(" 3")
+    assert _linea(texto, 'latencia_bucket{stage="pdf",le="30.0"}').endswith(" 3")
+    assert _linea(texto, 'latencia_bucket{stage="pdf",le="+Inf"}').endswith(" 4")
+    assert _linea(texto, 'latencia_count{stage="pdf"}') == 'latencia_count{stage="pdf"} 4'
+
+
+def test_contadores_colectores_y_etiquetas_escapadas():
+    registro = Metrics()
+    registro.describe("llamadas_total", "Llamadas por resultado")
+    registro.inc("llamadas_total", resultado='con "comillas"')
+    registro.inc("llamadas_total", 2, resultado='con "comillas"')
+    registro.add_collector(lambda: [("externo_total", {"origen": "cache"}, 7)])
+    texto = registro.render_prometheus()
+
+    assert "# HELP llamadas_total Llamadas por resultado" in texto
+    assert 'llamadas_total{resultado="con \\"comillas\\""} 3' in texto
+    assert 'externo_total{origen="cache"} 7' in texto
+
+
+def test_timed_en_funciones_sync_y_async():
+    registro = Metrics()
+
+    @registro.timed("sync")
+    def sumar(a, b):
+        return a + b
+
+    @registro.timed("async")
+    async def restar(a, b):
+        return a - b
+
+    assert sumar(2, 3) == 5
+    assert asyncio.run(restar(5, 3)) == 2
+    texto = registro.render_prometheus()
+    assert 'reclutamiento_stage_seconds_count{stage="sync"} 1' in texto
+    assert 'reclutamiento_stage_seconds_count{stage="async"} 1' in texto
+
+
+def test_desactivado_no_envuelve_ni_cuenta():
+    registro = Metrics(enabled=False)
+
+    def funcion():
+        return 1
+
+    assert registro.timed("x")(funcion) is funcion
+    with registro.timer("x"):
+        pass
+    registro.inc("llamadas_total")
+    assert registro.render_prometheus() == "\n"
+
+
+def test_consultas_cronometradas_por_operacion_y_tabla(db):
+    antes = metrics.render_prometheus()
+    cliente = get_db()
+    assert isinstance(cliente, TimedClient)
+
+    cliente.table("metricas_prueba").insert({"nombre": "a"}).execute()
+    filas = cliente.table("metricas_prueba").select("*").eq("nombre", "a").limit(1).execute().data
+    assert [f["nombre"] for f in filas] == ["a"]
+
+    texto = metrics.render_prometheus()
+    assert 'stage="db.insert.metricas_prueba"' not in antes
+    assert _linea(texto, 'reclutamiento_stage_seconds_count{stage="db.insert.metricas_prueba"}').endswith(" 1")
+    assert _linea(texto, 'reclutamiento_stage_seconds_count{stage="db.select.metricas_prueba"}').endswith(" 1")
+
+
+@pytest.mark.parametrize("cabeceras, estado", [
+    ({}, 403),
+    ({"X-Admin-Token": "otro"}, 403),
+    ({"X-Admin-Token": "secreto"}, 200),
+    ({"Authorization": "Bearer secreto"}, 200),
+])
+def test_endpoint_requiere_token(cabeceras, estado, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "secreto")
+    assert cliente.get("/metrics", headers=cabeceras).status_code == estado
+
+
+def test_endpoint_incluye_latencia_por_ruta(cliente):
+    cliente.get("/health")
+    respuesta = cliente.get("/metrics")
+    assert respuesta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'route="/health",status="200"' in respuesta.text
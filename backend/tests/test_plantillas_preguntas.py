@@ -0,0 +1,89 @@
+"""
+Tests for services.plantillas_preguntas (key normalization and lookups)
+"""
+import pytest
+
+from config import settings
+from services.plantillas_preguntas import PlantillasPreguntas, clave, rango_experiencia
+
+PREGUNTAS = [{"pregunta": "¿Qué es un índice?", "tipo_pregunta": "abierta"}]
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    monkeypatch.setattr(settings, "plantillas_enabled", True)
+    monkeypatch.setattr(settings, "plantillas_similitud", 0.8)
+    monkeypatch.setattr(settings, "plantillas_max", 2000)
+
+
+def test_clave_ignora_orden_tildes_mayusculas_y_duplicados():
+    a = clave("Desarrollador Backend Python", ["Python", "SQL", "python"], 3)
+    b = clave("desarrollador  python de backend", ["sql", "PYTHON"], 4)
+    assert a == b == (("backend", "desarrollador", "python"), ("python", "sql"), "intermedio")
+    assert clave("Diseñador Gráfico", [], 0) == clave("disenador grafico", [], 1)
+
+
+def test_clave_conserva_nombres_tecnicos():
+    k = clave("Programador C++ / C#", ["Node.js", "  "], 0)
+    assert k[0] == ("c#", "c++", "programador")
+    assert k[1] == ("node.js",)
+
+
+def test_clave_distingue_rango_de_experiencia():
+    assert clave("Contador", [], 1) != clave("Contador", [], 2)
+    assert [rango_experiencia(a) for a in (0, 2, 5, 10, 30)] == ["junior", "intermedio", "senior", "experto", "experto"]
+
+
+def test_busqueda_exacta_devuelve_copia():
+    plantillas = PlantillasPreguntas()
+    plantillas.guardar("Analista de Datos", ["SQL"], 2, PREGUNTAS)
+    encontradas = plantillas.buscar("datos analista", ["sql"], 3)
+    assert encontradas == PREGUNTAS
+    encontradas[0]["pregunta"] = "cambiada"
+    assert plantillas.buscar("Analista de Datos", ["SQL"], 2) == PREGUNTAS
+    assert plantillas.aciertos["exacta"] == 2
+
+
+def test_busqueda_similar_y_fallo():
+    plantillas = PlantillasPreguntas()
+    habilidades = ["python", "sql", "docker", "aws", "git", "linux", "kafka"]
+    plantillas.guardar("Ingeniero Backend", habilidades, 5, PREGUNTAS)
+    # 9 de 10 palabras en común: similar
+    assert plantillas.buscar("Ingeniero Backend", habilidades + ["redis"], 6) == PREGUNTAS
+    assert plantillas.aciertos["similar"] == 1
+    # Otro rango de experiencia: no se comparan
+    assert plantillas.buscar("Ingeniero Backend", habilidades + ["redis"], 0) is None
+    assert plantillas.fallos == 1
+
+
+def test_lru(monkeypatch):
+    monkeypatch.setattr(settings, "plantillas_max", 2)
+    plantillas = PlantillasPreguntas()
+    for titulo in ("uno", "dos"):
+        plantillas.guardar(titulo, [], 0, PREGUNTAS)
+    plantillas.buscar("uno", [], 0)
+    plantillas.guardar("tres", [], 0, PREGUNTAS)
+    assert plantillas.buscar("dos", [], 0) is None
+    assert plantillas.buscar("uno", [], 0) == PREGUNTAS
+
+
+def test_acierto_no_cuenta_como_latencia_del_llm(monkeypatch):
+    import asyncio
+    from services import ia_service as modulo
+    from services.metrics import metrics
+
+    monkeypatch.setattr(modulo, "plantillas_preguntas", PlantillasPreguntas())
+    servicio = modulo.IAService()
+    clave_metrica = ("reclutamiento_stage_seconds", (("stage", "llm.generar_preguntas"),))
+
+    def llamadas_al_llm():
+        histograma = metrics._histograms.get(clave_metrica)
+        return histograma.count if histograma else 0
+
+    antes = llamadas_al_llm()
+    primera = asyncio.run(servicio.generar_preguntas_vacante("Contador", "Cierres contables", ["Excel"], 2))
+    assert llamadas_al_llm() == antes + 1
+    # Misma vacante: sale de la plantilla, sin llamar ni medir el LLM
+    segunda = asyncio.run(servicio.generar_preguntas_vacante("Contador", "Otra descripción", ["excel"], 2))
+    assert segunda == primera
+    assert llamadas_al_llm() == antes + 1
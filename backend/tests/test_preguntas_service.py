@@ -0,0 +1,114 @@
+"""
+Tests for background question generation (crear-vacante and its polling/SSE routes)
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from config import settings
+from services.ia_service import IAService
+from services.preguntas_service import PreguntasService
+
+PREGUNTAS = [
+    {"pregunta": "¿Qué framework web usas más?", "tipo_pregunta": "abierta"},
+    {"pregunta": "¿Has desplegado en AWS?", "tipo_pregunta": "si_no"},
+]
+
+VACANTE = {
+    "empresa_id": "e1", "titulo": "Desarrollador Python",
+    "descripcion": "Construir y mantener las APIs del producto.", "cargo": "Desarrollador",
+    "tipo_contrato": "indefinido", "modalidad": "remoto", "habilidades_requeridas": ["Python"],
+    "experiencia_min": 2, "ciudad": "Cali"
+}
+
+
+class LLMControlado:
+    """Question generator that answers only once `liberar` is set"""
+
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.error = None
+
+    async def generar(self, *args, **kwargs):
+        await asyncio.to_thread(self.liberar.wait, 5)
+        if self.error:
+            raise RuntimeError(self.error)
+        return PREGUNTAS
+
+
+@pytest.fixture
+def llm(cliente, db, monkeypatch):
+    db.table("empresas").insert({"id": "e1", "nombre_empresa": "Acme"}).execute()
+    controlado = LLMControlado()
+    monkeypatch.setattr(IAService, "generar_preguntas_vacante", lambda self, **kw: controlado.generar(**kw))
+    yield controlado
+    # Que el apagado del cliente no espere a un LLM colgado
+    controlado.liberar.set()
+
+
+def _eventos_sse(texto):
+    eventos = []
+    for bloque in texto.strip().split("\n\n"):
+        nombre, data = bloque.split("\n")
+        eventos.append((nombre[len("event: "):], json.loads(data[len("data: "):])))
+    return eventos
+
+
+def test_responde_antes_de_generar_y_el_stream_avisa(cliente, llm):
+    creada = cliente.post("/api/empresa/crear-vacante", json=VACANTE).json()
+    assert creada["estado_preguntas"] == "generando" and creada["preguntas_sugeridas"] == []
+
+    vacante_id = creada["vacante_id"]
+    assert cliente.get(f"/api/empresa/vacantes/{vacante_id}/preguntas").json()["estado"] == "generando"
+
+    threading.Timer(0.05, llm.liberar.set).start()
+    respuesta = cliente.get(f"/api/empresa/vacantes/{vacante_id}/preguntas/stream")
+    assert respuesta.headers["content-type"].startswith("text/event-stream")
+    eventos = _eventos_sse(respuesta.text)
+    assert [nombre for nombre, _ in eventos] == ["estado", "listas"]
+    assert [p["pregunta"] for p in eventos[1][1]["preguntas_sugeridas"]] == [p["pregunta"] for p in PREGUNTAS]
+
+
+def test_esperar_devuelve_las_preguntas_guardadas(cliente, db, llm):
+    llm.liberar.set()
+    creada = cliente.post("/api/empresa/crear-vacante", params={"esperar": True}, json=VACANTE).json()
+
+    assert creada["estado_preguntas"] == "listas"
+    guardadas = {p["id"]: p["pregunta"] for p in db.tables["vacante_preguntas"]}
+    assert {p["pregunta_id"]: p["pregunta"] for p in creada["preguntas_sugeridas"]} == guardadas
+    assert db.tables["vacantes"][0]["estado"] == "borrador"
+
+
+def test_error_del_llm(cliente, llm):
+    llm.error = "límite de peticiones"
+    llm.liberar.set()
+    respuesta = cliente.post("/api/empresa/crear-vacante", params={"esperar": True}, json=VACANTE)
+    assert respuesta.status_code == 500
+    assert "límite de peticiones" in respuesta.json()["detail"]
+
+
+def test_stream_con_tiempo_agotado(cliente, llm, monkeypatch):
+    vacante_id = cliente.post("/api/empresa/crear-vacante", json=VACANTE).json()["vacante_id"]
+    monkeypatch.setattr(settings, "preguntas_stream_timeout_seconds", 0.05)
+
+    eventos = _eventos_sse(cliente.get(f"/api/empresa/vacantes/{vacante_id}/preguntas/stream").text)
+    assert eventos[-1][0] == "error"
+    assert eventos[-1][1]["error"] == "Tiempo de espera agotado"
+
+
+def test_empresa_inexistente(cliente, llm):
+    respuesta = cliente.post("/api/empresa/crear-vacante", json={**VACANTE, "empresa_id": "otra"})
+    assert respuesta.status_code == 404
+
+
+def test_otro_proceso_lee_las_filas_guardadas(db):
+    servicio = PreguntasService()
+    assert servicio.estado("v1")["estado"] == "pendiente"
+
+    db.table("vacante_preguntas").insert({"id": "p1", "vacante_id": "v1", **PREGUNTAS[0]}).execute()
+    assert servicio.estado("v1") == {
+        "vacante_id": "v1", "estado": "listas",
+        "preguntas_sugeridas": [{"pregunta_id": "p1", **PREGUNTAS[0]}]
+    }
@@ -0,0 +1,91 @@
+"""
+Tests for services.profiler (sampling profiler) and the /api/admin/perfiles routes
+"""
+import asyncio
+import time
+
+import pytest
+
+from config import settings
+from services.profiler import ESPERANDO, Profiler, profiler
+
+
+def _calcular(hasta: float) -> int:
+    n = 0
+    while time.perf_counter() < hasta:
+        n += 1
+    return n
+
+
+async def _peticion(perfilador: Profiler):
+    perfil = perfilador.iniciar("GET", "/lenta")
+
+    async def hija():
+        await asyncio.sleep(0.05)
+
+    tarea = asyncio.create_task(hija())
+    _calcular(time.perf_counter() + 0.05)
+    await tarea
+    perfilador.terminar(perfil, 200)
+    return perfil
+
+
+def test_muestras_en_cpu_y_en_espera():
+    perfilador = Profiler(interval_ms=1, buffer_size=2)
+    perfil = asyncio.run(_peticion(perfilador))
+
+    assert perfil.muestras > 5 and perfil.duracion_ms >= 100
+    stacks = perfil.folded()
+    assert "_calcular (test_profiler.py:" in stacks
+    # La tarea hija cuenta como parte de la petición mientras espera
+    assert any(l.startswith(ESPERANDO) and "hija" in l for l in stacks.splitlines())
+    assert perfilador.listar()[0]["status"] == 200
+    assert perfilador.obtener(perfil.id) is perfil
+
+
+def test_buffer_acotado():
+    perfilador = Profiler(interval_ms=1, buffer_size=2)
+
+    async def tres():
+        for _ in range(3):
+            perfilador.terminar(perfilador.iniciar("GET", "/"), 200)
+
+    asyncio.run(tres())
+    assert len(perfilador.listar()) == 2
+
+
+@pytest.mark.parametrize("header, tasa, esperado", [
+    ("1", 0.0, True),
+    ("true", 0.0, True),
+    ("0", 1.0, False),
+    (None, 1.0, True),
+    (None, 0.0, False),
+])
+def test_debe_perfilar(header, tasa, esperado, monkeypatch):
+    monkeypatch.setattr(settings, "profiler_sample_rate", tasa)
+    assert Profiler(5, 1).debe_perfilar(header) is esperado
+
+
+def test_desactivado_oculta_los_perfiles(cliente, monkeypatch):
+    monkeypatch.setattr(settings, "profiler_enabled", False)
+    respuesta = cliente.get("/health", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in respuesta.headers
+    assert cliente.get("/api/admin/perfiles").status_code == 404
+
+
+def test_peticion_perfilada_y_descargable(cliente, monkeypatch):
+    monkeypatch.setattr(settings, "profiler_enabled", True)
+    monkeypatch.setattr(settings, "admin_token", "secreto")
+    monkeypatch.setattr(profiler, "perfiles", type(profiler.perfiles)(maxlen=5))
+
+    perfil_id = cliente.get("/health", headers={"X-Profile": "1"}).headers["x-profile-id"]
+    admin = {"X-Admin-Token": "secreto"}
+
+    assert cliente.get("/api/admin/perfiles").status_code == 403
+    listado = cliente.get("/api/admin/perfiles", headers=admin).json()["perfiles"]
+    assert [(p["id"], p["path"], p["status"]) for p in listado] == [(perfil_id, "/health", 200)]
+
+    descarga = cliente.get(f"/api/admin/perfiles/{perfil_id}", headers=admin)
+    assert descarga.status_code == 200
+    assert f'filename="perfil-{perfil_id}.folded"' in descarga.headers["content-disposition"]
+    assert cliente.get("/api/admin/perfiles/nada", headers=admin).status_code == 404
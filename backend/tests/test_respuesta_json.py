@@ -0,0 +1,110 @@
+"""
+Tests for services.respuesta_json (orjson responses with a stdlib fallback)
+"""
+import builtins
+import dataclasses
+import importlib.util
+import json
+import random
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+
+import numpy as np
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks import serializacion
+from models.vacante import VacantePublicada
+from services import respuesta_json
+
+
+class Estado(Enum):
+    ABIERTA = "abierta"
+
+
+@dataclasses.dataclass
+class Punto:
+    x: int
+    y: int
+
+
+def _contenido():
+    return {
+        "fecha": datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc),
+        "dia": date(2024, 3, 1),
+        "salario": Decimal("4500000"),
+        "ratio": Decimal("0.75"),
+        "id": uuid.UUID("00000000-0000-4000-8000-000000000001"),
+        "estado": Estado.ABIERTA,
+        "habilidades": frozenset(["Python"]),
+        "punto": Punto(1, 2),
+        "texto": "Bogotá — ñandú",
+        7: "clave numérica",
+    }
+
+
+@pytest.fixture
+def sin_orjson(monkeypatch):
+    """A separate copy of the module loaded as if orjson were not installed"""
+    importar = builtins.__import__
+
+    def bloquear(nombre, *args, **kwargs):
+        if nombre == "orjson":
+            raise ImportError(nombre)
+        return importar(nombre, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", bloquear)
+    spec = importlib.util.spec_from_file_location("respuesta_json_sin_orjson", respuesta_json.__file__)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def test_misma_salida_que_jsonable_encoder():
+    esperado = json.loads(json.dumps(jsonable_encoder(_contenido())))
+    assert json.loads(respuesta_json.dumps(_contenido())) == esperado
+
+
+def test_respaldo_sin_orjson_da_el_mismo_json(sin_orjson):
+    assert sin_orjson.SERIALIZADOR == "json"
+    texto = sin_orjson.dumps(_contenido())
+    assert json.loads(texto) == json.loads(respuesta_json.dumps(_contenido()))
+    # Compacto y en UTF-8, sin escapar los caracteres no ASCII
+    assert b", " not in texto and "ñandú".encode() in texto
+
+
+def test_modelos_y_numpy():
+    modelo = VacantePublicada(**serializacion.vacantes(random.Random(1), 1)[0])
+    contenido = {"vacante": modelo, "puntajes": np.array([0.5, 0.25], dtype=np.float32), "n": np.int64(3)}
+    datos = json.loads(respuesta_json.dumps(contenido))
+    assert datos["vacante"] == jsonable_encoder(modelo)
+    assert datos["puntajes"] == [0.5, 0.25] and datos["n"] == 3
+
+
+def test_tipo_desconocido():
+    with pytest.raises(TypeError):
+        respuesta_json.dumps({"x": object()})
+
+
+def test_respuesta_por_defecto_de_la_app(cliente, db):
+    db.table("vacantes").insert({
+        "titulo": "Analista de datos", "estado": "publicada", "ciudad": "Medellín",
+        "empresa_id": "e1", "fecha_publicacion": "2024-03-01T09:00:00+00:00"
+    }).execute()
+    respuesta = cliente.get("/api/vacantes/publicadas")
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "application/json"
+    assert "Medellín".encode() in respuesta.content
+    assert respuesta.json()["vacantes"][0]["titulo"] == "Analista de datos"
+
+
+def test_benchmark_de_serializacion_corto():
+    reporte = serializacion.ejecutar([5], repeticiones=3, seed=1)
+    assert reporte["serializador"] == respuesta_json.SERIALIZADOR
+    assert {r["forma"] for r in reporte["resultados"]} == {
+        "vacantes_dict", "aplicaciones_dict", "vacantes_modelo", "aplicaciones_modelo"
+    }
+    assert all(r["filas"] == 5 and r["bytes"] > 0 for r in reporte["resultados"])
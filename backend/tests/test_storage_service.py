@@ -0,0 +1,79 @@
+"""
+Tests for services.storage_service (CVs stored once per content hash)
+"""
+import asyncio
+import hashlib
+
+import pytest
+
+from benchmarks.fakes import FakeBucket, pdf_minimo
+from services.storage_service import StorageService
+
+PDF = pdf_minimo("Ana\nPERFIL\nDesarrolladora backend\nHABILIDADES\nPython, SQL")
+SHA = hashlib.sha256(PDF).hexdigest()
+
+
+def _subir(servicio: StorageService, contenido=PDF, candidato_id="c1"):
+    return asyncio.run(servicio.upload_cv(contenido, candidato_id, "cv.pdf"))
+
+
+def _upload_caido(self, path, file, file_options=None):
+    raise ConnectionError("storage caído")
+
+
+@pytest.fixture
+def caido(monkeypatch):
+    """Storage that rejects every upload"""
+    monkeypatch.setattr(FakeBucket, "upload", _upload_caido)
+
+
+def test_mismo_contenido_se_sube_una_vez(db, tmp_path):
+    servicio = StorageService()
+    url = _subir(servicio)
+    assert url.endswith(f"/convocatoria/cv/{SHA}.pdf")
+
+    # Desde disco y para otro candidato: mismo objeto
+    ruta = tmp_path / "otro_nombre.pdf"
+    ruta.write_bytes(PDF)
+    assert _subir(servicio, str(ruta), "c2") == url
+    assert db.uploads == 1
+    assert list(db.objects) == [f"convocatoria/cv/{SHA}.pdf"]
+
+
+def test_otro_proceso_reutiliza_el_documento_guardado(db):
+    url = _subir(StorageService())
+    db.table("documentos").insert({"hash_contenido": SHA, "url_archivo": url}).execute()
+
+    # Índice vacío: lo encuentra en documentos y no vuelve a enviar los bytes
+    assert _subir(StorageService()) == url
+    assert db.uploads == 1
+
+
+def test_carrera_con_otra_subida(db):
+    url = _subir(StorageService())
+    # Sin fila en documentos todavía: el bucket responde 409 y vale igual
+    assert _subir(StorageService()) == url
+    assert db.uploads == 1
+
+
+def test_subida_fallida_no_cuenta_como_guardada(db, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(FakeBucket, "upload", _upload_caido)
+        assert _subir(StorageService()) is None
+    # Fila de una versión anterior que guardaba el hash sin URL
+    db.table("documentos").insert({"hash_contenido": SHA, "url_archivo": None}).execute()
+
+    assert _subir(StorageService()) is not None
+    assert db.uploads == 1
+
+
+def test_aplicar_con_storage_caido_no_guarda_el_hash(cliente, db, caido):
+    vacante = db.table("vacantes").insert({"empresa_id": "e1", "titulo": "Backend", "estado": "publicada"}).execute().data[0]
+    respuesta = cliente.post("/api/candidato/aplicar", data={
+        "vacante_id": vacante["id"], "nombre_anonimo": "Ana", "email": "ana@example.com",
+        "telefono": "3000000000", "ciudad": "Cali", "años_experiencia": "3"
+    }, files={"cv_pdf": ("cv.pdf", PDF, "application/pdf")})
+
+    assert respuesta.status_code == 200
+    documento = db.tables["documentos"][0]
+    assert documento["url_archivo"] is None and documento["hash_contenido"] is None